@@ -0,0 +1,107 @@
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_operations import flatten_loans_table, parse_and_expand_loan_object
+from payments_src.domain.borrowers import BorrowerFactory, Borrower
+from payments_src.domain.car import Car, CarFactory
+from payments_src.domain.dealerships import Dealership, DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payments import PaymentList, PaymentListFactory
+
+# Compares the flat active-loans view as it used to be built (models hydrated, one `.apply` per field) with
+# `parse_and_expand_loan_object` (single pass over models) and `flatten_loans_table` (straight from the JSON).
+# Run from the repository root: PYTHONPATH=src python scripts/benchmark_flatten_loans.py --num_loans 10000
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--num_loans", type=int, default=10_000)
+parser.add_argument("--num_pagos", type=int, default=12)
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+
+def build_raw_loans_table(num_loans: int, num_pagos: int) -> pd.DataFrame:
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=10000,
+        tasa_interes=0.05,
+        pago_mensual=1000,
+        fecha_inicio=datetime(2025, 1, 10),
+        num_pagos=num_pagos,
+        moneda=Currency.UYU,
+    )
+    dealership = DealershipFactory.create_dealership(1, "Automotora", "AU1", "24001234")
+
+    records = []
+    for loan_id in range(1, num_loans + 1):
+        loan = LoanFactory.create_loan(
+            loan_id=loan_id,
+            loan_number=loan_id,
+            payment_list=payment_list,
+            borrower=BorrowerFactory.create_borrower(loan_id, f"Cliente {loan_id}", "099123456", ""),
+            car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+            dealership=dealership,
+            status=LoanStatus.APPROVED,
+        )
+        records.append(loan.to_json_dict())
+    return pd.DataFrame(records)
+
+
+def hydrate(raw_df: pd.DataFrame) -> pd.DataFrame:
+    loans_table_copy = raw_df.copy()
+    loans_table_copy["payment_list"] = loans_table_copy["payment_list"].apply(
+        PaymentListFactory.create_from_payment_list_record_str
+    )
+    loans_table_copy["borrower"] = loans_table_copy["borrower"].apply(BorrowerFactory.create_from_borrower_record_str)
+    loans_table_copy["car"] = loans_table_copy["car"].apply(CarFactory.create_from_car_record_str)
+    loans_table_copy["dealership"] = loans_table_copy["dealership"].apply(
+        DealershipFactory.create_from_dealership_record_str
+    )
+    return loans_table_copy
+
+
+def previous_parse_and_expand(loans_table_copy: pd.DataFrame) -> pd.DataFrame:
+    expanded_df = loans_table_copy[["loan_id", "loan_readable_code", "status"]].copy()
+    for column, model in (("borrower", Borrower), ("car", Car), ("dealership", Dealership)):
+        for field_name in model.get_fields_and_types():
+            expanded_df[field_name] = loans_table_copy[column].apply(lambda x: getattr(x, field_name))
+    for field_name in PaymentList.get_fields_and_types():
+        expanded_df[field_name] = loans_table_copy["payment_list"].apply(
+            lambda x: (
+                getattr(x, field_name).value if isinstance(getattr(x, field_name), Currency) else getattr(x, field_name)
+            )
+        )
+    return expanded_df
+
+
+def best_time(func) -> float:
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+raw_df = build_raw_loans_table(args.num_loans, args.num_pagos)
+
+hydration_time = best_time(lambda: hydrate(raw_df))
+hydrated_df = hydrate(raw_df)
+previous_time = best_time(lambda: previous_parse_and_expand(hydrated_df))
+single_pass_time = best_time(lambda: parse_and_expand_loan_object(hydrated_df))
+flatten_time = best_time(lambda: flatten_loans_table(raw_df))
+
+pd.testing.assert_frame_equal(parse_and_expand_loan_object(hydrated_df), flatten_loans_table(raw_df))
+
+print(f"{args.num_loans} loans, {args.num_pagos} payments each (best of {args.repeat})")
+print(f"model hydration:                        {hydration_time:.3f}s")
+print(
+    f"previous expand (per-field apply):      {previous_time:.3f}s (+ hydration {hydration_time + previous_time:.3f}s)"
+)
+print(
+    f"parse_and_expand_loan_object:           {single_pass_time:.3f}s (+ hydration {hydration_time + single_pass_time:.3f}s)"
+)
+print(f"flatten_loans_table (from JSON):        {flatten_time:.3f}s")
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+import uuid
+from typing import BinaryIO
+
+import pandas as pd
+from pydantic import NonNegativeInt
+
+from payments_src.db.csv_db.db_constants import CSVTable
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def stream_to_file(source: BinaryIO, destination_path: str, chunk_size: int = CHUNK_SIZE) -> tuple[str, int]:
+    """
+    Copy `source` to `destination_path` in fixed-size chunks, hashing on the way. Only one chunk is held in
+    memory at a time. Returns the sha256 hex digest and the number of bytes written.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with open(destination_path, "wb") as f:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+
+    return sha256.hexdigest(), size
+
+
+class BlobStore:
+    """
+    Content-addressed store for customer documents. Each distinct content is written once, named by its
+    sha256 under BLOBS_PATH/<first two hex chars>/<hash>, and kept alive by a reference count stored in
+    BLOB_REFCOUNTS_PATH. A blob is deleted when its last reference is released.
+    """
+
+    def __init__(
+        self,
+        blobs_path: str = CSVTable.BLOBS_PATH.value,
+        refcounts_path: str = CSVTable.BLOB_REFCOUNTS_PATH.value,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.blobs_path = blobs_path
+        self.refcounts_path = refcounts_path
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+
+    def path_for(self, file_hash: str) -> str:
+        return os.path.join(self.blobs_path, file_hash[:2], file_hash)
+
+    def exists(self, file_hash: str) -> bool:
+        return os.path.exists(self.path_for(file_hash))
+
+    def put(self, source: BinaryIO) -> tuple[str, NonNegativeInt]:
+        """
+        Stream `source` into the store and add one reference to its blob. Returns the content hash and size.
+        """
+        os.makedirs(self.blobs_path, exist_ok=True)
+        partial_path = os.path.join(self.blobs_path, f".{uuid.uuid4().hex}.part")
+        file_hash, file_size = stream_to_file(source, partial_path, self.chunk_size)
+
+        with self._lock:
+            blob_path = self.path_for(file_hash)
+            if os.path.exists(blob_path):
+                os.remove(partial_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(partial_path, blob_path)
+
+            refcounts = self._read_refcounts()
+            refcounts[file_hash] = refcounts.get(file_hash, 0) + 1
+            self._write_refcounts(refcounts)
+
+        return file_hash, file_size
+
+    def release(self, file_hash: str) -> NonNegativeInt:
+        """
+        Drop one reference to a blob, deleting it once nothing references it. Returns the remaining count.
+        """
+        with self._lock:
+            refcounts = self._read_refcounts()
+            if file_hash not in refcounts:
+                raise ValueError(f"Blob {file_hash} is not referenced")
+
+            refcounts[file_hash] -= 1
+            remaining = refcounts[file_hash]
+
+            if remaining == 0:
+                del refcounts[file_hash]
+                if os.path.exists(self.path_for(file_hash)):
+                    os.remove(self.path_for(file_hash))
+
+            self._write_refcounts(refcounts)
+
+        return remaining
+
+    def refcount(self, file_hash: str) -> NonNegativeInt:
+        with self._lock:
+            return self._read_refcounts().get(file_hash, 0)
+
+    def _read_refcounts(self) -> dict[str, int]:
+        if not os.path.exists(self.refcounts_path):
+            return {}
+
+        df = pd.read_csv(self.refcounts_path, dtype={"file_hash": str, "refcount": int})
+        return dict(zip(df["file_hash"], df["refcount"]))
+
+    def _write_refcounts(self, refcounts: dict[str, int]) -> None:
+        df = pd.DataFrame({"file_hash": list(refcounts.keys()), "refcount": list(refcounts.values())})
+        df.to_csv(self.refcounts_path, index=False)
@@ -10,3 +10,26 @@ class CSVTable(Enum):
     LOAN_PATH = os.path.join(_base_path, "loan.csv")
     PAYMENTS_PATH = os.path.join(_base_path, "payments.csv")
     CUSTOMER_FILES_PATH = os.path.join(_base_path, "customer_files")
+    FILE_GROUPS_PATH = os.path.join(_base_path, "file_groups.csv")
+    BLOBS_PATH = os.path.join(_base_path, "customer_files", "blobs")
+    BLOB_REFCOUNTS_PATH = os.path.join(_base_path, "blob_refcounts.csv")
+    THUMBNAILS_PATH = os.path.join(_base_path, "customer_files", "thumbnails")
+    LOAN_META_PATH = os.path.join(_base_path, "loan_meta.json")
+    FX_RATES_PATH = os.path.join(_base_path, "fx_rates.csv")
+    LATE_FEE_POLICY_PATH = os.path.join(_base_path, "late_fee_policy.json")
+    HOLIDAYS_PATH = os.path.join(_base_path, "holidays.csv")
+    MONTHLY_COLLECTIONS_PATH = os.path.join(_base_path, "monthly_collections.csv")
+    MONTHLY_COLLECTIONS_META_PATH = os.path.join(_base_path, "monthly_collections_meta.json")
+
+
+# version of the loan table layout; bump it whenever the stored JSON of a loan changes shape
+LOAN_TABLE_SCHEMA_VERSION = 5
+
+
+# environment variable selecting the DataFrame library behind the table layer
+TABLE_BACKEND_ENV_VAR = "PAYMENTS_TABLE_BACKEND"
+
+
+class TableBackend(Enum):
+    PANDAS = "pandas"
+    POLARS = "polars"
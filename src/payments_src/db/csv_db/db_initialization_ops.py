@@ -2,9 +2,12 @@ import pandas as pd
 
 from payments_src.domain.borrowers import Borrower
 from payments_src.domain.dealerships import Dealership
+from payments_src.domain.file_groups import FileGroup
+from payments_src.domain.fx_rates import FXRate
+from payments_src.domain.holidays import Holiday
 from payments_src.domain.loans import Loan
-from payments_src.domain.payments import Payment
 from payments_src.domain.potential_borrowers import PotentialBorrower
+from payments_src.domain.receipts import Receipt
 
 
 def initialize_customer_df() -> None:
@@ -32,8 +35,33 @@ def initialize_loan_df() -> None:
 
 
 def initialize_payments_df() -> None:
-    payments_fields = Payment.model_fields
+    # the payments table holds the receipts
+    payments_fields = Receipt.model_fields
 
     df = pd.DataFrame(columns=payments_fields.keys())
 
     return df
+
+
+def initialize_file_groups_df() -> None:
+    file_group_fields = FileGroup.model_fields
+
+    df = pd.DataFrame(columns=file_group_fields.keys())
+
+    return df
+
+
+def initialize_fx_rates_df() -> None:
+    fx_rate_fields = FXRate.model_fields
+
+    df = pd.DataFrame(columns=fx_rate_fields.keys())
+
+    return df
+
+
+def initialize_holidays_df() -> None:
+    holiday_fields = Holiday.model_fields
+
+    df = pd.DataFrame(columns=holiday_fields.keys())
+
+    return df
@@ -1,15 +1,35 @@
+import importlib.util
+import json
 import os
+from typing import Optional
 
 import pandas as pd
 
-from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_constants import LOAN_TABLE_SCHEMA_VERSION, TABLE_BACKEND_ENV_VAR, CSVTable, TableBackend
+from payments_src.db.csv_db.monthly_collections import (
+    COLLECTION_SOURCE_COLUMNS,
+    apply_monthly_collections_delta,
+    build_monthly_collections,
+    monthly_collections_delta,
+)
+from payments_src.db.csv_db.table_meta import (
+    compute_checksum,
+    is_trusted_table,
+    is_unchanged_table,
+    read_table_checksum,
+    read_table_schema_version,
+    write_table_meta,
+)
 from payments_src.domain.borrowers import Borrower, BorrowerFactory
 from payments_src.domain.car import Car, CarFactory
 from payments_src.domain.dealerships import Dealership, DealershipFactory
+from payments_src.domain.file_groups import FileGroup
+from payments_src.domain.late_fees import LateFeePolicy
 from payments_src.domain.payments import PaymentList, PaymentListFactory
 from payments_src.domain.loans import Loan
 from payments_src.domain.loans_enums import LoanStatus
-from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payment_enums import AmortizationSystem, Currency
+from payments_src.domain.receipts import Receipt
 
 
 def read_customers_table() -> pd.DataFrame:
@@ -85,7 +105,14 @@ def write_dealership_table(df: pd.DataFrame, overwrite: bool = False) -> None:
 
 
 def read_payments_table() -> pd.DataFrame:
-    df = pd.read_csv(CSVTable.PAYMENTS_PATH.value)
+    # references are kept as written ("000123", "NA"); only empty cells are missing
+    df = pd.read_csv(
+        CSVTable.PAYMENTS_PATH.value,
+        parse_dates=["date_received"],
+        dtype={"reference": str},
+        keep_default_na=False,
+        na_values=[""],
+    )
 
     return df
 
@@ -97,28 +124,142 @@ def write_payments_table(df: pd.DataFrame, overwrite: bool = False) -> None:
     df.to_csv(CSVTable.PAYMENTS_PATH.value, index=False)
 
 
+def append_payments_table(df: pd.DataFrame, new_receipt: Receipt) -> pd.DataFrame:
+    if new_receipt.receipt_id in df["receipt_id"].values:
+        raise ValueError(f"Receipt with ID {new_receipt.receipt_id} already exists")
+
+    return pd.concat([df, pd.DataFrame([new_receipt.model_dump()])], ignore_index=True)
+
+
+def extend_payments_table(df: pd.DataFrame, new_receipts: list[Receipt]) -> pd.DataFrame:
+    new_ids = [receipt.receipt_id for receipt in new_receipts]
+    if len(set(new_ids)) != len(new_ids) or df["receipt_id"].isin(new_ids).any():
+        raise ValueError("Receipt IDs must be new and unique")
+
+    return pd.concat([df, pd.DataFrame([receipt.model_dump() for receipt in new_receipts])], ignore_index=True)
+
+
+def read_file_groups_table() -> pd.DataFrame:
+    df = pd.read_csv(CSVTable.FILE_GROUPS_PATH.value, dtype={"files": str})
+
+    return df
+
+
+def write_file_groups_table(df: pd.DataFrame, overwrite: bool = False) -> None:
+    if (os.path.exists(CSVTable.FILE_GROUPS_PATH.value)) and (overwrite == False):
+        raise FileExistsError(f"File {CSVTable.FILE_GROUPS_PATH.value} already exists")
+
+    df.to_csv(CSVTable.FILE_GROUPS_PATH.value, index=False)
+
+
+def upsert_file_groups_table_record(df: pd.DataFrame, file_group: FileGroup) -> pd.DataFrame:
+    new_df = df.loc[df["file_group_id"] != file_group.file_group_id]
+
+    return pd.concat([new_df, pd.DataFrame([file_group.to_json_dict()])], ignore_index=True)
+
+
+def read_fx_rates_table() -> pd.DataFrame:
+    df = pd.read_csv(CSVTable.FX_RATES_PATH.value, parse_dates=["date"])
+
+    return df
+
+
+def write_fx_rates_table(df: pd.DataFrame, overwrite: bool = False) -> None:
+    if (os.path.exists(CSVTable.FX_RATES_PATH.value)) and (overwrite == False):
+        raise FileExistsError(f"File {CSVTable.FX_RATES_PATH.value} already exists")
+
+    df.to_csv(CSVTable.FX_RATES_PATH.value, index=False)
+
+
+def read_holidays_table() -> pd.DataFrame:
+    """
+    Holidays table, or an empty one if it has not been created (due dates then only skip weekends).
+    """
+    if not os.path.exists(CSVTable.HOLIDAYS_PATH.value):
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "nombre": pd.Series(dtype=str)})
+
+    df = pd.read_csv(CSVTable.HOLIDAYS_PATH.value, parse_dates=["date"])
+
+    return df
+
+
+def write_holidays_table(df: pd.DataFrame, overwrite: bool = False) -> None:
+    if (os.path.exists(CSVTable.HOLIDAYS_PATH.value)) and (overwrite == False):
+        raise FileExistsError(f"File {CSVTable.HOLIDAYS_PATH.value} already exists")
+
+    df.to_csv(CSVTable.HOLIDAYS_PATH.value, index=False)
+
+
+def read_late_fee_policy() -> LateFeePolicy:
+    """
+    Late fee policy saved next to the tables, or the default policy if none was saved.
+    """
+    if not os.path.exists(CSVTable.LATE_FEE_POLICY_PATH.value):
+        return LateFeePolicy()
+
+    with open(CSVTable.LATE_FEE_POLICY_PATH.value) as f:
+        return LateFeePolicy.model_validate_json(f.read())
+
+
+def write_late_fee_policy(policy: LateFeePolicy) -> None:
+    with open(CSVTable.LATE_FEE_POLICY_PATH.value, "w") as f:
+        f.write(policy.model_dump_json(indent=2))
+
+
+def get_table_version(table: CSVTable) -> int:
+    """
+    Cheap version stamp for a table file (modification time in ns, 0 if missing). Caches keyed on it are
+    invalidated whenever the table is rewritten.
+    """
+    if not os.path.exists(table.value):
+        return 0
+    return os.stat(table.value).st_mtime_ns
+
+
+def get_table_backend() -> TableBackend:
+    """
+    DataFrame library used to read the loan table, set through PAYMENTS_TABLE_BACKEND (pandas by default).
+    Polars is optional; if it is selected but not installed the pandas implementation is used.
+    """
+    backend = TableBackend(os.environ.get(TABLE_BACKEND_ENV_VAR, TableBackend.PANDAS.value).lower())
+    if backend == TableBackend.POLARS and importlib.util.find_spec("polars") is None:
+        return TableBackend.PANDAS
+    return backend
+
+
 def read_loan_table() -> pd.DataFrame:
+    if get_table_backend() == TableBackend.POLARS:
+        from payments_src.db.csv_db import db_operations_polars
+
+        return db_operations_polars.read_loan_table().to_pandas()
+
     df = pd.read_csv(CSVTable.LOAN_PATH.value)
 
     return df
 
 
-def read_active_loans_table() -> pd.DataFrame:
+def read_loans_table_by_status(status: LoanStatus) -> pd.DataFrame:
+    if get_table_backend() == TableBackend.POLARS:
+        from payments_src.db.csv_db import db_operations_polars
+
+        # the status filter is pushed down into the scan, only matching rows are materialized
+        return db_operations_polars.read_loans_table_by_status(status).to_pandas()
+
     df = read_loan_table()
-    df = df[df["status"] == LoanStatus.APPROVED.value]
+    df = df[df["status"] == status.value]
     return df
 
 
+def read_active_loans_table() -> pd.DataFrame:
+    return read_loans_table_by_status(LoanStatus.APPROVED)
+
+
 def read_potential_loans_table() -> pd.DataFrame:
-    df = read_loan_table()
-    df = df[df["status"] == LoanStatus.POTENTIAL.value]
-    return df
+    return read_loans_table_by_status(LoanStatus.POTENTIAL)
 
 
 def read_rejected_loans_table() -> pd.DataFrame:
-    df = read_loan_table()
-    df = df[df["status"] == LoanStatus.REJECTED.value]
-    return df
+    return read_loans_table_by_status(LoanStatus.REJECTED)
 
 
 def append_loan_table(df: pd.DataFrame, new_loan: Loan) -> pd.DataFrame:
@@ -144,11 +285,116 @@ def edit_loan_table_record(df: pd.DataFrame, updated_loan: Loan) -> pd.DataFrame
     return append_loan_table(new_df, updated_loan)
 
 
-def write_loan_table(df: pd.DataFrame, overwrite: bool = False) -> None:
+def get_loan_table_record(df: pd.DataFrame, loan_id: int) -> Loan:
+    rows = df[df["loan_id"] == loan_id]
+    if rows.empty:
+        raise ValueError(f"Loan with ID {loan_id} does not exist")
+
+    return Loan.from_json_dict(rows.iloc[0])
+
+
+def loan_table_rows_schema_version(df) -> int:
+    """
+    Schema version of the rows of a loan table about to be written. Rows carried over from the stored table
+    keep its version, even if the loans the caller changed were serialized from the current models, so only
+    an empty table is current unless the caller reserialized every row.
+    """
+    if len(df) == 0:
+        return LOAN_TABLE_SCHEMA_VERSION
+    return read_table_schema_version(CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value)
+
+
+def write_loan_table(
+    df: pd.DataFrame,
+    overwrite: bool = False,
+    previous_df: Optional[pd.DataFrame] = None,
+    schema_version: Optional[int] = None,
+) -> None:
+    """
+    Write the loan table and bring the monthly collections aggregate up to date. `previous_df` is the table as
+    it was read before it was changed, which callers that read, edit and write it already hold; the aggregate
+    is then updated from the loans that changed without reading the file again. `schema_version` is given by
+    callers that serialized every row from the current models (see `loan_table_rows_schema_version`).
+    """
     if (os.path.exists(CSVTable.LOAN_PATH.value)) and (overwrite == False):
         raise FileExistsError(f"File {CSVTable.LOAN_PATH.value} already exists")
+    if schema_version is None:
+        schema_version = loan_table_rows_schema_version(df)
+
+    in_sync = is_monthly_collections_table_in_sync()
+    if in_sync and previous_df is None:
+        # what the aggregate is updated from, read before the file is replaced
+        previous_df = read_monthly_collections_source()
+
+    content = df.to_csv(index=False).encode()
+    with open(CSVTable.LOAN_PATH.value, "wb") as f:
+        f.write(content)
+    write_table_meta(
+        CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value, schema_version, checksum=compute_checksum(content)
+    )
+    update_monthly_collections_table(previous_df if in_sync else None, df)
+
+
+def read_monthly_collections_source() -> pd.DataFrame:
+    return pd.read_csv(CSVTable.LOAN_PATH.value, usecols=COLLECTION_SOURCE_COLUMNS)
+
+
+def is_monthly_collections_table_in_sync() -> bool:
+    """
+    True if the monthly collections aggregate was last updated with the loan table as it is on disk, so it can
+    be updated by delta on the next write (or read as it is).
+    """
+    if not (
+        os.path.exists(CSVTable.MONTHLY_COLLECTIONS_PATH.value)
+        and os.path.exists(CSVTable.MONTHLY_COLLECTIONS_META_PATH.value)
+    ):
+        return False
+
+    with open(CSVTable.MONTHLY_COLLECTIONS_META_PATH.value) as f:
+        loan_checksum = json.load(f).get("loan_checksum")
+
+    if not os.path.exists(CSVTable.LOAN_PATH.value):
+        return loan_checksum is None
+    return loan_checksum == read_table_checksum(CSVTable.LOAN_META_PATH.value) and is_unchanged_table(
+        CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value
+    )
+
+
+def read_monthly_collections_table() -> pd.DataFrame:
+    """
+    Pending / paid / total installments per due month, currency and dealership. If the aggregate is missing or
+    out of date (the loan table was changed outside the app), it is built from the loan table instead; it is
+    only written back by the next write of the loan table, so reads never race with a write.
+    """
+    if not is_monthly_collections_table_in_sync():
+        if not os.path.exists(CSVTable.LOAN_PATH.value):
+            return build_monthly_collections(pd.DataFrame(columns=COLLECTION_SOURCE_COLUMNS))
+        return build_monthly_collections(read_monthly_collections_source())
+
+    df = pd.read_csv(CSVTable.MONTHLY_COLLECTIONS_PATH.value, dtype={"month": str, "moneda": str})
+
+    return df
+
+
+def write_monthly_collections_table(df: pd.DataFrame) -> None:
+    df.to_csv(CSVTable.MONTHLY_COLLECTIONS_PATH.value, index=False)
+    # the loan table the aggregate now matches
+    with open(CSVTable.MONTHLY_COLLECTIONS_META_PATH.value, "w") as f:
+        json.dump({"loan_checksum": read_table_checksum(CSVTable.LOAN_META_PATH.value)}, f)
 
-    df.to_csv(CSVTable.LOAN_PATH.value, index=False)
+
+def update_monthly_collections_table(previous_loans_df: Optional[pd.DataFrame], loans_df: pd.DataFrame) -> None:
+    """
+    Bring the aggregate up to date with a loan table that was just written. With the previous table, only the
+    loans that changed are counted again; without it (the aggregate was out of date) it is rebuilt.
+    """
+    if previous_loans_df is None:
+        write_monthly_collections_table(build_monthly_collections(loans_df))
+        return
+
+    delta = monthly_collections_delta(previous_loans_df, loans_df)
+    collections = pd.read_csv(CSVTable.MONTHLY_COLLECTIONS_PATH.value, dtype={"month": str, "moneda": str})
+    write_monthly_collections_table(apply_monthly_collections_delta(collections, delta))
 
 
 def read_and_expand_loans_table(filter_type: LoanStatus = LoanStatus.POTENTIAL):
@@ -161,6 +407,14 @@ def read_and_expand_loans_table(filter_type: LoanStatus = LoanStatus.POTENTIAL):
     else:
         raise ValueError(f"Invalid filter type: {filter_type}")
 
+    # a table we wrote ourselves (matching schema version and checksum) is not validated again
+    if is_trusted_table(CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value):
+        loans_table_copy["payment_list"] = loans_table_copy["payment_list"].map(PaymentListFactory.construct_from_payment_list_record_str)
+        loans_table_copy["borrower"] = loans_table_copy["borrower"].map(BorrowerFactory.construct_from_borrower_record_str)
+        loans_table_copy["car"] = loans_table_copy["car"].map(CarFactory.construct_from_car_record_str)
+        loans_table_copy["dealership"] = loans_table_copy["dealership"].map(DealershipFactory.construct_from_dealership_record_str)
+        return loans_table_copy
+
     loans_table_copy["payment_list"] = loans_table_copy["payment_list"].apply(PaymentListFactory.create_from_payment_list_record_str)
     loans_table_copy["borrower"] = loans_table_copy["borrower"].apply(BorrowerFactory.create_from_borrower_record_str)
     loans_table_copy["car"] = loans_table_copy["car"].apply(CarFactory.create_from_car_record_str)
@@ -169,25 +423,51 @@ def read_and_expand_loans_table(filter_type: LoanStatus = LoanStatus.POTENTIAL):
     return loans_table_copy
 
 
+# nested loan columns and the model whose displayable fields become columns of the flat view
+NESTED_LOAN_COLUMNS = {
+    "borrower": Borrower,
+    "car": Car,
+    "dealership": Dealership,
+    "payment_list": PaymentList,
+}
+
+
 def parse_and_expand_loan_object(loans_table_copy: pd.DataFrame) -> pd.DataFrame:
-    expanded_df = loans_table_copy[["loan_id", "loan_readable_code", "status"]]
+    """
+    Flat view of an expanded loan table (nested columns as models). Each nested column is turned into a block
+    of columns in one pass over its models, and the blocks are joined once at the end.
+    """
+    flat_columns = [loans_table_copy[["loan_id", "loan_readable_code", "status"]]]
 
-    borrower_fields = Borrower.get_fields_and_types()
-    for field_name in borrower_fields.keys():
-        expanded_df[f"{field_name}"] = loans_table_copy["borrower"].apply(lambda x: getattr(x, field_name))
-    
-    car_fields = Car.get_fields_and_types()
-    for field_name in car_fields.keys():
-        expanded_df[f"{field_name}"] = loans_table_copy["car"].apply(lambda x: getattr(x, field_name))
-    
-    dealership_fields = Dealership.get_fields_and_types()
-    for field_name in dealership_fields.keys():
-        expanded_df[f"{field_name}"] = loans_table_copy["dealership"].apply(lambda x: getattr(x, field_name))
-    
-    payment_list_fields = PaymentList.get_fields_and_types()
-    for field_name in payment_list_fields.keys():
-        expanded_df[f"{field_name}"] = loans_table_copy["payment_list"].apply(
-            lambda x: getattr(x, field_name).value if isinstance(getattr(x, field_name), Currency) else getattr(x, field_name)
+    for column, model in NESTED_LOAN_COLUMNS.items():
+        records = [nested_object.__dict__ for nested_object in loans_table_copy[column]]
+        flat_columns.append(
+            pd.DataFrame.from_records(records, columns=list(model.get_fields_and_types()), index=loans_table_copy.index)
+        )
+
+    flat_df = pd.concat(flat_columns, axis=1)
+    flat_df["moneda"] = flat_df["moneda"].map(lambda x: x.value if isinstance(x, Currency) else x)
+    flat_df["sistema_amortizacion"] = flat_df["sistema_amortizacion"].map(
+        lambda x: x.value if isinstance(x, AmortizationSystem) else x
+    )
+    return flat_df
+
+
+def flatten_loans_table(loans_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same flat view as `parse_and_expand_loan_object`, straight from a raw loan table (nested columns as JSON).
+    Each JSON column is decoded once and only the displayed keys are kept, no models are built.
+    """
+    flat_columns = [loans_df[["loan_id", "loan_readable_code", "status"]]]
+
+    for column, model in NESTED_LOAN_COLUMNS.items():
+        records = [json.loads(value) for value in loans_df[column]]
+        flat_columns.append(
+            pd.DataFrame.from_records(records, columns=list(model.get_fields_and_types()), index=loans_df.index)
         )
 
-    return expanded_df
\ No newline at end of file
+    flat_df = pd.concat(flat_columns, axis=1)
+    flat_df["fecha_inicio"] = pd.to_datetime(flat_df["fecha_inicio"])
+    # payment lists stored before amortization systems existed are flat
+    flat_df["sistema_amortizacion"] = flat_df["sistema_amortizacion"].fillna(AmortizationSystem.FLAT.value)
+    return flat_df
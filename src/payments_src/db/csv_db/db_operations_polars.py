@@ -0,0 +1,92 @@
+import os
+from typing import Optional
+
+import polars as pl
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db import db_operations
+from payments_src.db.csv_db.monthly_collections import COLLECTION_SOURCE_COLUMNS
+from payments_src.db.csv_db.table_meta import compute_checksum, write_table_meta
+from payments_src.domain.loans import Loan
+from payments_src.domain.loans_enums import LoanStatus
+
+LOAN_TABLE_SCHEMA = {
+    "loan_id": pl.Int64,
+    "loan_readable_code": pl.String,
+    "payment_list": pl.String,
+    "borrower": pl.String,
+    "car": pl.String,
+    "dealership": pl.String,
+    "status": pl.String,
+}
+
+
+def scan_loan_table() -> pl.LazyFrame:
+    """
+    Lazy scan of the loan table. Filters applied to the scan are pushed down into the (multi-threaded) CSV
+    reader, so rows that do not match are dropped while parsing instead of after loading the whole file.
+    """
+    return pl.scan_csv(CSVTable.LOAN_PATH.value, schema_overrides=LOAN_TABLE_SCHEMA)
+
+
+def read_loan_table() -> pl.DataFrame:
+    return scan_loan_table().collect()
+
+
+def read_loans_table_by_status(status: LoanStatus) -> pl.DataFrame:
+    return scan_loan_table().filter(pl.col("status") == status.value).collect()
+
+
+def append_loan_table(df: pl.DataFrame, new_loan: Loan) -> pl.DataFrame:
+    """
+    Append a new loan. The new row is added as an extra chunk, the existing rows are not copied.
+    """
+    if df.select((pl.col("loan_id") == new_loan.loan_id).any()).item():
+        raise ValueError(f"Loan with ID {new_loan.loan_id} already exists")
+
+    new_row = pl.DataFrame([new_loan.to_json_dict()], schema=LOAN_TABLE_SCHEMA)
+    return pl.concat([df, new_row], how="vertical", rechunk=False)
+
+
+def edit_loan_table_record(df: pl.DataFrame, updated_loan: Loan) -> pl.DataFrame:
+    if not df.select((pl.col("loan_id") == updated_loan.loan_id).any()).item():
+        raise ValueError(f"Loan with ID {updated_loan.loan_id} does not exist")
+
+    new_df = df.filter(pl.col("loan_id") != updated_loan.loan_id)
+    return append_loan_table(new_df, updated_loan)
+
+
+def get_loan_table_record(df: pl.DataFrame, loan_id: int) -> Loan:
+    rows = df.filter(pl.col("loan_id") == loan_id)
+    if rows.is_empty():
+        raise ValueError(f"Loan with ID {loan_id} does not exist")
+
+    return Loan.from_json_dict(rows.row(0, named=True))
+
+
+def write_loan_table(
+    df: pl.DataFrame,
+    overwrite: bool = False,
+    previous_df: Optional[pl.DataFrame] = None,
+    schema_version: Optional[int] = None,
+) -> None:
+    if (os.path.exists(CSVTable.LOAN_PATH.value)) and (overwrite == False):
+        raise FileExistsError(f"File {CSVTable.LOAN_PATH.value} already exists")
+    if schema_version is None:
+        schema_version = db_operations.loan_table_rows_schema_version(df)
+
+    # the aggregate is kept with pandas; only the columns it depends on are converted
+    previous_source_df = None
+    if db_operations.is_monthly_collections_table_in_sync():
+        if previous_df is None:
+            previous_source_df = db_operations.read_monthly_collections_source()
+        else:
+            previous_source_df = previous_df.select(COLLECTION_SOURCE_COLUMNS).to_pandas()
+
+    content = df.write_csv().encode()
+    with open(CSVTable.LOAN_PATH.value, "wb") as f:
+        f.write(content)
+    write_table_meta(
+        CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value, schema_version, checksum=compute_checksum(content)
+    )
+    db_operations.update_monthly_collections_table(previous_source_df, df.select(COLLECTION_SOURCE_COLUMNS).to_pandas())
@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Optional
+
+import pandas as pd
+from pydantic import PositiveInt
+
+from payments_src.db.csv_db.blob_store import BlobStore
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_initialization_ops import initialize_file_groups_df
+from payments_src.db.csv_db.db_operations import (
+    read_file_groups_table,
+    upsert_file_groups_table_record,
+    write_file_groups_table,
+)
+from payments_src.domain.file_groups import FileGroup, FileObject
+
+DEFAULT_FILE_GROUP_NAME = "Documentos"
+
+
+class DocumentStorage:
+    """
+    Stores customer documents in the content-addressed BlobStore on a thread pool and keeps a FileGroup per
+    borrower in the file groups table. Every FileObject holds one reference to its blob, so the same ID or
+    payslip uploaded for several borrowers is kept on disk only once, and re-uploading it for the same
+    borrower returns the existing FileObject.
+    """
+
+    def __init__(self, blob_store: Optional[BlobStore] = None, max_workers: int = 4):
+        self.blob_store = blob_store if blob_store is not None else BlobStore()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="document-storage")
+        # the index is a single CSV file, so updates to it are serialized
+        self._index_lock = threading.Lock()
+
+    def upload_files(
+        self,
+        borrower_id: PositiveInt,
+        files: list[BinaryIO],
+        file_group_name: str = DEFAULT_FILE_GROUP_NAME,
+    ) -> list[Future]:
+        return [self._executor.submit(self.store_file, borrower_id, file, file_group_name) for file in files]
+
+    def store_file(
+        self,
+        borrower_id: PositiveInt,
+        file: BinaryIO,
+        file_group_name: str = DEFAULT_FILE_GROUP_NAME,
+    ) -> FileObject:
+        file_name = os.path.basename(file.name)
+        file_hash, file_size = self.blob_store.put(file)
+
+        with self._index_lock:
+            file_groups_df = self._read_index()
+            file_group = self._get_or_create_file_group(file_groups_df, borrower_id, file_group_name)
+
+            existing_file = file_group.retrieve_file_by_hash(file_hash)
+            if existing_file is not None:
+                self.blob_store.release(file_hash)
+                return existing_file
+
+            new_file = FileObject(
+                file_name=file_hash,
+                file_readable_name=file_name,
+                file_type=os.path.splitext(file_name)[1].lstrip(".").lower(),
+                file_path=self.blob_store.path_for(file_hash),
+                added_date=datetime.now(),
+                file_group_id=file_group.file_group_id,
+                file_id=file_group.next_file_id(),
+                file_hash=file_hash,
+                file_size=file_size,
+            )
+            file_group.add_file(new_file)
+
+            file_groups_df = upsert_file_groups_table_record(file_groups_df, file_group)
+            write_file_groups_table(file_groups_df, overwrite=True)
+
+        return new_file
+
+    def remove_file(self, file_group_id: PositiveInt, file_id: PositiveInt) -> None:
+        with self._index_lock:
+            file_groups_df = self._read_index()
+            file_group_row = file_groups_df[file_groups_df["file_group_id"] == file_group_id].iloc[0]
+            file_group = FileGroup.from_json_dict(file_group_row.to_dict())
+
+            removed_file = file_group.retrieve_file_by_id(file_id)
+            file_group.remove_file(file_id)
+
+            file_groups_df = upsert_file_groups_table_record(file_groups_df, file_group)
+            write_file_groups_table(file_groups_df, overwrite=True)
+
+        if removed_file.file_hash is not None:
+            self.blob_store.release(removed_file.file_hash)
+
+    def get_file_groups(self, borrower_id: PositiveInt) -> list[FileGroup]:
+        with self._index_lock:
+            file_groups_df = self._read_index()
+
+        borrower_groups_df = file_groups_df[file_groups_df["borrower_id"] == borrower_id]
+        return [FileGroup.from_json_dict(row) for row in borrower_groups_df.to_dict(orient="records")]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _read_index() -> pd.DataFrame:
+        if not os.path.exists(CSVTable.FILE_GROUPS_PATH.value):
+            return initialize_file_groups_df()
+        return read_file_groups_table()
+
+    @staticmethod
+    def _get_or_create_file_group(
+        file_groups_df: pd.DataFrame, borrower_id: PositiveInt, file_group_name: str
+    ) -> FileGroup:
+        matches = file_groups_df[
+            (file_groups_df["borrower_id"] == borrower_id) & (file_groups_df["file_group_name"] == file_group_name)
+        ]
+        if len(matches) > 0:
+            return FileGroup.from_json_dict(matches.iloc[0].to_dict())
+
+        next_file_group_id = 1 if len(file_groups_df) == 0 else int(file_groups_df["file_group_id"].max()) + 1
+        return FileGroup(
+            file_group_id=next_file_group_id, file_group_name=file_group_name, borrower_id=borrower_id, files={}
+        )
@@ -0,0 +1,134 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import to_minor_units
+from payments_src.domain.payment_enums import PaymentStatus
+
+# one row of the aggregate per due month (`YYYY-MM`), currency and dealership
+MONTHLY_COLLECTIONS_KEYS = ["month", "moneda", "dealership_id"]
+MONTHLY_COLLECTIONS_VALUES = [
+    "pending_count",
+    "pending_minor",
+    "paid_count",
+    "paid_minor",
+    "total_count",
+    "total_minor",
+]
+MONTHLY_COLLECTIONS_COLUMNS = MONTHLY_COLLECTIONS_KEYS + MONTHLY_COLLECTIONS_VALUES
+# columns of the raw loan table the aggregate depends on
+COLLECTION_SOURCE_COLUMNS = ["loan_id", "status", "dealership", "payment_list"]
+
+
+def empty_monthly_collections() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "month": pd.Series(dtype=str),
+            "moneda": pd.Series(dtype=str),
+            "dealership_id": pd.Series(dtype=np.int64),
+            **{column: pd.Series(dtype=np.int64) for column in MONTHLY_COLLECTIONS_VALUES},
+        }
+    )
+
+
+def build_monthly_collections(loans_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pending, paid and total installments (count and minor units) of the approved loans of a raw loan table
+    (nested columns as JSON), per due month, currency and dealership. Cancelled installments are left out:
+    they were replaced by the installments of a restructuring.
+    """
+    loans_df = loans_df[loans_df["status"] == LoanStatus.APPROVED.value]
+    pending, paid = PaymentStatus.PENDING.value, PaymentStatus.PAID.value
+
+    rows = []
+    for dealership_str, payment_list_str in zip(loans_df["dealership"], loans_df["payment_list"]):
+        dealership_id = json.loads(dealership_str)["dealership_id"]
+        payment_list = json.loads(payment_list_str)
+        moneda = payment_list["moneda"]
+        for payment in payment_list["payments"].values():
+            if payment["status"] not in (pending, paid):
+                continue
+            amount_minor = payment.get("amount_minor")
+            if amount_minor is None:
+                amount_minor = to_minor_units(payment["amount"])
+            # ISO dates, with a "T" or a space before the time
+            rows.append((payment["end_date"][:7], moneda, dealership_id, payment["status"] == pending, amount_minor))
+
+    if not rows:
+        return empty_monthly_collections()
+
+    installments = pd.DataFrame(rows, columns=[*MONTHLY_COLLECTIONS_KEYS, "is_pending", "amount_minor"])
+    is_pending = installments["is_pending"]
+    installments = installments.assign(
+        is_paid=~is_pending,
+        pending_minor=installments["amount_minor"].where(is_pending, 0),
+        paid_minor=installments["amount_minor"].where(~is_pending, 0),
+    )
+    collections = (
+        installments.groupby(MONTHLY_COLLECTIONS_KEYS)
+        .agg(
+            pending_count=("is_pending", "sum"),
+            pending_minor=("pending_minor", "sum"),
+            paid_count=("is_paid", "sum"),
+            paid_minor=("paid_minor", "sum"),
+            total_count=("amount_minor", "size"),
+            total_minor=("amount_minor", "sum"),
+        )
+        .reset_index()
+    )
+    return _normalize(collections)
+
+
+def _normalize(collections: pd.DataFrame) -> pd.DataFrame:
+    collections = collections.astype({column: np.int64 for column in ["dealership_id", *MONTHLY_COLLECTIONS_VALUES]})
+    collections = collections.astype({"month": str, "moneda": str})
+    return collections.sort_values(MONTHLY_COLLECTIONS_KEYS, ignore_index=True)[MONTHLY_COLLECTIONS_COLUMNS]
+
+
+def changed_loans(previous_loans_df: pd.DataFrame, loans_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rows of the previous and of the new loan table (raw, nested columns as JSON) for the loans that were added,
+    removed, or whose status, dealership or payment list changed. Unchanged loans are found by comparing the
+    stored JSON strings, without decoding them.
+    """
+    previous = previous_loans_df[COLLECTION_SOURCE_COLUMNS].set_index("loan_id")
+    current = loans_df[COLLECTION_SOURCE_COLUMNS].set_index("loan_id")
+    loan_ids = previous.index.union(current.index)
+    previous_aligned, current_aligned = previous.reindex(loan_ids), current.reindex(loan_ids)
+
+    changed = ~(loan_ids.isin(previous.index) & loan_ids.isin(current.index))
+    for column in COLLECTION_SOURCE_COLUMNS[1:]:
+        changed |= (previous_aligned[column] != current_aligned[column]).to_numpy(dtype=bool, na_value=True)
+
+    changed_ids = loan_ids[changed]
+    return (
+        previous_loans_df[previous_loans_df["loan_id"].isin(changed_ids)],
+        loans_df[loans_df["loan_id"].isin(changed_ids)],
+    )
+
+
+def monthly_collections_delta(previous_loans_df: pd.DataFrame, loans_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    What the aggregate changes by when `previous_loans_df` becomes `loans_df`. Only the loans that changed are
+    decoded, so a write that touches one loan costs one loan.
+    """
+    previous_changed, changed = changed_loans(previous_loans_df, loans_df)
+    removed = build_monthly_collections(previous_changed).set_index(MONTHLY_COLLECTIONS_KEYS)
+    added = build_monthly_collections(changed).set_index(MONTHLY_COLLECTIONS_KEYS)
+    return added.sub(removed, fill_value=0).reset_index()
+
+
+def apply_monthly_collections_delta(collections: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    if delta.empty:
+        return collections
+
+    collections = (
+        collections.set_index(MONTHLY_COLLECTIONS_KEYS)
+        .add(delta.set_index(MONTHLY_COLLECTIONS_KEYS), fill_value=0)
+        .reset_index()
+    )
+    # a month, currency and dealership with no installments left is dropped
+    collections = collections[(collections[MONTHLY_COLLECTIONS_VALUES] != 0).any(axis=1)]
+    return _normalize(collections)
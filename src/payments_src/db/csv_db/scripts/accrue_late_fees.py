@@ -0,0 +1,54 @@
+import argparse
+from datetime import date
+
+from payments_src.db.csv_db.db_operations import (
+    read_late_fee_policy,
+    read_loan_table,
+    write_late_fee_policy,
+    write_loan_table,
+)
+from payments_src.domain.late_fees import LateFeePolicy
+from payments_src.domain.money import from_minor_units
+from payments_src.operations.payments.late_fees import accrue_late_fees
+
+parser = argparse.ArgumentParser(description="Accrue late fees on the overdue installments of the loan table")
+
+parser.add_argument("--as_of", type=date.fromisoformat, default=date.today(), help="Accrue up to this day (YYYY-MM-DD)")
+parser.add_argument("--daily_rate", type=float, default=None, help="Override the daily rate of the saved policy")
+parser.add_argument("--grace_days", type=int, default=None, help="Override the grace days of the saved policy")
+parser.add_argument("--max_days", type=int, default=None, help="Override the maximum accrual days of the saved policy")
+parser.add_argument("--max_fee_ratio", type=float, default=None, help="Override the fee cap of the saved policy")
+parser.add_argument("--save_policy", action="store_true", default=False, help="Save the policy with the overrides")
+parser.add_argument("--dry_run", action="store_true", default=False, help="Only report what would change")
+
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    overrides = {
+        field: getattr(args, field)
+        for field in ("daily_rate", "grace_days", "max_days", "max_fee_ratio")
+        if getattr(args, field) is not None
+    }
+    policy = LateFeePolicy(**{**read_late_fee_policy().model_dump(), **overrides})
+
+    loans_df = read_loan_table()
+    accrual = accrue_late_fees(loans_df, args.as_of, policy)
+
+    print(f"Policy: {policy.model_dump()}")
+    print(f"{accrual.charged_installments} installments with a late fee as of {args.as_of}")
+    for currency, fee_minor in accrual.total_fee_minor.items():
+        print(f"  {currency}: {from_minor_units(fee_minor):,.2f}")
+
+    if args.dry_run:
+        print(f"{accrual.changed_loans} of {len(loans_df)} loans would be updated")
+    else:
+        if args.save_policy:
+            write_late_fee_policy(policy)
+        # one write for the whole book
+        write_loan_table(accrual.loans_df, overwrite=True, previous_df=loans_df)
+        print(f"{accrual.changed_loans} of {len(loans_df)} loans updated")
+
+# Example usage (nightly):
+# python src/payments_src/db/csv_db/scripts/accrue_late_fees.py
+# python src/payments_src/db/csv_db/scripts/accrue_late_fees.py --as_of 2025-06-30 --dry_run
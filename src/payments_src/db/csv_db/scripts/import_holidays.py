@@ -0,0 +1,35 @@
+import argparse
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_operations import read_holidays_table, write_holidays_table
+
+parser = argparse.ArgumentParser(description="Add holidays from a CSV file to the holidays table")
+
+parser.add_argument("path", type=str, help="CSV file with one holiday per row")
+parser.add_argument("--date_column", type=str, default="date", help="Column with the dates")
+parser.add_argument("--name_column", type=str, default=None, help="Column with the names of the holidays")
+parser.add_argument("--dayfirst", action="store_true", default=False, help="Dates are written day first (DD/MM/YYYY)")
+parser.add_argument("--sep", type=str, default=",", help="Column separator of the file")
+
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    source_df = pd.read_csv(args.path, sep=args.sep)
+    new_holidays = pd.DataFrame(
+        {
+            "date": pd.to_datetime(source_df[args.date_column], dayfirst=args.dayfirst).dt.normalize(),
+            "nombre": source_df[args.name_column] if args.name_column else None,
+        }
+    )
+
+    # a day already in the table keeps its new name
+    holidays_df = pd.concat([read_holidays_table(), new_holidays], ignore_index=True)
+    holidays_df = holidays_df.drop_duplicates("date", keep="last").sort_values("date")
+    write_holidays_table(holidays_df, overwrite=True)
+
+    print(f"{len(new_holidays)} holidays read, {len(holidays_df)} in the table")
+
+# Example usage:
+# python src/payments_src/db/csv_db/scripts/import_holidays.py feriados_2026.csv --date_column fecha --name_column nombre --dayfirst
@@ -5,12 +5,18 @@ from payments_src.db.csv_db.db_constants import CSVTable
 from payments_src.db.csv_db.db_initialization_ops import (
     initialize_customer_df,
     initialize_dealership_df,
+    initialize_file_groups_df,
+    initialize_fx_rates_df,
+    initialize_holidays_df,
     initialize_loan_df,
     initialize_payments_df,
 )
 from payments_src.db.csv_db.db_operations import (
     write_customers_table,
     write_dealership_table,
+    write_file_groups_table,
+    write_fx_rates_table,
+    write_holidays_table,
     write_loan_table,
     write_payments_table,
 )
@@ -22,6 +28,9 @@ parser.add_argument("--dealership", action="store_true", help="Initialize dealer
 parser.add_argument("--loan", action="store_true", help="Initialize loan table")
 parser.add_argument("--payments", action="store_true", help="Initialize payments table")
 parser.add_argument("--customer_files", action="store_true", help="Initialize customer files table")
+parser.add_argument("--file_groups", action="store_true", help="Initialize file groups (document index) table")
+parser.add_argument("--fx_rates", action="store_true", help="Initialize FX rates table")
+parser.add_argument("--holidays", action="store_true", help="Initialize holidays table")
 parser.add_argument("--overwrite", action="store_true", default=False, help="Overwrite existing tables")
 
 args = parser.parse_args()
@@ -51,6 +60,21 @@ def initialize_tables(args: argparse.Namespace) -> None:
         write_payments_table(payments_df, args.overwrite)
         print("Payments table initialized")
 
+    if args.file_groups:
+        file_groups_df = initialize_file_groups_df()
+        write_file_groups_table(file_groups_df, args.overwrite)
+        print("File groups table initialized")
+
+    if args.fx_rates:
+        fx_rates_df = initialize_fx_rates_df()
+        write_fx_rates_table(fx_rates_df, args.overwrite)
+        print("FX rates table initialized")
+
+    if args.holidays:
+        holidays_df = initialize_holidays_df()
+        write_holidays_table(holidays_df, args.overwrite)
+        print("Holidays table initialized")
+
     if args.customer_files:
         try:
             os.makedirs(CSVTable.CUSTOMER_FILES_PATH.value, exist_ok=False)
@@ -64,7 +88,7 @@ if __name__ == "__main__":
     initialize_tables(args)
 
 # Example usage: (Initializes all tables)
-# python src/payments_src/db/csv_db/scripts/initialize_tables.py --customer --dealership --loan --payments
+# python src/payments_src/db/csv_db/scripts/initialize_tables.py --customer --dealership --loan --payments --file_groups --fx_rates --holidays
 
 # Example usage (uv): (Initializes all tables)
-# uv run python src/payments_src/db/csv_db/scripts/initialize_tables.py --customer --overwrite --dealership --loan --payments
+# uv run python src/payments_src/db/csv_db/scripts/initialize_tables.py --customer --overwrite --dealership --loan --payments --file_groups --fx_rates --holidays
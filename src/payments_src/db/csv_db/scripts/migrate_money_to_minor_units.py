@@ -0,0 +1,45 @@
+import argparse
+import json
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_constants import LOAN_TABLE_SCHEMA_VERSION
+from payments_src.db.csv_db.db_operations import read_loan_table, write_loan_table
+from payments_src.domain.payments import PaymentListFactory
+
+parser = argparse.ArgumentParser(description="Store payment amounts of the loan table as integer minor units")
+
+parser.add_argument("--dry_run", action="store_true", default=False, help="Only report what would change")
+
+args = parser.parse_args()
+
+
+def migrate_payment_list_record_str(payment_list_str: str) -> str:
+    """
+    Re-serialize a stored payment list through the model, which adds `amount_minor` to every payment and
+    rounds `amount` to it.
+    """
+    payment_list = PaymentListFactory.create_from_payment_list_record_str(payment_list_str)
+    return json.dumps(payment_list.model_dump(mode="json"), default=str)
+
+
+def migrate_loan_table(loans_df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    migrated_df = loans_df.copy()
+    migrated_df["payment_list"] = migrated_df["payment_list"].map(migrate_payment_list_record_str)
+    changed_rows = int((migrated_df["payment_list"] != loans_df["payment_list"]).sum())
+    return migrated_df, changed_rows
+
+
+if __name__ == "__main__":
+    loans_df = read_loan_table()
+    migrated_df, changed_rows = migrate_loan_table(loans_df)
+
+    if args.dry_run:
+        print(f"{changed_rows} of {len(loans_df)} loans would be migrated")
+    else:
+        # every row was reserialized through the current models, so the table is recorded with their version
+        write_loan_table(migrated_df, overwrite=True, schema_version=LOAN_TABLE_SCHEMA_VERSION)
+        print(f"{changed_rows} of {len(loans_df)} loans migrated")
+
+# Example usage:
+# python src/payments_src/db/csv_db/scripts/migrate_money_to_minor_units.py --dry_run
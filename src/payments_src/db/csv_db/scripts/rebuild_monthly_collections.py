@@ -0,0 +1,53 @@
+import argparse
+import os
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_operations import (
+    is_monthly_collections_table_in_sync,
+    read_monthly_collections_source,
+    write_monthly_collections_table,
+)
+from payments_src.db.csv_db.monthly_collections import (
+    MONTHLY_COLLECTIONS_KEYS,
+    MONTHLY_COLLECTIONS_VALUES,
+    build_monthly_collections,
+    empty_monthly_collections,
+)
+
+parser = argparse.ArgumentParser(description="Rebuild the monthly collections aggregate from the loan table")
+
+parser.add_argument(
+    "--verify", action="store_true", default=False, help="Only compare the stored aggregate with a full rebuild"
+)
+
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    rebuilt = build_monthly_collections(read_monthly_collections_source())
+
+    if os.path.exists(CSVTable.MONTHLY_COLLECTIONS_PATH.value):
+        stored = pd.read_csv(CSVTable.MONTHLY_COLLECTIONS_PATH.value, dtype={"month": str, "moneda": str})
+    else:
+        stored = empty_monthly_collections()
+
+    difference = (
+        rebuilt.set_index(MONTHLY_COLLECTIONS_KEYS)
+        .sub(stored.set_index(MONTHLY_COLLECTIONS_KEYS), fill_value=0)
+        .loc[lambda df: (df[MONTHLY_COLLECTIONS_VALUES] != 0).any(axis=1)]
+    )
+    print(f"Aggregate in sync with the loan table: {is_monthly_collections_table_in_sync()}")
+    print(f"{len(rebuilt)} rows rebuilt, {len(stored)} stored, {len(difference)} different")
+    if not difference.empty:
+        print("Rebuilt minus stored:")
+        print(difference.to_string())
+
+    if not args.verify:
+        write_monthly_collections_table(rebuilt)
+        print("Aggregate rewritten")
+
+# Example usage:
+# python src/payments_src/db/csv_db/scripts/rebuild_monthly_collections.py --verify
+# python src/payments_src/db/csv_db/scripts/rebuild_monthly_collections.py
@@ -0,0 +1,80 @@
+import argparse
+
+from payments_src.db.csv_db.db_operations import (
+    read_dealership_table,
+    read_holidays_table,
+    read_loan_table,
+    write_loan_table,
+)
+from payments_src.domain.business_calendar import BusinessCalendar
+from payments_src.domain.payment_enums import AmortizationSystem, BusinessDayConvention
+from payments_src.domain.restructuring import RestructurePolicy
+from payments_src.operations.loans.restructuring import dealership_loan_ids, restructure_loans
+
+parser = argparse.ArgumentParser(description="Restructure many active loans at once with the same policy")
+
+parser.add_argument("--dealership_code", type=str, default=None, help="Restructure the active loans of this dealership")
+parser.add_argument("--loan_ids", type=int, nargs="+", default=None, help="Restructure these loans")
+parser.add_argument("--grace_months", type=int, default=0, help="Months to push the first new installment back")
+parser.add_argument(
+    "--num_pagos", type=int, default=None, help="New number of installments (default: as many as pending)"
+)
+parser.add_argument("--tasa_interes", type=float, default=None, help="New interest rate (default: the loan's)")
+parser.add_argument(
+    "--sistema", type=str, default=None, choices=AmortizationSystem.list(), help="New amortization system"
+)
+parser.add_argument(
+    "--forgive_late_fees", action="store_true", default=False, help="Forgive late fees instead of capitalizing them"
+)
+parser.add_argument(
+    "--convention",
+    type=str,
+    default=BusinessDayConvention.MODIFIED_FOLLOWING.value,
+    choices=BusinessDayConvention.list(),
+    help="How due dates falling on weekends or holidays are moved",
+)
+parser.add_argument("--motivo", type=str, default=None, help="Reason recorded with every restructuring")
+parser.add_argument("--dry_run", action="store_true", default=False, help="Only report what would change")
+
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    loans_df = read_loan_table()
+
+    if args.dealership_code is not None:
+        dealerships_df = read_dealership_table()
+        dealership = dealerships_df[dealerships_df["dealership_code"] == args.dealership_code]
+        if dealership.empty:
+            raise SystemExit(f"Dealership {args.dealership_code} not found")
+        loan_ids = dealership_loan_ids(loans_df, int(dealership["dealership_id"].iloc[0]))
+    elif args.loan_ids is not None:
+        loan_ids = args.loan_ids
+    else:
+        raise SystemExit("Pass --dealership_code or --loan_ids")
+
+    policy = RestructurePolicy(
+        grace_months=args.grace_months,
+        num_pagos=args.num_pagos,
+        tasa_interes=args.tasa_interes,
+        sistema_amortizacion=args.sistema,
+        capitalize_late_fees=not args.forgive_late_fees,
+    )
+    calendar = BusinessCalendar(convention=BusinessDayConvention(args.convention))
+    calendar.sync_with_holidays_df(read_holidays_table())
+    result = restructure_loans(loans_df, loan_ids, policy, motivo=args.motivo, calendar=calendar)
+
+    print(f"Policy: {policy.model_dump()}")
+    for loan_id, reason in result.skipped.items():
+        print(f"  loan {loan_id} skipped: {reason}")
+
+    if args.dry_run:
+        print(f"{len(result.restructured)} of {len(loan_ids)} loans would be restructured")
+    else:
+        # one write for the whole batch
+        write_loan_table(result.loans_df, overwrite=True, previous_df=loans_df)
+        print(f"{len(result.restructured)} of {len(loan_ids)} loans restructured")
+
+# Example usage:
+# python src/payments_src/db/csv_db/scripts/restructure_loans.py --dealership_code AU1 --grace_months 1 --motivo "Mes de gracia"
+# python src/payments_src/db/csv_db/scripts/restructure_loans.py --loan_ids 12 15 --num_pagos 24 --tasa_interes 0.03 --dry_run
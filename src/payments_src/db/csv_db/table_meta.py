@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+from payments_src.db.csv_db.db_constants import LOAN_TABLE_SCHEMA_VERSION
+
+# (path, mtime_ns, size) of table files whose checksum already matched their meta file
+_verified_files: set[tuple[str, int, int]] = set()
+
+
+def compute_checksum(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def compute_file_checksum(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def write_table_meta(
+    table_path: str,
+    meta_path: str,
+    schema_version: int = LOAN_TABLE_SCHEMA_VERSION,
+    checksum: Optional[str] = None,
+) -> None:
+    """
+    Record the schema version of the rows of a table the app just wrote and its checksum, next to it. Writers
+    that hashed the content they wrote pass its `checksum`, so the file is not read back.
+    """
+    if checksum is None:
+        checksum = compute_file_checksum(table_path)
+    meta = {"schema_version": schema_version, "checksum": checksum}
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    # the checksum was just computed from the file itself, no need to hash it again to trust it
+    stat = os.stat(table_path)
+    _verified_files.add((table_path, stat.st_mtime_ns, stat.st_size))
+
+
+def read_table_schema_version(table_path: str, meta_path: str) -> int:
+    """
+    Schema version recorded for the rows of a table: 0 if the table was never written by the app (its rows
+    may have any older layout) and the current version if there is no table yet.
+    """
+    if not os.path.exists(meta_path):
+        return 0 if os.path.exists(table_path) else LOAN_TABLE_SCHEMA_VERSION
+    with open(meta_path) as f:
+        return json.load(f).get("schema_version", 0)
+
+
+def read_table_checksum(meta_path: str) -> Optional[str]:
+    """
+    Checksum recorded the last time the app wrote the table, or None if there is no meta file.
+    """
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f).get("checksum")
+
+
+def is_trusted_table(table_path: str, meta_path: str, schema_version: int = LOAN_TABLE_SCHEMA_VERSION) -> bool:
+    """
+    True if the table file is exactly what the app last wrote and all its rows have the current schema
+    version, so its records can be loaded without validation. Any edit made outside the app changes the
+    checksum.
+    """
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        if json.load(f).get("schema_version") != schema_version:
+            return False
+
+    return is_unchanged_table(table_path, meta_path)
+
+
+def is_unchanged_table(table_path: str, meta_path: str) -> bool:
+    """
+    True if the table file is exactly what the app last wrote, whatever the schema version of its rows.
+    """
+    if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+        return False
+
+    stat = os.stat(table_path)
+    file_key = (table_path, stat.st_mtime_ns, stat.st_size)
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    if file_key in _verified_files:
+        return True
+
+    if meta.get("checksum") != compute_file_checksum(table_path):
+        return False
+
+    _verified_files.add(file_key)
+    return True
@@ -0,0 +1,87 @@
+import os
+import threading
+from typing import Optional
+
+from PIL import Image
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.domain.file_groups import FileObject
+
+IMAGE_FILE_TYPES = {"jpg", "jpeg", "png"}
+PDF_FILE_TYPES = {"pdf"}
+
+
+def _render_pdf_first_page(pdf_path: str) -> Optional[Image.Image]:
+    try:
+        import pypdfium2
+    except ImportError:
+        return None
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return pdf[0].render(scale=1).to_pil()
+    finally:
+        pdf.close()
+
+
+class ThumbnailCache:
+    """
+    Lazily generated previews for stored documents, keyed by content hash and size so that a blob shared by
+    several borrowers is rendered once. The cache directory is kept under `max_bytes` by evicting the least
+    recently used previews. PDF previews need the optional `pypdfium2` package; without it PDFs get no preview.
+    """
+
+    def __init__(
+        self,
+        cache_path: str = CSVTable.THUMBNAILS_PATH.value,
+        max_bytes: int = 64 * 1024 * 1024,
+        thumbnail_size: tuple[int, int] = (256, 256),
+    ):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self._lock = threading.Lock()
+
+    def get_thumbnail(self, file: FileObject) -> Optional[str]:
+        if file.file_hash is None or file.file_type not in IMAGE_FILE_TYPES | PDF_FILE_TYPES:
+            return None
+
+        width, height = self.thumbnail_size
+        thumbnail_path = os.path.join(self.cache_path, f"{file.file_hash}_{width}x{height}.png")
+
+        with self._lock:
+            if os.path.exists(thumbnail_path):
+                # bump the access time used for LRU eviction
+                os.utime(thumbnail_path)
+                return thumbnail_path
+
+            image = self._load_preview_image(file)
+            if image is None:
+                return None
+
+            image.thumbnail(self.thumbnail_size)
+            os.makedirs(self.cache_path, exist_ok=True)
+            image.save(thumbnail_path, format="PNG")
+            self._evict(keep=thumbnail_path)
+
+        return thumbnail_path
+
+    @staticmethod
+    def _load_preview_image(file: FileObject) -> Optional[Image.Image]:
+        if file.file_type in PDF_FILE_TYPES:
+            return _render_pdf_first_page(file.file_path)
+
+        with Image.open(file.file_path) as image:
+            return image.convert("RGB")
+
+    def _evict(self, keep: str) -> None:
+        entries = [entry for entry in os.scandir(self.cache_path) if entry.is_file()]
+        total_bytes = sum(entry.stat().st_size for entry in entries)
+
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if total_bytes <= self.max_bytes:
+                break
+            if os.path.samefile(entry.path, keep):
+                continue
+            total_bytes -= entry.stat().st_size
+            os.remove(entry.path)
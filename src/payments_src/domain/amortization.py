@@ -0,0 +1,96 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from payments_src.domain.payment_enums import AmortizationSystem
+
+
+class AmortizationSchedules(NamedTuple):
+    """
+    Schedules of several loans as (loans, periods) arrays of minor units. Loans with fewer payments than the
+    longest one have zeros in their trailing periods; `balance_minor` is the balance left after each payment.
+    """
+
+    installment_minor: np.ndarray
+    principal_minor: np.ndarray
+    interest_minor: np.ndarray
+    balance_minor: np.ndarray
+    num_payments: np.ndarray
+
+
+def _round_half_up(values: np.ndarray) -> np.ndarray:
+    return np.floor(values + 0.5).astype(np.int64)
+
+
+def annuity_factor(interest_rates: np.ndarray, num_payments: np.ndarray) -> np.ndarray:
+    """
+    Installment per unit of principal of a French loan; 1 / n when the rate is zero.
+    """
+    interest_rates = np.asarray(interest_rates, dtype=np.float64)
+    num_payments = np.asarray(num_payments, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = interest_rates / (1 - (1 + interest_rates) ** -num_payments)
+    return np.where(interest_rates > 0, factor, 1 / num_payments)
+
+
+def build_schedules(
+    principals_minor: np.ndarray,
+    interest_rates: np.ndarray,
+    num_payments: np.ndarray,
+    system: AmortizationSystem,
+) -> AmortizationSchedules:
+    """
+    Amortization schedules of many loans at once. Every amount is rounded to minor units as it is produced,
+    interest on the rounded balance, and the last payment repays whatever balance is left, so principals
+    always add up to the amount loaned. The loop runs over periods only; each step works on all loans.
+    """
+    principals_minor, interest_rates, num_payments = np.broadcast_arrays(
+        np.asarray(principals_minor, dtype=np.int64),
+        np.asarray(interest_rates, dtype=np.float64),
+        np.asarray(num_payments, dtype=np.int64),
+    )
+    principals_minor, interest_rates, num_payments = (
+        np.atleast_1d(principals_minor),
+        np.atleast_1d(interest_rates),
+        np.atleast_1d(num_payments),
+    )
+    if (num_payments <= 0).any():
+        raise ValueError("num_payments must be positive")
+    if (principals_minor < 0).any() or (interest_rates < 0).any():
+        raise ValueError("principals and interest rates must not be negative")
+
+    num_loans, num_periods = len(principals_minor), int(num_payments.max())
+    installment_minor = np.zeros((num_loans, num_periods), dtype=np.int64)
+    principal_minor = np.zeros((num_loans, num_periods), dtype=np.int64)
+    interest_minor = np.zeros((num_loans, num_periods), dtype=np.int64)
+    balance_minor = np.zeros((num_loans, num_periods), dtype=np.int64)
+
+    even_principal = _round_half_up(principals_minor / num_payments)
+    flat_interest = _round_half_up(principals_minor * interest_rates)
+    french_installment = _round_half_up(principals_minor * annuity_factor(interest_rates, num_payments))
+
+    balance = principals_minor.copy()
+    for period in range(num_periods):
+        active = period < num_payments
+
+        if system == AmortizationSystem.FLAT:
+            interest = flat_interest
+        else:
+            interest = _round_half_up(balance * interest_rates)
+
+        if system == AmortizationSystem.FRENCH:
+            principal = np.maximum(french_installment - interest, 0)
+        else:
+            principal = even_principal
+
+        principal = np.where(period == num_payments - 1, balance, np.minimum(principal, balance))
+        principal = np.where(active, principal, 0)
+        interest = np.where(active, interest, 0)
+        balance = balance - principal
+
+        principal_minor[:, period] = principal
+        interest_minor[:, period] = interest
+        installment_minor[:, period] = principal + interest
+        balance_minor[:, period] = balance
+
+    return AmortizationSchedules(installment_minor, principal_minor, interest_minor, balance_minor, num_payments)
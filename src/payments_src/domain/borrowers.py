@@ -4,6 +4,8 @@ from typing import Optional
 import pandas as pd
 from pydantic import BaseModel, ConfigDict, PositiveInt
 
+from payments_src.domain.trusted_construction import construct_trusted
+
 
 class Borrower(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
@@ -66,3 +68,10 @@ class BorrowerFactory:
             notas=borrower_record_dict["notas"],
             path_to_files=borrower_record_dict["path_to_files"],
         )
+
+    @staticmethod
+    def construct_from_borrower_record_str(borrower_record_str: str) -> Borrower:
+        """
+        Build a Borrower without validation, for records read from a table written by the app.
+        """
+        return construct_trusted(Borrower, json.loads(borrower_record_str))
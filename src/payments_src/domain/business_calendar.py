@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from payments_src.domain.payment_enums import BusinessDayConvention
+
+# Monday to Friday
+DEFAULT_WEEKMASK = "1111100"
+# years of business days precomputed on each side of today
+PRECOMPUTED_YEARS = 10
+# margin kept around the looked up days, so the business day they roll to is always in the table
+_PADDING_DAYS = 31
+
+
+class _BusinessDayTable(NamedTuple):
+    start: np.datetime64
+    is_business_day: np.ndarray
+    # position (days from `start`) of the first business day on or after / on or before each day
+    following: np.ndarray
+    preceding: np.ndarray
+
+
+def _to_days(values) -> np.ndarray:
+    return np.asarray(values, dtype="datetime64[D]")
+
+
+def monthly_due_days(fechas_inicio, num_pagos: int) -> np.ndarray:
+    """
+    Unadjusted due days of `num_pagos` monthly installments for each start date, as a (loans, num_pagos)
+    datetime64[D] array. Like `relativedelta(months=i)`, a day past the end of a month is moved to its last day.
+    """
+    starts = _to_days(fechas_inicio).reshape(-1)
+    start_months = starts.astype("datetime64[M]")
+    day_of_month = (starts - start_months.astype("datetime64[D]")).astype(np.int64)[:, None]
+
+    months = start_months[:, None] + np.arange(num_pagos)
+    month_days = months.astype("datetime64[D]")
+    month_lengths = ((months + 1).astype("datetime64[D]") - month_days).astype(np.int64)
+    return month_days + np.minimum(day_of_month, month_lengths - 1)
+
+
+class BusinessCalendar:
+    """
+    Business days (the weekmask days minus the holidays) and the conventions to roll due dates onto them. The
+    next and previous business day of every day in a range around today are precomputed, so rolling a whole
+    array of dates is a couple of array lookups; the range is extended if a date falls outside it.
+    """
+
+    def __init__(
+        self,
+        convention: BusinessDayConvention = BusinessDayConvention.MODIFIED_FOLLOWING,
+        weekmask: str = DEFAULT_WEEKMASK,
+    ):
+        self.convention = BusinessDayConvention(convention)
+        self._weekmask = weekmask
+        self._holidays = np.array([], dtype="datetime64[D]")
+        today = np.datetime64(date.today(), "D")
+        self._table = self._build_table(today - 366 * PRECOMPUTED_YEARS, today + 366 * PRECOMPUTED_YEARS)
+        # data version of the holidays table this calendar was last synced with
+        self.version = 0
+
+    def sync_with_holidays_df(self, holidays_df: pd.DataFrame) -> None:
+        self._holidays = np.unique(pd.to_datetime(holidays_df["date"]).to_numpy(dtype="datetime64[D]"))
+        table = self._table
+        self._table = self._build_table(table.start, table.start + len(table.is_business_day) - 1)
+
+    def _build_table(self, start: np.datetime64, end: np.datetime64) -> _BusinessDayTable:
+        days = np.arange(start, end + 1, dtype="datetime64[D]")
+        is_business_day = np.is_busday(days, weekmask=self._weekmask, holidays=self._holidays)
+        positions = np.arange(len(days))
+        following = np.minimum.accumulate(np.where(is_business_day, positions, len(days))[::-1])[::-1]
+        preceding = np.maximum.accumulate(np.where(is_business_day, positions, -1))
+        return _BusinessDayTable(start, is_business_day, following, preceding)
+
+    def _table_covering(self, days: np.ndarray) -> _BusinessDayTable:
+        table = self._table
+        end = table.start + len(table.is_business_day) - 1
+        first, last = days.min() - _PADDING_DAYS, days.max() + _PADDING_DAYS
+        if first < table.start or last > end:
+            # replaced in one assignment, so a lookup running on another thread keeps a consistent table
+            table = self._table = self._build_table(min(first, table.start), max(last, end))
+        return table
+
+    def is_business_day(self, days) -> np.ndarray:
+        days = _to_days(days)
+        if days.size == 0:
+            return np.zeros(days.shape, dtype=bool)
+        table = self._table_covering(days)
+        return table.is_business_day[(days - table.start).astype(np.int64)]
+
+    def adjust(self, days, convention: Optional[BusinessDayConvention] = None) -> np.ndarray:
+        """
+        Roll an array of days (any shape) onto business days with `convention`, or the calendar's own one.
+        """
+        convention = BusinessDayConvention(convention or self.convention)
+        days = _to_days(days)
+        if convention == BusinessDayConvention.UNADJUSTED or days.size == 0:
+            return days
+
+        table = self._table_covering(days)
+        positions = (days - table.start).astype(np.int64)
+        preceding = table.start + table.preceding[positions]
+        if convention == BusinessDayConvention.PRECEDING:
+            return preceding
+
+        following = table.start + table.following[positions]
+        if convention == BusinessDayConvention.MODIFIED_FOLLOWING:
+            next_month = following.astype("datetime64[M]") != days.astype("datetime64[M]")
+            following = np.where(next_month, preceding, following)
+        return following
+
+    def schedule_due_days(
+        self, fechas_inicio, num_pagos: int, convention: Optional[BusinessDayConvention] = None
+    ) -> np.ndarray:
+        """
+        Due days of `num_pagos` monthly installments for each start date, rolled onto business days, as a
+        (loans, num_pagos) datetime64[D] array. Every month is counted from the start date, not from the
+        previous rolled due day, so the schedule does not drift.
+        """
+        return self.adjust(monthly_due_days(fechas_inicio, num_pagos), convention)
+
+    def due_dates(self, fecha_inicio: date | datetime, num_pagos: int) -> list[datetime]:
+        """
+        Due dates of one schedule as datetimes, with the time of day of `fecha_inicio`.
+        """
+        if isinstance(fecha_inicio, datetime):
+            time_of_day = fecha_inicio - datetime.combine(fecha_inicio.date(), datetime.min.time())
+        else:
+            time_of_day = timedelta(0)
+        days = self.schedule_due_days([fecha_inicio], num_pagos)[0]
+        return [datetime.combine(day, datetime.min.time()) + time_of_day for day in days.tolist()]
+
+
+def monthly_due_dates(
+    fecha_inicio: date | datetime, num_pagos: int, calendar: Optional[BusinessCalendar] = None
+) -> list[datetime]:
+    """
+    Due dates of `num_pagos` monthly installments from `fecha_inicio`, rolled onto business days if a calendar
+    is given.
+    """
+    if calendar is None:
+        return [fecha_inicio + relativedelta(months=i) for i in range(num_pagos)]
+    return calendar.due_dates(fecha_inicio, num_pagos)
@@ -2,6 +2,8 @@ import json
 
 from pydantic import BaseModel, PositiveInt
 
+from payments_src.domain.trusted_construction import construct_trusted
+
 
 class Car(BaseModel):
     borrower_id: PositiveInt
@@ -29,4 +31,11 @@ class CarFactory:
             borrower_id=car_record_dict["borrower_id"],
             marca_auto=car_record_dict["marca_auto"],
             modelo_auto=car_record_dict["modelo_auto"],
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def construct_from_car_record_str(car_record_str: str) -> Car:
+        """
+        Build a Car without validation, for records read from a table written by the app.
+        """
+        return construct_trusted(Car, json.loads(car_record_str))
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class DealershipSortKey(Enum):
+    PRESTAMOS = "prestamos"
+    MONTO_PRESTADO = "monto_prestado"
+    TASA_COBRANZA = "tasa_cobranza"
+    TASA_MOROSIDAD = "tasa_morosidad"
+    PLAZO_PROMEDIO = "plazo_promedio"
@@ -2,6 +2,8 @@ import json
 
 from pydantic import BaseModel, ConfigDict, PositiveInt
 
+from payments_src.domain.trusted_construction import construct_trusted
+
 
 class Dealership(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
@@ -46,4 +48,11 @@ class DealershipFactory:
             name=dealership_record_dict["name"],
             dealership_code=dealership_record_dict["dealership_code"],
             dealership_phone_number=dealership_record_dict["dealership_phone_number"],
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def construct_from_dealership_record_str(dealership_record_str: str) -> Dealership:
+        """
+        Build a Dealership without validation, for records read from a table written by the app.
+        """
+        return construct_trusted(Dealership, json.loads(dealership_record_str))
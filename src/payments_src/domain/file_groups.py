@@ -1,7 +1,8 @@
-import os
+import json
 from datetime import datetime
+from typing import Optional
 
-from pydantic import BaseModel, PositiveInt
+from pydantic import BaseModel, NonNegativeInt, PositiveInt
 
 
 class FileObject(BaseModel):
@@ -12,6 +13,8 @@ class FileObject(BaseModel):
     added_date: datetime
     file_group_id: PositiveInt
     file_id: PositiveInt
+    file_hash: Optional[str] = None
+    file_size: Optional[NonNegativeInt] = None
 
 
 class FileGroup(BaseModel):
@@ -28,3 +31,32 @@ class FileGroup(BaseModel):
 
     def retrieve_file_by_id(self, file_id: PositiveInt) -> FileObject:
         return self.files[file_id]
+
+    def retrieve_file_by_hash(self, file_hash: str) -> Optional[FileObject]:
+        for file in self.files.values():
+            if file.file_hash == file_hash:
+                return file
+        return None
+
+    def next_file_id(self) -> PositiveInt:
+        return max(self.files.keys(), default=0) + 1
+
+    def to_json_dict(self) -> dict:
+        """
+        Convert the FileGroup to a dictionary with the files serialized as a JSON string, for CSV storage.
+        """
+        return {
+            "file_group_id": self.file_group_id,
+            "file_group_name": self.file_group_name,
+            "borrower_id": self.borrower_id,
+            "files": json.dumps({file_id: file.model_dump(mode="json") for file_id, file in self.files.items()}),
+        }
+
+    @classmethod
+    def from_json_dict(cls, data: dict) -> "FileGroup":
+        return cls(
+            file_group_id=data["file_group_id"],
+            file_group_name=data["file_group_name"],
+            borrower_id=data["borrower_id"],
+            files=json.loads(data["files"]),
+        )
@@ -0,0 +1,15 @@
+from datetime import date
+
+from pydantic import BaseModel, ConfigDict, PositiveFloat
+
+from payments_src.domain.payment_enums import Currency
+
+# rates are quoted as units of the base currency for one unit of `currency`
+FX_BASE_CURRENCY = Currency.UYU
+
+
+class FXRate(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    date: date
+    currency: Currency
+    rate: PositiveFloat
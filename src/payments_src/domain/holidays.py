@@ -0,0 +1,10 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Holiday(BaseModel):
+    # a day with no business: due dates falling on it are moved
+    date: date
+    nombre: Optional[str] = None
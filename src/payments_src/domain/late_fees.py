@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel, NonNegativeFloat, NonNegativeInt, PositiveInt
+
+
+class LateFeePolicy(BaseModel):
+    # share of the installment charged for every day late after the grace days (0.001 is 0.1% a day)
+    daily_rate: NonNegativeFloat = 0.001
+    # days after the due date with no fee
+    grace_days: NonNegativeInt = 5
+    # caps: days of accrual, and fee as a share of the installment; None means no cap
+    max_days: Optional[PositiveInt] = None
+    max_fee_ratio: Optional[NonNegativeFloat] = 0.2
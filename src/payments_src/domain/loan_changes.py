@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, NonNegativeFloat, PositiveInt
+
+from payments_src.domain.loans import Loan
+from payments_src.domain.payment_enums import PaymentStatus
+
+
+class PaymentChange(BaseModel):
+    """
+    Edit of one installment of a loan; only the fields that are set are changed. It is saved as a change, not
+    as the whole loan, so it is applied to the loan as it is stored when it is written and edits saved in the
+    meantime are kept.
+    """
+
+    model_config = ConfigDict(use_enum_values=True)
+    payment_id: PositiveInt
+    status: Optional[PaymentStatus] = None
+    amount: Optional[NonNegativeFloat] = None
+    end_date: Optional[datetime] = None
+    date_paid: Optional[datetime] = None
+
+    def apply(self, loan: Loan) -> None:
+        payment = loan.payment_list.payments.get(self.payment_id)
+        if payment is None:
+            raise ValueError(f"Loan {loan.loan_id} has no installment {self.payment_id}")
+
+        current_status = PaymentStatus(payment.status)
+        if current_status == PaymentStatus.CANCELLED:
+            raise ValueError(f"Installment {self.payment_id} of loan {loan.loan_id} was cancelled by a restructuring")
+        if self.status == PaymentStatus.PAID.value and current_status != PaymentStatus.PENDING:
+            raise ValueError(f"Installment {self.payment_id} of loan {loan.loan_id} is already paid")
+
+        if self.status is not None:
+            payment.change_status(PaymentStatus(self.status))
+        if self.amount is not None:
+            payment.change_amount(self.amount)
+        if self.end_date is not None:
+            payment.change_end_date(self.end_date)
+        if self.date_paid is not None:
+            payment.change_date_paid(self.date_paid)
@@ -4,10 +4,11 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, PositiveInt
 
 from payments_src.domain.borrowers import Borrower, BorrowerFactory
-from payments_src.domain.car import Car
+from payments_src.domain.car import Car, CarFactory
 from payments_src.domain.dealerships import Dealership, DealershipFactory
 from payments_src.domain.loans_enums import LoanConstants, LoanStatus
 from payments_src.domain.payments import PaymentList, PaymentListFactory
+from payments_src.domain.trusted_construction import construct_trusted
 
 
 class Loan(BaseModel):
@@ -55,6 +56,24 @@ class Loan(BaseModel):
             status=data["status"],
         )
 
+    @classmethod
+    def construct_from_json_dict(cls, data: dict) -> "Loan":
+        """
+        Same as `from_json_dict` without validation, for rows of a loan table written by the app.
+        """
+        return construct_trusted(
+            cls,
+            {
+                "loan_id": int(data["loan_id"]),
+                "loan_readable_code": data["loan_readable_code"],
+                "payment_list": PaymentListFactory.construct_from_payment_list_record_str(data["payment_list"]),
+                "borrower": BorrowerFactory.construct_from_borrower_record_str(data["borrower"]),
+                "car": CarFactory.construct_from_car_record_str(data["car"]),
+                "dealership": DealershipFactory.construct_from_dealership_record_str(data["dealership"]),
+                "status": data["status"],
+            },
+        )
+
     def approve_loan(self) -> None:
         self.status = LoanStatus.APPROVED.value
 
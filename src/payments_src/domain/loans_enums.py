@@ -9,3 +9,11 @@ class LoanStatus(Enum):
     POTENTIAL = "Pendiente de Aprobación"
     REJECTED = "Rechazado"
     APPROVED = "Aprobado"
+
+
+class LoanSortKey(Enum):
+    LOAN_ID = "loan_id"
+    LOAN_READABLE_CODE = "loan_readable_code"
+    NOMBRE_CLIENTE = "nombre_cliente"
+    FECHA_INICIO = "fecha_inicio"
+    DINERO_TOTAL_PRESTADO = "dinero_total_prestado"
@@ -0,0 +1,61 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from payments_src.domain.payment_enums import Currency
+
+# every supported currency (USD, UYU, EUR) has two decimal places
+MINOR_UNIT_DIGITS = 2
+MINOR_UNITS_PER_MAJOR = 10**MINOR_UNIT_DIGITS
+
+
+def to_minor_units(amount: float) -> int:
+    """
+    Amount in minor units (cents), rounding half away from zero on the decimal representation so that e.g.
+    1.005 becomes 101 and not 100.
+    """
+    return int((Decimal(str(amount)) * MINOR_UNITS_PER_MAJOR).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(amount_minor: int) -> float:
+    return amount_minor / MINOR_UNITS_PER_MAJOR
+
+
+def to_minor_units_array(amounts: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `to_minor_units` for amounts that already have at most two decimals (as stored by the app).
+    """
+    scaled = np.asarray(amounts, dtype=np.float64) * MINOR_UNITS_PER_MAJOR
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+class Money(BaseModel):
+    """
+    Exact amount of money: an integer number of minor units in a currency. Sums of Money are integer sums,
+    so collection totals do not drift the way float sums do.
+    """
+
+    model_config = ConfigDict(frozen=True)
+    amount_minor: int
+    currency: Currency
+
+    @classmethod
+    def from_amount(cls, amount: float, currency: Currency) -> "Money":
+        return cls(amount_minor=to_minor_units(amount), currency=currency)
+
+    @classmethod
+    def sum(cls, amounts_minor: np.ndarray | list[int], currency: Currency) -> "Money":
+        return cls(amount_minor=int(np.sum(np.asarray(amounts_minor, dtype=np.int64))), currency=currency)
+
+    @property
+    def amount(self) -> float:
+        return from_minor_units(self.amount_minor)
+
+    def __add__(self, other: "Money") -> "Money":
+        if self.currency != other.currency:
+            raise ValueError(f"Cannot add {self.currency.value} and {other.currency.value}")
+        return Money(amount_minor=self.amount_minor + other.amount_minor, currency=self.currency)
+
+    def __str__(self) -> str:
+        return f"{self.currency.value} {self.amount:,.2f}"
@@ -7,6 +7,25 @@ class PaymentStatus(Enum):
     CANCELLED = "cancelado"
 
 
+class AllocationComponent(Enum):
+    # in the order a receipt pays an installment
+    FEE = "recargo"
+    INTEREST = "interes"
+    PRINCIPAL = "capital"
+    # part of a receipt left over once every installment of the loan is paid
+    CREDIT = "saldo_a_favor"
+
+
+class MatchEvidence(Enum):
+    # what ties a bank transaction to an installment
+    LOAN_CODE = "codigo"
+    PHONE = "telefono"
+    NAME = "nombre"
+    AMOUNT = "monto"
+    AMOUNT_WITHOUT_FEE = "monto_sin_recargo"
+    DUE_DATE = "vencimiento"
+
+
 class Currency(Enum):
     USD = "USD"
     UYU = "UYU"
@@ -15,3 +34,30 @@ class Currency(Enum):
     @classmethod
     def list(cls):
         return [currency.value for currency in cls]
+
+
+class AmortizationSystem(Enum):
+    # same interest every month on the original amount, as computed by the monthly payment calculator
+    FLAT = "directo"
+    # constant installment, interest on the remaining balance
+    FRENCH = "frances"
+    # constant principal repayment, interest on the remaining balance
+    GERMAN = "aleman"
+
+    @classmethod
+    def list(cls):
+        return [system.value for system in cls]
+
+
+class BusinessDayConvention(Enum):
+    # how a due date that falls on a weekend or holiday is moved
+    UNADJUSTED = "sin_ajuste"
+    # next business day
+    FOLLOWING = "siguiente"
+    # next business day, unless it is in the next month: then the previous one
+    MODIFIED_FOLLOWING = "siguiente_modificado"
+    PRECEDING = "anterior"
+
+    @classmethod
+    def list(cls):
+        return [convention.value for convention in cls]
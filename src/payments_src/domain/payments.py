@@ -2,10 +2,23 @@ import json
 from datetime import datetime
 from typing import Optional
 
-from dateutil.relativedelta import relativedelta
-from pydantic import BaseModel, ConfigDict, NonNegativeFloat, PositiveInt, PositiveFloat
+import numpy as np
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    model_validator,
+)
 
-from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.domain.amortization import build_schedules
+from payments_src.domain.business_calendar import BusinessCalendar, monthly_due_dates
+from payments_src.domain.money import Money, from_minor_units, to_minor_units
+from payments_src.domain.payment_enums import AmortizationSystem, Currency, PaymentStatus
+from payments_src.domain.restructuring import Restructuring
+from payments_src.domain.trusted_construction import construct_trusted
 
 
 class Payment(BaseModel):
@@ -15,12 +28,38 @@ class Payment(BaseModel):
     end_date: datetime
     status: PaymentStatus
     date_paid: Optional[datetime] = None
+    # exact amount in minor units (cents); `amount` is always amount_minor / 100
+    amount_minor: NonNegativeInt = 0
+    # principal / interest split of the installment in minor units, when the loan has an amortization schedule
+    principal_minor: Optional[NonNegativeInt] = None
+    interest_minor: Optional[NonNegativeInt] = None
+    # late fee accrued on the installment by the late fee batch, in minor units
+    late_fee_minor: NonNegativeInt = 0
+    # the installment was paid by the recorded receipts (see operations.payments.allocation), not marked by hand
+    paid_by_receipts: bool = False
+
+    @model_validator(mode="before")
+    @classmethod
+    def _sync_amount_minor(cls, data):
+        if not isinstance(data, dict):
+            return data
+
+        data = dict(data)
+        try:
+            if data.get("amount_minor") is None:
+                data["amount_minor"] = to_minor_units(data["amount"])
+            data["amount"] = from_minor_units(data["amount_minor"])
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            # leave the fields as given so field validation reports the problem
+            pass
+        return data
 
     def change_status(self, status: PaymentStatus) -> None:
         self.status = status
 
     def change_amount(self, amount: NonNegativeFloat) -> None:
-        self.amount = amount
+        self.amount_minor = to_minor_units(amount)
+        self.amount = from_minor_units(self.amount_minor)
 
     def change_end_date(self, end_date: datetime) -> None:
         self.end_date = end_date
@@ -29,6 +68,11 @@ class Payment(BaseModel):
         self.date_paid = date_paid
 
 
+def _status_value(status: PaymentStatus | str) -> str:
+    # statuses are stored as values, but change_status may have been given the enum member
+    return status.value if isinstance(status, PaymentStatus) else status
+
+
 class PaymentList(BaseModel):
     fecha_inicio: datetime
     pago_mensual: PositiveFloat
@@ -36,7 +80,10 @@ class PaymentList(BaseModel):
     dinero_total_prestado: PositiveFloat
     tasa_interes: PositiveFloat
     moneda: Currency
+    sistema_amortizacion: AmortizationSystem = AmortizationSystem.FLAT
     payments: dict[PositiveInt, Payment]
+    # changes of terms, oldest first; tasa_interes, pago_mensual and sistema_amortizacion are the current terms
+    restructurings: list[Restructuring] = []
     
     @classmethod
     def model_validate(cls, value):
@@ -55,24 +102,162 @@ class PaymentList(BaseModel):
     def retrieve_payment_by_id(self, payment_id: PositiveInt) -> Payment:
         return self.payments[payment_id]
 
+    def calculate_total_money(self, status: Optional[PaymentStatus] = None) -> Money:
+        """
+        Exact total of the payments (optionally only those with `status`), as an integer sum of minor units.
+        """
+        amounts_minor = [
+            payment.amount_minor
+            for payment in self.payments.values()
+            if status is None or _status_value(payment.status) == status.value
+        ]
+        return Money.sum(np.array(amounts_minor, dtype=np.int64), self.moneda)
+
     def calculate_total_amount(self) -> NonNegativeFloat:
-        return sum(payment.amount for payment in self.payments.values())
+        return self.calculate_total_money().amount
 
     def calculate_total_amount_paid(self) -> NonNegativeFloat:
-        return sum(payment.amount for payment in self.payments.values() if payment.status == PaymentStatus.PAID)
+        return self.calculate_total_money(PaymentStatus.PAID).amount
 
     def calculate_total_amount_pending(self) -> NonNegativeFloat:
-        return sum(payment.amount for payment in self.payments.values() if payment.status == PaymentStatus.PENDING)
+        return self.calculate_total_money(PaymentStatus.PENDING).amount
 
     def change_payment_status(self, payment_id: PositiveInt, status: PaymentStatus) -> None:
         self.payments[payment_id].change_status(status)
 
+    def pending_payments(self) -> list[Payment]:
+        pending = PaymentStatus.PENDING.value
+        return sorted(
+            (payment for payment in self.payments.values() if _status_value(payment.status) == pending),
+            key=lambda payment: (payment.end_date, payment.id),
+        )
+
+    def outstanding_principal_minor(self) -> int:
+        """
+        Principal still owed by the pending installments. Installments without a stored principal / interest
+        split (flat loans) count for the share of the loan's principal in its total to pay.
+        """
+        total_minor = self.calculate_total_money().amount_minor
+        principal_minor = to_minor_units(self.dinero_total_prestado)
+        return sum(
+            payment.principal_minor
+            if payment.principal_minor is not None
+            else min(payment.amount_minor * principal_minor // total_minor, payment.amount_minor)
+            for payment in self.pending_payments()
+        )
+
+    def plan_restructuring(
+        self,
+        fecha_inicio: datetime,
+        num_pagos: int,
+        tasa_interes: float,
+        sistema_amortizacion: Optional[AmortizationSystem] = None,
+        fecha: Optional[datetime] = None,
+        motivo: Optional[str] = None,
+        capitalize_late_fees: bool = True,
+    ) -> Restructuring:
+        """
+        The restructuring that would cancel every pending installment and schedule their balance again with
+        the given terms; the payment list is not changed.
+        """
+        if not (0 < tasa_interes < 1):
+            raise ValueError("tasa_interes must be a float between 0 and 1 (exclusive)")
+        pending_payments = self.pending_payments()
+        if not pending_payments:
+            raise ValueError("There are no pending installments to restructure")
+
+        saldo_minor = self.outstanding_principal_minor()
+        if capitalize_late_fees:
+            saldo_minor += sum(payment.late_fee_minor for payment in pending_payments)
+        if saldo_minor <= 0:
+            raise ValueError("There is no balance left to restructure")
+
+        return Restructuring(
+            fecha=fecha or datetime.now(),
+            fecha_inicio=fecha_inicio,
+            saldo_minor=saldo_minor,
+            tasa_interes=tasa_interes,
+            num_pagos=num_pagos,
+            sistema_amortizacion=AmortizationSystem(sistema_amortizacion or self.sistema_amortizacion),
+            cuotas_canceladas=[payment.id for payment in pending_payments],
+            motivo=motivo,
+        )
+
+    def apply_restructuring(
+        self,
+        restructuring: Restructuring,
+        installments_minor: list[int],
+        principals_minor: list[int],
+        interests_minor: list[int],
+        calendar: Optional[BusinessCalendar] = None,
+    ) -> None:
+        """
+        Cancel the installments of `restructuring` and add its new schedule, given as one amount per new
+        installment, so that many loans can share one `build_schedules` call. New installments take the ids
+        after the last one, and their due dates are rolled onto business days if a calendar is given.
+        """
+        for payment_id in restructuring.cuotas_canceladas:
+            self.payments[payment_id].change_status(PaymentStatus.CANCELLED.value)
+
+        first_id = max(self.payments) + 1
+        end_dates = monthly_due_dates(restructuring.fecha_inicio, restructuring.num_pagos, calendar)
+        for i in range(restructuring.num_pagos):
+            self.add_payment(
+                PaymentFactory.create_payment(
+                    amount=from_minor_units(installments_minor[i]),
+                    end_date=end_dates[i],
+                    id=first_id + i,
+                    status=PaymentStatus.PENDING,
+                    principal_minor=principals_minor[i],
+                    interest_minor=interests_minor[i],
+                )
+            )
+
+        self.tasa_interes = restructuring.tasa_interes
+        self.sistema_amortizacion = AmortizationSystem(restructuring.sistema_amortizacion)
+        self.pago_mensual = from_minor_units(installments_minor[0])
+        self.restructurings.append(restructuring)
+
+    def restructure(
+        self,
+        fecha_inicio: datetime,
+        num_pagos: int,
+        tasa_interes: float,
+        sistema_amortizacion: Optional[AmortizationSystem] = None,
+        fecha: Optional[datetime] = None,
+        motivo: Optional[str] = None,
+        capitalize_late_fees: bool = True,
+        calendar: Optional[BusinessCalendar] = None,
+    ) -> Restructuring:
+        """
+        Cancel every pending installment and schedule their balance (pending principal, plus their late fees
+        unless they are forgiven) again: `num_pagos` monthly installments from `fecha_inicio` at `tasa_interes`.
+        Paid installments are left as they are.
+        """
+        restructuring = self.plan_restructuring(
+            fecha_inicio, num_pagos, tasa_interes, sistema_amortizacion, fecha, motivo, capitalize_late_fees
+        )
+        schedule = build_schedules(
+            [restructuring.saldo_minor],
+            [restructuring.tasa_interes],
+            [restructuring.num_pagos],
+            AmortizationSystem(restructuring.sistema_amortizacion),
+        )
+        self.apply_restructuring(
+            restructuring,
+            schedule.installment_minor[0].tolist(),
+            schedule.principal_minor[0].tolist(),
+            schedule.interest_minor[0].tolist(),
+            calendar,
+        )
+        return restructuring
+
     def __len__(self) -> int:
         return len(self.payments)
 
     @classmethod
     def _private_attributes(cls):
-        return set(("payments",))
+        return set(("payments", "restructurings"))
 
     @classmethod
     def get_fields_and_types(cls):
@@ -91,10 +276,20 @@ class PaymentFactory:
         id: int,
         status: Optional[PaymentStatus] = None,
         date_paid: Optional[datetime] = None,
+        principal_minor: Optional[int] = None,
+        interest_minor: Optional[int] = None,
     ) -> Payment:
         if status is None:
             status = PaymentStatus.PENDING
-        return Payment(id=id, amount=amount, end_date=end_date, status=status, date_paid=date_paid)
+        return Payment(
+            id=id,
+            amount=amount,
+            end_date=end_date,
+            status=status,
+            date_paid=date_paid,
+            principal_minor=principal_minor,
+            interest_minor=interest_minor,
+        )
 
 
 class PaymentListFactory:
@@ -102,19 +297,41 @@ class PaymentListFactory:
     def create_payment_list(
         dinero_total_prestado: float,
         tasa_interes: float,
-        pago_mensual: float,
+        pago_mensual: Optional[float],
         fecha_inicio: datetime,
         num_pagos: int,
         moneda: Currency,
         ids: Optional[list[int]] = None,
+        sistema_amortizacion: AmortizationSystem = AmortizationSystem.FLAT,
+        calendar: Optional[BusinessCalendar] = None,
     ) -> PaymentList:
+        """
+        Payments of a new loan. Flat loans get `pago_mensual` as every installment, as they always have (it is
+        computed if not given); French and German loans get their installments, with the principal / interest
+        split, from the amortization schedule, and `pago_mensual` is set to the first installment. Due dates
+        are a month apart from `fecha_inicio`, rolled onto business days if a calendar is given.
+        """
         if ids is None:
             ids = list(range(1, num_pagos + 1))
+        end_dates = monthly_due_dates(fecha_inicio, num_pagos, calendar)
+
+        sistema_amortizacion = AmortizationSystem(sistema_amortizacion)
+        if sistema_amortizacion != AmortizationSystem.FLAT or pago_mensual is None:
+            return PaymentListFactory._create_scheduled_payment_list(
+                dinero_total_prestado,
+                tasa_interes,
+                fecha_inicio,
+                num_pagos,
+                moneda,
+                ids,
+                sistema_amortizacion,
+                end_dates,
+            )
 
         list_payments = {
             identifier: PaymentFactory.create_payment(
                 amount=pago_mensual,
-                end_date=fecha_inicio + relativedelta(months=i),
+                end_date=end_dates[i],
                 status=PaymentStatus.PENDING,
                 id=identifier,
                 date_paid=None,
@@ -131,6 +348,49 @@ class PaymentListFactory:
             moneda=moneda,
         )
 
+    @staticmethod
+    def _create_scheduled_payment_list(
+        dinero_total_prestado: float,
+        tasa_interes: float,
+        fecha_inicio: datetime,
+        num_pagos: int,
+        moneda: Currency,
+        ids: list[int],
+        sistema_amortizacion: AmortizationSystem,
+        end_dates: list[datetime],
+    ) -> PaymentList:
+        schedule = build_schedules(
+            [to_minor_units(dinero_total_prestado)], [tasa_interes], [num_pagos], sistema_amortizacion
+        )
+        installments, principals, interests = (
+            schedule.installment_minor[0].tolist(),
+            schedule.principal_minor[0].tolist(),
+            schedule.interest_minor[0].tolist(),
+        )
+
+        list_payments = {
+            identifier: PaymentFactory.create_payment(
+                amount=from_minor_units(installments[i]),
+                end_date=end_dates[i],
+                status=PaymentStatus.PENDING,
+                id=identifier,
+                date_paid=None,
+                principal_minor=principals[i],
+                interest_minor=interests[i],
+            )
+            for i, identifier in zip(range(num_pagos), ids)
+        }
+        return PaymentList(
+            payments=list_payments,
+            num_pagos=num_pagos,
+            fecha_inicio=fecha_inicio,
+            dinero_total_prestado=dinero_total_prestado,
+            tasa_interes=tasa_interes,
+            pago_mensual=from_minor_units(installments[0]),
+            moneda=moneda,
+            sistema_amortizacion=sistema_amortizacion,
+        )
+
     
     @staticmethod
     def create_from_payment_list_record_dict(payment_record_dict: dict) -> PaymentList:
@@ -141,7 +401,9 @@ class PaymentListFactory:
             dinero_total_prestado=payment_record_dict["dinero_total_prestado"],
             tasa_interes=payment_record_dict["tasa_interes"],
             moneda=payment_record_dict["moneda"],
+            sistema_amortizacion=payment_record_dict.get("sistema_amortizacion", AmortizationSystem.FLAT),
             payments=payment_record_dict["payments"],
+            restructurings=payment_record_dict.get("restructurings", []),
             date_paid=payment_record_dict.get("date_paid", None),
         ) 
 
@@ -156,6 +418,49 @@ class PaymentListFactory:
             dinero_total_prestado=payment_record_dict["dinero_total_prestado"],
             tasa_interes=payment_record_dict["tasa_interes"],
             moneda=payment_record_dict["moneda"],
+            sistema_amortizacion=payment_record_dict.get("sistema_amortizacion", AmortizationSystem.FLAT),
             payments=payment_record_dict["payments"],
+            restructurings=payment_record_dict.get("restructurings", []),
             date_paid=payment_record_dict.get("date_paid", None),
         )
+
+    @staticmethod
+    def construct_from_payment_list_record_str(payment_record_str: str) -> PaymentList:
+        """
+        Build a PaymentList and its payments without validation, for records read from a table written by the
+        app. Only the conversions validation would have done are applied: ISO dates, integer payment ids and
+        the currency enum.
+        """
+        payment_list = json.loads(payment_record_str)
+
+        payments = {}
+        for payment_id, payment in payment_list["payments"].items():
+            payment["end_date"] = datetime.fromisoformat(payment["end_date"])
+            # rows written before amount_minor existed only have the float amount, as Payment itself handles
+            if payment.get("amount_minor") is None:
+                payment["amount_minor"] = to_minor_units(payment["amount"])
+            payment["amount"] = from_minor_units(payment["amount_minor"])
+            if payment["date_paid"] is not None:
+                payment["date_paid"] = datetime.fromisoformat(payment["date_paid"])
+            # rows written before these fields existed can be carried over into a rewritten table
+            payment.setdefault("principal_minor", None)
+            payment.setdefault("interest_minor", None)
+            payment.setdefault("late_fee_minor", 0)
+            payment.setdefault("paid_by_receipts", False)
+            payments[int(payment_id)] = construct_trusted(Payment, payment)
+
+        payment_list["fecha_inicio"] = datetime.fromisoformat(payment_list["fecha_inicio"])
+        payment_list["moneda"] = Currency(payment_list["moneda"])
+        payment_list["sistema_amortizacion"] = AmortizationSystem(
+            payment_list.get("sistema_amortizacion", AmortizationSystem.FLAT.value)
+        )
+        payment_list["payments"] = payments
+
+        restructurings = []
+        for restructuring in payment_list.get("restructurings", []):
+            restructuring["fecha"] = datetime.fromisoformat(restructuring["fecha"])
+            restructuring["fecha_inicio"] = datetime.fromisoformat(restructuring["fecha_inicio"])
+            restructuring.setdefault("motivo", None)
+            restructurings.append(construct_trusted(Restructuring, restructuring))
+        payment_list["restructurings"] = restructurings
+        return construct_trusted(PaymentList, payment_list)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, PositiveInt
+
+from payments_src.domain.money import to_minor_units
+
+
+class Receipt(BaseModel):
+    """
+    Money received for a loan, in the loan's currency. How it pays the installments is worked out by the
+    allocation engine, not stored.
+    """
+
+    receipt_id: PositiveInt
+    loan_id: PositiveInt
+    date_received: datetime
+    amount_minor: PositiveInt
+    reference: Optional[str] = None
+
+
+class ReceiptFactory:
+    @staticmethod
+    def create_receipt(
+        receipt_id: int,
+        loan_id: int,
+        date_received: datetime,
+        amount: float,
+        reference: Optional[str] = None,
+    ) -> Receipt:
+        return Receipt(
+            receipt_id=receipt_id,
+            loan_id=loan_id,
+            date_received=date_received,
+            amount_minor=to_minor_units(amount),
+            reference=reference,
+        )
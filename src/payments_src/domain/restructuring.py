@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, NonNegativeInt, PositiveFloat, PositiveInt
+
+from payments_src.domain.payment_enums import AmortizationSystem
+
+
+class Restructuring(BaseModel):
+    """
+    A change of terms of a loan: its pending installments were cancelled and the balance was scheduled again.
+    The cancelled installments stay in the payment list, so the history of the loan is kept.
+    """
+
+    model_config = ConfigDict(use_enum_values=True)
+    # day the new terms were agreed
+    fecha: datetime
+    # due date of the first installment of the new schedule
+    fecha_inicio: datetime
+    # balance scheduled again: pending principal plus, if capitalized, their unpaid late fees
+    saldo_minor: NonNegativeInt
+    tasa_interes: PositiveFloat
+    num_pagos: PositiveInt
+    sistema_amortizacion: AmortizationSystem
+    cuotas_canceladas: list[PositiveInt]
+    motivo: Optional[str] = None
+
+
+class RestructurePolicy(BaseModel):
+    """
+    Terms applied to many loans at once. Every field left as None keeps what the loan has; the first new
+    installment is due `grace_months` months after the oldest pending one, or after the restructuring date if
+    that installment is already overdue.
+    """
+
+    grace_months: NonNegativeInt = 0
+    # None keeps the number of pending installments
+    num_pagos: Optional[PositiveInt] = None
+    tasa_interes: Optional[PositiveFloat] = None
+    sistema_amortizacion: Optional[AmortizationSystem] = None
+    # late fees of the cancelled installments are added to the balance, or forgiven
+    capitalize_late_fees: bool = True
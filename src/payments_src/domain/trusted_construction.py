@@ -0,0 +1,22 @@
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_set_attribute = object.__setattr__
+
+
+def construct_trusted(model_cls: type[ModelT], values: dict) -> ModelT:
+    """
+    Build a model instance straight from already-typed values, without validation. Unlike `model_construct`
+    it does not look up aliases or fill defaults, so `values` must hold every field (as it does for records
+    the app serialized itself); that per-field bookkeeping is what makes `model_construct` slower than
+    validating in pydantic-core.
+    """
+    instance = model_cls.__new__(model_cls)
+    _set_attribute(instance, "__dict__", values)
+    _set_attribute(instance, "__pydantic_fields_set__", set(values))
+    _set_attribute(instance, "__pydantic_extra__", None)
+    _set_attribute(instance, "__pydantic_private__", None)
+    return instance
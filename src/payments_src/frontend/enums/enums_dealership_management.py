@@ -6,6 +6,7 @@ class DealershipManagementActions(Enum):
     VIEW_DEALERSHIP = "Ver Automotora"
     EDIT_DEALERSHIP = "Editar Automotora"
     DELETE_DEALERSHIP = "Eliminar Automotora"
+    DEALERSHIP_RANKING = "Ranking de Automotoras"
 
     @classmethod
     def list(cls):
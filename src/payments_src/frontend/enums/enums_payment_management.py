@@ -5,6 +5,9 @@ class PaymentManagementActions(Enum):
     MARK_AS_PAID = "Marcar como Pagado"
     EDIT_PAYMENT = "Editar Pago"
     VIEW_PAYMENTS = "Ver Pagos"
+    RECORD_RECEIPT = "Registrar Cobro"
+    RECONCILE_BANK = "Conciliar Extracto Bancario"
+    RESTRUCTURE_LOAN = "Reestructurar Préstamo"
 
     @classmethod
     def list(cls):
@@ -18,3 +21,12 @@ class PaymentFilterType(Enum):
     @classmethod
     def list(cls):
         return [filter_type.value for filter_type in cls]
+
+
+class RestructureScope(Enum):
+    SINGLE_LOAN = "Un Préstamo"
+    DEALERSHIP = "Préstamos de una Automotora"
+
+    @classmethod
+    def list(cls):
+        return [scope.value for scope in cls]
@@ -1,11 +1,37 @@
 import streamlit as st
 
 from payments_src.frontend.enums.enums_active_loans import ActiveLoansActions
-from payments_src.db.csv_db.db_operations import parse_and_expand_loan_object, read_and_expand_loans_table
-from payments_src.domain.loans_enums import LoanStatus
+from payments_src.db.csv_db.db_operations import read_and_expand_loans_table
+from payments_src.domain.loans_enums import LoanSortKey, LoanStatus
 from payments_src.domain.loans import Loan
-from payments_src.frontend.page_potential_borrowers import pretty_print_object
-from payments_src.frontend.utils import add_n_line_jumps
+from payments_src.frontend.page_potential_borrowers import pretty_print_object, show_borrower_files
+from payments_src.frontend.utils import add_n_line_jumps, filter_loans_by_search, get_synced_active_loan_listing
+
+SORT_KEY_LABELS = {
+    LoanSortKey.LOAN_ID: "ID de préstamo",
+    LoanSortKey.LOAN_READABLE_CODE: "Código",
+    LoanSortKey.NOMBRE_CLIENTE: "Cliente",
+    LoanSortKey.FECHA_INICIO: "Fecha de inicio",
+    LoanSortKey.DINERO_TOTAL_PRESTADO: "Monto prestado",
+}
+LISTING_COLUMNS = [
+    "loan_readable_code",
+    "status",
+    "nombre_cliente",
+    "telefono_cliente",
+    "notas",
+    "marca_auto",
+    "modelo_auto",
+    "name",
+    "dealership_code",
+    "dealership_phone_number",
+    "fecha_inicio",
+    "pago_mensual",
+    "num_pagos",
+    "dinero_total_prestado",
+    "tasa_interes",
+    "moneda",
+]
 
 
 def active_loans_page():
@@ -18,13 +44,16 @@ def active_loans_page():
     )
 
     if selected_action == ActiveLoansActions.LIST_LOANS.value:
-        active_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
-        active_loans_df = parse_and_expand_loan_object(active_loans_df)
-
-        st.dataframe(active_loans_df)   
+        list_active_loans()
 
     elif selected_action == ActiveLoansActions.VIEW_LOAN.value:
         active_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
+        active_loans_df = filter_loans_by_search(active_loans_df, key="active_loans_search")
+
+        if active_loans_df.empty:
+            st.warning("No se encontraron préstamos")
+            return
+
         active_loans_df["display_name"] = active_loans_df.apply(
             lambda x: str(x["loan_id"]) + " - " + x["loan_readable_code"] + " - " + x["borrower"].nombre_cliente + f' ({x["car"].marca_auto} {x["car"].modelo_auto})',
             axis=1
@@ -54,6 +83,8 @@ def active_loans_page():
         pretty_print_object(loan_obj.dealership)
         st.subheader("Financiación")
         pretty_print_object(loan_obj.payment_list)
+        st.subheader("Archivos")
+        show_borrower_files(loan_obj.borrower.borrower_id)
 
         
 
@@ -61,3 +92,45 @@ def active_loans_page():
         pass
     elif selected_action == ActiveLoansActions.VIEW_LOAN_PAYMENTS.value:
         pass
+
+
+def list_active_loans():
+    listing = get_synced_active_loan_listing()
+
+    sort_col, order_col, size_col = st.columns([2, 1, 1])
+    sort_key = sort_col.selectbox(
+        "Ordenar por", list(LoanSortKey), format_func=SORT_KEY_LABELS.get, key="active_loans_sort_key"
+    )
+    descending = order_col.selectbox("Orden", ["Ascendente", "Descendente"], key="active_loans_order") == "Descendente"
+    page_size = size_col.selectbox("Filas por página", [25, 50, 100, 250], key="active_loans_page_size")
+    columns = st.multiselect("Columnas", LISTING_COLUMNS, default=LISTING_COLUMNS[:9], key="active_loans_columns")
+
+    # cursors of the pages visited so far; going back pops the last one. They are keyset cursors, so the
+    # current page stays in place when loans are written in the meantime
+    listing_settings = (sort_key, descending, page_size)
+    if st.session_state.get("active_loans_listing_settings") != listing_settings:
+        st.session_state["active_loans_listing_settings"] = listing_settings
+        st.session_state["active_loans_cursors"] = [None]
+    cursors = st.session_state["active_loans_cursors"]
+
+    page = listing.get_page(
+        page_size, sort_key=sort_key, descending=descending, cursor=cursors[-1], columns=["loan_id", *columns]
+    )
+
+    if page.total_rows == 0:
+        st.warning("No hay préstamos activos")
+        return
+
+    st.dataframe(page.rows, hide_index=True)
+
+    previous_col, info_col, next_col = st.columns([1, 3, 1])
+    if previous_col.button("Anterior", disabled=len(cursors) == 1, key="active_loans_previous_page"):
+        cursors.pop()
+        st.rerun()
+    info_col.caption(
+        f"Mostrando {page.start + 1}-{page.start + len(page.rows)} de {page.total_rows} préstamos "
+        f"(página {len(cursors)} de {-(-page.total_rows // page_size)})"
+    )
+    if next_col.button("Siguiente", disabled=page.next_cursor is None, key="active_loans_next_page"):
+        cursors.append(page.next_cursor)
+        st.rerun()
@@ -1,4 +1,5 @@
 import uuid
+from datetime import date
 
 import streamlit as st
 
@@ -6,14 +7,25 @@ from payments_src.db.csv_db.db_constants import CSVTable
 from payments_src.db.csv_db.db_operations import (
     append_dealership_table,
     edit_dealership_table_record,
+    get_table_version,
     read_dealership_table,
     write_dealership_table,
 )
+from payments_src.domain.dealership_enums import DealershipSortKey
 from payments_src.domain.dealerships import Dealership, DealershipFactory
 from payments_src.frontend.enums.enums_dealership_management import DealershipManagementActions
-from payments_src.frontend.utils import add_n_line_jumps
+from payments_src.frontend.utils import add_n_line_jumps, get_dealership_metrics
+from payments_src.operations.analytics.dealership_metrics import rank_dealerships
 from payments_src.shared.pydantic_validation_utils import get_field_input_widget_dealership
 
+SORT_KEY_LABELS = {
+    DealershipSortKey.PRESTAMOS: "Préstamos otorgados",
+    DealershipSortKey.MONTO_PRESTADO: "Monto prestado",
+    DealershipSortKey.TASA_COBRANZA: "Tasa de cobranza",
+    DealershipSortKey.TASA_MOROSIDAD: "Morosidad",
+    DealershipSortKey.PLAZO_PROMEDIO: "Plazo promedio",
+}
+
 
 def dealership_management_page():
     st.title("Gestión de Automotoras")
@@ -188,3 +200,69 @@ def dealership_management_page():
                 write_dealership_table(dealership_table_to_write, overwrite=True)
                 st.success(f"Automotora '{dealership_display_name}' eliminada exitosamente!")
                 st.rerun()
+
+    elif selected_action == DealershipManagementActions.DEALERSHIP_RANKING.value:
+        dealership_ranking()
+
+
+def dealership_ranking():
+    today = date.today()
+    metrics = get_dealership_metrics(get_table_version(CSVTable.LOAN_PATH), today)
+
+    if metrics.empty:
+        st.info("No hay préstamos aprobados para comparar automotoras.")
+        return
+
+    currency_col, sort_col, _ = st.columns([1, 2, 2])
+    moneda = currency_col.selectbox("Moneda", sorted(metrics["moneda"].unique()), key="dealership_ranking_currency")
+    sort_key = sort_col.selectbox(
+        "Ordenar por", list(DealershipSortKey), format_func=SORT_KEY_LABELS.get, key="dealership_ranking_sort_key"
+    )
+
+    dealership_table = read_dealership_table()[["dealership_id", "name", "dealership_code"]]
+    ranking = rank_dealerships(metrics[metrics["moneda"] == moneda], sort_key).merge(
+        dealership_table, on="dealership_id", how="left"
+    )
+
+    st.caption(f"Cuotas exigibles y vencidas al {today:%d/%m/%Y}. Montos en {moneda}.")
+    st.dataframe(
+        ranking.assign(
+            tasa_cobranza=(ranking["tasa_cobranza"] * 100).round(1),
+            tasa_morosidad=(ranking["tasa_morosidad"] * 100).round(1),
+            plazo_promedio=ranking["plazo_promedio"].round(1),
+        )[
+            [
+                "posicion",
+                "dealership_code",
+                "name",
+                "prestamos",
+                "monto_prestado",
+                "plazo_promedio",
+                "monto_exigible",
+                "monto_cobrado",
+                "tasa_cobranza",
+                "prestamos_activos",
+                "prestamos_morosos",
+                "tasa_morosidad",
+                "monto_vencido",
+            ]
+        ].rename(
+            columns={
+                "posicion": "Posición",
+                "dealership_code": "Código",
+                "name": "Automotora",
+                "prestamos": "Préstamos",
+                "monto_prestado": "Monto Prestado",
+                "plazo_promedio": "Plazo Promedio (cuotas)",
+                "monto_exigible": "Monto Exigible",
+                "monto_cobrado": "Monto Cobrado",
+                "tasa_cobranza": "Cobranza (%)",
+                "prestamos_activos": "Préstamos Activos",
+                "prestamos_morosos": "Préstamos Morosos",
+                "tasa_morosidad": "Morosidad (%)",
+                "monto_vencido": "Monto Vencido",
+            }
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
@@ -1,8 +1,13 @@
+import numpy as np
+import pandas as pd
 import streamlit as st
 
-from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payment_enums import AmortizationSystem, Currency
 from payments_src.frontend.utils import add_n_line_jumps
-from payments_src.operations.payments.monthly_payment_calculations import calculate_monthly_payment
+from payments_src.operations.payments.amortization import build_schedule_frame
+from payments_src.operations.payments.monthly_payment_calculations import quote_grid
+
+SENSITIVITY_NUM_PAYMENTS_OPTIONS = [3, 6, 9, 12, 18, 24, 30, 36, 48, 60, 72]
 
 
 def monthly_payment_calculation_page():
@@ -19,9 +24,63 @@ def monthly_payment_calculation_page():
     interest_rate_perc = short_col1.number_input("Tasa de interés (%)", min_value=0.0, value=2.0, step=0.5)
     interest_rate = interest_rate_perc / 100
     num_payments = short_col2.number_input("Número de pagos", min_value=0, value=12, step=1)
+    amortization_system = short_col1.selectbox("Sistema de amortización", AmortizationSystem.list())
 
     if st.button("Calcular"):
-        monthly_payment = calculate_monthly_payment(amount, num_payments, interest_rate)
+        if num_payments <= 0:
+            st.error("El número de pagos debe ser mayor a 0")
+            return
+
+        schedule_df = build_schedule_frame(amount, interest_rate, num_payments, AmortizationSystem(amortization_system))
 
         add_n_line_jumps(1)
-        st.write(f"#### COUTA: **{moneda} {monthly_payment:.2f}**")
+        if amortization_system == AmortizationSystem.GERMAN.value:
+            st.write(f"#### PRIMERA COUTA: **{moneda} {schedule_df['pago'].iloc[0]:.2f}**")
+        else:
+            st.write(f"#### COUTA: **{moneda} {schedule_df['pago'].iloc[0]:.2f}**")
+        st.write(f"TOTAL A PAGAR: **{moneda} {schedule_df['pago'].sum():.2f}**")
+        st.write(f"TOTAL DE INTERESES: **{moneda} {schedule_df['interes'].sum():.2f}**")
+
+        st.dataframe(schedule_df, hide_index=True)
+
+    add_n_line_jumps(2)
+    sensitivity_table_section(moneda, amount, AmortizationSystem(amortization_system))
+
+
+def sensitivity_table_section(moneda: str, amount: float, amortization_system: AmortizationSystem):
+    """
+    Quotes of the loan amount for every number of payments and interest rate in the chosen ranges, computed
+    as one grid.
+    """
+    st.subheader("Tabla de Sensibilidad")
+    st.write(f"Monto: **{moneda} {amount}**, sistema **{amortization_system.value}**")
+
+    num_payments_options = st.multiselect(
+        "Números de pagos",
+        SENSITIVITY_NUM_PAYMENTS_OPTIONS,
+        default=[6, 12, 18, 24, 36],
+        key="sensitivity_num_payments",
+    )
+
+    short_col1, short_col2, short_col3, _ = st.columns([1, 1, 1, 3])
+    min_rate_perc = short_col1.number_input("Tasa mínima (%)", min_value=0.0, value=1.0, step=0.5)
+    max_rate_perc = short_col2.number_input("Tasa máxima (%)", min_value=0.0, value=5.0, step=0.5)
+    rate_step_perc = short_col3.number_input("Paso (%)", min_value=0.1, value=0.5, step=0.1)
+    shown_value = st.radio("Mostrar", ["Cuota", "Total a pagar"], horizontal=True, key="sensitivity_shown_value")
+
+    if not num_payments_options or max_rate_perc < min_rate_perc:
+        st.warning("Seleccione al menos un número de pagos y una tasa máxima mayor o igual a la mínima")
+        return
+
+    rates_perc = np.round(np.arange(min_rate_perc, max_rate_perc + rate_step_perc / 2, rate_step_perc), 2)
+    num_payments = sorted(num_payments_options)
+
+    quotes = quote_grid([amount], num_payments, rates_perc / 100, amortization_system)
+    values = quotes.monthly_payment[0] if shown_value == "Cuota" else quotes.total_to_pay[0]
+
+    sensitivity_df = pd.DataFrame(
+        values.round(2),
+        index=pd.Index(num_payments, name="Pagos"),
+        columns=[f"{rate:.2f}%" for rate in rates_perc],
+    )
+    st.dataframe(sensitivity_df)
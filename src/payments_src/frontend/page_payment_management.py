@@ -2,12 +2,50 @@ import streamlit as st
 from datetime import datetime
 import pandas as pd
 
-from payments_src.frontend.enums.enums_payment_management import PaymentManagementActions, PaymentFilterType
-from payments_src.db.csv_db.db_operations import read_and_expand_loans_table, edit_loan_table_record, read_loan_table, write_loan_table
+from payments_src.frontend.enums.enums_payment_management import PaymentManagementActions, PaymentFilterType, RestructureScope
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_operations import (
+    get_table_version,
+    read_and_expand_loans_table,
+    read_active_loans_table,
+    read_dealership_table,
+    read_payments_table,
+)
+from payments_src.domain.loan_changes import PaymentChange
 from payments_src.domain.loans_enums import LoanStatus
-from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.domain.payment_enums import AllocationComponent, AmortizationSystem, PaymentStatus
 from payments_src.domain.loans import Loan
-from payments_src.frontend.utils import add_n_line_jumps
+from payments_src.domain.money import from_minor_units
+from payments_src.domain.receipts import ReceiptFactory
+from payments_src.domain.restructuring import RestructurePolicy
+from payments_src.frontend.utils import (
+    add_n_line_jumps,
+    filter_loans_by_search,
+    get_delinquency_tracker,
+    get_due_date_index,
+    get_job_queue,
+    get_monthly_collections,
+    get_synced_business_calendar,
+    get_synced_due_date_index,
+    show_pending_loan_jobs,
+    wait_for_save,
+)
+from payments_src.operations.jobs.persistence_jobs import (
+    persist_bulk_restructuring,
+    persist_loan_restructuring,
+    persist_payment_change,
+    persist_receipts,
+)
+from payments_src.operations.analytics.monthly_collections import monthly_collection_totals
+from payments_src.operations.loans.restructuring import dealership_loan_ids
+from payments_src.operations.payments.allocation import allocate_receipts, build_installment_components
+from payments_src.operations.payments.amortization import build_schedule_frame
+from payments_src.operations.payments.delinquency_tracker import days_past_due
+from payments_src.operations.payments.reconciliation import (
+    AUTO_ACCEPT_CONFIDENCE,
+    receipts_from_matches,
+    reconcile_bank_statement,
+)
 
 
 def payment_management_page():
@@ -18,6 +56,9 @@ def payment_management_page():
     st.write("• **Marcar pago como pagado**: Marcar pagos individuales o por mes como pagados.")
     st.write("• **Editar pago**: Editar datos depagos individuales o por mes. Podrás modificar el monto, la fecha de vencimiento y la fecha de pago.")
     st.write("• **Ver pagos**: Ver pagos individuales o por mes. También podrás generar reportes de pagos.")
+    st.write("• **Registrar cobro**: Registrar un cobro parcial o total de un préstamo, que se aplica a sus cuotas más antiguas.")
+    st.write("• **Conciliar extracto bancario**: Importar el extracto del banco y registrar de una vez los cobros que coinciden con cuotas pendientes.")
+    st.write("• **Reestructurar préstamo**: Cancelar las cuotas pendientes y generar un nuevo cronograma, para un préstamo o para todos los de una automotora.")
     add_n_line_jumps(1)
     short_col, _ = st.columns([1, 3])
     selected_action = short_col.selectbox(
@@ -33,6 +74,12 @@ def payment_management_page():
         edit_payment_section()
     elif selected_action == PaymentManagementActions.VIEW_PAYMENTS.value:
         view_payments_section()
+    elif selected_action == PaymentManagementActions.RECORD_RECEIPT.value:
+        record_receipt_section()
+    elif selected_action == PaymentManagementActions.RECONCILE_BANK.value:
+        reconcile_bank_section()
+    elif selected_action == PaymentManagementActions.RESTRUCTURE_LOAN.value:
+        restructure_loan_section()
 
 
 def mark_payment_as_paid_section():
@@ -56,6 +103,12 @@ def mark_payment_as_paid_section():
 
 
 def mark_payment_by_borrower(active_loans_df):
+    active_loans_df = filter_loans_by_search(active_loans_df, key="mark_paid_search")
+
+    if active_loans_df.empty:
+        st.warning("No se encontraron préstamos")
+        return
+
     # Create display names for borrowers
     active_loans_df["display_name"] = active_loans_df.apply(
         lambda x: f"{x['loan_id']} - {x['loan_readable_code']} - {x['borrower'].nombre_cliente} ({x['car'].marca_auto} {x['car'].modelo_auto})",
@@ -76,6 +129,7 @@ def mark_payment_by_borrower(active_loans_df):
     selected_loan_row = active_loans_df[active_loans_df["loan_id"] == loan_id].iloc[0]
 
     selected_loan = Loan(**selected_loan_row.to_dict())
+    show_pending_loan_jobs(selected_loan.loan_id)
     
     # Display pending payments
     st.subheader("Pagos Pendientes")
@@ -91,7 +145,8 @@ def mark_payment_by_borrower(active_loans_df):
     # Create payment selection
     payment_options = []
     for payment in pending_payments:
-        payment_options.append(f"Pago #{payment.id} - ${payment.amount:.2f} - Vence: {payment.end_date.strftime('%Y-%m-%d')}")
+        late_fee_info = f" + recargo ${from_minor_units(payment.late_fee_minor):.2f}" if payment.late_fee_minor else ""
+        payment_options.append(f"Pago #{payment.id} - ${payment.amount:.2f}{late_fee_info} - Vence: {payment.end_date.strftime('%Y-%m-%d')}")
     
     selected_payment_option = st.selectbox(
         "Selecciona un pago para marcar como pagado:",
@@ -111,36 +166,36 @@ def mark_payment_by_borrower(active_loans_df):
     
     # Confirm button
     if st.button("Marcar como Pagado", key="mark_paid_confirm"):
+        if has_receipt_allocations(selected_loan, selected_payment_id):
+            st.error(f"El pago #{selected_payment_id} ya tiene cobros aplicados. Registra el resto como un cobro.")
+            return
+        
         # Update payment status
-        selected_loan.payment_list.payments[selected_payment_id].change_status(PaymentStatus.PAID)
-        selected_loan.payment_list.payments[selected_payment_id].change_date_paid(datetime.combine(payment_date, datetime.min.time()))
+        change = PaymentChange(payment_id=selected_payment_id, status=PaymentStatus.PAID, date_paid=datetime.combine(payment_date, datetime.min.time()))
+        change.apply(selected_loan)
         
-        # Update loan in database
-        loans_df = read_loan_table()
-        updated_loans_df = edit_loan_table_record(loans_df, selected_loan)
-        write_loan_table(updated_loans_df, overwrite=True)
+        # Update loan in database (in the background), applied to the loan as it is stored by then
+        job = get_job_queue().submit(persist_payment_change, selected_loan.loan_id, change, description=f"Actualizar préstamo {selected_loan.loan_readable_code}", loan_ids=[selected_loan.loan_id])
+        get_due_date_index().upsert_loan(selected_loan)
+        get_delinquency_tracker().upsert_loan(selected_loan)
         
         st.success(f"Pago #{selected_payment_id} marcado como pagado exitosamente!")
+        wait_for_save(job)
         st.rerun()
 
 
 def mark_payment_by_month(active_loans_df):
     st.subheader("Selecciona un Mes")
     
-    # Get all unique months from payment end dates
-    all_months = set()
-    for _, loan_row in active_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            month_key = payment.end_date.strftime('%Y-%m')
-            all_months.add(month_key)
+    # Months come straight from the due-date index
+    due_date_index = get_synced_due_date_index()
+    sorted_months = due_date_index.months()
     
-    if not all_months:
+    if not sorted_months:
         st.info("No hay pagos disponibles.")
         return
     
     # Month selection
-    sorted_months = sorted(list(all_months))
     selected_month = st.selectbox(
         "Mes:",
         sorted_months,
@@ -151,28 +206,11 @@ def mark_payment_by_month(active_loans_df):
     pending_payments = []
     paid_payments = []
     
-    for _, loan_row in active_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            if payment.end_date.strftime('%Y-%m') == selected_month:
-                payment_info = {
-                    'loan_id': loan.loan_id,
-                    'loan_code': loan.loan_readable_code,
-                    'borrower_name': loan.borrower.nombre_cliente,
-                    'car_info': f"{loan.car.marca_auto} {loan.car.modelo_auto}",
-                    'payment_id': payment.id,
-                    'amount': payment.amount,
-                    'end_date': payment.end_date,
-                    'status': payment.status,
-                    'date_paid': payment.date_paid,
-                    'payment_obj': payment,
-                    'loan_obj': loan
-                }
-                
-                if payment.status == PaymentStatus.PENDING.value:
-                    pending_payments.append(payment_info)
-                else:
-                    paid_payments.append(payment_info)
+    for payment_info in collect_month_payments(active_loans_df, due_date_index, selected_month):
+        if payment_info['status'] == PaymentStatus.PENDING.value:
+            pending_payments.append(payment_info)
+        else:
+            paid_payments.append(payment_info)
     
     # Display pending payments table
     st.subheader("Pagos Pendientes")
@@ -185,6 +223,7 @@ def mark_payment_by_month(active_loans_df):
                 'Vehículo': p['car_info'],
                 'Pago #': p['payment_id'],
                 'Monto': f"${p['amount']:.2f}",
+                'Recargo': f"${p['late_fee']:.2f}",
                 'Vence': p['end_date'].strftime('%Y-%m-%d')
             }
             for p in pending_payments
@@ -210,6 +249,8 @@ def mark_payment_by_month(active_loans_df):
                 break
         
         if selected_payment_info:
+            show_pending_loan_jobs(selected_payment_info['loan_id'])
+            
             # Payment date input
             payment_date = st.date_input(
                 "Fecha de pago:",
@@ -222,15 +263,19 @@ def mark_payment_by_month(active_loans_df):
                 # Update payment status
                 loan = selected_payment_info['loan_obj']
                 payment_id = selected_payment_info['payment_id']
-                loan.payment_list.payments[payment_id].change_status(PaymentStatus.PAID)
-                loan.payment_list.payments[payment_id].change_date_paid(datetime.combine(payment_date, datetime.min.time()))
+                if has_receipt_allocations(loan, payment_id):
+                    st.error(f"El pago #{payment_id} ya tiene cobros aplicados. Registra el resto como un cobro.")
+                    return
+                change = PaymentChange(payment_id=payment_id, status=PaymentStatus.PAID, date_paid=datetime.combine(payment_date, datetime.min.time()))
+                change.apply(loan)
                 
-                # Update loan in database
-                loans_df = read_loan_table()
-                updated_loans_df = edit_loan_table_record(loans_df, loan)
-                write_loan_table(updated_loans_df, overwrite=True)
+                # Update loan in database (in the background), applied to the loan as it is stored by then
+                job = get_job_queue().submit(persist_payment_change, loan.loan_id, change, description=f"Actualizar préstamo {loan.loan_readable_code}", loan_ids=[loan.loan_id])
+                get_due_date_index().upsert_loan(loan)
+                get_delinquency_tracker().upsert_loan(loan)
                 
                 st.success(f"Pago #{payment_id} marcado como pagado exitosamente!")
+                wait_for_save(job)
                 st.rerun()
     else:
         st.info("No hay pagos pendientes para este mes.")
@@ -246,6 +291,7 @@ def mark_payment_by_month(active_loans_df):
                 'Vehículo': p['car_info'],
                 'Pago #': p['payment_id'],
                 'Monto': f"${p['amount']:.2f}",
+                'Recargo': f"${p['late_fee']:.2f}",
                 'Vence': p['end_date'].strftime('%Y-%m-%d'),
                 'Pagado': p['date_paid'].strftime('%Y-%m-%d') if p['date_paid'] else 'N/A'
             }
@@ -277,6 +323,12 @@ def edit_payment_section():
 
 
 def edit_payment_by_borrower(active_loans_df):
+    active_loans_df = filter_loans_by_search(active_loans_df, key="edit_payment_search")
+
+    if active_loans_df.empty:
+        st.warning("No se encontraron préstamos")
+        return
+
     # Create display names for borrowers
     active_loans_df["display_name"] = active_loans_df.apply(
         lambda x: f"{x['loan_id']} - {x['loan_readable_code']} - {x['borrower'].nombre_cliente} ({x['car'].marca_auto} {x['car'].modelo_auto})",
@@ -296,6 +348,7 @@ def edit_payment_by_borrower(active_loans_df):
     loan_id = active_loans_df[active_loans_df["display_name"] == selected_borrower]["loan_id"].iloc[0]
     selected_loan_row = active_loans_df[active_loans_df["loan_id"] == loan_id].iloc[0]
     selected_loan = Loan(**selected_loan_row.to_dict())
+    show_pending_loan_jobs(selected_loan.loan_id)
     
     # Display all payments
     st.subheader("Pagos del Cliente")
@@ -354,38 +407,40 @@ def edit_payment_by_borrower(active_loans_df):
     # Confirm button
     if st.button("Guardar Cambios", key="edit_payment_confirm"):
         # Update payment
-        selected_payment.change_amount(new_amount)
-        selected_payment.change_end_date(datetime.combine(new_end_date, datetime.min.time()))
-        
-        if new_payment_date:
-            selected_payment.change_date_paid(datetime.combine(new_payment_date, datetime.min.time()))
+        change = PaymentChange(
+            payment_id=selected_payment_id,
+            amount=new_amount,
+            end_date=datetime.combine(new_end_date, datetime.min.time()),
+            date_paid=datetime.combine(new_payment_date, datetime.min.time()) if new_payment_date else None,
+        )
+        try:
+            change.apply(selected_loan)
+        except ValueError as e:
+            st.error(f"No se puede editar este pago: {e}")
+            return
         
-        # Update loan in database
-        loans_df = read_loan_table()
-        updated_loans_df = edit_loan_table_record(loans_df, selected_loan)
-        write_loan_table(updated_loans_df, overwrite=True)
+        # Update loan in database (in the background), applied to the loan as it is stored by then
+        job = get_job_queue().submit(persist_payment_change, selected_loan.loan_id, change, description=f"Actualizar préstamo {selected_loan.loan_readable_code}", loan_ids=[selected_loan.loan_id])
+        get_due_date_index().upsert_loan(selected_loan)
+        get_delinquency_tracker().upsert_loan(selected_loan)
         
         st.success(f"Pago #{selected_payment_id} actualizado exitosamente!")
+        wait_for_save(job)
         st.rerun()
 
 
 def edit_payment_by_month(active_loans_df):
     st.subheader("Selecciona un Mes")
     
-    # Get all unique months from payment end dates
-    all_months = set()
-    for _, loan_row in active_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            month_key = payment.end_date.strftime('%Y-%m')
-            all_months.add(month_key)
+    # Months come straight from the due-date index
+    due_date_index = get_synced_due_date_index()
+    sorted_months = due_date_index.months()
     
-    if not all_months:
+    if not sorted_months:
         st.info("No hay pagos disponibles.")
         return
     
     # Month selection
-    sorted_months = sorted(list(all_months))
     selected_month = st.selectbox(
         "Mes:",
         sorted_months,
@@ -393,27 +448,7 @@ def edit_payment_by_month(active_loans_df):
     )
     
     # Collect payments for selected month
-    all_payments = []
-    
-    for _, loan_row in active_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            if payment.end_date.strftime('%Y-%m') == selected_month:
-                payment_info = {
-                    'loan_id': loan.loan_id,
-                    'loan_code': loan.loan_readable_code,
-                    'borrower_name': loan.borrower.nombre_cliente,
-                    'borrower_phone': loan.borrower.telefono_cliente,
-                    'car_info': f"{loan.car.marca_auto} {loan.car.modelo_auto}",
-                    'payment_id': payment.id,
-                    'amount': payment.amount,
-                    'end_date': payment.end_date,
-                    'status': payment.status,
-                    'date_paid': payment.date_paid,
-                    'payment_obj': payment,
-                    'loan_obj': loan
-                }
-                all_payments.append(payment_info)
+    all_payments = collect_month_payments(active_loans_df, due_date_index, selected_month)
     
     if not all_payments:
         st.info("No hay pagos para este mes.")
@@ -430,6 +465,7 @@ def edit_payment_by_month(active_loans_df):
             'Vehículo': p['car_info'],
             'Pago #': p['payment_id'],
             'Monto': f"${p['amount']:.2f}",
+            'Recargo': f"${p['late_fee']:.2f}",
             'Estado': "Pagado" if p['status'] == PaymentStatus.PAID.value else "Pendiente",
             'Vence': p['end_date'].strftime('%Y-%m-%d'),
             'Pagado': p['date_paid'].strftime('%Y-%m-%d') if p['date_paid'] else 'N/A'
@@ -458,6 +494,8 @@ def edit_payment_by_month(active_loans_df):
             break
     
     if selected_payment_info:
+        show_pending_loan_jobs(selected_payment_info['loan_id'])
+        
         # Edit form
         st.subheader("Editar Pago")
         
@@ -493,20 +531,25 @@ def edit_payment_by_month(active_loans_df):
             # Update payment
             loan = selected_payment_info['loan_obj']
             payment_id = selected_payment_info['payment_id']
-            payment = loan.payment_list.payments[payment_id]
-            
-            payment.change_amount(new_amount)
-            payment.change_end_date(datetime.combine(new_end_date, datetime.min.time()))
-            
-            if new_payment_date:
-                payment.change_date_paid(datetime.combine(new_payment_date, datetime.min.time()))
+            change = PaymentChange(
+                payment_id=payment_id,
+                amount=new_amount,
+                end_date=datetime.combine(new_end_date, datetime.min.time()),
+                date_paid=datetime.combine(new_payment_date, datetime.min.time()) if new_payment_date else None,
+            )
+            try:
+                change.apply(loan)
+            except ValueError as e:
+                st.error(f"No se puede editar este pago: {e}")
+                return
             
-            # Update loan in database
-            loans_df = read_loan_table()
-            updated_loans_df = edit_loan_table_record(loans_df, loan)
-            write_loan_table(updated_loans_df, overwrite=True)
+            # Update loan in database (in the background), applied to the loan as it is stored by then
+            job = get_job_queue().submit(persist_payment_change, loan.loan_id, change, description=f"Actualizar préstamo {loan.loan_readable_code}", loan_ids=[loan.loan_id])
+            get_due_date_index().upsert_loan(loan)
+            get_delinquency_tracker().upsert_loan(loan)
             
             st.success(f"Pago #{payment_id} actualizado exitosamente!")
+            wait_for_save(job)
             st.rerun()
 
 
@@ -524,34 +567,61 @@ def view_payments_section():
     # Get active loans
     active_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
     
-    # Collect all payments
+    if filter_type == "Todos los pagos":
+        view_all_payments(collect_all_payments(active_loans_df))
+    else:  # "Por mes"
+        view_payments_by_month(active_loans_df)
+
+
+def collect_all_payments(active_loans_df):
     all_payments = []
     
     for _, loan_row in active_loans_df.iterrows():
         loan = Loan(**loan_row.to_dict())
         for payment in loan.payment_list.payments.values():
-            payment_info = {
-                'loan_id': loan.loan_id,
-                'loan_code': loan.loan_readable_code,
-                'borrower_name': loan.borrower.nombre_cliente,
-                'borrower_phone': loan.borrower.telefono_cliente,
-                'car_info': f"{loan.car.marca_auto} {loan.car.modelo_auto}",
-                'payment_id': payment.id,
-                'amount': payment.amount,
-                'end_date': payment.end_date,
-                'status': payment.status,
-                'date_paid': payment.date_paid
-            }
-            all_payments.append(payment_info)
+            all_payments.append(build_payment_info(loan, payment))
     
-    if not all_payments:
-        st.info("No hay pagos disponibles.")
-        return
+    return all_payments
+
+
+def collect_month_payments(active_loans_df, due_date_index, selected_month):
+    """
+    Payment info for the installments due in `selected_month`, looked up in the due-date index. Only the
+    loans that have an installment in that month are turned into Loan objects.
+    """
+    loan_rows = active_loans_df.set_index("loan_id")
+    loans_by_id = {}
+    month_payments = []
+    
+    for entry in due_date_index.due_in_month(selected_month):
+        if entry.loan_id not in loan_rows.index:
+            continue
+        
+        if entry.loan_id not in loans_by_id:
+            loans_by_id[entry.loan_id] = Loan(loan_id=entry.loan_id, **loan_rows.loc[entry.loan_id].to_dict())
+        loan = loans_by_id[entry.loan_id]
+        
+        month_payments.append(build_payment_info(loan, loan.payment_list.payments[entry.payment_id]))
     
-    if filter_type == "Todos los pagos":
-        view_all_payments(all_payments)
-    else:  # "Por mes"
-        view_payments_by_month(all_payments)
+    return month_payments
+
+
+def build_payment_info(loan, payment):
+    return {
+        'loan_id': loan.loan_id,
+        'loan_code': loan.loan_readable_code,
+        'borrower_name': loan.borrower.nombre_cliente,
+        'borrower_phone': loan.borrower.telefono_cliente,
+        'car_info': f"{loan.car.marca_auto} {loan.car.modelo_auto}",
+        'payment_id': payment.id,
+        'amount': payment.amount,
+        'late_fee': from_minor_units(payment.late_fee_minor),
+        'end_date': payment.end_date,
+        'status': payment.status,
+        'date_paid': payment.date_paid,
+        'payment_obj': payment,
+        'loan_obj': loan
+    }
 
 
 def view_all_payments(all_payments):
@@ -560,13 +630,17 @@ def view_all_payments(all_payments):
     paid_payments = len([p for p in all_payments if p['status'] == PaymentStatus.PAID.value])
     pending_payments = total_payments - paid_payments
     
-    col1, col2, col3 = st.columns(3)
+    pending_late_fees = sum(p['late_fee'] for p in all_payments if p['status'] == PaymentStatus.PENDING.value)
+    
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Pagos", total_payments)
     with col2:
         st.metric("Pagos Realizados", paid_payments)
     with col3:
         st.metric("Pagos Pendientes", pending_payments)
+    with col4:
+        st.metric("Recargos Pendientes", f"${pending_late_fees:,.2f}")
     
     # Display all payments table
     st.subheader("Todos los Pagos")
@@ -578,6 +652,7 @@ def view_all_payments(all_payments):
             'Vehículo': p['car_info'],
             'Pago #': p['payment_id'],
             'Monto': f"${p['amount']:.2f}",
+            'Recargo': f"${p['late_fee']:.2f}",
             'Estado': "Pagado" if p['status'] == PaymentStatus.PAID.value else "Pendiente",
             'Vence': p['end_date'].strftime('%Y-%m-%d'),
             'Pagado': p['date_paid'].strftime('%Y-%m-%d') if p['date_paid'] else 'N/A'
@@ -590,50 +665,48 @@ def view_all_payments(all_payments):
     st.dataframe(payments_df, use_container_width=True)
 
 
-def view_payments_by_month(all_payments):
-    # Get all unique months from payment end dates
-    all_months = set()
-    for payment in all_payments:
-        month_key = payment['end_date'].strftime('%Y-%m')
-        all_months.add(month_key)
+def view_payments_by_month(active_loans_df):
+    # Months come straight from the due-date index
+    due_date_index = get_synced_due_date_index()
+    sorted_months = due_date_index.months()
     
-    if not all_months:
+    if not sorted_months:
         st.info("No hay pagos disponibles.")
         return
     
     # Month selection
-    sorted_months = sorted(list(all_months))
     selected_month = st.selectbox(
         "Selecciona un mes:",
         sorted_months,
         key="view_payments_month"
     )
     
-    # Filter payments for selected month
-    month_payments = [
-        p for p in all_payments 
-        if p['end_date'].strftime('%Y-%m') == selected_month
-    ]
+    # Payments for selected month
+    month_payments = collect_month_payments(active_loans_df, due_date_index, selected_month)
     
     if not month_payments:
         st.info(f"No hay pagos para el mes {selected_month}.")
         return
     
-    # Create summary statistics for the month
-    total_month_payments = len(month_payments)
-    paid_month_payments = len([p for p in month_payments if p['status'] == PaymentStatus.PAID.value])
-    pending_month_payments = total_month_payments - paid_month_payments
+    # Summary of the month, a lookup in the monthly collections aggregate
+    month_totals = monthly_collection_totals(
+        get_monthly_collections(get_table_version(CSVTable.LOAN_PATH)), start_month=selected_month, end_month=selected_month
+    )
     
     add_n_line_jumps(1)
     st.subheader(f"Pagos del mes {selected_month}")
     
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Total Pagos", total_month_payments)
-    with col2:
-        st.metric("Pagos Realizados", paid_month_payments)
-    with col3:
-        st.metric("Pagos Pendientes", pending_month_payments)
+    if not month_totals.empty:
+        month_totals = month_totals.iloc[0]
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Pagos", int(month_totals['count']))
+        with col2:
+            st.metric("Pagos Realizados", int(month_totals['paid_count']))
+        with col3:
+            st.metric("Pagos Pendientes", int(month_totals['pending_count']))
+        with col4:
+            st.metric("Monto Pendiente", f"${month_totals['pending_amount']:,.2f}")
     
     # Sort payments by status (pending first) and then by end_date
     month_payments_sorted = sorted(
@@ -654,6 +727,7 @@ def view_payments_by_month(all_payments):
             'Vehículo': f"{p['car_info']}",
             'Pago #': p['payment_id'],
             'Monto': f"${p['amount']:.2f}",
+            'Recargo': f"${p['late_fee']:.2f}",
             'Estado': "Pagado" if p['status'] == PaymentStatus.PAID.value else "Pendiente",
             'Vence': p['end_date'].strftime('%Y-%m-%d'),
             'Pagado': p['date_paid'].strftime('%Y-%m-%d') if p['date_paid'] else 'N/A'
@@ -674,7 +748,7 @@ def view_payments_by_month(all_payments):
         today = datetime.now().date()
         
         for i, payment in enumerate(pending_payments_for_month, 1):
-            days_until_due = (payment['end_date'].date() - today).days
+            days_until_due = -days_past_due(payment['end_date'], today)
             
             if days_until_due < 0:
                 status_icon = "🔴"
@@ -701,7 +775,7 @@ def view_payments_by_month(all_payments):
         reporte = col3.button("📊 Generar Reporte", key="generate_report")
         
         if atrasados:
-            overdue_clients = [p for p in pending_payments_for_month if (p['end_date'].date() - today).days < 0]
+            overdue_clients = [p for p in pending_payments_for_month if days_past_due(p['end_date'], today) > 0]
             if overdue_clients:
                 st.success(f"📞 Lista de llamadas generada para {len(overdue_clients)} clientes vencidos")
                 for client in overdue_clients:
@@ -710,7 +784,7 @@ def view_payments_by_month(all_payments):
                 st.info("No hay clientes vencidos este mes")
         
         if recordatorios:
-                due_soon = [p for p in pending_payments_for_month if (p['end_date'].date() - today).days <= 3]
+                due_soon = [p for p in pending_payments_for_month if days_past_due(p['end_date'], today) >= -3]
                 if due_soon:
                     st.success(f"📧 Recordatorios enviados a {len(due_soon)} clientes")
                     for client in due_soon:
@@ -724,6 +798,387 @@ def view_payments_by_month(all_payments):
                 st.write(f"• Total de pagos a recibir este mes: {total_month_payments}")
                 st.write(f"• Pagos realizados este mes: {paid_month_payments}")
                 st.write(f"• Pagos pendientes este mes: {pending_month_payments}")
-                st.write(f"• Clientes atrasados este mes: {len([p for p in pending_payments_for_month if (p['end_date'].date() - today).days < 0])}")
+                st.write(f"• Clientes atrasados este mes: {len([p for p in pending_payments_for_month if days_past_due(p['end_date'], today) > 0])}")
     else:
         st.success("🎉 ¡Excelente! Todos los pagos de este mes han sido realizados.")
+
+
+def read_receipts_table_or_warn():
+    """
+    The receipts table, or None (with a warning saying how to fix it) if it is missing or has the old format.
+    """
+    if get_table_version(CSVTable.PAYMENTS_PATH) == 0:
+        st.warning("La tabla de cobros no existe. Inicialízala con: python src/payments_src/db/csv_db/scripts/initialize_tables.py --payments")
+        return None
+    
+    try:
+        return read_payments_table()
+    except ValueError:
+        # created before the table held receipts, with the columns of a Payment
+        st.warning("La tabla de cobros tiene el formato anterior. Reinicialízala con: python src/payments_src/db/csv_db/scripts/initialize_tables.py --payments --overwrite")
+        return None
+
+
+def has_receipt_allocations(loan, payment_id):
+    """
+    Whether the receipts recorded for the loan pay part of the installment; it is settled by the receipts,
+    so it can't be marked as paid by hand.
+    """
+    if get_table_version(CSVTable.PAYMENTS_PATH) == 0:
+        return False
+    
+    try:
+        receipts_df = read_payments_table()
+    except ValueError:
+        return False
+    
+    loan_receipts = receipts_df[receipts_df["loan_id"] == loan.loan_id]
+    if loan_receipts.empty:
+        return False
+    
+    installments = allocate_receipts(build_installment_components(pd.DataFrame([loan.to_json_dict()])), loan_receipts).installments
+    return bool(installments.loc[installments["payment_id"] == payment_id, "allocated_minor"].sum() > 0)
+
+
+def record_receipt_section():
+    st.header("Registrar Cobro")
+    
+    receipts_df = read_receipts_table_or_warn()
+    if receipts_df is None:
+        return
+    
+    active_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
+    active_loans_df = filter_loans_by_search(active_loans_df, key="receipt_search")
+    
+    if active_loans_df.empty:
+        st.warning("No se encontraron préstamos")
+        return
+    
+    active_loans_df["display_name"] = active_loans_df.apply(
+        lambda x: f"{x['loan_id']} - {x['loan_readable_code']} - {x['borrower'].nombre_cliente} ({x['car'].marca_auto} {x['car'].modelo_auto})",
+        axis=1
+    )
+    selected_borrower = st.selectbox("Cliente:", active_loans_df["display_name"].tolist(), key="receipt_borrower")
+    selected_loan_row = active_loans_df[active_loans_df["display_name"] == selected_borrower].iloc[0]
+    selected_loan = Loan(**selected_loan_row.to_dict())
+    show_pending_loan_jobs(selected_loan.loan_id)
+    
+    col1, col2, col3 = st.columns(3)
+    amount = col1.number_input("Monto recibido:", min_value=0.0, value=float(selected_loan.payment_list.pago_mensual), step=0.01, key="receipt_amount")
+    date_received = col2.date_input("Fecha del cobro:", value=datetime.now().date(), key="receipt_date")
+    reference = col3.text_input("Referencia:", key="receipt_reference")
+    
+    if st.button("Registrar Cobro", key="receipt_confirm"):
+        if amount <= 0:
+            st.error("El monto debe ser mayor a 0")
+            return
+        
+        receipt = ReceiptFactory.create_receipt(
+            receipt_id=int(receipts_df["receipt_id"].max()) + 1 if not receipts_df.empty else 1,
+            loan_id=selected_loan.loan_id,
+            date_received=datetime.combine(date_received, datetime.min.time()),
+            amount=amount,
+            reference=reference or None,
+        )
+        # the receipt is numbered when the job runs, and the installments it pays are marked as paid
+        job = get_job_queue().submit(persist_receipts, [receipt], description=f"Registrar cobro de {selected_loan.loan_readable_code}", loan_ids=[selected_loan.loan_id])
+        
+        st.success("Registro del cobro en curso. Puedes seguirlo en las tareas en segundo plano.")
+        wait_for_save(job)
+        st.rerun()
+    
+    loan_receipts = receipts_df[receipts_df["loan_id"] == selected_loan.loan_id]
+    allocation = allocate_receipts(
+        build_installment_components(pd.DataFrame([selected_loan.to_json_dict()])), loan_receipts
+    )
+    show_receipt_allocation(loan_receipts, allocation)
+
+
+def show_receipt_allocation(loan_receipts, allocation):
+    """
+    Receipts of a loan and how they pay its installments; the installment status shown is the one derived
+    from the receipts.
+    """
+    st.subheader("Cobros Registrados")
+    if loan_receipts.empty:
+        st.info("No hay cobros registrados para este préstamo.")
+    else:
+        receipts_view = pd.DataFrame({
+            'Cobro #': loan_receipts['receipt_id'],
+            'Fecha': loan_receipts['date_received'].dt.strftime('%Y-%m-%d'),
+            'Monto': loan_receipts['amount_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+            'Referencia': loan_receipts['reference'].fillna(''),
+        })
+        st.dataframe(receipts_view, use_container_width=True, hide_index=True)
+    
+    credit_minor = allocation.allocations.loc[allocation.allocations['component'] == AllocationComponent.CREDIT.value, 'amount_minor'].sum()
+    installments = allocation.installments.sort_values(['end_date', 'payment_id'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Saldo Pendiente", f"${from_minor_units(int(installments['outstanding_minor'].sum())):,.2f}")
+    with col2:
+        st.metric("Saldo a Favor", f"${from_minor_units(int(credit_minor)):,.2f}")
+    
+    status_labels = {
+        PaymentStatus.PAID.value: "Pagado",
+        PaymentStatus.PENDING.value: "Pendiente",
+        PaymentStatus.CANCELLED.value: "Cancelado",
+    }
+    st.subheader("Aplicación a las Cuotas")
+    installments_view = pd.DataFrame({
+        'Pago #': installments['payment_id'],
+        'Vence': installments['end_date'].dt.strftime('%Y-%m-%d'),
+        'Recargo': installments['fee_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+        'Interés': installments['interest_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+        'Capital': installments['principal_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+        'Aplicado': installments['allocated_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+        'Saldo': installments['outstanding_minor'].map(lambda amount: f"${from_minor_units(amount):.2f}"),
+        'Estado': [
+            "Parcial" if status == PaymentStatus.PENDING.value and allocated > 0 else status_labels[status]
+            for status, allocated in zip(installments['derived_status'], installments['allocated_minor'])
+        ],
+        'Pagado': installments['derived_date_paid'].dt.strftime('%Y-%m-%d').fillna(''),
+    })
+    st.dataframe(installments_view, use_container_width=True, hide_index=True)
+
+
+def reconcile_bank_section():
+    st.header("Conciliar Extracto Bancario")
+    st.write("Sube el extracto exportado del banco en CSV. Cada crédito se compara con las cuotas pendientes por código de préstamo, teléfono y nombre del cliente, monto y fecha de vencimiento.")
+    
+    receipts_df = read_receipts_table_or_warn()
+    if receipts_df is None:
+        return
+    
+    statement_file = st.file_uploader("Extracto bancario (CSV):", type=["csv"], key="bank_statement_file")
+    col1, col2, col3 = st.columns(3)
+    sep = col1.selectbox("Separador de columnas:", [",", ";"], key="bank_statement_sep")
+    decimal = col2.selectbox("Separador decimal:", [".", ","], key="bank_statement_decimal")
+    dayfirst = col3.checkbox("Fechas en formato día/mes/año", value=True, key="bank_statement_dayfirst")
+    
+    if statement_file is None:
+        st.session_state.pop("bank_reconciliation", None)
+        return
+    
+    if st.button("Buscar Coincidencias", key="bank_reconcile_search"):
+        try:
+            st.session_state["bank_reconciliation"] = reconcile_bank_statement(
+                statement_file,
+                read_active_loans_table(),
+                receipts_df,
+                sep=sep,
+                decimal=decimal,
+                thousands="." if decimal == "," else None,
+                dayfirst=dayfirst,
+            )
+        except ValueError as e:
+            st.error(f"No se pudo leer el extracto: {e}")
+            return
+    
+    matches = st.session_state.get("bank_reconciliation")
+    if matches is not None:
+        show_reconciliation_matches(matches, receipts_df)
+
+
+def show_reconciliation_matches(matches, receipts_df):
+    """
+    Proposed matches of a bank statement for the operator to review; the accepted ones are recorded as
+    receipts in a background job, which also marks the installments they pay as paid.
+    """
+    matched = matches[matches["loan_id"].notna()]
+    unmatched = matches[matches["loan_id"].isna() & ~matches["duplicate"]]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Créditos en el Extracto", len(matches))
+    with col2:
+        st.metric("Con Coincidencia", len(matched))
+    with col3:
+        st.metric("Sin Coincidencia", len(unmatched))
+    with col4:
+        st.metric("Ya Registrados", int(matches["duplicate"].sum()))
+    
+    st.subheader("Coincidencias Propuestas")
+    if matched.empty:
+        st.info("Ningún movimiento coincide con una cuota pendiente.")
+    else:
+        st.write(f"Se marcan como aceptadas las coincidencias con confianza de al menos {AUTO_ACCEPT_CONFIDENCE:.0%}. Revisa el resto antes de registrar.")
+        matches_view = pd.DataFrame({
+            'Aceptar': matched['confidence'] >= AUTO_ACCEPT_CONFIDENCE,
+            'Línea': matched['line'],
+            'Fecha': matched['date'].dt.strftime('%Y-%m-%d'),
+            'Monto': matched['amount_minor'].map(lambda amount: f"${from_minor_units(amount):,.2f}"),
+            'Descripción': matched['description'],
+            'Préstamo': matched['loan_readable_code'],
+            'Cliente': matched['nombre_cliente'],
+            'Pago #': matched['payment_id'],
+            'Vence': matched['end_date'].dt.strftime('%Y-%m-%d'),
+            'Confianza': matched['confidence'],
+            'Evidencia': matched['evidence'],
+        })
+        edited_view = st.data_editor(
+            matches_view,
+            column_config={"Confianza": st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f")},
+            disabled=[column for column in matches_view.columns if column != 'Aceptar'],
+            use_container_width=True,
+            hide_index=True,
+            key="bank_reconciliation_editor",
+        )
+        accepted = matched[edited_view['Aceptar'].to_numpy()]
+        
+        if st.button(f"Registrar {len(accepted)} Cobros", key="bank_reconcile_confirm", disabled=accepted.empty):
+            first_receipt_id = int(receipts_df["receipt_id"].max()) + 1 if not receipts_df.empty else 1
+            receipts = receipts_from_matches(accepted, first_receipt_id)
+            # a single write of the receipts table and one of the loan table for the installments they pay
+            job = get_job_queue().submit(persist_receipts, receipts, description=f"Registrar {len(receipts)} cobros del extracto", loan_ids=[receipt.loan_id for receipt in receipts])
+            
+            del st.session_state["bank_reconciliation"]
+            st.success(f"Registro de {len(receipts)} cobros en curso. Puedes seguirlo en las tareas en segundo plano.")
+            wait_for_save(job)
+            st.rerun()
+    
+    if not unmatched.empty:
+        st.subheader("Movimientos Sin Coincidencia")
+        unmatched_view = pd.DataFrame({
+            'Línea': unmatched['line'],
+            'Fecha': unmatched['date'].dt.strftime('%Y-%m-%d'),
+            'Monto': unmatched['amount_minor'].map(lambda amount: f"${from_minor_units(amount):,.2f}"),
+            'Descripción': unmatched['description'],
+            'Referencia': unmatched['reference'],
+        })
+        st.dataframe(unmatched_view, use_container_width=True, hide_index=True)
+
+
+def restructure_loan_section():
+    st.header("Reestructurar Préstamo")
+    st.write("Las cuotas pendientes se cancelan y su saldo (capital pendiente y, si se capitalizan, sus recargos) se reparte en un nuevo cronograma. Las cuotas pagadas no cambian.")
+    
+    scope_col, _ = st.columns([1, 2])
+    scope = scope_col.selectbox("Aplicar a:", RestructureScope.list(), key="restructure_scope")
+    
+    if scope == RestructureScope.SINGLE_LOAN.value:
+        restructure_single_loan()
+    else:
+        restructure_dealership_loans()
+
+
+def restructure_single_loan():
+    active_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
+    active_loans_df = filter_loans_by_search(active_loans_df, key="restructure_search")
+    
+    if active_loans_df.empty:
+        st.warning("No se encontraron préstamos")
+        return
+    
+    active_loans_df["display_name"] = active_loans_df.apply(
+        lambda x: f"{x['loan_id']} - {x['loan_readable_code']} - {x['borrower'].nombre_cliente} ({x['car'].marca_auto} {x['car'].modelo_auto})",
+        axis=1
+    )
+    selected_borrower = st.selectbox("Cliente:", active_loans_df["display_name"].tolist(), key="restructure_borrower")
+    selected_loan_row = active_loans_df[active_loans_df["display_name"] == selected_borrower].iloc[0]
+    selected_loan = Loan(**selected_loan_row.to_dict())
+    show_pending_loan_jobs(selected_loan.loan_id)
+    payment_list = selected_loan.payment_list
+    
+    pending_payments = payment_list.pending_payments()
+    if not pending_payments:
+        st.info("Este préstamo no tiene cuotas pendientes.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cuotas Pendientes", len(pending_payments))
+    with col2:
+        st.metric("Capital Pendiente", f"${from_minor_units(payment_list.outstanding_principal_minor()):,.2f}")
+    with col3:
+        st.metric("Recargos Pendientes", f"${from_minor_units(sum(payment.late_fee_minor for payment in pending_payments)):,.2f}")
+    
+    st.subheader("Nuevas Condiciones")
+    col1, col2 = st.columns(2)
+    fecha_inicio = col1.date_input("Vencimiento de la primera cuota:", value=max(pending_payments[0].end_date.date(), datetime.now().date()), key="restructure_start")
+    num_pagos = col2.number_input("Cantidad de cuotas:", min_value=1, max_value=120, value=len(pending_payments), step=1, key="restructure_num_pagos")
+    tasa_interes = col1.number_input("Tasa de interés mensual:", min_value=0.0001, max_value=0.9999, value=float(payment_list.tasa_interes), step=0.005, format="%.4f", key="restructure_rate")
+    systems = AmortizationSystem.list()
+    sistema = col2.selectbox("Sistema de amortización:", systems, index=systems.index(AmortizationSystem(payment_list.sistema_amortizacion).value), key="restructure_system")
+    capitalize = st.checkbox("Capitalizar recargos (si no, se condonan)", value=True, key="restructure_capitalize")
+    motivo = st.text_input("Motivo:", key="restructure_reason")
+    
+    terms = dict(
+        fecha_inicio=datetime.combine(fecha_inicio, datetime.min.time()),
+        num_pagos=int(num_pagos),
+        tasa_interes=tasa_interes,
+        sistema_amortizacion=AmortizationSystem(sistema),
+        motivo=motivo or None,
+        capitalize_late_fees=capitalize,
+    )
+    try:
+        restructuring = payment_list.plan_restructuring(**terms)
+    except ValueError as e:
+        st.error(f"No se puede reestructurar este préstamo: {e}")
+        return
+    
+    st.subheader("Nuevo Cronograma")
+    st.write(f"Saldo a reestructurar: ${from_minor_units(restructuring.saldo_minor):,.2f}")
+    st.dataframe(
+        build_schedule_frame(
+            from_minor_units(restructuring.saldo_minor),
+            tasa_interes,
+            int(num_pagos),
+            AmortizationSystem(sistema),
+            terms["fecha_inicio"],
+            calendar=get_synced_business_calendar(),
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    
+    if st.button("Reestructurar", key="restructure_confirm"):
+        fecha = datetime.now()
+        calendar = get_synced_business_calendar()
+        payment_list.restructure(**terms, fecha=fecha, calendar=calendar)
+        
+        # the worker restructures the loan as it is stored by then, with the same terms
+        job = get_job_queue().submit(persist_loan_restructuring, selected_loan.loan_id, terms, fecha, calendar, description=f"Reestructurar préstamo {selected_loan.loan_readable_code}", loan_ids=[selected_loan.loan_id])
+        get_due_date_index().upsert_loan(selected_loan)
+        get_delinquency_tracker().upsert_loan(selected_loan)
+        
+        st.success(f"Préstamo {selected_loan.loan_readable_code} reestructurado: {restructuring.num_pagos} cuotas desde {fecha_inicio.strftime('%Y-%m-%d')}")
+        wait_for_save(job)
+        st.rerun()
+
+
+def restructure_dealership_loans():
+    dealerships_df = read_dealership_table()
+    if dealerships_df.empty:
+        st.warning("No hay automotoras registradas")
+        return
+    
+    dealership_names = [f"{name} ({code})" for name, code in zip(dealerships_df["name"], dealerships_df["dealership_code"])]
+    selected_dealership = st.selectbox("Automotora:", dealership_names, key="restructure_dealership")
+    dealership_id = int(dealerships_df["dealership_id"].iloc[dealership_names.index(selected_dealership)])
+    
+    loan_ids = dealership_loan_ids(read_active_loans_table(), dealership_id)
+    st.write(f"Préstamos activos de la automotora: {len(loan_ids)}")
+    
+    st.subheader("Política")
+    col1, col2 = st.columns(2)
+    grace_months = col1.number_input("Meses de gracia:", min_value=0, max_value=12, value=1, step=1, key="restructure_grace_months")
+    change_term = col2.checkbox("Cambiar la cantidad de cuotas", key="restructure_change_term")
+    num_pagos = col2.number_input("Cantidad de cuotas:", min_value=1, max_value=120, value=12, step=1, key="restructure_bulk_num_pagos", disabled=not change_term)
+    change_rate = col1.checkbox("Cambiar la tasa de interés", key="restructure_change_rate")
+    tasa_interes = col1.number_input("Tasa de interés mensual:", min_value=0.0001, max_value=0.9999, value=0.05, step=0.005, format="%.4f", key="restructure_bulk_rate", disabled=not change_rate)
+    capitalize = st.checkbox("Capitalizar recargos (si no, se condonan)", value=True, key="restructure_bulk_capitalize")
+    motivo = st.text_input("Motivo:", key="restructure_bulk_reason")
+    st.write("Las cuotas pendientes de cada préstamo se reemplazan por un nuevo cronograma que empieza los meses de gracia indicados después de su cuota pendiente más antigua, con su tasa y cantidad de cuotas pendientes salvo que se cambien.")
+    
+    if st.button(f"Reestructurar {len(loan_ids)} Préstamos", key="restructure_bulk_confirm", disabled=not loan_ids):
+        policy = RestructurePolicy(
+            grace_months=int(grace_months),
+            num_pagos=int(num_pagos) if change_term else None,
+            tasa_interes=tasa_interes if change_rate else None,
+            capitalize_late_fees=capitalize,
+        )
+        # a single write of the loan table, queued behind any pending loan update
+        get_job_queue().submit(persist_bulk_restructuring, loan_ids, policy, motivo or None, get_synced_business_calendar(), description=f"Reestructurar {len(loan_ids)} préstamos de {selected_dealership}", loan_ids=loan_ids)
+        st.success(f"Reestructuración de {len(loan_ids)} préstamos en curso. Puedes seguirla en las tareas en segundo plano.")
@@ -5,15 +5,8 @@ import pandas as pd
 
 from payments_src.db.csv_db.db_constants import CSVTable
 from payments_src.db.csv_db.db_operations import (
-    append_customers_table,
-    read_customers_table,
     read_dealership_table,
-    write_customers_table,
-    read_loan_table,
-    append_loan_table,
-    write_loan_table,
     read_and_expand_loans_table,
-    edit_loan_table_record
 )
 from payments_src.domain.borrowers import Borrower, BorrowerFactory
 from payments_src.domain.car import Car, CarFactory
@@ -23,7 +16,16 @@ from payments_src.domain.loans_enums import LoanStatus
 from payments_src.domain.payment_enums import Currency
 from payments_src.domain.payments import PaymentListFactory, PaymentList
 from payments_src.frontend.enums.enums_potential_borrowers import PagePotentialBorrowersActions, PotentialBorrowersTitle
-from payments_src.frontend.utils import add_n_line_jumps
+from payments_src.frontend.utils import (
+    add_n_line_jumps,
+    filter_loans_by_search,
+    get_document_storage,
+    get_job_queue,
+    get_loan_search_index,
+    get_synced_business_calendar,
+    get_thumbnail_cache,
+)
+from payments_src.operations.jobs.persistence_jobs import persist_loan_status, persist_new_loan
 from payments_src.operations.loans.loan_number_calculations import get_next_loan_readable_number, get_next_loan_id, get_next_borrower_id
 from payments_src.shared.pydantic_validation_utils import (
     get_field_input_widget_car,
@@ -45,6 +47,26 @@ def pretty_print_object(class_instance: object) -> None:
     wide_col.dataframe(display_df)
 
 
+def show_borrower_files(borrower_id: int) -> None:
+    file_groups = get_document_storage().get_file_groups(borrower_id)
+    files = [file for file_group in file_groups for file in file_group.files.values()]
+
+    if not files:
+        st.write("El cliente no tiene archivos")
+        return
+
+    thumbnail_cache = get_thumbnail_cache()
+    columns = st.columns(4)
+
+    for i, file in enumerate(files):
+        column = columns[i % len(columns)]
+        thumbnail_path = thumbnail_cache.get_thumbnail(file)
+
+        if thumbnail_path is not None:
+            column.image(thumbnail_path)
+        column.caption(f"{file.file_readable_name} ({(file.file_size or 0) / 1024:.0f} KB)")
+
+
 def list_loans_page():
     st.subheader("Mostrando todos los préstamos pendientes de aprobación")
 
@@ -150,11 +172,14 @@ def add_loan_page():
             field_value = get_field_input_widget_payment_list(field_name=field_name, field_info=field_info, key=f"form_{field_name}")
             field_value = field_value or None
             payment_list_form_data[field_name] = field_value
+        st.caption("Los vencimientos que caen en fin de semana o feriado pasan al día hábil siguiente (o al anterior, si el siguiente es del mes próximo).")
         
         
         st.subheader("Subir Archivos")
 
-        files = st.file_uploader("Subir archivos", type=["pdf", "jpg", "jpeg", "png"], key="files_uploader")
+        files = st.file_uploader(
+            "Subir archivos", type=["pdf", "jpg", "jpeg", "png"], accept_multiple_files=True, key="files_uploader"
+        )
         if (files is not None) and (not isinstance(files, list)):
             files = [files]
 
@@ -166,6 +191,9 @@ def add_loan_page():
                 st.error("Debe seleccionar una automotora para continuar!")
                 raise ValueError("Debe seleccionar una automotora para continuar!")
 
+            # ids are derived from the tables, so earlier writes still in the queue must land first
+            get_job_queue().wait_for_pending()
+
             borrower_form_data["borrower_id"] = get_next_borrower_id()
 
             # create a new directory for the new user in the database
@@ -180,13 +208,13 @@ def add_loan_page():
             new_borrower = Borrower(**borrower_form_data)
             new_car = Car(**car_form_data)
             dealership = Dealership(**selected_dealership_dict)
-            payment_list = PaymentListFactory.create_payment_list(**payment_list_form_data)
+            # due dates falling on weekends or holidays are moved to a business day
+            payment_list = PaymentListFactory.create_payment_list(
+                **payment_list_form_data, calendar=get_synced_business_calendar()
+            )
 
             loan_number = get_next_loan_readable_number(dealership.dealership_id)
 
-            borrower_table = read_customers_table()
-            loan_table = read_loan_table()
-
             # create a new loan with Pending status (default)
             new_loan = LoanFactory.create_loan(
                 loan_id=get_next_loan_id(),
@@ -198,23 +226,17 @@ def add_loan_page():
                 status=LoanStatus.POTENTIAL,
             )
 
-            os.makedirs(new_directory, exist_ok=False)
-
-            if files is not None:
-                for file in files:
-                    file_name = file.name
-                    file_path = os.path.join(new_directory, file_name)
-                    with open(file_path, "wb") as f:
-                        f.write(file.getvalue())
+            if files:
+                # files are streamed to disk in chunks on the storage thread pool
+                get_document_storage().upload_files(new_borrower.borrower_id, files)
+                st.info(f"Guardando {len(files)} archivo(s) en segundo plano")
 
-            # save the new borrower to the database
-            borrower_table = append_customers_table(borrower_table, new_borrower)
-            write_customers_table(borrower_table, overwrite=True)
-            
-            # save the new loan to the database
-            loan_table = append_loan_table(loan_table, new_loan)
-            write_loan_table(loan_table, overwrite=True)
-            st.success(f"Préstamo agregado exitosamente! ID: {new_borrower.borrower_id}")
+            # save the new borrower and loan to the database in the background
+            job = get_job_queue().submit(
+                persist_new_loan, new_borrower, new_loan, description=f"Guardar préstamo {new_loan.loan_readable_code}"
+            )
+            get_loan_search_index().upsert_loan(new_loan)
+            st.success(f"Préstamo enviado para guardar! ID: {new_borrower.borrower_id} (tarea #{job.job_id})")
 
 
 def view_loan_page():
@@ -225,6 +247,12 @@ def view_loan_page():
 
         return
 
+    loans_table_copy = filter_loans_by_search(loans_table_copy, key="potential_loans_search")
+
+    if loans_table_copy.empty:
+        st.warning("No se encontraron préstamos")
+        return
+
     loans_table_copy["display_name"] = loans_table_copy.apply(
         lambda x: 
             str(x["loan_id"]) + " - " 
@@ -254,6 +282,8 @@ def view_loan_page():
     pretty_print_object(loan_obj.dealership)
     st.subheader("Financiación")
     pretty_print_object(loan_obj.payment_list)
+    st.subheader("Archivos")
+    show_borrower_files(loan_obj.borrower.borrower_id)
 
     add_n_line_jumps(2)
     col1, col2, _ = st.columns([1, 1, 7])
@@ -268,17 +298,13 @@ def view_loan_page():
 
     if approve_loan:
         loan_obj.approve_loan()
-        clean_loan_table = read_loan_table()
-        clean_loan_table = edit_loan_table_record(clean_loan_table, loan_obj)
-        write_loan_table(clean_loan_table, overwrite=True)
+        get_job_queue().submit(persist_loan_status, loan_obj.loan_id, LoanStatus.APPROVED, description=f"Aprobar préstamo {loan_obj.loan_readable_code}")
 
         st.success(f"Préstamo Aprobado! ID Financiación: {loan_obj.loan_id} | ID Cliente {loan_obj.borrower.borrower_id} | Nombre: {loan_obj.borrower.nombre_cliente}")
 
     if reject_loan:
         loan_obj.reject_loan()
-        clean_loan_table = read_loan_table()
-        clean_loan_table = edit_loan_table_record(clean_loan_table, loan_obj)
-        write_loan_table(clean_loan_table, overwrite=True)
+        get_job_queue().submit(persist_loan_status, loan_obj.loan_id, LoanStatus.REJECTED, description=f"Rechazar préstamo {loan_obj.loan_readable_code}")
         st.warning(
             f"Préstamo Rechazado! ID Financiación: {loan_obj.loan_id} | ID Cliente {loan_obj.borrower.borrower_id} | Nombre: {loan_obj.borrower.nombre_cliente}"
         )
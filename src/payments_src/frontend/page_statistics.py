@@ -6,11 +6,37 @@ from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from collections import defaultdict
 
-from payments_src.db.csv_db.db_operations import read_and_expand_loans_table, read_loan_table
+from payments_src.db.csv_db.db_operations import get_table_version, read_and_expand_loans_table, read_loan_table
+from payments_src.domain.fx_rates import FX_BASE_CURRENCY
 from payments_src.domain.loans_enums import LoanStatus
-from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.domain.payment_enums import Currency, PaymentStatus
 from payments_src.domain.loans import Loan
-from payments_src.frontend.utils import add_n_line_jumps
+from payments_src.domain.money import from_minor_units, to_minor_units
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.operations.analytics.currency_analytics import ReportingCurrencyAnalytics, build_analytics_frames
+from payments_src.operations.analytics.monthly_collections import monthly_collection_totals
+from payments_src.operations.analytics.cash_flow_simulation import (
+    build_simulation_inputs,
+    collection_bands,
+    estimate_loan_risk,
+    simulate_collections,
+)
+from payments_src.operations.analytics.loan_yields import (
+    build_loan_cash_flows,
+    compute_loan_yields,
+    portfolio_npv,
+    portfolio_xirr,
+)
+from payments_src.frontend.utils import (
+    add_n_line_jumps,
+    get_cohort_analysis,
+    get_duckdb_analytics,
+    get_monthly_collections,
+    get_reporting_currency_analytics,
+    get_simulation_executor,
+    get_synced_delinquency_tracker,
+    get_synced_fx_rate_store,
+)
 
 
 def statistics_page():
@@ -19,48 +45,168 @@ def statistics_page():
     # Get all loans data
     all_loans_df = read_and_expand_loans_table(LoanStatus.POTENTIAL)  # This gets all loans regardless of status
     approved_loans_df = read_and_expand_loans_table(LoanStatus.APPROVED)
+    # SQL backend for the aggregations when duckdb is installed, Python loops otherwise
+    analytics = get_duckdb_analytics()
     
     if approved_loans_df.empty:
         st.info("No hay datos de préstamos disponibles.")
         return
     
+    analytics = select_reporting_currency(all_loans_df, analytics)
+    
     # Create tabs for different statistics
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 Resumen General", "💰 Dinero Pendiente", "📅 Análisis Mensual", "💼 Proyecciones de Inversión"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["📈 Resumen General", "💰 Dinero Pendiente", "📅 Análisis Mensual", "💼 Proyecciones de Inversión", "🌱 Cosechas"]
+    )
     
     with tab1:
-        general_statistics_tab(all_loans_df, approved_loans_df)
+        general_statistics_tab(all_loans_df, approved_loans_df, analytics)
     
     with tab2:
-        pending_money_tab(approved_loans_df)
+        pending_money_tab(approved_loans_df, analytics)
     
     with tab3:
-        monthly_analysis_tab(approved_loans_df)
+        monthly_analysis_tab(approved_loans_df, analytics)
     
     with tab4:
-        investment_projections_tab(approved_loans_df)
+        investment_projections_tab(approved_loans_df, analytics)
+    
+    with tab5:
+        cohort_analysis_tab()
 
 
-def general_statistics_tab(all_loans_df, approved_loans_df):
-    st.header("📈 Resumen General")
+def cohort_analysis_tab():
+    st.header("🌱 Análisis de Cosechas")
+    st.write("Préstamos agrupados por el mes en que comenzaron.")
     
-    # Calculate acceptance rate
-    total_decided_loans = len(all_loans_df[all_loans_df['status'] != LoanStatus.POTENTIAL.value])
-    approved_loans_count = len(approved_loans_df)
-    rejected_loans_count = len(all_loans_df[all_loans_df['status'] == LoanStatus.REJECTED.value])
+    cohort_analysis = get_cohort_analysis(get_table_version(CSVTable.LOAN_PATH), date.today())
     
-    if total_decided_loans > 0:
-        acceptance_rate = (approved_loans_count / total_decided_loans) * 100
+    cohort_summary = cohort_analysis.cohort_summary
+    if cohort_summary.empty:
+        st.info("No hay préstamos aprobados para analizar.")
+        return
+    
+    st.subheader("Resumen por Cosecha")
+    st.dataframe(
+        cohort_summary.assign(porcentaje_cobrado=(cohort_summary['porcentaje_cobrado'] * 100).round(1)).rename(
+            columns={
+                'cohorte': 'Cosecha',
+                'prestamos': 'Préstamos',
+                'monto_prestado': 'Monto Prestado',
+                'monto_esperado': 'Monto Esperado',
+                'monto_cobrado': 'Monto Cobrado',
+                'porcentaje_cobrado': 'Cobrado (%)',
+            }
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+    
+    st.subheader("Curvas de Cobranza")
+    curves_df = (cohort_analysis.collection_curves * 100).reset_index().melt(
+        id_vars='cohorte', var_name='mes', value_name='cobrado'
+    ).dropna()
+    fig = px.line(
+        curves_df,
+        x='mes',
+        y='cobrado',
+        color='cohorte',
+        labels={'mes': 'Meses desde el inicio', 'cobrado': 'Cobrado acumulado (%)', 'cohorte': 'Cosecha'},
+        title="Porcentaje cobrado acumulado por cosecha",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Matriz de Transición de Morosidad")
+    st.write("Proporción de préstamos que pasan de cada estado al cierre de un mes a cada estado al cierre del siguiente.")
+    roll_rates = cohort_analysis.roll_rates
+    if roll_rates.empty:
+        st.info("Todavía no hay cierres de mes suficientes para calcular transiciones.")
     else:
-        acceptance_rate = 0
+        st.dataframe((roll_rates * 100).round(1), use_container_width=True)
+
+
+def select_reporting_currency(all_loans_df, analytics):
+    """
+    With an FX rates table, lets the user pick the currency every amount is converted to and returns the
+    converted analytics. Without one, amounts of different currencies are added as they are.
+    """
+    loan_currencies = {payment_list.moneda.value for payment_list in all_loans_df['payment_list']}
+    fx_rate_store = get_synced_fx_rate_store()
+    
+    if fx_rate_store is None:
+        if len(loan_currencies) > 1:
+            st.warning(
+                "Hay préstamos en varias monedas y no hay tabla de tasas de cambio: los montos se suman sin convertir."
+            )
+        return analytics
+    
+    if not fx_rate_store.has_rates_for(loan_currencies):
+        missing = sorted(loan_currencies - {currency.value for currency in fx_rate_store.currencies()})
+        st.warning(f"Faltan tasas de cambio para {', '.join(missing)}: los montos se suman sin convertir.")
+        return analytics
+    
+    short_col, _ = st.columns([1, 3])
+    currencies = sorted(fx_rate_store.currencies(), key=lambda currency: currency.value)
+    reporting_currency = short_col.selectbox(
+        "Moneda de reporte",
+        currencies,
+        index=currencies.index(FX_BASE_CURRENCY),
+        format_func=lambda currency: currency.value,
+        key="statistics_reporting_currency",
+    )
     
-    # Calculate total investment
-    total_investment = sum(loan['payment_list'].dinero_total_prestado for _, loan in approved_loans_df.iterrows())
+    try:
+        analytics = get_reporting_currency_analytics(
+            reporting_currency, get_table_version(CSVTable.LOAN_PATH), get_table_version(CSVTable.FX_RATES_PATH)
+        )
+    except ValueError as e:
+        st.warning(f"No se pudieron convertir los montos: {e}")
+        return analytics
     
-    # Calculate total expected revenue
-    total_expected_revenue = 0
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        total_expected_revenue += sum(payment.amount for payment in loan.payment_list.payments.values())
+    st.caption(f"Montos expresados en {reporting_currency.value}")
+    return analytics
+
+
+def general_statistics_tab(all_loans_df, approved_loans_df, analytics=None):
+    st.header("📈 Resumen General")
+    
+    if analytics is not None:
+        acceptance = analytics.acceptance_summary()
+        total_decided_loans = acceptance['decided']
+        approved_loans_count = acceptance['approved']
+        rejected_loans_count = acceptance['rejected']
+        acceptance_rate = acceptance['acceptance_rate']
+        
+        totals = analytics.portfolio_totals()
+        total_investment = totals['total_investment']
+        total_expected_revenue = totals['total_expected']
+        
+        status_counts = analytics.loan_status_counts().set_index('status')['count']
+    else:
+        # Calculate acceptance rate
+        total_decided_loans = len(all_loans_df[all_loans_df['status'] != LoanStatus.POTENTIAL.value])
+        approved_loans_count = len(approved_loans_df)
+        rejected_loans_count = len(all_loans_df[all_loans_df['status'] == LoanStatus.REJECTED.value])
+        
+        if total_decided_loans > 0:
+            acceptance_rate = (approved_loans_count / total_decided_loans) * 100
+        else:
+            acceptance_rate = 0
+        
+        # Calculate total investment (money is summed in integer minor units)
+        total_investment = from_minor_units(
+            sum(to_minor_units(loan['payment_list'].dinero_total_prestado) for _, loan in approved_loans_df.iterrows())
+        )
+        
+        # Calculate total expected revenue (installments cancelled by a restructuring are not owed)
+        total_expected_revenue = 0
+        for _, loan_row in approved_loans_df.iterrows():
+            loan = Loan(**loan_row.to_dict())
+            total_expected_revenue += loan.payment_list.calculate_total_money(PaymentStatus.PENDING).amount_minor
+            total_expected_revenue += loan.payment_list.calculate_total_money(PaymentStatus.PAID).amount_minor
+        total_expected_revenue = from_minor_units(total_expected_revenue)
+        
+        status_counts = all_loans_df['status'].value_counts()
     
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -96,7 +242,6 @@ def general_statistics_tab(all_loans_df, approved_loans_df):
     # Status distribution chart
     st.subheader("Distribución de Estados de Préstamos")
     
-    status_counts = all_loans_df['status'].value_counts()
     status_labels = {
         LoanStatus.POTENTIAL.value: "Potenciales",
         LoanStatus.APPROVED.value: "Aprobados", 
@@ -111,20 +256,21 @@ def general_statistics_tab(all_loans_df, approved_loans_df):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def pending_money_tab(approved_loans_df):
+def pending_money_tab(approved_loans_df, analytics=None):
     st.header("💰 Dinero Pendiente de Cobro")
     
     # Overall pending money
-    total_pending = 0
-    total_paid = 0
-    
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            if payment.status == PaymentStatus.PENDING.value:
-                total_pending += payment.amount
-            else:
-                total_paid += payment.amount
+    if isinstance(analytics, ReportingCurrencyAnalytics):
+        totals = analytics.portfolio_totals()
+        total_pending = totals['total_pending']
+        total_paid = totals['total_paid']
+        monthly_totals = analytics.monthly_totals()
+    else:
+        # amounts as they are: the monthly collections aggregate already has them per month
+        collections = get_monthly_collections(get_table_version(CSVTable.LOAN_PATH))
+        total_pending = from_minor_units(int(collections['pending_minor'].sum()))
+        total_paid = from_minor_units(int(collections['paid_minor'].sum()))
+        monthly_totals = monthly_collection_totals(collections)
     
     # Display overall metrics
     col1, col2, col3 = st.columns(3)
@@ -147,17 +293,9 @@ def pending_money_tab(approved_loans_df):
     all_months = set()
     monthly_data = defaultdict(lambda: {'pending': 0, 'paid': 0, 'total': 0})
     
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            month_key = payment.end_date.strftime('%Y-%m')
-            all_months.add(month_key)
-            monthly_data[month_key]['total'] += payment.amount
-            
-            if payment.status == PaymentStatus.PENDING.value:
-                monthly_data[month_key]['pending'] += payment.amount
-            else:
-                monthly_data[month_key]['paid'] += payment.amount
+    for row in monthly_totals.itertuples(index=False):
+        all_months.add(row.month)
+        monthly_data[row.month] = {'pending': row.pending_amount, 'paid': row.paid_amount, 'total': row.total_amount}
     
     if all_months:
         sorted_months = sorted(list(all_months))
@@ -217,7 +355,7 @@ def pending_money_tab(approved_loans_df):
         st.plotly_chart(fig, use_container_width=True)
 
 
-def monthly_analysis_tab(approved_loans_df):
+def monthly_analysis_tab(approved_loans_df, analytics=None):
     st.header("📅 Análisis de Pagos Mensuales")
     
     # Time window selection
@@ -247,19 +385,23 @@ def monthly_analysis_tab(approved_loans_df):
     # Collect monthly payment data
     monthly_payments = defaultdict(lambda: {'count': 0, 'total_amount': 0, 'pending_count': 0, 'pending_amount': 0})
     
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            payment_month = payment.end_date.strftime('%Y-%m')
-            
-            # Check if payment is within our analysis window
-            if start_date <= payment.end_date.date() <= end_date:
-                monthly_payments[payment_month]['count'] += 1
-                monthly_payments[payment_month]['total_amount'] += payment.amount
-                
-                if payment.status == PaymentStatus.PENDING.value:
-                    monthly_payments[payment_month]['pending_count'] += 1
-                    monthly_payments[payment_month]['pending_amount'] += payment.amount
+    if isinstance(analytics, ReportingCurrencyAnalytics):
+        monthly_totals = analytics.monthly_totals(start_date, end_date)
+    else:
+        # whole months from the monthly collections aggregate
+        monthly_totals = monthly_collection_totals(
+            get_monthly_collections(get_table_version(CSVTable.LOAN_PATH)),
+            start_month=start_date.strftime('%Y-%m'),
+            end_month=end_date.strftime('%Y-%m'),
+        )
+    
+    for row in monthly_totals.itertuples(index=False):
+        monthly_payments[row.month] = {
+            'count': row.count,
+            'total_amount': row.total_amount,
+            'pending_count': row.pending_count,
+            'pending_amount': row.pending_amount,
+        }
     
     if monthly_payments:
         # Create DataFrame for analysis
@@ -354,11 +496,128 @@ def monthly_analysis_tab(approved_loans_df):
         st.info("No hay pagos en el período seleccionado.")
 
 
-def investment_projections_tab(approved_loans_df):
+def portfolio_yield_section(analytics=None):
+    """
+    XIRR of every approved loan from its actual cash flows (payment dates for paid installments, due dates for
+    the rest), the XIRR of the whole portfolio and the present value of what is still pending.
+    """
+    st.subheader("Rendimiento")
+    
+    if analytics is not None:
+        loans_frame, installments_frame = analytics.loans_frame(), analytics.installments_frame()
+    else:
+        loans_frame, installments_frame = build_analytics_frames(read_loan_table())
+    
+    cash_flows = build_loan_cash_flows(loans_frame, installments_frame)
+    loan_yields = compute_loan_yields(cash_flows)
+    
+    short_col, _ = st.columns([1, 3])
+    discount_rate_perc = short_col.number_input(
+        "Tasa de descuento anual (%)", min_value=0.0, value=10.0, step=1.0, key="portfolio_discount_rate"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("TIR Cartera (anual)", f"{portfolio_xirr(cash_flows, loans_frame) * 100:.1f}%")
+    
+    with col2:
+        median_xirr = loan_yields['xirr'].median()
+        st.metric("TIR Mediana por Préstamo", f"{median_xirr * 100:.1f}%" if pd.notna(median_xirr) else "-")
+    
+    with col3:
+        npv = portfolio_npv(installments_frame, discount_rate_perc / 100, date.today())
+        st.metric("Valor Presente Pendiente", f"${npv:,.2f}", f"Descontado al {discount_rate_perc:.1f}% anual")
+    
+    if loan_yields['xirr'].notna().any():
+        fig = px.histogram(
+            loan_yields.dropna(subset=['xirr']).assign(xirr=lambda df: df['xirr'] * 100),
+            x='xirr',
+            nbins=30,
+            labels={'xirr': 'TIR anual (%)'},
+            title="Distribución de la TIR por Préstamo",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def collection_simulation_section(analytics=None):
+    """
+    Monte Carlo bands of the monthly collections: late and default probabilities estimated per loan from its
+    history, scenarios run in parallel on the simulation process pool. Only runs when asked to, and the result
+    is kept in the session until run again.
+    """
+    st.subheader("Simulación de Cobranza")
+    
+    short_col1, short_col2, _ = st.columns([1, 1, 2])
+    num_scenarios = short_col1.number_input(
+        "Escenarios", min_value=100, max_value=100_000, value=2000, step=500, key="simulation_num_scenarios"
+    )
+    seed = short_col2.number_input("Semilla", min_value=0, value=0, step=1, key="simulation_seed")
+    
+    if st.button("Simular", key="run_collection_simulation"):
+        if analytics is not None:
+            loans_frame, installments_frame = analytics.loans_frame(), analytics.installments_frame()
+        else:
+            loans_frame, installments_frame = build_analytics_frames(read_loan_table())
+        
+        today = date.today()
+        with st.spinner("Simulando escenarios..."):
+            loan_risk = estimate_loan_risk(loans_frame, installments_frame, today)
+            inputs = build_simulation_inputs(installments_frame, loan_risk, today)
+            collections = simulate_collections(
+                inputs, num_scenarios=int(num_scenarios), seed=int(seed), executor=get_simulation_executor()
+            )
+        st.session_state["collection_simulation"] = collection_bands(inputs, collections)
+    
+    bands = st.session_state.get("collection_simulation")
+    if bands is None:
+        st.info("Presione 'Simular' para estimar la cobranza mensual con incertidumbre.")
+        return
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=bands['mes'], y=bands['p95'], mode='lines', line=dict(width=0), showlegend=False))
+    fig.add_trace(go.Scatter(
+        x=bands['mes'], y=bands['p5'], mode='lines', line=dict(width=0), fill='tonexty',
+        fillcolor='rgba(70, 130, 180, 0.2)', name='P5 - P95'
+    ))
+    fig.add_trace(go.Scatter(x=bands['mes'], y=bands['p75'], mode='lines', line=dict(width=0), showlegend=False))
+    fig.add_trace(go.Scatter(
+        x=bands['mes'], y=bands['p25'], mode='lines', line=dict(width=0), fill='tonexty',
+        fillcolor='rgba(70, 130, 180, 0.4)', name='P25 - P75'
+    ))
+    fig.add_trace(go.Scatter(
+        x=bands['mes'], y=bands['p50'], mode='lines', name='Mediana', line=dict(color='steelblue', width=3)
+    ))
+    fig.add_trace(go.Scatter(
+        x=bands['mes'], y=bands['programado'], mode='lines', name='Programado', line=dict(color='gray', dash='dash')
+    ))
+    fig.update_layout(
+        title="Cobranza Mensual Simulada",
+        xaxis_title="Mes",
+        yaxis_title="Cobranza ($)",
+        hovermode='x unified'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Cobranza Programada", f"${bands['programado'].sum():,.2f}")
+    with col2:
+        expected = bands['media'].sum()
+        shortfall = expected - bands['programado'].sum()
+        st.metric("Cobranza Esperada", f"${expected:,.2f}", f"${shortfall:,.2f}")
+
+
+def investment_projections_tab(approved_loans_df, analytics=None):
     st.header("💼 Proyecciones de Inversión")
     
     # Current investment calculation
-    total_investment = sum(loan['payment_list'].dinero_total_prestado for _, loan in approved_loans_df.iterrows())
+    if analytics is not None:
+        total_investment = analytics.portfolio_totals()['total_investment']
+    else:
+        total_investment = from_minor_units(
+            sum(to_minor_units(loan['payment_list'].dinero_total_prestado) for _, loan in approved_loans_df.iterrows())
+        )
     
     # Projection date selection
     col1, col2 = st.columns(2)
@@ -377,18 +636,27 @@ def investment_projections_tab(approved_loans_df):
     projected_money = 0
     total_expected_revenue = 0
     
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            total_expected_revenue += payment.amount
-            
-            # If payment is due before or on projection date, add to projected money
-            if payment.end_date.date() <= projection_date:
-                if payment.status == PaymentStatus.PAID.value:
-                    projected_money += payment.amount
-                else:
-                    # Assume pending payments will be paid by projection date
-                    projected_money += payment.amount
+    if analytics is not None:
+        total_expected_revenue = analytics.portfolio_totals()['total_expected']
+        # Assume pending payments will be paid by projection date
+        projected_money = analytics.amount_due_until(projection_date)
+    else:
+        for _, loan_row in approved_loans_df.iterrows():
+            loan = Loan(**loan_row.to_dict())
+            for payment in loan.payment_list.payments.values():
+                if payment.status == PaymentStatus.CANCELLED.value:
+                    continue
+                total_expected_revenue += payment.amount_minor
+                
+                # If payment is due before or on projection date, add to projected money
+                if payment.end_date.date() <= projection_date:
+                    if payment.status == PaymentStatus.PAID.value:
+                        projected_money += payment.amount_minor
+                    else:
+                        # Assume pending payments will be paid by projection date
+                        projected_money += payment.amount_minor
+        total_expected_revenue = from_minor_units(total_expected_revenue)
+        projected_money = from_minor_units(projected_money)
     
     # Calculate revenue
     projected_revenue = projected_money - total_investment
@@ -439,12 +707,18 @@ def investment_projections_tab(approved_loans_df):
         current_date += relativedelta(months=1)
     
     # Fill in actual and projected payments
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            payment_month = payment.end_date.strftime('%Y-%m')
-            if payment_month in monthly_projections:
-                monthly_projections[payment_month] += payment.amount
+    if analytics is not None:
+        for row in analytics.monthly_totals().itertuples(index=False):
+            if row.month in monthly_projections:
+                monthly_projections[row.month] += row.total_amount
+    else:
+        for _, loan_row in approved_loans_df.iterrows():
+            loan = Loan(**loan_row.to_dict())
+            for payment in loan.payment_list.payments.values():
+                payment_month = payment.end_date.strftime('%Y-%m')
+                if payment_month in monthly_projections and payment.status != PaymentStatus.CANCELLED.value:
+                    monthly_projections[payment_month] += payment.amount_minor
+        monthly_projections = {month: from_minor_units(amount) for month, amount in monthly_projections.items()}
     
     # Create projection chart
     projection_df = pd.DataFrame([
@@ -488,6 +762,10 @@ def investment_projections_tab(approved_loans_df):
     
     st.plotly_chart(fig2, use_container_width=True)
     
+    portfolio_yield_section(analytics)
+    
+    collection_simulation_section(analytics)
+    
     # Risk analysis
     st.subheader("Análisis de Riesgo")
     
@@ -496,12 +774,18 @@ def investment_projections_tab(approved_loans_df):
     overdue_payments = 0
     overdue_amount = 0
     
-    for _, loan_row in approved_loans_df.iterrows():
-        loan = Loan(**loan_row.to_dict())
-        for payment in loan.payment_list.payments.values():
-            if payment.status == PaymentStatus.PENDING.value and payment.end_date.date() < today:
-                overdue_payments += 1
-                overdue_amount += payment.amount
+    if analytics is not None:
+        overdue = analytics.overdue_summary(today)
+        overdue_payments = overdue['overdue_payments']
+        overdue_amount = overdue['overdue_amount']
+    else:
+        for _, loan_row in approved_loans_df.iterrows():
+            loan = Loan(**loan_row.to_dict())
+            for payment in loan.payment_list.payments.values():
+                if payment.status == PaymentStatus.PENDING.value and payment.end_date.date() < today:
+                    overdue_payments += 1
+                    overdue_amount += payment.amount_minor
+        overdue_amount = from_minor_units(overdue_amount)
     
     col1, col2 = st.columns(2)
     
@@ -516,3 +800,54 @@ def investment_projections_tab(approved_loans_df):
         st.warning(f"⚠️ {risk_percentage:.1f}% de los ingresos esperados están en riesgo por pagos vencidos.")
     else:
         st.success("✅ No hay pagos vencidos. Excelente gestión de cobros.")
+    
+    delinquency_section(today)
+
+
+def delinquency_section(as_of):
+    """
+    Aging buckets, portfolio at risk and the breakdown per dealership, from the incrementally maintained tracker.
+    Amounts are in each loan's own currency.
+    """
+    st.subheader("Morosidad")
+    
+    tracker = get_synced_delinquency_tracker()
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Saldo Pendiente", f"${tracker.outstanding_balance():,.2f}")
+    
+    with col2:
+        st.metric("PAR30", f"{tracker.portfolio_at_risk(as_of, 30) * 100:.1f}%")
+    
+    with col3:
+        st.metric("PAR90", f"{tracker.portfolio_at_risk(as_of, 90) * 100:.1f}%")
+    
+    aging_df = tracker.aging_buckets(as_of).rename(
+        columns={
+            'tramo': 'Días de Atraso',
+            'cuotas': 'Cuotas Vencidas',
+            'monto_vencido': 'Monto Vencido',
+            'prestamos': 'Préstamos',
+            'saldo_prestamos': 'Saldo de los Préstamos',
+        }
+    )
+    st.dataframe(aging_df, hide_index=True, use_container_width=True)
+    
+    breakdown_df = tracker.dealership_breakdown(as_of)
+    if not breakdown_df.empty:
+        st.write("**Por automotora:**")
+        breakdown_df = breakdown_df.drop(columns='dealership_id').assign(
+            par30=lambda df: (df['par30'] * 100).round(1),
+            par90=lambda df: (df['par90'] * 100).round(1),
+        ).rename(
+            columns={
+                'automotora': 'Automotora',
+                'saldo_pendiente': 'Saldo Pendiente',
+                'monto_vencido': 'Monto Vencido',
+                'par30': 'PAR30 (%)',
+                'par90': 'PAR90 (%)',
+            }
+        )
+        st.dataframe(breakdown_df, hide_index=True, use_container_width=True)
@@ -1,7 +1,7 @@
 import streamlit as st
 
 from payments_src.frontend.enums.enums_sidebar import SidebarOptions, SidebarTitle, SidebarQuickAccess
-from payments_src.frontend.utils import add_n_line_jumps_to_object
+from payments_src.frontend.utils import add_n_line_jumps_to_object, show_background_jobs
 from payments_src.operations.payments.monthly_payment_calculations import calculate_monthly_payment
 
 
@@ -33,5 +33,8 @@ def create_main_sidebar():
 
     elif quick_access_option == SidebarQuickAccess.OCULTAR.value:
         st.sidebar.write("")
+
+    add_n_line_jumps_to_object(st.sidebar, 2)
+    show_background_jobs(st.sidebar)
     
     return selected_option
@@ -1,5 +1,39 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable, Optional
+
+import pandas as pd
 import streamlit as st
 
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_operations import (
+    get_table_version,
+    read_active_loans_table,
+    read_fx_rates_table,
+    read_holidays_table,
+    read_loan_table,
+    read_monthly_collections_table,
+)
+from payments_src.db.csv_db.document_storage import DocumentStorage
+from payments_src.db.csv_db.thumbnail_cache import ThumbnailCache
+from payments_src.domain.business_calendar import BusinessCalendar
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency
+from payments_src.operations.analytics.cohort_analysis import CohortAnalysis
+from payments_src.operations.analytics.currency_analytics import ReportingCurrencyAnalytics, build_analytics_frames
+from payments_src.operations.analytics.dealership_metrics import build_dealership_metrics
+from payments_src.operations.analytics.duckdb_analytics import DuckDBAnalytics, is_duckdb_available
+from payments_src.operations.fx.fx_rate_store import FXRateStore
+from payments_src.operations.jobs.job_enums import JobStatus
+from payments_src.operations.jobs.job_queue import JobHandle, JobQueue
+from payments_src.operations.jobs.persistence_jobs import LoanTableWrite
+from payments_src.operations.loans.loan_listing import LoanListing
+from payments_src.operations.payments.delinquency_tracker import DelinquencyTracker
+from payments_src.operations.payments.due_date_index import DueDateIndex
+from payments_src.operations.search.loan_search_index import LoanSearchIndex
+
 
 def add_n_line_jumps(n: int):
     for _ in range(n):
@@ -9,3 +43,289 @@ def add_n_line_jumps(n: int):
 def add_n_line_jumps_to_object(object: object, n: int):
     for _ in range(n):
         object.write("")
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    return JobQueue(max_workers=1)
+
+
+@st.cache_resource
+def get_simulation_executor() -> ProcessPoolExecutor:
+    """
+    Process pool, one worker per core, for the collection simulations of the statistics page.
+    """
+    # "spawn" avoids forking the (multi-threaded) Streamlit server process
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_resource
+def get_document_storage() -> DocumentStorage:
+    return DocumentStorage()
+
+
+@st.cache_resource
+def get_thumbnail_cache() -> ThumbnailCache:
+    return ThumbnailCache()
+
+
+@st.cache_resource
+def get_duckdb_analytics() -> Optional[DuckDBAnalytics]:
+    """
+    SQL analytics backend for the statistics page, or None when duckdb is not installed.
+    """
+    if not is_duckdb_available():
+        return None
+    return DuckDBAnalytics()
+
+
+@st.cache_resource
+def get_fx_rate_store() -> FXRateStore:
+    return FXRateStore()
+
+
+def get_synced_fx_rate_store() -> Optional[FXRateStore]:
+    """
+    Rates from the FX rates table, or None when the table has not been created.
+    """
+    version = get_table_version(CSVTable.FX_RATES_PATH)
+    if version == 0:
+        return None
+
+    store = get_fx_rate_store()
+    if store.version != version:
+        store.sync_with_rates_df(read_fx_rates_table())
+        store.version = version
+
+    return store
+
+
+@st.cache_resource(max_entries=1)
+def get_monthly_collections(loan_table_version: int) -> pd.DataFrame:
+    """
+    Monthly collections aggregate, read once per version of the loan table (only part of the cache key): the
+    aggregate is updated by every write of the loan table.
+    """
+    return read_monthly_collections_table()
+
+
+@st.cache_resource
+def get_business_calendar() -> BusinessCalendar:
+    return BusinessCalendar()
+
+
+def get_synced_business_calendar() -> BusinessCalendar:
+    """
+    Calendar with the holidays of the holidays table; without the table, due dates only skip weekends.
+    """
+    calendar = get_business_calendar()
+    version = get_table_version(CSVTable.HOLIDAYS_PATH)
+
+    if calendar.version != version:
+        calendar.sync_with_holidays_df(read_holidays_table())
+        calendar.version = version
+
+    return calendar
+
+
+@st.cache_resource(max_entries=3)
+def get_reporting_currency_analytics(
+    reporting_currency: Currency, loan_table_version: int, fx_rates_version: int
+) -> ReportingCurrencyAnalytics:
+    """
+    Statistics converted to `reporting_currency`, built once per currency and version of the loan and FX
+    tables (the versions are only part of the cache key).
+    """
+    analytics = get_duckdb_analytics()
+    if analytics is not None:
+        loans_frame, installments_frame = analytics.loans_frame(), analytics.installments_frame()
+    else:
+        loans_frame, installments_frame = build_analytics_frames(read_loan_table())
+
+    return ReportingCurrencyAnalytics(loans_frame, installments_frame, get_synced_fx_rate_store(), reporting_currency)
+
+
+@st.cache_resource(max_entries=2)
+def get_cohort_analysis(loan_table_version: int, as_of: date) -> CohortAnalysis:
+    """
+    Vintage analysis of the approved loans, built once per version of the loan table and as-of day (both only
+    part of the cache key).
+    """
+    analytics = get_duckdb_analytics()
+    if analytics is not None:
+        loans_frame, installments_frame = analytics.loans_frame(), analytics.installments_frame()
+    else:
+        loans_frame, installments_frame = build_analytics_frames(read_loan_table())
+
+    return CohortAnalysis(loans_frame, installments_frame, as_of)
+
+
+@st.cache_resource(max_entries=2)
+def get_dealership_metrics(loan_table_version: int, as_of: date) -> pd.DataFrame:
+    """
+    Portfolio metrics per dealership and currency, built once per version of the loan table and as-of day
+    (both only part of the cache key).
+    """
+    analytics = get_duckdb_analytics()
+    if analytics is not None:
+        loans_frame, installments_frame = analytics.loans_frame(), analytics.installments_frame()
+    else:
+        loans_frame, installments_frame = build_analytics_frames(read_loan_table())
+
+    return build_dealership_metrics(loans_frame, installments_frame, as_of)
+
+
+def apply_loan_table_writes(index, upsert_loans_df: Callable[[pd.DataFrame], None]) -> None:
+    """
+    Bring an index of the loan table forward through the writes of the finished jobs, in the order they ran:
+    a write that starts from the version the index is at is applied by upserting the loans it changed, so the
+    app's own writes do not make the index read and decode the whole table again. Any other write to the
+    table still leaves the index behind and it is resynced.
+    """
+    for job in get_job_queue().list_jobs():
+        if job.status != JobStatus.DONE:
+            continue
+        write = job.result()
+        if isinstance(write, LoanTableWrite) and write.previous_version == index.version:
+            upsert_loans_df(write.loans_df)
+            index.version = write.version
+
+
+def upsert_active_loans(index, loans_df: pd.DataFrame) -> None:
+    """
+    Upsert rows of the loan table into an index of the active loans only: loans that are no longer approved
+    are removed from it.
+    """
+    is_active = loans_df["status"] == LoanStatus.APPROVED.value
+    index.upsert_loans_df(loans_df[is_active])
+    for loan_id in loans_df.loc[~is_active, "loan_id"]:
+        index.remove_loan(int(loan_id))
+
+
+@st.cache_resource
+def get_loan_search_index() -> LoanSearchIndex:
+    return LoanSearchIndex()
+
+
+def get_synced_loan_search_index() -> LoanSearchIndex:
+    index = get_loan_search_index()
+    apply_loan_table_writes(index, index.upsert_loans_df)
+    version = get_table_version(CSVTable.LOAN_PATH)
+
+    if index.version != version:
+        index.sync_with_loans_df(read_loan_table())
+        index.version = version
+
+    return index
+
+
+@st.cache_resource
+def get_due_date_index() -> DueDateIndex:
+    return DueDateIndex()
+
+
+def get_synced_due_date_index() -> DueDateIndex:
+    """
+    Due-date index over the installments of active loans.
+    """
+    index = get_due_date_index()
+    apply_loan_table_writes(index, lambda loans_df: upsert_active_loans(index, loans_df))
+    version = get_table_version(CSVTable.LOAN_PATH)
+
+    if index.version != version:
+        index.sync_with_loans_df(read_active_loans_table())
+        index.version = version
+
+    return index
+
+
+@st.cache_resource
+def get_delinquency_tracker() -> DelinquencyTracker:
+    return DelinquencyTracker()
+
+
+def get_synced_delinquency_tracker() -> DelinquencyTracker:
+    """
+    Aging and portfolio at risk of the active loans.
+    """
+    tracker = get_delinquency_tracker()
+    apply_loan_table_writes(tracker, lambda loans_df: upsert_active_loans(tracker, loans_df))
+    version = get_table_version(CSVTable.LOAN_PATH)
+
+    if tracker.version != version:
+        tracker.sync_with_loans_df(read_active_loans_table())
+        tracker.version = version
+
+    return tracker
+
+
+@st.cache_resource
+def get_active_loan_listing() -> LoanListing:
+    return LoanListing()
+
+
+def get_synced_active_loan_listing() -> LoanListing:
+    listing = get_active_loan_listing()
+    version = get_table_version(CSVTable.LOAN_PATH)
+
+    if listing.version != version:
+        listing.sync_with_loans_df(read_active_loans_table())
+        listing.version = version
+
+    return listing
+
+
+def filter_loans_by_search(loans_df: pd.DataFrame, key: str) -> pd.DataFrame:
+    query = st.text_input("Buscar (nombre, teléfono, código, vehículo o automotora)", key=key)
+
+    if not query:
+        return loans_df
+
+    results = get_synced_loan_search_index().search(query, limit=50)
+    ranking = {result.loan_id: position for position, result in enumerate(results)}
+
+    filtered_df = loans_df[loans_df["loan_id"].isin(ranking)]
+    return filtered_df.iloc[filtered_df["loan_id"].map(ranking).argsort()]
+
+
+# how long a page waits for the write it just queued before rerunning, so the rerun reads the new data
+SAVE_WAIT_SECONDS = 5
+
+
+def wait_for_save(job: JobHandle, timeout: float = SAVE_WAIT_SECONDS) -> None:
+    """
+    Wait briefly for a write job before the page reruns. A job that takes longer keeps running and the
+    pages show it next to its loans (see show_pending_loan_jobs); a failed one is reported in the sidebar.
+    """
+    with st.spinner("Guardando cambios..."):
+        job.wait(timeout)
+
+
+def show_pending_loan_jobs(loan_id: int) -> None:
+    for job in get_job_queue().pending_jobs_for_loan(loan_id):
+        st.info(
+            f"#{job.job_id} {job.description}: {job.status.value}. "
+            "Los datos de este préstamo se actualizarán al terminar."
+        )
+
+
+def show_background_jobs(object: object):
+    jobs = get_job_queue().list_jobs()
+
+    if not jobs:
+        return
+
+    object.subheader("Tareas en Segundo Plano")
+
+    for job in reversed(jobs):
+        status = job.status
+        if status == JobStatus.FAILED:
+            object.error(f"#{job.job_id} {job.description}: {status.value} ({job.error()})")
+        elif status == JobStatus.DONE:
+            object.success(f"#{job.job_id} {job.description}: {status.value}")
+        else:
+            object.info(f"#{job.job_id} {job.description}: {status.value}")
+
+    if object.button("Limpiar tareas finalizadas", key="clear_finished_jobs"):
+        get_job_queue().clear_finished()
+        st.rerun()
@@ -0,0 +1 @@
+# This file makes the analytics directory a Python package
@@ -0,0 +1,208 @@
+from concurrent.futures import Executor
+from datetime import date
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR
+from payments_src.domain.payment_enums import PaymentStatus
+
+# a loan whose oldest pending installment is this many days late is taken as defaulted
+DEFAULT_DAYS_PAST_DUE = 90
+# weight, in installments, of the portfolio late rate when estimating the late rate of a single loan
+LATE_RATE_PRIOR_WEIGHT = 6
+# installment draws held in memory at once by a worker (scenarios x pending installments)
+_MAX_DRAWS_PER_BATCH = 4_000_000
+
+
+def _month_number(dates: np.ndarray) -> np.ndarray:
+    return dates.astype("datetime64[M]").astype(np.int64)
+
+
+def estimate_loan_risk(
+    loans_frame: pd.DataFrame,
+    installments_frame: pd.DataFrame,
+    as_of: date,
+    loan_status: LoanStatus = LoanStatus.APPROVED,
+) -> pd.DataFrame:
+    """
+    Per loan: the probability that an installment is paid late and the monthly probability of default, from
+    the installments already due. A loan's late rate is its own history pulled towards the portfolio rate
+    (LATE_RATE_PRIOR_WEIGHT installments worth); the portfolio default rate is loans currently more than
+    DEFAULT_DAYS_PAST_DUE days late per month on book, scaled for each loan by how its late rate compares with
+    the portfolio's. Loans already past that point default with certainty.
+    """
+    loans = loans_frame[loans_frame["status"] == loan_status.value].sort_values("loan_id")
+    installments = installments_frame[
+        installments_frame["loan_id"].isin(loans["loan_id"])
+        & (installments_frame["payment_status"] != PaymentStatus.CANCELLED.value)
+    ]
+    loan_ids = loans["loan_id"].to_numpy()
+    rows = np.searchsorted(loan_ids, installments["loan_id"].to_numpy())
+    as_of_day = np.datetime64(as_of, "D")
+
+    end_days = installments["end_date"].to_numpy("datetime64[D]")
+    paid_days = installments["date_paid"].to_numpy("datetime64[D]")
+    is_pending = (installments["payment_status"] == PaymentStatus.PENDING.value).to_numpy()
+    is_due = end_days < as_of_day
+    # NaT comparisons are False, so paid installments without a payment date count as on time
+    is_late = is_due & (is_pending | (paid_days > end_days))
+
+    due_counts = np.bincount(rows[is_due], minlength=len(loan_ids))
+    late_counts = np.bincount(rows[is_late], minlength=len(loan_ids))
+    portfolio_late_rate = late_counts.sum() / due_counts.sum() if due_counts.sum() > 0 else 0.0
+    late_probability = (late_counts + LATE_RATE_PRIOR_WEIGHT * portfolio_late_rate) / (
+        due_counts + LATE_RATE_PRIOR_WEIGHT
+    )
+
+    oldest_pending = np.full(len(loan_ids), np.datetime64("NaT"), dtype="datetime64[D]")
+    pending_rows, pending_end_days = rows[is_pending], end_days[is_pending]
+    order = np.lexsort((pending_end_days, pending_rows))
+    first = np.flatnonzero(np.diff(pending_rows[order], prepend=-1) != 0)
+    oldest_pending[pending_rows[order][first]] = pending_end_days[order][first]
+    # NaT comparisons are False, so loans with nothing pending are not defaulted
+    defaulted = (as_of_day - oldest_pending) > np.timedelta64(DEFAULT_DAYS_PAST_DUE, "D")
+
+    months_on_book = np.maximum(
+        _month_number(np.array([as_of_day])) - _month_number(loans["fecha_inicio"].to_numpy("datetime64[D]")), 1
+    )
+    portfolio_default_hazard = defaulted.sum() / months_on_book.sum() if len(loan_ids) else 0.0
+    relative_risk = late_probability / portfolio_late_rate if portfolio_late_rate > 0 else np.ones(len(loan_ids))
+    default_hazard = np.where(defaulted, 1.0, np.clip(portfolio_default_hazard * relative_risk, 0, 1))
+
+    return pd.DataFrame({"loan_id": loan_ids, "late_probability": late_probability, "default_hazard": default_hazard})
+
+
+class SimulationInputs(NamedTuple):
+    """
+    Pending installments as arrays: the row of their loan in the per-loan arrays, the month they are due in
+    (0 is the as-of month; overdue ones are due now) and their amount.
+    """
+
+    loan_rows: np.ndarray
+    due_months: np.ndarray
+    amounts_minor: np.ndarray
+    late_probability: np.ndarray
+    default_hazard: np.ndarray
+    first_month: np.ndarray
+    num_months: int
+
+
+def build_simulation_inputs(
+    installments_frame: pd.DataFrame,
+    loan_risk: pd.DataFrame,
+    as_of: date,
+    loan_status: LoanStatus = LoanStatus.APPROVED,
+) -> SimulationInputs:
+    pending = installments_frame[
+        (installments_frame["loan_status"] == loan_status.value)
+        & (installments_frame["payment_status"] == PaymentStatus.PENDING.value)
+        & installments_frame["loan_id"].isin(loan_risk["loan_id"])
+    ]
+    loan_ids = loan_risk["loan_id"].to_numpy()
+    as_of_month = np.datetime64(as_of, "M")
+
+    due_months = np.maximum(
+        _month_number(pending["end_date"].to_numpy("datetime64[D]")) - as_of_month.astype(np.int64), 0
+    )
+    # one extra month for installments due last that are paid late
+    num_months = int(due_months.max()) + 2 if len(due_months) else 1
+    return SimulationInputs(
+        loan_rows=np.searchsorted(loan_ids, pending["loan_id"].to_numpy()),
+        due_months=due_months,
+        amounts_minor=pending["amount_minor"].to_numpy(),
+        late_probability=loan_risk["late_probability"].to_numpy(),
+        default_hazard=loan_risk["default_hazard"].to_numpy(),
+        first_month=as_of_month,
+        num_months=num_months,
+    )
+
+
+def simulate_scenarios(
+    inputs: SimulationInputs, num_scenarios: int, seed_sequence: np.random.SeedSequence
+) -> np.ndarray:
+    """
+    Collections per month (minor units) of `num_scenarios` scenarios, shape (scenarios, months). In each
+    scenario every loan defaults after a geometric number of months, losing the installments due from then
+    on, and every installment it still pays is paid a month late with the loan's late probability.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    num_loans, num_installments = len(inputs.default_hazard), len(inputs.amounts_minor)
+    collections = np.zeros((num_scenarios, inputs.num_months), dtype=np.int64)
+
+    with np.errstate(divide="ignore"):
+        log_survival = np.log1p(-inputs.default_hazard)
+    batch_size = max(1, _MAX_DRAWS_PER_BATCH // max(num_installments, 1))
+    installment_late_probability = inputs.late_probability[inputs.loan_rows].astype(np.float32)
+
+    for start in range(0, num_scenarios, batch_size):
+        scenarios = min(batch_size, num_scenarios - start)
+
+        # months survived before defaulting: 0 defaults right away, inf never (hazard 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            default_months = np.floor(np.log(rng.random((scenarios, num_loans))) / log_survival)
+        default_months = np.where(inputs.default_hazard >= 1, 0, np.nan_to_num(default_months, nan=np.inf))
+
+        paid = inputs.due_months[None, :] < default_months[:, inputs.loan_rows]
+        late = rng.random((scenarios, num_installments), dtype=np.float32) < installment_late_probability
+        payment_months = inputs.due_months[None, :] + late
+
+        scenario_offsets = np.arange(scenarios)[:, None] * inputs.num_months
+        collections[start : start + scenarios] = np.bincount(
+            (scenario_offsets + payment_months)[paid],
+            weights=np.broadcast_to(inputs.amounts_minor, paid.shape)[paid],
+            minlength=scenarios * inputs.num_months,
+        ).reshape(scenarios, inputs.num_months)
+
+    return collections
+
+
+def simulate_collections(
+    inputs: SimulationInputs,
+    num_scenarios: int = 2000,
+    seed: int = 0,
+    chunk_size: int = 250,
+    executor: Optional[Executor] = None,
+) -> np.ndarray:
+    """
+    Monthly collections of `num_scenarios` scenarios, shape (scenarios, months). Scenarios are split in chunks
+    of `chunk_size`, each with its own stream spawned from `seed`, and run on `executor` (a process pool to use
+    every core) or inline without one. The chunks do not depend on the executor, so the same seed gives the
+    same scenarios however many workers run them.
+    """
+    chunk_sizes = [min(chunk_size, num_scenarios - start) for start in range(0, num_scenarios, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    if executor is None:
+        chunks = [simulate_scenarios(inputs, size, seeds) for size, seeds in zip(chunk_sizes, seed_sequences)]
+    else:
+        futures = [
+            executor.submit(simulate_scenarios, inputs, size, seeds) for size, seeds in zip(chunk_sizes, seed_sequences)
+        ]
+        chunks = [future.result() for future in futures]
+
+    if not chunks:
+        return np.zeros((0, inputs.num_months), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def collection_bands(
+    inputs: SimulationInputs, collections: np.ndarray, percentiles: tuple[int, ...] = (5, 25, 50, 75, 95)
+) -> pd.DataFrame:
+    """
+    Per month: the scheduled collections (every pending installment paid when due), the mean of the scenarios
+    and the requested percentiles, in major units.
+    """
+    scheduled = np.bincount(inputs.due_months, weights=inputs.amounts_minor, minlength=inputs.num_months)
+    bands = pd.DataFrame(
+        {
+            "mes": np.datetime_as_string(inputs.first_month + np.arange(inputs.num_months), unit="M"),
+            "programado": scheduled / MINOR_UNITS_PER_MAJOR,
+            "media": collections.mean(axis=0) / MINOR_UNITS_PER_MAJOR,
+        }
+    )
+    for percentile, values in zip(percentiles, np.percentile(collections, percentiles, axis=0)):
+        bands[f"p{percentile}"] = values / MINOR_UNITS_PER_MAJOR
+    return bands
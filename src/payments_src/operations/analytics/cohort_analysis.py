@@ -0,0 +1,209 @@
+from datetime import date
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.payments.delinquency_tracker import AGING_BUCKETS
+
+CURRENT_STATE = "Al día"
+PAID_OFF_STATE = "Cancelado"
+DELINQUENCY_STATES = [CURRENT_STATE] + [label for label, _, _ in AGING_BUCKETS] + [PAID_OFF_STATE]
+
+
+def _month_number(dates: np.ndarray) -> np.ndarray:
+    """
+    Months since 1970-01 of datetime64 values.
+    """
+    return dates.astype("datetime64[M]").astype(np.int64)
+
+
+def _month_label(month_numbers: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(np.asarray(month_numbers, dtype=np.int64).astype("datetime64[M]"), unit="M")
+
+
+def _first_of_runs(sorted_values: np.ndarray) -> np.ndarray:
+    """
+    Positions where each run of equal values starts in a sorted array.
+    """
+    return np.flatnonzero(np.diff(sorted_values, prepend=-1) != 0)
+
+
+class CohortAnalysis:
+    """
+    Loans grouped by the month they started (their vintage): how much of what each cohort owes has been
+    collected after each month on book, and how loans move between delinquency states from one month end
+    to the next. Works on the loan and installment frames the analytics backends export, with the
+    installments of every loan laid out once as arrays; every figure is a groupby or a scan over them, computed
+    the first time it is asked for.
+    """
+
+    def __init__(
+        self,
+        loans_frame: pd.DataFrame,
+        installments_frame: pd.DataFrame,
+        as_of: date,
+        loan_status: LoanStatus = LoanStatus.APPROVED,
+    ):
+        self.as_of = as_of
+        loans = loans_frame[loans_frame["status"] == loan_status.value].sort_values("loan_id")
+        installments = installments_frame[
+            installments_frame["loan_id"].isin(loans["loan_id"])
+            & (installments_frame["payment_status"] != PaymentStatus.CANCELLED.value)
+        ]
+        # installments of a loan together and in due date order
+        installments = installments.sort_values(["loan_id", "end_date"], kind="stable")
+
+        self._loan_ids = loans["loan_id"].to_numpy()
+        self._loan_cohorts = _month_number(loans["fecha_inicio"].to_numpy("datetime64[D]"))
+        self._loan_principal_minor = loans["dinero_total_prestado_minor"].to_numpy()
+
+        self._rows = np.searchsorted(self._loan_ids, installments["loan_id"].to_numpy())
+        self._end_days = installments["end_date"].to_numpy("datetime64[D]")
+        is_paid = (installments["payment_status"] == PaymentStatus.PAID.value).to_numpy()
+        paid_days = installments["date_paid"].to_numpy("datetime64[D]")
+        # paid installments without a payment date count as paid on their due date
+        self._paid_days = np.where(
+            is_paid, np.where(np.isnat(paid_days), self._end_days, paid_days), np.datetime64("NaT")
+        )
+        self._amounts_minor = installments["amount_minor"].to_numpy()
+
+    @cached_property
+    def cohort_summary(self) -> pd.DataFrame:
+        """
+        Per cohort: number of loans, amount loaned, amount owed in installments, collected so far and the
+        collected share.
+        """
+        loans = pd.DataFrame({"cohort": self._loan_cohorts, "principal_minor": self._loan_principal_minor})
+        installments = pd.DataFrame(
+            {
+                "cohort": self._loan_cohorts[self._rows],
+                "expected_minor": self._amounts_minor,
+                "collected_minor": np.where(np.isnat(self._paid_days), 0, self._amounts_minor),
+            }
+        )
+        summary = (
+            loans.groupby("cohort")
+            .agg(prestamos=("principal_minor", "size"), principal_minor=("principal_minor", "sum"))
+            .join(installments.groupby("cohort")[["expected_minor", "collected_minor"]].sum())
+            .fillna(0)
+        )
+        return pd.DataFrame(
+            {
+                "cohorte": _month_label(summary.index.to_numpy()),
+                "prestamos": summary["prestamos"].to_numpy(),
+                "monto_prestado": summary["principal_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR,
+                "monto_esperado": summary["expected_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR,
+                "monto_cobrado": summary["collected_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR,
+                "porcentaje_cobrado": np.divide(
+                    summary["collected_minor"].to_numpy(),
+                    summary["expected_minor"].to_numpy(),
+                    out=np.zeros(len(summary)),
+                    where=summary["expected_minor"].to_numpy() > 0,
+                ),
+            }
+        )
+
+    @cached_property
+    def collection_curves(self) -> pd.DataFrame:
+        """
+        Share of each cohort's installments collected by the end of each month on book (0 is the start month),
+        one row per cohort and one column per month on book. Months a cohort has not reached yet are NaN.
+        """
+        if len(self._loan_ids) == 0:
+            return pd.DataFrame()
+
+        cohorts = self._loan_cohorts[self._rows]
+        is_paid = ~np.isnat(self._paid_days)
+        months_on_book = _month_number(self._paid_days[is_paid]) - cohorts[is_paid]
+
+        all_cohorts = np.unique(self._loan_cohorts)
+        as_of_month = _month_number(np.array([self.as_of], dtype="datetime64[D]"))[0]
+        max_months_on_book = int(as_of_month - all_cohorts.min())
+
+        collected = (
+            pd.DataFrame({"cohort": cohorts[is_paid], "month_on_book": months_on_book.clip(0, max_months_on_book)})
+            .assign(amount_minor=self._amounts_minor[is_paid])
+            .pivot_table(index="cohort", columns="month_on_book", values="amount_minor", aggfunc="sum", fill_value=0)
+            .reindex(index=all_cohorts, columns=range(max_months_on_book + 1), fill_value=0)
+            .cumsum(axis=1)
+        )
+        expected = pd.Series(self._amounts_minor).groupby(cohorts).sum().reindex(all_cohorts, fill_value=0)
+
+        curves = collected.div(expected.replace(0, np.nan), axis=0)
+        not_reached = np.arange(max_months_on_book + 1)[None, :] > (as_of_month - all_cohorts)[:, None]
+        curves = curves.mask(not_reached)
+        curves.index = _month_label(all_cohorts)
+        curves.index.name = "cohorte"
+        curves.columns.name = "mes"
+        return curves
+
+    def delinquency_states(self, snapshot_days: np.ndarray) -> np.ndarray:
+        """
+        State index (into DELINQUENCY_STATES) of every loan at the end of each snapshot day, shape
+        (loans, snapshots); -1 before the loan started. A loan is as late as its oldest installment that was
+        due and not yet paid on that day.
+        """
+        states = np.full((len(self._loan_ids), len(snapshot_days)), -1, dtype=np.int64)
+        cohort_starts = self._loan_cohorts.astype("datetime64[M]").astype("datetime64[D]")
+
+        for i, day in enumerate(snapshot_days):
+            started = cohort_starts <= day
+            unpaid = np.isnat(self._paid_days) | (self._paid_days > day)
+
+            # installments are sorted by due date inside each loan, so the first one per loan is the oldest
+            overdue = unpaid & (self._end_days < day)
+            first = _first_of_runs(self._rows[overdue])
+            overdue_rows = self._rows[overdue][first]
+            days_late = (day - self._end_days[overdue][first]).astype(np.int64)
+
+            loan_states = np.zeros(len(self._loan_ids), dtype=np.int64)
+            for bucket, (_, first_day, last_day) in enumerate(AGING_BUCKETS, start=1):
+                in_bucket = days_late >= first_day
+                if last_day is not None:
+                    in_bucket &= days_late <= last_day
+                loan_states[overdue_rows[in_bucket]] = bucket
+
+            paid_off = np.ones(len(self._loan_ids), dtype=bool)
+            paid_off[self._rows[unpaid]] = False
+            loan_states[paid_off] = len(DELINQUENCY_STATES) - 1
+
+            states[:, i] = np.where(started, loan_states, -1)
+        return states
+
+    def month_end_snapshots(self) -> np.ndarray:
+        """
+        Last day of every month from the first cohort to the month before the as-of date.
+        """
+        if len(self._loan_ids) == 0:
+            return np.array([], dtype="datetime64[D]")
+        as_of_month = np.datetime64(self.as_of, "M")
+        months = np.arange(self._loan_cohorts.min(), as_of_month.astype(np.int64)).astype("datetime64[M]")
+        return (months + 1).astype("datetime64[D]") - 1
+
+    @cached_property
+    def roll_rates(self) -> pd.DataFrame:
+        """
+        Share of loans in each delinquency state at one month end that are in each state at the next one,
+        over every pair of consecutive month ends. Rows with no loans are left out.
+        """
+        states = self.delinquency_states(self.month_end_snapshots())
+        num_states = len(DELINQUENCY_STATES)
+
+        before, after = states[:, :-1].ravel(), states[:, 1:].ravel()
+        observed = (before >= 0) & (after >= 0)
+        counts = np.bincount(
+            before[observed] * num_states + after[observed], minlength=num_states * num_states
+        ).reshape(num_states, num_states)
+
+        totals = counts.sum(axis=1, keepdims=True)
+        rates = pd.DataFrame(
+            np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0),
+            index=pd.Index(DELINQUENCY_STATES, name="desde"),
+            columns=pd.Index(DELINQUENCY_STATES, name="hacia"),
+        )
+        # a paid off loan stays paid off
+        return rates[totals[:, 0] > 0].drop(index=PAID_OFF_STATE, errors="ignore")
@@ -0,0 +1,199 @@
+import json
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import from_minor_units, to_minor_units
+from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.operations.fx.fx_rate_store import FXRateStore
+
+
+def build_analytics_frames(loans_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Loan and installment frames (the shape DuckDBAnalytics exports) built from a raw loan table, for when
+    duckdb is not installed.
+    """
+    loan_rows = []
+    installment_rows = []
+    for loan_id, status, dealership_str, payment_list_str in zip(
+        loans_df["loan_id"], loans_df["status"], loans_df["dealership"], loans_df["payment_list"]
+    ):
+        payment_list = json.loads(payment_list_str)
+        moneda = payment_list["moneda"]
+        loan_rows.append(
+            (
+                int(loan_id),
+                status,
+                json.loads(dealership_str)["dealership_id"],
+                moneda,
+                payment_list["fecha_inicio"],
+                to_minor_units(payment_list["dinero_total_prestado"]),
+            )
+        )
+        for payment in payment_list["payments"].values():
+            amount_minor = payment.get("amount_minor")
+            if amount_minor is None:
+                amount_minor = to_minor_units(payment["amount"])
+            installment_rows.append(
+                (
+                    int(loan_id),
+                    status,
+                    moneda,
+                    payment["end_date"],
+                    payment["status"],
+                    payment.get("date_paid"),
+                    amount_minor,
+                )
+            )
+
+    loans_frame = pd.DataFrame(
+        loan_rows,
+        columns=["loan_id", "status", "dealership_id", "moneda", "fecha_inicio", "dinero_total_prestado_minor"],
+    )
+    installments_frame = pd.DataFrame(
+        installment_rows,
+        columns=["loan_id", "loan_status", "moneda", "end_date", "payment_status", "date_paid", "amount_minor"],
+    )
+    loans_frame["fecha_inicio"] = pd.to_datetime(loans_frame["fecha_inicio"], format="ISO8601")
+    installments_frame["end_date"] = pd.to_datetime(installments_frame["end_date"], format="ISO8601")
+    installments_frame["date_paid"] = pd.to_datetime(installments_frame["date_paid"], format="ISO8601")
+    return loans_frame, installments_frame
+
+
+def _day(value: date | datetime) -> pd.Timestamp:
+    return pd.Timestamp(value).normalize()
+
+
+class ReportingCurrencyAnalytics:
+    """
+    Same queries as DuckDBAnalytics, with every amount converted to one reporting currency. Installments are
+    converted at the rate of their due date and loan principal at the rate of the loan start date, all in one
+    vectorized pass when the object is built; the queries are then plain integer sums over the frames.
+    """
+
+    def __init__(
+        self,
+        loans_frame: pd.DataFrame,
+        installments_frame: pd.DataFrame,
+        fx_rate_store: FXRateStore,
+        reporting_currency: Currency,
+    ):
+        self.reporting_currency = reporting_currency
+        self._loans = loans_frame.assign(
+            investment_minor=fx_rate_store.convert_minor_units(
+                loans_frame["dinero_total_prestado_minor"].to_numpy(),
+                loans_frame["moneda"].to_numpy(),
+                loans_frame["fecha_inicio"].to_numpy(),
+                reporting_currency,
+            )
+        )
+        self._installments = installments_frame.assign(
+            amount_minor=fx_rate_store.convert_minor_units(
+                installments_frame["amount_minor"].to_numpy(),
+                installments_frame["moneda"].to_numpy(),
+                installments_frame["end_date"].to_numpy(),
+                reporting_currency,
+            ),
+            is_pending=installments_frame["payment_status"] == PaymentStatus.PENDING.value,
+            is_paid=installments_frame["payment_status"] == PaymentStatus.PAID.value,
+        )
+
+    def _installments_with_status(self, loan_status: LoanStatus) -> pd.DataFrame:
+        # installments cancelled by a restructuring are not owed and count in no total
+        installments = self._installments[self._installments["loan_status"] == loan_status.value]
+        return installments[installments["payment_status"] != PaymentStatus.CANCELLED.value]
+
+    def loan_status_counts(self) -> pd.DataFrame:
+        counts = self._loans["status"].value_counts()
+        return pd.DataFrame({"status": counts.index, "count": counts.to_numpy()})
+
+    def acceptance_summary(self) -> dict:
+        approved = int((self._loans["status"] == LoanStatus.APPROVED.value).sum())
+        rejected = int((self._loans["status"] == LoanStatus.REJECTED.value).sum())
+        decided = approved + rejected
+        return {
+            "approved": approved,
+            "rejected": rejected,
+            "decided": decided,
+            "acceptance_rate": approved / decided * 100 if decided > 0 else 0,
+        }
+
+    def portfolio_totals(self, loan_status: LoanStatus = LoanStatus.APPROVED) -> dict:
+        installments = self._installments_with_status(loan_status)
+        amounts = installments["amount_minor"].to_numpy()
+        is_pending = installments["is_pending"].to_numpy()
+        is_paid = installments["is_paid"].to_numpy()
+        investment = self._loans.loc[self._loans["status"] == loan_status.value, "investment_minor"].to_numpy()
+
+        return {
+            "total_investment": from_minor_units(int(investment.sum())),
+            "total_expected": from_minor_units(int(amounts.sum())),
+            "total_pending": from_minor_units(int(amounts[is_pending].sum())),
+            "total_paid": from_minor_units(int(amounts[is_paid].sum())),
+        }
+
+    def monthly_totals(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        loan_status: LoanStatus = LoanStatus.APPROVED,
+    ) -> pd.DataFrame:
+        installments = self._installments_with_status(loan_status)
+        if start_date is not None:
+            installments = installments[installments["end_date"] >= _day(start_date)]
+        if end_date is not None:
+            installments = installments[installments["end_date"] < _day(end_date) + pd.Timedelta(days=1)]
+
+        installments = installments.assign(
+            month=installments["end_date"].dt.strftime("%Y-%m"),
+            pending_minor=installments["amount_minor"].where(installments["is_pending"], 0),
+            paid_minor=installments["amount_minor"].where(installments["is_paid"], 0),
+        )
+        monthly = (
+            installments.groupby("month")
+            .agg(
+                count=("amount_minor", "size"),
+                total_minor=("amount_minor", "sum"),
+                pending_count=("is_pending", "sum"),
+                pending_minor=("pending_minor", "sum"),
+                paid_minor=("paid_minor", "sum"),
+            )
+            .reset_index()
+        )
+        return pd.DataFrame(
+            {
+                "month": monthly["month"],
+                "count": monthly["count"],
+                "total_amount": monthly["total_minor"] / 100,
+                "pending_count": monthly["pending_count"].astype(np.int64),
+                "pending_amount": monthly["pending_minor"] / 100,
+                "paid_amount": monthly["paid_minor"] / 100,
+            }
+        )
+
+    def amount_due_until(self, until: date, loan_status: LoanStatus = LoanStatus.APPROVED) -> float:
+        installments = self._installments_with_status(loan_status)
+        due = installments["end_date"] < _day(until) + pd.Timedelta(days=1)
+        return from_minor_units(int(installments.loc[due, "amount_minor"].sum()))
+
+    def overdue_summary(self, as_of: date, loan_status: LoanStatus = LoanStatus.APPROVED) -> dict:
+        installments = self._installments_with_status(loan_status)
+        overdue = installments[installments["is_pending"] & (installments["end_date"] < _day(as_of))]
+        return {
+            "overdue_payments": len(overdue),
+            "overdue_amount": from_minor_units(int(overdue["amount_minor"].sum())),
+        }
+
+    def loans_frame(self) -> pd.DataFrame:
+        """
+        Same frame as DuckDBAnalytics.loans_frame, with principals in the reporting currency.
+        """
+        return self._loans.assign(
+            moneda=self.reporting_currency.value, dinero_total_prestado_minor=self._loans["investment_minor"]
+        ).drop(columns="investment_minor")
+
+    def installments_frame(self) -> pd.DataFrame:
+        return self._installments.assign(moneda=self.reporting_currency.value).drop(columns=["is_pending", "is_paid"])
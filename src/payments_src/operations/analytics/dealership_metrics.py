@@ -0,0 +1,105 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.dealership_enums import DealershipSortKey
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR
+from payments_src.domain.payment_enums import PaymentStatus
+
+# keys where a smaller value ranks a dealership higher
+ASCENDING_SORT_KEYS = {DealershipSortKey.TASA_MOROSIDAD}
+
+
+def _rate(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    return np.divide(
+        numerator.to_numpy(dtype=float),
+        denominator.to_numpy(dtype=float),
+        out=np.zeros(len(numerator)),
+        where=denominator.to_numpy() > 0,
+    )
+
+
+def build_dealership_metrics(
+    loans_frame: pd.DataFrame,
+    installments_frame: pd.DataFrame,
+    as_of: date,
+    loan_status: LoanStatus = LoanStatus.APPROVED,
+) -> pd.DataFrame:
+    """
+    Portfolio of each dealership and currency as of a day, from the frames the analytics backends export (with
+    the dealership id of every loan): loans originated and amount lent, average term (installments per loan,
+    cancelled ones left out), collection rate (collected over what was due up to the day) and delinquency
+    (loans with an installment past due over loans with something pending). Every figure is a groupby over
+    the frames.
+    """
+    as_of_day = pd.Timestamp(as_of).normalize()
+    loans = loans_frame[loans_frame["status"] == loan_status.value]
+    installments = installments_frame[installments_frame["payment_status"] != PaymentStatus.CANCELLED.value]
+    installments = installments[installments["loan_id"].isin(loans["loan_id"])]
+
+    end_days = installments["end_date"].dt.normalize()
+    is_pending = installments["payment_status"] == PaymentStatus.PENDING.value
+    is_due = end_days <= as_of_day
+    is_overdue = is_pending & (end_days < as_of_day)
+    amounts_minor = installments["amount_minor"]
+    per_loan = (
+        pd.DataFrame(
+            {
+                "loan_id": installments["loan_id"],
+                "cuotas": 1,
+                "is_active": is_pending,
+                "is_delinquent": is_overdue,
+                "due_minor": amounts_minor.where(is_due, 0),
+                "collected_minor": amounts_minor.where(is_due & ~is_pending, 0),
+                "overdue_minor": amounts_minor.where(is_overdue, 0),
+            }
+        )
+        .groupby("loan_id")
+        .sum()
+    )
+    loans = loans.join(per_loan, on="loan_id").fillna({column: 0 for column in per_loan.columns})
+    # a loan is active with any installment pending and delinquent with any of them past due
+    loans = loans.assign(is_active=loans["is_active"] > 0, is_delinquent=loans["is_delinquent"] > 0)
+
+    metrics = (
+        loans.groupby(["dealership_id", "moneda"])
+        .agg(
+            prestamos=("loan_id", "size"),
+            principal_minor=("dinero_total_prestado_minor", "sum"),
+            plazo_promedio=("cuotas", "mean"),
+            due_minor=("due_minor", "sum"),
+            collected_minor=("collected_minor", "sum"),
+            overdue_minor=("overdue_minor", "sum"),
+            prestamos_activos=("is_active", "sum"),
+            prestamos_morosos=("is_delinquent", "sum"),
+        )
+        .reset_index()
+    )
+    return pd.DataFrame(
+        {
+            "dealership_id": metrics["dealership_id"].astype(np.int64),
+            "moneda": metrics["moneda"],
+            "prestamos": metrics["prestamos"].astype(np.int64),
+            "monto_prestado": metrics["principal_minor"] / MINOR_UNITS_PER_MAJOR,
+            "plazo_promedio": metrics["plazo_promedio"].astype(float),
+            "monto_exigible": metrics["due_minor"] / MINOR_UNITS_PER_MAJOR,
+            "monto_cobrado": metrics["collected_minor"] / MINOR_UNITS_PER_MAJOR,
+            "tasa_cobranza": _rate(metrics["collected_minor"], metrics["due_minor"]),
+            "prestamos_activos": metrics["prestamos_activos"].astype(np.int64),
+            "prestamos_morosos": metrics["prestamos_morosos"].astype(np.int64),
+            "tasa_morosidad": _rate(metrics["prestamos_morosos"], metrics["prestamos_activos"]),
+            "monto_vencido": metrics["overdue_minor"] / MINOR_UNITS_PER_MAJOR,
+        }
+    )
+
+
+def rank_dealerships(metrics: pd.DataFrame, sort_key: DealershipSortKey) -> pd.DataFrame:
+    """
+    Metrics sorted best first by `sort_key`, with the position of each row. Ties keep the dealership id order.
+    """
+    ranked = metrics.sort_values(
+        [sort_key.value, "dealership_id"], ascending=[sort_key in ASCENDING_SORT_KEYS, True], kind="stable"
+    )
+    return ranked.assign(posicion=np.arange(1, len(ranked) + 1)).reset_index(drop=True)
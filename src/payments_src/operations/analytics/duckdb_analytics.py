@@ -0,0 +1,223 @@
+import os
+import threading
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+
+
+def is_duckdb_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_LOANS_QUERY = """
+CREATE OR REPLACE TABLE loans AS
+SELECT
+    CAST(loan_id AS BIGINT) AS loan_id,
+    status,
+    CAST(CAST(dealership AS JSON)->>'dealership_id' AS BIGINT) AS dealership_id,
+    CAST(payment_list AS JSON) AS payment_list
+FROM {source}
+"""
+
+# one row per installment, unnesting the `payments` object of each payment_list. Amounts are kept as integer
+# minor units so every sum is exact; tables written before amount_minor existed get it from the float amount
+_INSTALLMENTS_QUERY = """
+CREATE OR REPLACE TABLE installments AS
+WITH payment_keys AS (
+    SELECT loan_id, status, payment_list, unnest(json_keys(payment_list->'payments')) AS payment_key
+    FROM loans
+)
+SELECT
+    loan_id,
+    status AS loan_status,
+    payment_list->>'moneda' AS moneda,
+    CAST(payment_key AS BIGINT) AS payment_id,
+    coalesce(
+        CAST(payment_list->'payments'->payment_key->>'amount_minor' AS BIGINT),
+        CAST(round(CAST(payment_list->'payments'->payment_key->>'amount' AS DOUBLE) * 100) AS BIGINT)
+    ) AS amount_minor,
+    CAST(payment_list->'payments'->payment_key->>'end_date' AS TIMESTAMP) AS end_date,
+    payment_list->'payments'->payment_key->>'status' AS payment_status,
+    CAST(payment_list->'payments'->payment_key->>'date_paid' AS TIMESTAMP) AS date_paid
+FROM payment_keys
+"""
+
+
+class DuckDBAnalytics:
+    """
+    Statistics over the loan table computed as SQL in an embedded DuckDB connection. The table (CSV or
+    Parquet) is loaded and its payment lists unnested into an `installments` table once per data version;
+    every query after that runs on DuckDB's columnar, multi-threaded engine. Needs the optional `duckdb`
+    package (`analytics` extra).
+    """
+
+    def __init__(self, loan_table_path: str = CSVTable.LOAN_PATH.value):
+        import duckdb
+
+        self.loan_table_path = loan_table_path
+        self._connection = duckdb.connect()
+        self._version: Optional[int] = None
+        # the connection is shared by every Streamlit session, which run on different threads
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        version = os.stat(self.loan_table_path).st_mtime_ns
+        if version == self._version:
+            return
+
+        if self.loan_table_path.endswith(".parquet"):
+            source = "read_parquet(?)"
+        else:
+            source = "read_csv(?, header = true, all_varchar = true)"
+
+        self._connection.execute(_LOANS_QUERY.format(source=source), [self.loan_table_path])
+        self._connection.execute(_INSTALLMENTS_QUERY)
+        self._version = version
+
+    def _query(self, query: str, parameters: Optional[list | dict] = None) -> pd.DataFrame:
+        with self._lock:
+            self.refresh()
+            return self._connection.execute(query, parameters or []).df()
+
+    def loan_status_counts(self) -> pd.DataFrame:
+        return self._query("SELECT status, count(*) AS count FROM loans GROUP BY status ORDER BY count DESC")
+
+    def acceptance_summary(self) -> dict:
+        row = self._query(
+            """
+            SELECT
+                count(*) FILTER (WHERE status = ?) AS approved,
+                count(*) FILTER (WHERE status = ?) AS rejected
+            FROM loans
+            """,
+            [LoanStatus.APPROVED.value, LoanStatus.REJECTED.value],
+        ).iloc[0]
+
+        approved, rejected = int(row["approved"]), int(row["rejected"])
+        decided = approved + rejected
+        return {
+            "approved": approved,
+            "rejected": rejected,
+            "decided": decided,
+            "acceptance_rate": approved / decided * 100 if decided > 0 else 0,
+        }
+
+    def portfolio_totals(self, loan_status: LoanStatus = LoanStatus.APPROVED) -> dict:
+        row = self._query(
+            """
+            SELECT
+                (SELECT coalesce(
+                    sum(CAST(round(CAST(payment_list->>'dinero_total_prestado' AS DOUBLE) * 100) AS BIGINT)), 0
+                 ) FROM loans WHERE status = $status) / 100 AS total_investment,
+                coalesce(sum(amount_minor), 0) / 100 AS total_expected,
+                coalesce(sum(amount_minor) FILTER (WHERE payment_status = $pending), 0) / 100 AS total_pending,
+                coalesce(sum(amount_minor) FILTER (WHERE payment_status = $paid), 0) / 100 AS total_paid
+            FROM installments
+            WHERE loan_status = $status AND payment_status != $cancelled
+            """,
+            {
+                "status": loan_status.value,
+                "pending": PaymentStatus.PENDING.value,
+                "paid": PaymentStatus.PAID.value,
+                "cancelled": PaymentStatus.CANCELLED.value,
+            },
+        ).iloc[0]
+        return {key: float(value) for key, value in row.items()}
+
+    def monthly_totals(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        loan_status: LoanStatus = LoanStatus.APPROVED,
+    ) -> pd.DataFrame:
+        """
+        Installment counts and amounts per due month (`YYYY-MM`), optionally limited to [start_date, end_date].
+        Installments cancelled by a restructuring are left out.
+        """
+        return self._query(
+            """
+            SELECT
+                strftime(end_date, '%Y-%m') AS month,
+                count(*) AS count,
+                sum(amount_minor) / 100 AS total_amount,
+                count(*) FILTER (WHERE payment_status = $pending) AS pending_count,
+                coalesce(sum(amount_minor) FILTER (WHERE payment_status = $pending), 0) / 100 AS pending_amount,
+                coalesce(sum(amount_minor) FILTER (WHERE payment_status = $paid), 0) / 100 AS paid_amount
+            FROM installments
+            WHERE loan_status = $status
+              AND payment_status != $cancelled
+              AND ($start_date IS NULL OR CAST(end_date AS DATE) >= $start_date)
+              AND ($end_date IS NULL OR CAST(end_date AS DATE) <= $end_date)
+            GROUP BY month
+            ORDER BY month
+            """,
+            {
+                "pending": PaymentStatus.PENDING.value,
+                "paid": PaymentStatus.PAID.value,
+                "cancelled": PaymentStatus.CANCELLED.value,
+                "status": loan_status.value,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+        )
+
+    def amount_due_until(self, until: date, loan_status: LoanStatus = LoanStatus.APPROVED) -> float:
+        return float(
+            self._query(
+                """
+                SELECT coalesce(sum(amount_minor), 0) / 100 AS amount
+                FROM installments
+                WHERE loan_status = ? AND payment_status != ? AND CAST(end_date AS DATE) <= ?
+                """,
+                [loan_status.value, PaymentStatus.CANCELLED.value, until],
+            ).iloc[0]["amount"]
+        )
+
+    def overdue_summary(self, as_of: date, loan_status: LoanStatus = LoanStatus.APPROVED) -> dict:
+        row = self._query(
+            """
+            SELECT count(*) AS overdue_payments, coalesce(sum(amount_minor), 0) / 100 AS overdue_amount
+            FROM installments
+            WHERE loan_status = ? AND payment_status = ? AND CAST(end_date AS DATE) < ?
+            """,
+            [loan_status.value, PaymentStatus.PENDING.value, as_of],
+        ).iloc[0]
+        return {"overdue_payments": int(row["overdue_payments"]), "overdue_amount": float(row["overdue_amount"])}
+
+    def loans_frame(self) -> pd.DataFrame:
+        """
+        One row per loan with its dealership, currency, start date and principal in minor units (all statuses).
+        """
+        return self._query(
+            """
+            SELECT
+                loan_id,
+                status,
+                dealership_id,
+                payment_list->>'moneda' AS moneda,
+                CAST(payment_list->>'fecha_inicio' AS TIMESTAMP) AS fecha_inicio,
+                CAST(round(CAST(payment_list->>'dinero_total_prestado' AS DOUBLE) * 100) AS BIGINT)
+                    AS dinero_total_prestado_minor
+            FROM loans
+            """
+        )
+
+    def installments_frame(self) -> pd.DataFrame:
+        return self._query(
+            """
+            SELECT loan_id, loan_status, moneda, end_date, payment_status, date_paid, amount_minor
+            FROM installments
+            """
+        )
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,180 @@
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR
+from payments_src.domain.payment_enums import PaymentStatus
+
+DAYS_PER_YEAR = 365.0
+# yields are searched in (MIN_RATE, MAX_RATE) when Newton's method does not converge
+MIN_RATE = -0.99
+MAX_RATE = 100.0
+
+
+class LoanCashFlows(NamedTuple):
+    """
+    Cash flows of several loans as (loans, flows) arrays: the principal paid out at time 0 followed by the
+    installments, at `times` years after the loan start. Shorter loans are padded with zero flows.
+    """
+
+    loan_ids: np.ndarray
+    times: np.ndarray
+    amounts: np.ndarray
+
+
+def build_loan_cash_flows(
+    loans_frame: pd.DataFrame,
+    installments_frame: pd.DataFrame,
+    loan_status: LoanStatus = LoanStatus.APPROVED,
+) -> LoanCashFlows:
+    """
+    Cash flows of every loan with `loan_status`, from the frames DuckDBAnalytics (or build_analytics_frames)
+    exports. Paid installments are dated when they were paid, pending ones when they are due, and cancelled
+    ones are left out.
+    """
+    loans = loans_frame[loans_frame["status"] == loan_status.value].sort_values("loan_id")
+    installments = installments_frame[
+        installments_frame["loan_id"].isin(loans["loan_id"])
+        & (installments_frame["payment_status"] != PaymentStatus.CANCELLED.value)
+    ]
+
+    loan_ids = loans["loan_id"].to_numpy()
+    rows = np.searchsorted(loan_ids, installments["loan_id"].to_numpy())
+    # column 0 holds the principal, installments go after it in the order they come
+    columns = installments.groupby("loan_id").cumcount().to_numpy() + 1
+    num_columns = int(columns.max()) + 1 if len(columns) else 1
+
+    is_paid = (installments["payment_status"] == PaymentStatus.PAID.value) & installments["date_paid"].notna()
+    flow_dates = installments["date_paid"].where(is_paid, installments["end_date"]).to_numpy("datetime64[ns]")
+    start_dates = loans["fecha_inicio"].to_numpy("datetime64[ns]")
+
+    times = np.zeros((len(loans), num_columns))
+    amounts = np.zeros((len(loans), num_columns))
+    amounts[:, 0] = -loans["dinero_total_prestado_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR
+    times[rows, columns] = (flow_dates - start_dates[rows]) / np.timedelta64(1, "D") / DAYS_PER_YEAR
+    amounts[rows, columns] = installments["amount_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR
+
+    return LoanCashFlows(loan_ids, times, amounts)
+
+
+def net_present_values(rates: np.ndarray, times: np.ndarray, amounts: np.ndarray) -> np.ndarray:
+    """
+    NPV of each row of cash flows at its own rate (or one rate for all rows).
+    """
+    rates = np.broadcast_to(np.asarray(rates, dtype=np.float64), amounts.shape[:1])
+    return (amounts * (1 + rates[:, None]) ** -times).sum(axis=1)
+
+
+def solve_yields(
+    times: np.ndarray,
+    amounts: np.ndarray,
+    guess: float = 0.1,
+    tolerance: float = 1e-10,
+    max_iterations: int = 50,
+) -> np.ndarray:
+    """
+    Rate that makes the NPV of each row of cash flows zero, per unit of `times` (annual with times in years,
+    monthly with times in months). Newton's method runs on all rows at once; rows it does not bring within
+    `tolerance` are bisected in (MIN_RATE, MAX_RATE). Rows without both an outflow and an inflow, or with no
+    root in that interval, get NaN.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.full(len(amounts), np.nan)
+
+    solvable = (amounts < 0).any(axis=1) & (amounts > 0).any(axis=1)
+    active = np.flatnonzero(solvable)
+    current = np.full(len(active), guess, dtype=np.float64)
+    converged = np.zeros(len(active), dtype=bool)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(max_iterations):
+            pending = ~converged
+            if not pending.any():
+                break
+            rows = active[pending]
+            discount = (1 + current[pending, None]) ** -times[rows]
+            npv = (amounts[rows] * discount).sum(axis=1)
+            derivative = (-times[rows] * amounts[rows] * discount).sum(axis=1) / (1 + current[pending])
+            step = npv / derivative
+
+            updated = current[pending] - step
+            # leave rows that went out of range to the bisection
+            out_of_range = ~np.isfinite(updated) | (updated <= MIN_RATE) | (updated >= MAX_RATE)
+            current[pending] = np.where(out_of_range, np.nan, updated)
+            converged[pending] = (np.abs(step) < tolerance) & ~out_of_range
+
+            stalled = np.flatnonzero(pending)[out_of_range]
+            converged[stalled] = True
+
+    newton_ok = np.isfinite(current) & converged
+    rates[active[newton_ok]] = current[newton_ok]
+
+    remaining = np.setdiff1d(active, active[newton_ok])
+    if len(remaining):
+        rates[remaining] = _bisect_yields(times[remaining], amounts[remaining], tolerance)
+    return rates
+
+
+def _bisect_yields(times: np.ndarray, amounts: np.ndarray, tolerance: float) -> np.ndarray:
+    low = np.full(len(amounts), MIN_RATE)
+    high = np.full(len(amounts), MAX_RATE)
+    with np.errstate(over="ignore", invalid="ignore"):
+        npv_low = net_present_values(low, times, amounts)
+        npv_high = net_present_values(high, times, amounts)
+        bracketed = np.sign(npv_low) != np.sign(npv_high)
+
+        # enough halvings to shrink the interval below the tolerance
+        for _ in range(int(np.ceil(np.log2((MAX_RATE - MIN_RATE) / tolerance)))):
+            middle = (low + high) / 2
+            npv_middle = net_present_values(middle, times, amounts)
+            same_sign_as_low = np.sign(npv_middle) == np.sign(npv_low)
+            low = np.where(same_sign_as_low, middle, low)
+            npv_low = np.where(same_sign_as_low, npv_middle, npv_low)
+            high = np.where(same_sign_as_low, high, middle)
+
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def compute_loan_yields(cash_flows: LoanCashFlows) -> pd.DataFrame:
+    """
+    Annual XIRR of every loan, and the equivalent monthly rate.
+    """
+    xirr = solve_yields(cash_flows.times, cash_flows.amounts)
+    return pd.DataFrame({"loan_id": cash_flows.loan_ids, "xirr": xirr, "tasa_mensual": (1 + xirr) ** (1 / 12) - 1})
+
+
+def portfolio_xirr(cash_flows: LoanCashFlows, loans_frame: pd.DataFrame) -> float:
+    """
+    XIRR of the whole portfolio: the cash flows of every loan put on one timeline from the first loan start.
+    """
+    if len(cash_flows.loan_ids) == 0:
+        return float("nan")
+
+    start_dates = loans_frame.set_index("loan_id").loc[cash_flows.loan_ids, "fecha_inicio"].to_numpy("datetime64[ns]")
+    offsets = (start_dates - start_dates.min()) / np.timedelta64(1, "D") / DAYS_PER_YEAR
+    times = (cash_flows.times + offsets[:, None]).ravel()
+    return float(solve_yields(times[None, :], cash_flows.amounts.ravel()[None, :])[0])
+
+
+def portfolio_npv(
+    installments_frame: pd.DataFrame,
+    annual_discount_rate: float,
+    as_of: date,
+    loan_status: LoanStatus = LoanStatus.APPROVED,
+) -> float:
+    """
+    Present value as of `as_of` of the pending installments, discounted at `annual_discount_rate` from their
+    due dates. Overdue installments count at face value.
+    """
+    pending = installments_frame[
+        (installments_frame["loan_status"] == loan_status.value)
+        & (installments_frame["payment_status"] == PaymentStatus.PENDING.value)
+    ]
+    days = (pending["end_date"].to_numpy("datetime64[ns]") - np.datetime64(as_of, "ns")) / np.timedelta64(1, "D")
+    years = np.maximum(days, 0) / DAYS_PER_YEAR
+    amounts = pending["amount_minor"].to_numpy() / MINOR_UNITS_PER_MAJOR
+    return float((amounts * (1 + annual_discount_rate) ** -years).sum())
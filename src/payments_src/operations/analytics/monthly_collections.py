@@ -0,0 +1,37 @@
+from typing import Optional
+
+import pandas as pd
+
+from payments_src.db.csv_db.monthly_collections import MONTHLY_COLLECTIONS_VALUES
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR
+
+
+def monthly_collection_totals(
+    collections: pd.DataFrame,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    dealership_id: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Totals per month (amounts in major units) from the aggregate, optionally limited to [start_month,
+    end_month] (`YYYY-MM`) and to one dealership. Currencies are added as they are.
+    """
+    if start_month is not None:
+        collections = collections[collections["month"] >= start_month]
+    if end_month is not None:
+        collections = collections[collections["month"] <= end_month]
+    if dealership_id is not None:
+        collections = collections[collections["dealership_id"] == dealership_id]
+
+    monthly = collections.groupby("month", as_index=False)[MONTHLY_COLLECTIONS_VALUES].sum().sort_values("month")
+    return pd.DataFrame(
+        {
+            "month": monthly["month"],
+            "count": monthly["total_count"],
+            "total_amount": monthly["total_minor"] / MINOR_UNITS_PER_MAJOR,
+            "pending_count": monthly["pending_count"],
+            "pending_amount": monthly["pending_minor"] / MINOR_UNITS_PER_MAJOR,
+            "paid_count": monthly["paid_count"],
+            "paid_amount": monthly["paid_minor"] / MINOR_UNITS_PER_MAJOR,
+        }
+    ).reset_index(drop=True)
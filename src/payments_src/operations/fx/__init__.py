@@ -0,0 +1 @@
+# This file makes the fx directory a Python package
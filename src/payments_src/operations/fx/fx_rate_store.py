@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.fx_rates import FX_BASE_CURRENCY
+from payments_src.domain.payment_enums import Currency
+
+
+def _to_day(value: date | datetime) -> np.datetime64:
+    return np.datetime64(value.date() if isinstance(value, datetime) else value, "D")
+
+
+class FXRateStore:
+    """
+    Dated exchange rates against FX_BASE_CURRENCY, one sorted date array per currency. The rate on a day is
+    the latest quote on or before it, found with a binary search; single lookups are cached per
+    (currency, day) and arrays of dates are resolved with one `searchsorted` per currency.
+    """
+
+    def __init__(self):
+        self._dates: dict[Currency, np.ndarray] = {}
+        self._rates: dict[Currency, np.ndarray] = {}
+        self._day_cache: dict[tuple[Currency, np.datetime64], float] = {}
+        # data version of the FX rates table this store was last synced with
+        self.version = 0
+
+    def sync_with_rates_df(self, rates_df: pd.DataFrame) -> None:
+        self._dates, self._rates, self._day_cache = {}, {}, {}
+
+        rates_df = rates_df.assign(date=pd.to_datetime(rates_df["date"]).dt.normalize())
+        for currency_value, currency_rates in rates_df.groupby("currency"):
+            # a later row for the same day replaces an earlier one
+            currency_rates = currency_rates.drop_duplicates("date", keep="last").sort_values("date")
+            currency = Currency(currency_value)
+            self._dates[currency] = currency_rates["date"].to_numpy(dtype="datetime64[D]")
+            self._rates[currency] = currency_rates["rate"].to_numpy(dtype=np.float64)
+
+    def currencies(self) -> set[Currency]:
+        return {FX_BASE_CURRENCY, *self._dates}
+
+    def has_rates_for(self, currencies) -> bool:
+        return {Currency(currency) for currency in currencies} <= self.currencies()
+
+    def rate(self, currency: Currency, on: date | datetime) -> float:
+        """
+        Units of FX_BASE_CURRENCY for one unit of `currency` on the given day.
+        """
+        day = _to_day(on)
+        key = (currency, day)
+        if key not in self._day_cache:
+            self._day_cache[key] = float(self.rates_on(currency, np.array([day]))[0])
+        return self._day_cache[key]
+
+    def rates_on(self, currency: Currency, days: np.ndarray) -> np.ndarray:
+        days = np.asarray(days, dtype="datetime64[D]")
+        if currency == FX_BASE_CURRENCY:
+            return np.ones(len(days))
+        if currency not in self._dates:
+            raise ValueError(f"No FX rates for {currency.value}")
+
+        positions = np.searchsorted(self._dates[currency], days, side="right") - 1
+        if len(positions) and positions.min() < 0:
+            raise ValueError(f"No FX rate for {currency.value} on or before {days[positions < 0].min()}")
+        return self._rates[currency][positions]
+
+    def convert(self, amount: float, from_currency: Currency, to_currency: Currency, on: date | datetime) -> float:
+        if from_currency == to_currency:
+            return amount
+        return amount * self.rate(from_currency, on) / self.rate(to_currency, on)
+
+    def convert_minor_units(
+        self, amounts_minor: np.ndarray, currencies: np.ndarray, days: np.ndarray, to_currency: Currency
+    ) -> np.ndarray:
+        """
+        Convert many amounts (minor units, each in its own currency, at the rate of its own day) to
+        `to_currency` in one vectorized pass. Returns int64 minor units.
+        """
+        amounts_minor = np.asarray(amounts_minor, dtype=np.float64)
+        currencies = np.asarray(currencies)
+        days = np.asarray(days, dtype="datetime64[D]")
+
+        rates = np.empty(len(amounts_minor))
+        for currency_value in np.unique(currencies):
+            mask = currencies == currency_value
+            rates[mask] = self.rates_on(Currency(currency_value), days[mask])
+
+        target_rates = self.rates_on(to_currency, days)
+        return np.rint(amounts_minor * rates / target_rates).astype(np.int64)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class JobStatus(Enum):
+    QUEUED = "en cola"
+    RUNNING = "en proceso"
+    DONE = "completado"
+    FAILED = "fallido"
@@ -0,0 +1,96 @@
+import itertools
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from payments_src.operations.jobs.job_enums import JobStatus
+
+
+class JobHandle:
+    """
+    Reference to a job submitted to the JobQueue. The UI keeps the handle and polls it on every rerun
+    instead of blocking the script thread until the work is done.
+    """
+
+    def __init__(self, job_id: int, description: str, future: Future, loan_ids: tuple[int, ...] = ()):
+        self.job_id = job_id
+        self.description = description
+        self.loan_ids = loan_ids
+        self.submitted_at = datetime.now()
+        self._future = future
+
+    @property
+    def status(self) -> JobStatus:
+        if self._future.running():
+            return JobStatus.RUNNING
+        if not self._future.done():
+            return JobStatus.QUEUED
+        if self._future.exception() is not None:
+            return JobStatus.FAILED
+        return JobStatus.DONE
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block for at most `timeout` seconds; returns whether the job has finished by then.
+        """
+        wait([self._future], timeout=timeout)
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self._future.result(timeout=timeout)
+
+    def error(self) -> Optional[BaseException]:
+        if not self._future.done():
+            return None
+        return self._future.exception()
+
+
+class JobQueue:
+    """
+    Local job queue backed by a process pool. With the default single worker, jobs run one at a time in
+    submission order, so table rewrites never interleave with each other.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        # "spawn" avoids forking the (multi-threaded) Streamlit server process
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._ids = itertools.count(1)
+        self._jobs: dict[int, JobHandle] = {}
+
+    def submit(self, func: Callable, *args, description: str = "", loan_ids: Sequence[int] = (), **kwargs) -> JobHandle:
+        """
+        Queue `func(*args, **kwargs)`. `loan_ids` names the loans the job writes, so the pages can show it
+        next to them until it has finished.
+        """
+        job_id = next(self._ids)
+        future = self._executor.submit(func, *args, **kwargs)
+        handle = JobHandle(
+            job_id=job_id, description=description or func.__name__, future=future, loan_ids=tuple(loan_ids)
+        )
+        self._jobs[job_id] = handle
+        return handle
+
+    def get(self, job_id: int) -> JobHandle:
+        return self._jobs[job_id]
+
+    def list_jobs(self) -> list[JobHandle]:
+        return list(self._jobs.values())
+
+    def pending_jobs(self) -> list[JobHandle]:
+        return [job for job in self._jobs.values() if not job.done()]
+
+    def pending_jobs_for_loan(self, loan_id: int) -> list[JobHandle]:
+        return [job for job in self.pending_jobs() if loan_id in job.loan_ids]
+
+    def wait_for_pending(self, timeout: Optional[float] = None) -> None:
+        wait([job._future for job in self.pending_jobs()], timeout=timeout)
+
+    def clear_finished(self) -> None:
+        self._jobs = {job_id: job for job_id, job in self._jobs.items() if not job.done()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
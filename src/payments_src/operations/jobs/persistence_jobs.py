@@ -0,0 +1,164 @@
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+from payments_src.db.csv_db import db_operations
+from payments_src.db.csv_db.db_constants import CSVTable, TableBackend
+from payments_src.db.csv_db.db_operations import (
+    append_customers_table,
+    extend_payments_table,
+    get_table_backend,
+    get_table_version,
+    read_customers_table,
+    read_payments_table,
+    write_customers_table,
+    write_payments_table,
+)
+from payments_src.domain.borrowers import Borrower
+from payments_src.domain.business_calendar import BusinessCalendar
+from payments_src.domain.loan_changes import PaymentChange
+from payments_src.domain.loans import Loan
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.receipts import Receipt
+from payments_src.domain.restructuring import RestructurePolicy
+from payments_src.operations.loans.restructuring import restructure_loans
+from payments_src.operations.payments.allocation import (
+    allocate_receipts,
+    build_installment_components,
+    settle_installments,
+)
+
+
+class LoanTableWrite(NamedTuple):
+    """
+    Result of a job that wrote the loan table: the rows of the loans it changed, as stored, and the version of
+    the table it read and the one it wrote. An index synced with `previous_version` is brought to `version` by
+    upserting these rows, without reading the table again.
+    """
+
+    loans_df: pd.DataFrame
+    previous_version: int
+    version: int
+
+
+def _loan_table_operations():
+    """
+    Module with read/append/edit/write for the loan table in the configured backend. The jobs never hand the
+    table to the UI, so with Polars it stays a Polars DataFrame from read to write.
+    """
+    if get_table_backend() == TableBackend.POLARS:
+        from payments_src.db.csv_db import db_operations_polars
+
+        return db_operations_polars
+    return db_operations
+
+
+def persist_new_loan(new_borrower: Borrower, new_loan: Loan) -> LoanTableWrite:
+    borrower_table = read_customers_table()
+    borrower_table = append_customers_table(borrower_table, new_borrower)
+    write_customers_table(borrower_table, overwrite=True)
+
+    loan_operations = _loan_table_operations()
+    previous_version = get_table_version(CSVTable.LOAN_PATH)
+    loan_table = loan_operations.read_loan_table()
+    updated_table = loan_operations.append_loan_table(loan_table, new_loan)
+    loan_operations.write_loan_table(updated_table, overwrite=True, previous_df=loan_table)
+
+    return LoanTableWrite(
+        pd.DataFrame([new_loan.to_json_dict()]), previous_version, get_table_version(CSVTable.LOAN_PATH)
+    )
+
+
+def _persist_loan_change(loan_id: int, change: Callable[[Loan], None]) -> LoanTableWrite:
+    """
+    Apply a change to a loan as it is in the table when the job runs, not as the page read it, so a queued
+    job never undoes a write that ran before it.
+    """
+    loan_operations = _loan_table_operations()
+    previous_version = get_table_version(CSVTable.LOAN_PATH)
+    loan_table = loan_operations.read_loan_table()
+    loan = loan_operations.get_loan_table_record(loan_table, loan_id)
+    change(loan)
+    updated_table = loan_operations.edit_loan_table_record(loan_table, loan)
+    loan_operations.write_loan_table(updated_table, overwrite=True, previous_df=loan_table)
+
+    return LoanTableWrite(pd.DataFrame([loan.to_json_dict()]), previous_version, get_table_version(CSVTable.LOAN_PATH))
+
+
+def persist_payment_change(loan_id: int, change: PaymentChange) -> LoanTableWrite:
+    return _persist_loan_change(loan_id, change.apply)
+
+
+def persist_loan_status(loan_id: int, status: LoanStatus) -> LoanTableWrite:
+    def change_status(loan: Loan) -> None:
+        loan.status = status.value
+
+    return _persist_loan_change(loan_id, change_status)
+
+
+def persist_loan_restructuring(
+    loan_id: int, terms: dict, fecha: datetime, calendar: Optional[BusinessCalendar] = None
+) -> LoanTableWrite:
+    """
+    Restructure a loan with the terms chosen on the page (the keyword arguments of PaymentList.restructure).
+    The balance is taken from the installments pending when the job runs.
+    """
+
+    def restructure(loan: Loan) -> None:
+        loan.payment_list.restructure(**terms, fecha=fecha, calendar=calendar)
+
+    return _persist_loan_change(loan_id, restructure)
+
+
+def persist_bulk_restructuring(
+    loan_ids: list[int],
+    policy: RestructurePolicy,
+    motivo: Optional[str] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> Optional[LoanTableWrite]:
+    """
+    Restructure many loans and save them with a single write of the loan table (always pandas: the batch
+    works on the raw JSON columns). Nothing is written, and None returned, if no loan was restructured.
+    """
+    previous_version = get_table_version(CSVTable.LOAN_PATH)
+    loan_table = db_operations.read_loan_table()
+    result = restructure_loans(loan_table, loan_ids, policy, motivo=motivo, calendar=calendar)
+    if not result.restructured:
+        return None
+
+    db_operations.write_loan_table(result.loans_df, overwrite=True, previous_df=loan_table)
+    restructured_df = result.loans_df[result.loans_df["loan_id"].isin(list(result.restructured))]
+    return LoanTableWrite(restructured_df, previous_version, get_table_version(CSVTable.LOAN_PATH))
+
+
+def persist_receipts(receipts: list[Receipt]) -> Optional[LoanTableWrite]:
+    """
+    Record receipts and settle the installments of their loans: the ones the receipts pay in full are marked
+    as paid, with the day of the receipt that completed them, in a single write of the loan table (always
+    pandas: the settlement works on the raw JSON columns). The receipts are numbered after the ones recorded
+    when the job runs. None is returned if no installment changed and the loan table was not written.
+    """
+    receipts_df = read_payments_table()
+    first_receipt_id = int(receipts_df["receipt_id"].max()) + 1 if not receipts_df.empty else 1
+    receipts = [
+        receipt.model_copy(update={"receipt_id": receipt_id})
+        for receipt_id, receipt in enumerate(receipts, start=first_receipt_id)
+    ]
+    receipts_df = extend_payments_table(receipts_df, receipts)
+    write_payments_table(receipts_df, overwrite=True)
+
+    loan_ids = [receipt.loan_id for receipt in receipts]
+    previous_version = get_table_version(CSVTable.LOAN_PATH)
+    loan_table = db_operations.read_loan_table()
+    allocation = allocate_receipts(
+        build_installment_components(loan_table[loan_table["loan_id"].isin(loan_ids)]),
+        receipts_df[receipts_df["loan_id"].isin(loan_ids)],
+    )
+    settlement = settle_installments(loan_table, allocation.installments)
+    if not settlement.changed_loans:
+        return None
+
+    db_operations.write_loan_table(settlement.loans_df, overwrite=True, previous_df=loan_table)
+    receipt_loans_df = settlement.loans_df[settlement.loans_df["loan_id"].isin(loan_ids)]
+    return LoanTableWrite(receipt_loans_df, previous_version, get_table_version(CSVTable.LOAN_PATH))
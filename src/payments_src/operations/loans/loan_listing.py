@@ -0,0 +1,106 @@
+import base64
+import bisect
+import json
+from typing import Optional
+
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, NonNegativeInt, PositiveInt
+
+from payments_src.db.csv_db.db_operations import NESTED_LOAN_COLUMNS, flatten_loans_table
+from payments_src.domain.loans_enums import LoanSortKey
+
+
+class LoanPage(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    rows: pd.DataFrame
+    # position of the first row of the page in the sorted listing
+    start: NonNegativeInt
+    total_rows: NonNegativeInt
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_value, loan_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, loan_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    sort_value, loan_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return sort_value, loan_id
+
+
+class LoanListing:
+    """
+    Sorted, paginated listing over a raw loan table. The sort order for each key is computed once per data
+    version (only the JSON column holding the key is decoded), and a page is a slice of that order: only its
+    rows are flattened and sent to the UI. Pages are addressed by keyset cursors, the (sort value, loan_id) of
+    the last row shown, so a page does not shift when loans are added or removed before it.
+    """
+
+    def __init__(self):
+        self._loans_df = pd.DataFrame()
+        self._sort_orders: dict[LoanSortKey, tuple[list[int], list[tuple]]] = {}
+        # data version of the loan table this listing was last synced with
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._loans_df)
+
+    def sync_with_loans_df(self, loans_df: pd.DataFrame) -> None:
+        self._loans_df = loans_df.reset_index(drop=True)
+        self._sort_orders = {}
+
+    def get_page(
+        self,
+        page_size: PositiveInt,
+        sort_key: LoanSortKey = LoanSortKey.LOAN_ID,
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        columns: Optional[list[str]] = None,
+    ) -> LoanPage:
+        positions, sort_keys = self._sort_order(sort_key)
+        total_rows = len(positions)
+
+        if descending:
+            end = bisect.bisect_left(sort_keys, decode_cursor(cursor)) if cursor else total_rows
+            begin = max(end - page_size, 0)
+            page_positions = positions[begin:end][::-1]
+            start = total_rows - end
+            last_key = sort_keys[begin] if begin > 0 else None
+        else:
+            begin = bisect.bisect_right(sort_keys, decode_cursor(cursor)) if cursor else 0
+            end = min(begin + page_size, total_rows)
+            page_positions = positions[begin:end]
+            start = begin
+            last_key = sort_keys[end - 1] if end < total_rows else None
+
+        rows = flatten_loans_table(self._loans_df.iloc[page_positions])
+        if columns is not None:
+            rows = rows[columns]
+
+        return LoanPage(
+            rows=rows,
+            start=start,
+            total_rows=total_rows,
+            next_cursor=encode_cursor(*last_key) if last_key is not None else None,
+        )
+
+    def _sort_order(self, sort_key: LoanSortKey) -> tuple[list[int], list[tuple]]:
+        if sort_key not in self._sort_orders:
+            values = self._sort_values(sort_key)
+            loan_ids = self._loans_df["loan_id"].astype(int).tolist()
+            positions = sorted(range(len(values)), key=lambda position: (values[position], loan_ids[position]))
+            sort_keys = [(values[position], loan_ids[position]) for position in positions]
+            self._sort_orders[sort_key] = (positions, sort_keys)
+
+        return self._sort_orders[sort_key]
+
+    def _sort_values(self, sort_key: LoanSortKey) -> list:
+        field_name = sort_key.value
+        if field_name in self._loans_df.columns:
+            return self._loans_df[field_name].tolist()
+
+        for column, model in NESTED_LOAN_COLUMNS.items():
+            if field_name in model.model_fields:
+                return [json.loads(value)[field_name] for value in self._loans_df[column]]
+
+        raise ValueError(f"Invalid sort key: {sort_key}")
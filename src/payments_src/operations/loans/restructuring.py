@@ -0,0 +1,109 @@
+import json
+from datetime import datetime, time
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from payments_src.domain.amortization import build_schedules
+from payments_src.domain.business_calendar import BusinessCalendar
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import AmortizationSystem
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.domain.restructuring import Restructuring, RestructurePolicy
+
+
+class LoanRestructuring(NamedTuple):
+    loans_df: pd.DataFrame
+    # loan_id -> what was done to it
+    restructured: dict[int, Restructuring]
+    # loan_id -> why it was left as it was
+    skipped: dict[int, str]
+
+
+def dealership_loan_ids(
+    loans_df: pd.DataFrame, dealership_id: int, status: LoanStatus = LoanStatus.APPROVED
+) -> list[int]:
+    """
+    Loans of a raw loan table (nested columns as JSON) sold by a dealership, with the given status.
+    """
+    loans_df = loans_df[loans_df["status"] == status.value]
+    return [
+        int(loan_id)
+        for loan_id, dealership_str in zip(loans_df["loan_id"], loans_df["dealership"])
+        if json.loads(dealership_str)["dealership_id"] == dealership_id
+    ]
+
+
+def restructure_loans(
+    loans_df: pd.DataFrame,
+    loan_ids: list[int],
+    policy: RestructurePolicy,
+    fecha: Optional[datetime] = None,
+    motivo: Optional[str] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> LoanRestructuring:
+    """
+    Apply `policy` to some loans of a raw loan table (nested columns as JSON). Only the payment lists of those
+    loans are decoded and encoded again, and the new schedules of every loan with the same amortization
+    system come from one `build_schedules` call. Loans with nothing left to restructure are skipped. New due
+    dates are rolled onto business days if a calendar is given. The table is returned, not written, so the
+    whole batch is saved with a single write.
+    """
+    # the restructuring day, so new installments fall due at midnight like every other one
+    fecha = datetime.combine((fecha or datetime.now()).date(), time.min)
+    payment_list_strs = loans_df["payment_list"].tolist()
+    plans = []
+    skipped = {}
+
+    for row in np.flatnonzero(loans_df["loan_id"].isin(loan_ids).to_numpy()).tolist():
+        loan_id = int(loans_df["loan_id"].iat[row])
+        payment_list = PaymentListFactory.construct_from_payment_list_record_str(payment_list_strs[row])
+        pending_payments = payment_list.pending_payments()
+        if not pending_payments:
+            skipped[loan_id] = "There are no pending installments to restructure"
+            continue
+
+        try:
+            restructuring = payment_list.plan_restructuring(
+                # overdue loans start again from the restructuring date, so the new schedule is not born overdue
+                fecha_inicio=max(pending_payments[0].end_date, fecha) + relativedelta(months=policy.grace_months),
+                num_pagos=policy.num_pagos or len(pending_payments),
+                tasa_interes=policy.tasa_interes or payment_list.tasa_interes,
+                sistema_amortizacion=policy.sistema_amortizacion,
+                fecha=fecha,
+                motivo=motivo,
+                capitalize_late_fees=policy.capitalize_late_fees,
+            )
+        except ValueError as e:
+            skipped[loan_id] = str(e)
+            continue
+        plans.append((row, loan_id, payment_list, restructuring))
+
+    for system in AmortizationSystem:
+        group = [plan for plan in plans if plan[3].sistema_amortizacion == system.value]
+        if not group:
+            continue
+        schedule = build_schedules(
+            [restructuring.saldo_minor for _, _, _, restructuring in group],
+            [restructuring.tasa_interes for _, _, _, restructuring in group],
+            [restructuring.num_pagos for _, _, _, restructuring in group],
+            system,
+        )
+        for i, (_, _, payment_list, restructuring) in enumerate(group):
+            num_pagos = restructuring.num_pagos
+            payment_list.apply_restructuring(
+                restructuring,
+                schedule.installment_minor[i, :num_pagos].tolist(),
+                schedule.principal_minor[i, :num_pagos].tolist(),
+                schedule.interest_minor[i, :num_pagos].tolist(),
+                calendar,
+            )
+
+    for row, _, payment_list, _ in plans:
+        payment_list_strs[row] = json.dumps(payment_list.model_dump(mode="json"), default=str)
+    # one assignment: setting string cells one at a time is slow on Arrow-backed columns
+    loans_df = loans_df.assign(payment_list=payment_list_strs)
+
+    return LoanRestructuring(loans_df, {loan_id: restructuring for _, loan_id, _, restructuring in plans}, skipped)
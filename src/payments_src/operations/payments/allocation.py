@@ -0,0 +1,266 @@
+import json
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.money import to_minor_units
+from payments_src.domain.payment_enums import AllocationComponent, PaymentStatus
+
+# components of an installment in the order a receipt pays them
+INSTALLMENT_COMPONENTS = [AllocationComponent.FEE, AllocationComponent.INTEREST, AllocationComponent.PRINCIPAL]
+
+
+def build_installment_components(loans_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every installment of a raw loan table (nested columns as JSON) with what it is owed split into late fee,
+    interest and principal, in minor units. Installments without a stored principal / interest split (flat
+    loans) take the share of the loan's principal in its total to pay.
+    """
+    rows = []
+    for loan_id, payment_list_str in zip(loans_df["loan_id"], loans_df["payment_list"]):
+        payment_list = json.loads(payment_list_str)
+        payments = payment_list["payments"].values()
+        amounts_minor = [
+            payment["amount_minor"] if payment.get("amount_minor") is not None else to_minor_units(payment["amount"])
+            for payment in payments
+        ]
+        principal_minor = to_minor_units(payment_list["dinero_total_prestado"])
+        total_minor = sum(amounts_minor)
+
+        for payment, amount_minor in zip(payments, amounts_minor):
+            if payment.get("principal_minor") is not None:
+                principal = payment["principal_minor"]
+            else:
+                principal = min(amount_minor * principal_minor // total_minor, amount_minor) if total_minor else 0
+            rows.append(
+                (
+                    int(loan_id),
+                    int(payment["id"]),
+                    payment_list["moneda"],
+                    payment["end_date"],
+                    payment["status"],
+                    payment["date_paid"],
+                    payment.get("paid_by_receipts", False),
+                    amount_minor,
+                    payment.get("late_fee_minor", 0),
+                    amount_minor - principal,
+                    principal,
+                )
+            )
+
+    installments = pd.DataFrame(
+        rows,
+        columns=[
+            "loan_id",
+            "payment_id",
+            "moneda",
+            "end_date",
+            "payment_status",
+            "date_paid",
+            "paid_by_receipts",
+            "amount_minor",
+            "fee_minor",
+            "interest_minor",
+            "principal_minor",
+        ],
+    )
+    # the models write ISO 8601 dates, with microseconds when a time of day has them
+    installments["end_date"] = pd.to_datetime(installments["end_date"], format="ISO8601")
+    installments["date_paid"] = pd.to_datetime(installments["date_paid"], format="ISO8601")
+    return installments
+
+
+class ReceiptAllocation(NamedTuple):
+    # receipt_id, loan_id, payment_id (missing for credit), component, amount_minor
+    allocations: pd.DataFrame
+    # every installment with due_minor, allocated_minor, outstanding_minor, derived status and date_paid
+    installments: pd.DataFrame
+
+
+def _loan_intervals(
+    loan_rows: np.ndarray, amounts: np.ndarray, loan_starts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [start, end) of consecutive amounts laid end to end from the start of their loan; rows must be sorted by
+    loan.
+    """
+    ends = np.cumsum(amounts)
+    starts = ends - amounts
+    first_of_loan = np.flatnonzero(np.diff(loan_rows, prepend=-1) != 0)
+    loan_base = np.repeat(starts[first_of_loan], np.diff(np.append(first_of_loan, len(loan_rows))))
+    return starts - loan_base + loan_starts[loan_rows], ends - loan_base + loan_starts[loan_rows]
+
+
+def _containing(starts: np.ndarray, ends: np.ndarray, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Index of the interval (sorted, not overlapping) each point falls in, and whether it falls in one at all.
+    """
+    if len(starts) == 0:
+        return np.zeros(len(points), dtype=np.int64), np.zeros(len(points), dtype=bool)
+    indices = np.maximum(np.searchsorted(starts, points, side="right") - 1, 0)
+    return indices, (points >= starts[indices]) & (points < ends[indices])
+
+
+def allocate_receipts(installments: pd.DataFrame, receipts: pd.DataFrame) -> ReceiptAllocation:
+    """
+    Apply every receipt of every loan at once. The receipts of a loan, oldest first, pay its pending
+    installments oldest first, each installment's late fee, then interest, then principal; what is left once
+    every installment is paid is credit. Installments marked as paid by hand or cancelled on the loan take
+    nothing; the ones the receipts paid (`paid_by_receipts`) are allocated again like pending ones, so the
+    receipts that paid them keep paying them.
+
+    Both sides are laid on one number line: each loan gets a stretch, the installment components end to end
+    from its start and, separately, the receipts end to end from its start. Cutting the line at every
+    boundary of either side gives the pieces, each inside exactly one component and at most one receipt, so
+    the whole allocation is one sort and two binary searches.
+    """
+    is_open = (installments["payment_status"] == PaymentStatus.PENDING.value) | installments["paid_by_receipts"]
+    owed = installments[is_open].sort_values(["loan_id", "end_date", "payment_id"])
+    receipts = receipts.sort_values(["loan_id", "date_received", "receipt_id"])
+
+    loan_ids = np.union1d(owed["loan_id"].to_numpy(), receipts["loan_id"].to_numpy())
+    installment_loan_rows = np.searchsorted(loan_ids, owed["loan_id"].to_numpy())
+    receipt_loan_rows = np.searchsorted(loan_ids, receipts["loan_id"].to_numpy())
+
+    # one bucket per installment and component, in the order they are paid; empty ones are dropped
+    bucket_due = owed[["fee_minor", "interest_minor", "principal_minor"]].to_numpy(dtype=np.int64).ravel()
+    bucket_installment = np.repeat(np.arange(len(owed)), len(INSTALLMENT_COMPONENTS))
+    bucket_component = np.tile(np.arange(len(INSTALLMENT_COMPONENTS)), len(owed))
+    has_due = bucket_due > 0
+    bucket_due, bucket_installment, bucket_component = (
+        bucket_due[has_due],
+        bucket_installment[has_due],
+        bucket_component[has_due],
+    )
+    bucket_loan_rows = installment_loan_rows[bucket_installment]
+
+    receipt_amounts = receipts["amount_minor"].to_numpy(dtype=np.int64)
+    due_per_loan = np.bincount(bucket_loan_rows, weights=bucket_due, minlength=len(loan_ids)).astype(np.int64)
+    received_per_loan = np.bincount(receipt_loan_rows, weights=receipt_amounts, minlength=len(loan_ids)).astype(
+        np.int64
+    )
+    loan_spans = np.maximum(due_per_loan, received_per_loan)
+    loan_starts = np.cumsum(loan_spans) - loan_spans
+
+    bucket_starts, bucket_ends = _loan_intervals(bucket_loan_rows, bucket_due, loan_starts)
+    receipt_starts, receipt_ends = _loan_intervals(receipt_loan_rows, receipt_amounts, loan_starts)
+
+    cuts = np.sort(np.concatenate((bucket_starts, bucket_ends, receipt_starts, receipt_ends)))
+    # positions are non-negative; sorting and dropping repeats is much faster than np.unique here
+    cuts = cuts[np.diff(cuts, prepend=-1) != 0]
+    piece_starts, piece_lengths = cuts[:-1], np.diff(cuts)
+
+    piece_buckets, in_bucket = _containing(bucket_starts, bucket_ends, piece_starts)
+    piece_receipts, in_receipt = _containing(receipt_starts, receipt_ends, piece_starts)
+
+    # pieces of a receipt outside every component are credit
+    pieces = np.flatnonzero(in_receipt)
+    piece_buckets, in_bucket, piece_receipts = piece_buckets[pieces], in_bucket[pieces], piece_receipts[pieces]
+    piece_lengths = piece_lengths[pieces]
+    piece_installments = np.full(len(pieces), -1)
+    piece_installments[in_bucket] = bucket_installment[piece_buckets[in_bucket]]
+
+    payment_ids = pd.array(np.zeros(len(pieces), dtype=np.int64), dtype="Int64")
+    payment_ids[in_bucket] = owed["payment_id"].to_numpy()[piece_installments[in_bucket]]
+    payment_ids[~in_bucket] = pd.NA
+    components = np.full(len(pieces), AllocationComponent.CREDIT.value, dtype=object)
+    components[in_bucket] = np.array([component.value for component in INSTALLMENT_COMPONENTS])[
+        bucket_component[piece_buckets[in_bucket]]
+    ]
+
+    allocations = pd.DataFrame(
+        {
+            "receipt_id": receipts["receipt_id"].to_numpy()[piece_receipts],
+            "loan_id": receipts["loan_id"].to_numpy()[piece_receipts],
+            "payment_id": payment_ids,
+            "component": components,
+            "amount_minor": piece_lengths,
+        }
+    )
+
+    # per open installment: total allocated, and the date of the last receipt that paid into it
+    allocated = np.bincount(
+        piece_installments[in_bucket], weights=piece_lengths[in_bucket], minlength=len(owed)
+    ).astype(np.int64)
+    last_receipt = np.full(len(owed), -1)
+    np.maximum.at(last_receipt, piece_installments[in_bucket], piece_receipts[in_bucket])
+    receipt_dates = receipts["date_received"].to_numpy("datetime64[ns]")
+
+    due = owed[["fee_minor", "interest_minor", "principal_minor"]].to_numpy(dtype=np.int64).sum(axis=1)
+    fully_paid = (allocated >= due) & (last_receipt >= 0)
+    date_paid = np.full(len(owed), np.datetime64("NaT"), dtype="datetime64[ns]")
+    date_paid[fully_paid] = receipt_dates[last_receipt[fully_paid]]
+    derived = pd.DataFrame(
+        {
+            "due_minor": due,
+            "allocated_minor": allocated,
+            "outstanding_minor": due - allocated,
+            "derived_status": np.where(fully_paid, PaymentStatus.PAID.value, PaymentStatus.PENDING.value),
+            "derived_date_paid": date_paid,
+        },
+        index=owed.index,
+    )
+
+    # installments paid by hand or cancelled keep their status and owe nothing more
+    result = installments.join(derived)
+    settled = result["derived_status"].isna()
+    result.loc[settled, ["due_minor", "allocated_minor", "outstanding_minor"]] = 0
+    result["derived_status"] = result["derived_status"].fillna(result["payment_status"])
+    for column in ["due_minor", "allocated_minor", "outstanding_minor"]:
+        result[column] = result[column].astype(np.int64)
+
+    return ReceiptAllocation(allocations, result)
+
+
+class ReceiptSettlement(NamedTuple):
+    loans_df: pd.DataFrame
+    changed_loans: int
+    # installments that became paid / went back to pending
+    paid_installments: int
+    reopened_installments: int
+
+
+def settle_installments(loans_df: pd.DataFrame, installments: pd.DataFrame) -> ReceiptSettlement:
+    """
+    Write the status and date paid derived by `allocate_receipts` into the payment lists of a raw loan table
+    (nested columns as JSON): installments the receipts pay in full become paid, flagged as paid by receipts,
+    and the ones the receipts paid but no longer cover go back to pending. Only the loans whose installments
+    change are decoded and encoded again. The table is returned, not written.
+    """
+    is_paid = installments["derived_status"] == PaymentStatus.PAID.value
+    newly_paid = (
+        is_paid
+        & installments["derived_date_paid"].notna()
+        & (
+            ~installments["paid_by_receipts"]
+            | (installments["payment_status"] != PaymentStatus.PAID.value)
+            | (installments["date_paid"] != installments["derived_date_paid"])
+        )
+    )
+    reopened = installments["paid_by_receipts"] & (installments["derived_status"] == PaymentStatus.PENDING.value)
+    changes = installments[newly_paid | reopened]
+
+    updated_df = loans_df.copy()
+    if changes.empty:
+        return ReceiptSettlement(updated_df, 0, 0, 0)
+
+    rows = np.flatnonzero(updated_df["loan_id"].isin(changes["loan_id"]).to_numpy())
+    payment_lists = {
+        int(loan_id): json.loads(payment_list_str)
+        for loan_id, payment_list_str in zip(
+            updated_df["loan_id"].to_numpy()[rows], updated_df["payment_list"].to_numpy()[rows]
+        )
+    }
+    for loan_id, payment_id, status, date_paid in zip(
+        changes["loan_id"], changes["payment_id"], changes["derived_status"], changes["derived_date_paid"]
+    ):
+        payment = payment_lists[int(loan_id)]["payments"][str(payment_id)]
+        payment["status"] = status
+        payment["date_paid"] = date_paid.isoformat() if status == PaymentStatus.PAID.value else None
+        payment["paid_by_receipts"] = status == PaymentStatus.PAID.value
+
+    updated_df.iloc[rows, updated_df.columns.get_loc("payment_list")] = [
+        json.dumps(payment_lists[int(loan_id)]) for loan_id in updated_df["loan_id"].to_numpy()[rows]
+    ]
+    return ReceiptSettlement(updated_df, len(rows), int(newly_paid.sum()), int(reopened.sum()))
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.amortization import build_schedules
+from payments_src.domain.business_calendar import BusinessCalendar, monthly_due_dates
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR, to_minor_units_array
+from payments_src.domain.payment_enums import AmortizationSystem
+
+
+def build_schedule_frame(
+    amount: float,
+    interest_rate: float,
+    num_payments: int,
+    system: AmortizationSystem,
+    fecha_inicio: Optional[datetime] = None,
+    calendar: Optional[BusinessCalendar] = None,
+) -> pd.DataFrame:
+    """
+    Schedule of a single loan, one row per payment, with amounts in major units. Dates are only added if
+    `fecha_inicio` is given, rolled onto business days if a calendar is given too.
+    """
+    schedules = build_schedules(to_minor_units_array([amount]), [interest_rate], [num_payments], system)
+
+    schedule_df = pd.DataFrame(
+        {
+            "numero_pago": np.arange(1, num_payments + 1),
+            "pago": schedules.installment_minor[0] / MINOR_UNITS_PER_MAJOR,
+            "capital": schedules.principal_minor[0] / MINOR_UNITS_PER_MAJOR,
+            "interes": schedules.interest_minor[0] / MINOR_UNITS_PER_MAJOR,
+            "saldo": schedules.balance_minor[0] / MINOR_UNITS_PER_MAJOR,
+        }
+    )
+    if fecha_inicio is not None:
+        schedule_df.insert(1, "fecha", monthly_due_dates(fecha_inicio, num_payments, calendar))
+    return schedule_df
@@ -0,0 +1,293 @@
+import bisect
+import json
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.loans import Loan
+from payments_src.domain.money import MINOR_UNITS_PER_MAJOR, to_minor_units
+from payments_src.domain.payment_enums import PaymentStatus
+
+# (label, first day past due, last day past due); None means no upper limit
+AGING_BUCKETS = [
+    ("1-30", 1, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+]
+
+
+def days_past_due(end_date: datetime | date, as_of: datetime | date) -> int:
+    """
+    Whole days between the due day and the `as_of` day; negative while the installment is not due yet.
+    """
+    end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+    as_of_day = as_of.date() if isinstance(as_of, datetime) else as_of
+    return (as_of_day - end_day).days
+
+
+class LoanDelinquency(NamedTuple):
+    loan_id: int
+    dealership_id: int
+    dealership_name: str
+    # (end_date, payment_id, amount_minor) of the pending installments, in due date order
+    pending: tuple[tuple[datetime, int, int], ...]
+
+
+class _SortedAmounts:
+    """
+    Amounts kept sorted by key, with prefix sums rebuilt lazily after changes so that the total and count of
+    any key range is two binary searches.
+    """
+
+    def __init__(self):
+        self._keys: list[tuple] = []
+        self._amounts: dict[tuple, int] = {}
+        self._prefix: Optional[np.ndarray] = None
+        self._bulk_mode = False
+
+    def add(self, key: tuple, amount: int) -> None:
+        self._amounts[key] = amount
+        if self._bulk_mode:
+            self._keys.append(key)
+        else:
+            bisect.insort(self._keys, key)
+        self._prefix = None
+
+    def remove(self, key: tuple) -> None:
+        del self._amounts[key]
+        if not self._bulk_mode:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+        self._prefix = None
+
+    def start_bulk(self) -> None:
+        self._bulk_mode = True
+
+    def end_bulk(self) -> None:
+        self._bulk_mode = False
+        self._keys = sorted(self._amounts)
+
+    def range_total(self, start: tuple, end: tuple) -> tuple[int, int]:
+        """
+        Count and total amount of the keys in [start, end).
+        """
+        if self._prefix is None:
+            amounts = np.fromiter((self._amounts[key] for key in self._keys), dtype=np.int64, count=len(self._keys))
+            self._prefix = np.concatenate(([0], np.cumsum(amounts)))
+
+        lo = bisect.bisect_left(self._keys, start)
+        hi = bisect.bisect_left(self._keys, end, lo=lo)
+        return hi - lo, int(self._prefix[hi] - self._prefix[lo])
+
+
+class _DelinquencyBook:
+    """
+    Pending installments keyed by due date, and loans keyed by the due date of their oldest pending installment
+    with their whole pending balance as amount.
+    """
+
+    def __init__(self):
+        self.installments = _SortedAmounts()
+        self.loans = _SortedAmounts()
+
+    def add(self, entry: LoanDelinquency) -> None:
+        for end_date, payment_id, amount_minor in entry.pending:
+            self.installments.add((end_date, entry.loan_id, payment_id), amount_minor)
+        if entry.pending:
+            self.loans.add((entry.pending[0][0], entry.loan_id), sum(amount for _, _, amount in entry.pending))
+
+    def remove(self, entry: LoanDelinquency) -> None:
+        for end_date, payment_id, _ in entry.pending:
+            self.installments.remove((end_date, entry.loan_id, payment_id))
+        if entry.pending:
+            self.loans.remove((entry.pending[0][0], entry.loan_id))
+
+    def start_bulk(self) -> None:
+        self.installments.start_bulk()
+        self.loans.start_bulk()
+
+    def end_bulk(self) -> None:
+        self.installments.end_bulk()
+        self.loans.end_bulk()
+
+
+def _due_day_bounds(as_of: datetime | date, first_day: int, last_day: Optional[int]) -> tuple[tuple, tuple]:
+    """
+    Key range [start, end) of the items that are between `first_day` and `last_day` days past due on `as_of`.
+    """
+    as_of_day = datetime.combine(as_of.date() if isinstance(as_of, datetime) else as_of, datetime.min.time())
+    end = (as_of_day - timedelta(days=first_day - 1),)
+    start = (datetime.min,) if last_day is None else (as_of_day - timedelta(days=last_day),)
+    return start, end
+
+
+class DelinquencyTracker:
+    """
+    Aging of the pending installments of active loans and portfolio at risk, overall and per dealership. Loans
+    are kept sorted by the due date of their oldest pending installment, so every figure for an as-of date is
+    a pair of binary searches over prefix sums; moving the as-of date costs nothing and marking a payment as
+    paid only updates that loan. Amounts are added in minor units of each loan's own currency.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, LoanDelinquency] = {}
+        self._portfolio = _DelinquencyBook()
+        self._dealerships: dict[int, _DelinquencyBook] = {}
+        self._dealership_names: dict[int, str] = {}
+        # data version of the loan table this tracker was last synced with
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert_entry(self, entry: LoanDelinquency) -> None:
+        if self._entries.get(entry.loan_id) == entry:
+            return
+
+        self.remove_loan(entry.loan_id)
+
+        self._entries[entry.loan_id] = entry
+        self._portfolio.add(entry)
+        self._dealerships.setdefault(entry.dealership_id, _DelinquencyBook()).add(entry)
+        self._dealership_names[entry.dealership_id] = entry.dealership_name
+
+    def upsert_loan(self, loan: Loan) -> None:
+        self.upsert_entry(self.loan_entry(loan))
+
+    def remove_loan(self, loan_id: int) -> None:
+        entry = self._entries.pop(loan_id, None)
+        if entry is None:
+            return
+        self._portfolio.remove(entry)
+        self._dealerships[entry.dealership_id].remove(entry)
+
+    def upsert_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Track the loans of some rows of a raw loan table; loans that are not in them are left as they are.
+        """
+        for loan_id, dealership_str, payment_list_str in zip(
+            loans_df["loan_id"], loans_df["dealership"], loans_df["payment_list"]
+        ):
+            self.upsert_entry(self.record_entry(int(loan_id), dealership_str, payment_list_str))
+
+    def sync_with_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Bring the tracker in line with a raw loan table (nested columns as JSON). Unchanged loans are left
+        alone and loans missing from the table are dropped.
+        """
+        books = [self._portfolio, *self._dealerships.values()]
+        for book in books:
+            book.start_bulk()
+        try:
+            seen_loan_ids = set()
+            for loan_id, dealership_str, payment_list_str in zip(
+                loans_df["loan_id"], loans_df["dealership"], loans_df["payment_list"]
+            ):
+                loan_id = int(loan_id)
+                seen_loan_ids.add(loan_id)
+                entry = self.record_entry(loan_id, dealership_str, payment_list_str)
+                if entry.dealership_id not in self._dealerships:
+                    self._dealerships[entry.dealership_id] = _DelinquencyBook()
+                    self._dealerships[entry.dealership_id].start_bulk()
+                    books.append(self._dealerships[entry.dealership_id])
+                self.upsert_entry(entry)
+
+            for loan_id in set(self._entries) - seen_loan_ids:
+                self.remove_loan(loan_id)
+        finally:
+            for book in books:
+                book.end_bulk()
+
+    def _book(self, dealership_id: Optional[int]) -> _DelinquencyBook:
+        if dealership_id is None:
+            return self._portfolio
+        return self._dealerships.get(dealership_id, _DelinquencyBook())
+
+    def aging_buckets(self, as_of: datetime | date, dealership_id: Optional[int] = None) -> pd.DataFrame:
+        """
+        Per aging bucket: overdue installments and their amount (by how late each installment is), and loans
+        and their pending balance (by how late their oldest pending installment is).
+        """
+        book = self._book(dealership_id)
+        rows = []
+        for label, first_day, last_day in AGING_BUCKETS:
+            start, end = _due_day_bounds(as_of, first_day, last_day)
+            installments, overdue_minor = book.installments.range_total(start, end)
+            loans, balance_minor = book.loans.range_total(start, end)
+            rows.append(
+                {
+                    "tramo": label,
+                    "cuotas": installments,
+                    "monto_vencido": overdue_minor / MINOR_UNITS_PER_MAJOR,
+                    "prestamos": loans,
+                    "saldo_prestamos": balance_minor / MINOR_UNITS_PER_MAJOR,
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def outstanding_balance(self, dealership_id: Optional[int] = None) -> float:
+        _, balance_minor = self._book(dealership_id).loans.range_total((datetime.min,), (datetime.max,))
+        return balance_minor / MINOR_UNITS_PER_MAJOR
+
+    def portfolio_at_risk(self, as_of: datetime | date, days: int, dealership_id: Optional[int] = None) -> float:
+        """
+        Share of the pending balance that belongs to loans more than `days` days past due (PAR30 with days=30).
+        """
+        book = self._book(dealership_id)
+        _, total_minor = book.loans.range_total((datetime.min,), (datetime.max,))
+        if total_minor == 0:
+            return 0.0
+        start, end = _due_day_bounds(as_of, days + 1, None)
+        _, at_risk_minor = book.loans.range_total(start, end)
+        return at_risk_minor / total_minor
+
+    def dealership_breakdown(self, as_of: datetime | date) -> pd.DataFrame:
+        rows = []
+        for dealership_id, name in sorted(self._dealership_names.items()):
+            book = self._dealerships[dealership_id]
+            overdue_start, overdue_end = _due_day_bounds(as_of, 1, None)
+            _, overdue_minor = book.installments.range_total(overdue_start, overdue_end)
+            rows.append(
+                {
+                    "dealership_id": dealership_id,
+                    "automotora": name,
+                    "saldo_pendiente": self.outstanding_balance(dealership_id),
+                    "monto_vencido": overdue_minor / MINOR_UNITS_PER_MAJOR,
+                    "par30": self.portfolio_at_risk(as_of, 30, dealership_id),
+                    "par90": self.portfolio_at_risk(as_of, 90, dealership_id),
+                }
+            )
+        return pd.DataFrame(
+            rows, columns=["dealership_id", "automotora", "saldo_pendiente", "monto_vencido", "par30", "par90"]
+        )
+
+    @staticmethod
+    def loan_entry(loan: Loan) -> LoanDelinquency:
+        pending = sorted(
+            (payment.end_date, payment.id, payment.amount_minor)
+            for payment in loan.payment_list.payments.values()
+            if (payment.status.value if isinstance(payment.status, PaymentStatus) else payment.status)
+            == PaymentStatus.PENDING.value
+        )
+        return LoanDelinquency(loan.loan_id, loan.dealership.dealership_id, loan.dealership.name, tuple(pending))
+
+    @staticmethod
+    def record_entry(loan_id: int, dealership_str: str, payment_list_str: str) -> LoanDelinquency:
+        dealership = json.loads(dealership_str)
+        payments = json.loads(payment_list_str)["payments"]
+        pending = sorted(
+            (
+                datetime.fromisoformat(payment["end_date"]),
+                int(payment["id"]),
+                (
+                    payment["amount_minor"]
+                    if payment.get("amount_minor") is not None
+                    else to_minor_units(payment["amount"])
+                ),
+            )
+            for payment in payments.values()
+            if payment["status"] == PaymentStatus.PENDING.value
+        )
+        return LoanDelinquency(loan_id, int(dealership["dealership_id"]), dealership["name"], tuple(pending))
@@ -0,0 +1,167 @@
+import bisect
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from payments_src.domain.loans import Loan
+from payments_src.domain.payment_enums import PaymentStatus
+
+
+class DueDateEntry(NamedTuple):
+    end_date: datetime
+    loan_id: int
+    payment_id: int
+    status: str
+    amount: float
+
+
+def month_key(date: datetime) -> str:
+    return date.strftime("%Y-%m")
+
+
+def month_bounds(month: str) -> tuple[datetime, datetime]:
+    start = datetime.strptime(month, "%Y-%m")
+    return start, start + relativedelta(months=1)
+
+
+class DueDateIndex:
+    """
+    Installments of a set of loans sorted by due date. Range queries (a month, overdue as of a date, due in
+    the next N days) are two binary searches plus the matching entries, instead of a scan over every
+    installment of every loan. Pending installments have their own sorted list so overdue and upcoming
+    queries never touch paid ones.
+    """
+
+    def __init__(self):
+        self._all_keys: list[tuple[datetime, int, int]] = []
+        self._pending_keys: list[tuple[datetime, int, int]] = []
+        self._entries: dict[tuple[int, int], DueDateEntry] = {}
+        self._loan_entries: dict[int, list[DueDateEntry]] = {}
+        self._month_counts: Counter = Counter()
+        # data version of the loan table this index was last synced with
+        self.version = 0
+        self._bulk_mode = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert_entries(self, loan_id: int, entries: list[DueDateEntry]) -> None:
+        if self._loan_entries.get(loan_id) == entries:
+            return
+
+        self.remove_loan(loan_id)
+
+        for entry in entries:
+            self._entries[(entry.loan_id, entry.payment_id)] = entry
+            self._month_counts[month_key(entry.end_date)] += 1
+            if not self._bulk_mode:
+                key = (entry.end_date, entry.loan_id, entry.payment_id)
+                bisect.insort(self._all_keys, key)
+                if entry.status == PaymentStatus.PENDING.value:
+                    bisect.insort(self._pending_keys, key)
+
+        self._loan_entries[loan_id] = entries
+
+    def upsert_loan(self, loan: Loan) -> None:
+        self.upsert_entries(loan.loan_id, self.loan_entries(loan))
+
+    def remove_loan(self, loan_id: int) -> None:
+        for entry in self._loan_entries.pop(loan_id, []):
+            del self._entries[(entry.loan_id, entry.payment_id)]
+            self._month_counts[month_key(entry.end_date)] -= 1
+            if self._month_counts[month_key(entry.end_date)] == 0:
+                del self._month_counts[month_key(entry.end_date)]
+            if not self._bulk_mode:
+                key = (entry.end_date, entry.loan_id, entry.payment_id)
+                del self._all_keys[bisect.bisect_left(self._all_keys, key)]
+                if entry.status == PaymentStatus.PENDING.value:
+                    del self._pending_keys[bisect.bisect_left(self._pending_keys, key)]
+
+    def upsert_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Index the installments of some rows of a raw loan table; loans that are not in them are left as they are.
+        """
+        for loan_id, payment_list_str in zip(loans_df["loan_id"], loans_df["payment_list"]):
+            self.upsert_entries(int(loan_id), self.record_entries(int(loan_id), payment_list_str))
+
+    def sync_with_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Bring the index in line with a raw loan table (payment_list as JSON). Loans whose installments did not
+        change are left alone and loans missing from the table are dropped.
+        """
+        seen_loan_ids = set(int(loan_id) for loan_id in loans_df["loan_id"])
+
+        self._bulk_mode = True
+        try:
+            self.upsert_loans_df(loans_df)
+
+            for loan_id in set(self._loan_entries) - seen_loan_ids:
+                self.remove_loan(loan_id)
+        finally:
+            self._bulk_mode = False
+            self._all_keys = sorted((e.end_date, e.loan_id, e.payment_id) for e in self._entries.values())
+            self._pending_keys = [
+                key for key in self._all_keys if self._entries[key[1:]].status == PaymentStatus.PENDING.value
+            ]
+
+    def months(self) -> list[str]:
+        return sorted(self._month_counts)
+
+    def due_between(self, start: datetime, end: datetime, pending_only: bool = False) -> list[DueDateEntry]:
+        """
+        Installments due in [start, end), in due date order.
+        """
+        keys = self._pending_keys if pending_only else self._all_keys
+        lo = bisect.bisect_left(keys, (start,))
+        hi = bisect.bisect_left(keys, (end,), lo=lo)
+        return [self._entries[key[1:]] for key in keys[lo:hi]]
+
+    def due_in_month(self, month: str, pending_only: bool = False) -> list[DueDateEntry]:
+        start, end = month_bounds(month)
+        return self.due_between(start, end, pending_only=pending_only)
+
+    def overdue(self, as_of: datetime) -> list[DueDateEntry]:
+        """
+        Pending installments due strictly before the `as_of` day.
+        """
+        as_of_day = datetime.combine(as_of.date() if isinstance(as_of, datetime) else as_of, datetime.min.time())
+        hi = bisect.bisect_left(self._pending_keys, (as_of_day,))
+        return [self._entries[key[1:]] for key in self._pending_keys[:hi]]
+
+    def due_within(self, as_of: datetime, days: int) -> list[DueDateEntry]:
+        """
+        Pending installments due from the `as_of` day through `days` days later (inclusive).
+        """
+        as_of_day = datetime.combine(as_of.date() if isinstance(as_of, datetime) else as_of, datetime.min.time())
+        return self.due_between(as_of_day, as_of_day + timedelta(days=days + 1), pending_only=True)
+
+    @staticmethod
+    def loan_entries(loan: Loan) -> list[DueDateEntry]:
+        return sorted(
+            DueDateEntry(
+                payment.end_date,
+                loan.loan_id,
+                payment.id,
+                payment.status.value if isinstance(payment.status, PaymentStatus) else payment.status,
+                payment.amount,
+            )
+            for payment in loan.payment_list.payments.values()
+        )
+
+    @staticmethod
+    def record_entries(loan_id: int, payment_list_str: str) -> list[DueDateEntry]:
+        payments = json.loads(payment_list_str)["payments"]
+        return sorted(
+            DueDateEntry(
+                datetime.fromisoformat(payment["end_date"]),
+                loan_id,
+                int(payment["id"]),
+                payment["status"],
+                float(payment["amount"]),
+            )
+            for payment in payments.values()
+        )
@@ -1,3 +1,11 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from payments_src.domain.payment_enums import AmortizationSystem
+from payments_src.domain.amortization import annuity_factor
+
+
 def calculate_total_amount_loaned(amount: float, interest_rate: float, num_payments: int) -> float:
     return amount / (num_payments * interest_rate + 1)
 
@@ -11,3 +19,44 @@ def calculate_monthly_payment(amount_loaned: float, num_payments: int, interest_
     total_loaned = total_amount_to_pay_calculator(amount_loaned, num_payments, interest_rate)
     payment = total_loaned / num_payments
     return payment
+
+
+class QuoteGrid(NamedTuple):
+    """
+    Quotes for every combination of amount, number of payments and interest rate, as arrays of shape
+    (amounts, num_payments, interest_rates).
+    """
+
+    monthly_payment: np.ndarray
+    total_to_pay: np.ndarray
+
+
+def quote_grid(
+    amounts: np.ndarray,
+    num_payments: np.ndarray,
+    interest_rates: np.ndarray,
+    system: AmortizationSystem = AmortizationSystem.FLAT,
+) -> QuoteGrid:
+    """
+    Monthly payment (the first one, for German loans) and total to pay of every option, from the closed form of
+    each amortization system broadcast over the whole grid. Amounts are not rounded to cents.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64).reshape(-1, 1, 1)
+    num_payments = np.asarray(num_payments, dtype=np.float64).reshape(1, -1, 1)
+    interest_rates = np.asarray(interest_rates, dtype=np.float64).reshape(1, 1, -1)
+    if (num_payments <= 0).any():
+        raise ValueError("num_payments must be positive")
+
+    if system == AmortizationSystem.FLAT:
+        total_to_pay = amounts * (num_payments * interest_rates + 1)
+        monthly_payment = total_to_pay / num_payments
+    elif system == AmortizationSystem.FRENCH:
+        monthly_payment = amounts * annuity_factor(interest_rates, num_payments)
+        total_to_pay = monthly_payment * num_payments
+    else:
+        # German: interest on a balance that drops by amount / n every month
+        monthly_payment = amounts / num_payments + amounts * interest_rates
+        total_to_pay = amounts * (1 + interest_rates * (num_payments + 1) / 2)
+
+    shape = np.broadcast_shapes(amounts.shape, num_payments.shape, interest_rates.shape)
+    return QuoteGrid(np.broadcast_to(monthly_payment, shape), np.broadcast_to(total_to_pay, shape))
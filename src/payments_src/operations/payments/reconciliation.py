@@ -0,0 +1,444 @@
+import json
+from collections import defaultdict
+from typing import IO, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from payments_src.domain.money import to_minor_units_array
+from payments_src.domain.payment_enums import Currency, MatchEvidence, PaymentStatus
+from payments_src.domain.receipts import Receipt
+from payments_src.operations.payments.allocation import allocate_receipts, build_installment_components
+from payments_src.operations.search.loan_search_index import normalize_text, tokenize
+
+# normalized header of a bank export column -> what it holds; the first column found for each is used
+BANK_STATEMENT_COLUMNS = {
+    "fecha": "date",
+    "fecha valor": "date",
+    "date": "date",
+    "monto": "amount",
+    "importe": "amount",
+    "credito": "amount",
+    "amount": "amount",
+    "descripcion": "description",
+    "concepto": "description",
+    "detalle": "description",
+    "description": "description",
+    "referencia": "reference",
+    "nro referencia": "reference",
+    "reference": "reference",
+    "moneda": "currency",
+    "currency": "currency",
+}
+
+# confidence each kind of evidence adds to a match (clipped to 1); the name weight is scaled by the share of
+# the borrower's name found and the due date weight by how close the transaction is to the due date
+EVIDENCE_WEIGHTS = {
+    MatchEvidence.LOAN_CODE: 0.6,
+    MatchEvidence.PHONE: 0.45,
+    MatchEvidence.NAME: 0.35,
+    MatchEvidence.AMOUNT: 0.35,
+    MatchEvidence.AMOUNT_WITHOUT_FEE: 0.25,
+    MatchEvidence.DUE_DATE: 0.15,
+}
+# matches at least this confident are proposed as accepted
+AUTO_ACCEPT_CONFIDENCE = 0.7
+# an amount shared by more installments due around the transaction date than this identifies nothing
+MAX_AMOUNT_CANDIDATES = 20
+# name tokens shared by more loans than this ("maria", "rodriguez") do not generate candidates on their own
+MAX_NAME_POSTINGS = 500
+# a phone or a name shared by more loans than this (a family, a company phone) identifies none of them
+MAX_IDENTIFIED_LOANS = 5
+# phone numbers are compared on their last digits, so "+598 99 123 456" matches "099123456"
+PHONE_DIGITS = 8
+# bits of an amount index key taken by the day number
+_DAY_BITS = 20
+
+
+def _day_numbers(dates) -> np.ndarray:
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _spread(values: np.ndarray, mask: np.ndarray, missing) -> np.ndarray:
+    """
+    `values` placed at the rows where `mask` is set, `missing` elsewhere.
+    """
+    column = np.full(len(mask), missing, dtype=values.dtype)
+    column[mask] = values
+    return column
+
+
+def _receipt_reference(reference: str, description: str) -> str:
+    # the reference a receipt recorded from a bank transaction is stored with
+    return reference or description
+
+
+def read_bank_statement(
+    source: Union[str, IO],
+    chunksize: int = 10_000,
+    sep: str = ",",
+    decimal: str = ".",
+    thousands: Optional[str] = None,
+    dayfirst: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Credits of a bank export CSV, `chunksize` rows at a time, so a statement of any size is never held in
+    memory at once. Columns are recognised by their header (BANK_STATEMENT_COLUMNS) and each chunk has line
+    (in the file, the header being line 1), date, amount_minor, description, reference and currency (empty
+    when the export does not have them). Debits and rows without a date or amount are skipped.
+    """
+    reader = pd.read_csv(source, sep=sep, chunksize=chunksize, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        roles = {}
+        for column in chunk.columns:
+            role = BANK_STATEMENT_COLUMNS.get(normalize_text(column).strip())
+            if role is not None and role not in roles:
+                roles[role] = column
+        missing = {"date", "amount"} - set(roles)
+        if missing:
+            raise ValueError(f"Bank statement is missing the {', '.join(sorted(missing))} column(s)")
+
+        amounts = chunk[roles["amount"]].str.strip()
+        if thousands:
+            amounts = amounts.str.replace(thousands, "", regex=False)
+        amounts = pd.to_numeric(amounts.str.replace(decimal, ".", regex=False), errors="coerce")
+
+        statement = pd.DataFrame(
+            {
+                "line": chunk.index + 2,
+                "date": pd.to_datetime(chunk[roles["date"]], dayfirst=dayfirst, errors="coerce"),
+                "amount": amounts,
+            }
+        )
+        for role in ["description", "reference", "currency"]:
+            statement[role] = chunk[roles[role]].str.strip() if role in roles else ""
+        statement["currency"] = statement["currency"].str.upper()
+
+        statement = statement[statement["date"].notna() & (statement["amount"] > 0)]
+        statement.insert(2, "amount_minor", to_minor_units_array(statement.pop("amount").to_numpy()))
+        yield statement.reset_index(drop=True)
+
+
+class BankReconciler:
+    """
+    Matches bank transactions with the installments still owed by a set of loans, without comparing every
+    transaction with every installment. What receipts already recorded have paid is taken off first, so only
+    the outstanding amounts are matched. Candidates come from two indexes:
+
+    - amount and due date: every installment keyed by (amount owed, due day) in one sorted array, so the
+      installments owing exactly the transaction amount and due in the window around its date are a range
+      found with two binary searches. The amount without the unpaid late fee is indexed too.
+    - identity: the loan code, the last digits of the borrower's phone and the tokens of the borrower's name
+      in hash maps, looked up with the tokens of the transaction description; every installment of an
+      identified loan is a candidate.
+
+    Each candidate gets a confidence from its evidence (EVIDENCE_WEIGHTS), divided by the number of loans
+    tied for the best score, and transactions take installments greedily, most confident first. Taken
+    installments stay taken across `match` calls, so a statement can be matched chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        loans_df: pd.DataFrame,
+        receipts_df: pd.DataFrame,
+        days_before: int = 10,
+        days_after: int = 40,
+    ):
+        self.days_before = days_before
+        self.days_after = days_after
+
+        loans_df = loans_df.sort_values("loan_id")
+        self._loan_ids = loans_df["loan_id"].to_numpy(dtype=np.int64)
+        self._loan_codes = loans_df["loan_readable_code"].astype(str).to_numpy()
+
+        # installments still owed after the receipts already recorded, grouped by loan
+        installments = allocate_receipts(build_installment_components(loans_df), receipts_df).installments
+        pending = installments[
+            (installments["derived_status"] == PaymentStatus.PENDING.value) & (installments["outstanding_minor"] > 0)
+        ].sort_values(["loan_id", "end_date", "payment_id"])
+        self._payment_ids = pending["payment_id"].to_numpy(dtype=np.int64)
+        self._end_dates = pending["end_date"].to_numpy("datetime64[ns]")
+        self._end_days = _day_numbers(self._end_dates)
+        self._currencies = pending["moneda"].to_numpy()
+        self._installment_loan_rows = np.searchsorted(self._loan_ids, pending["loan_id"].to_numpy())
+        self._loan_bounds = np.searchsorted(self._installment_loan_rows, np.arange(len(self._loan_ids) + 1))
+
+        self._outstanding = pending["outstanding_minor"].to_numpy(dtype=np.int64)
+        unpaid_fee = np.maximum(
+            pending["fee_minor"].to_numpy(dtype=np.int64) - pending["allocated_minor"].to_numpy(), 0
+        )
+        self._without_fee = np.where(unpaid_fee > 0, self._outstanding - unpaid_fee, -1)
+
+        has_without_fee = np.flatnonzero(self._without_fee > 0)
+        keys = np.concatenate(
+            (
+                (self._outstanding << _DAY_BITS) + self._end_days,
+                (self._without_fee[has_without_fee] << _DAY_BITS) + self._end_days[has_without_fee],
+            )
+        )
+        rows = np.concatenate((np.arange(len(pending)), has_without_fee))
+        order = np.argsort(keys, kind="stable")
+        self._amount_keys, self._amount_rows = keys[order], rows[order]
+
+        self._codes: dict[str, int] = {}
+        self._phones: dict[str, list[int]] = defaultdict(list)
+        self._name_postings: dict[str, list[int]] = defaultdict(list)
+        self._name_tokens: list[set[str]] = []
+        self._borrower_names = []
+        for row, (code, borrower_str) in enumerate(zip(self._loan_codes, loans_df["borrower"])):
+            borrower = json.loads(borrower_str)
+            self._codes["".join(tokenize(code))] = row
+            phone = "".join(character for character in str(borrower["telefono_cliente"]) if character.isdigit())
+            if len(phone) >= PHONE_DIGITS:
+                self._phones[phone[-PHONE_DIGITS:]].append(row)
+            name_tokens = {token for token in tokenize(borrower["nombre_cliente"]) if not token.isdigit()}
+            for token in name_tokens:
+                self._name_postings[token].append(row)
+            self._name_tokens.append(name_tokens)
+            self._borrower_names.append(borrower["nombre_cliente"])
+        self._borrower_names = np.array(self._borrower_names, dtype=object)
+
+        # receipts already recorded, so importing the same statement twice does not record them twice
+        self._recorded = set(
+            zip(
+                _day_numbers(receipts_df["date_received"].to_numpy("datetime64[ns]")).tolist(),
+                receipts_df["amount_minor"].astype(np.int64).tolist(),
+                receipts_df["reference"].fillna("").astype(str).tolist(),
+            )
+        )
+        self._taken: set[int] = set()
+
+    def identify(self, description: str) -> dict[int, tuple[bool, bool, float]]:
+        """
+        Loans (by row) a transaction description points at, with whether it has the loan code, the phone
+        and the share of the borrower's name it has.
+        """
+        tokens = tokenize(description)
+        found: dict[int, list] = defaultdict(lambda: [False, False, 0.0])
+
+        # codes such as "AU1-00000001" are tokenized in two, and may be written with or without the dash
+        used = set()
+        for i, token in enumerate(tokens):
+            for span in [(i,), (i, i + 1)] if i + 1 < len(tokens) else [(i,)]:
+                row = self._codes.get("".join(tokens[j] for j in span))
+                if row is not None:
+                    found[row][0] = True
+                    used.update(span)
+
+        # phones may be split by spaces or dashes: try every run of digit tokens of a phone's length
+        digit_tokens = [token if token.isdigit() and i not in used else None for i, token in enumerate(tokens)]
+        for start in range(len(digit_tokens)):
+            digits = ""
+            for token in digit_tokens[start:]:
+                if token is None:
+                    break
+                digits += token
+                if PHONE_DIGITS <= len(digits) <= PHONE_DIGITS + 4:
+                    rows = self._phones.get(digits[-PHONE_DIGITS:], [])
+                    for row in rows if len(rows) <= MAX_IDENTIFIED_LOANS else []:
+                        found[row][1] = True
+
+        # a borrower needs two tokens of their name in the description (or their whole name, if it is one)
+        name_tokens = {token for i, token in enumerate(tokens) if i not in used and not token.isdigit()}
+        candidates = set()
+        for token in name_tokens:
+            postings = self._name_postings.get(token, [])
+            if len(postings) <= MAX_NAME_POSTINGS:
+                candidates.update(postings)
+        name_shares = {}
+        for row in candidates:
+            matched = len(self._name_tokens[row] & name_tokens)
+            if matched >= min(2, len(self._name_tokens[row])):
+                name_shares[row] = matched / len(self._name_tokens[row])
+        if len(name_shares) <= MAX_IDENTIFIED_LOANS:
+            for row, share in name_shares.items():
+                found[row][2] = share
+
+        return {row: tuple(evidence) for row, evidence in found.items()}
+
+    def _amount_candidates(self, amounts_minor: np.ndarray, days: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        lo = np.searchsorted(self._amount_keys, (amounts_minor << _DAY_BITS) + days - self.days_before)
+        hi = np.searchsorted(self._amount_keys, (amounts_minor << _DAY_BITS) + days + self.days_after, side="right")
+        counts = np.where(hi - lo > MAX_AMOUNT_CANDIDATES, 0, hi - lo)
+        transactions = np.repeat(np.arange(len(counts)), counts)
+        positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+        return transactions, self._amount_rows[positions]
+
+    def match(self, statement: pd.DataFrame) -> pd.DataFrame:
+        """
+        Proposed match of every transaction of a statement chunk (as read by `read_bank_statement`): the
+        statement columns plus loan_id, loan_readable_code, nombre_cliente, payment_id and end_date of the
+        installment (missing when nothing matched), confidence, evidence and whether the transaction is
+        already recorded as a receipt (duplicate; those are not matched).
+        """
+        amounts_minor = statement["amount_minor"].to_numpy(dtype=np.int64)
+        days = _day_numbers(statement["date"].to_numpy("datetime64[ns]"))
+        duplicate = np.array(
+            [
+                (day, amount_minor, _receipt_reference(reference, description)) in self._recorded
+                for day, amount_minor, reference, description in zip(
+                    days.tolist(), amounts_minor.tolist(), statement["reference"], statement["description"]
+                )
+            ],
+            dtype=bool,
+        )
+
+        identity_transactions, identity_rows, identity_evidence = [], [], []
+        for transaction, description in enumerate(statement["description"]):
+            if duplicate[transaction]:
+                continue
+            for row, evidence in self.identify(description).items():
+                identity_transactions.append(transaction)
+                identity_rows.append(row)
+                identity_evidence.append(evidence)
+        identity_transactions = np.array(identity_transactions, dtype=np.int64)
+        identity_rows = np.array(identity_rows, dtype=np.int64)
+        identity_evidence = np.array(identity_evidence, dtype=np.float64).reshape(-1, 3)
+
+        # candidates: every installment of an identified loan, plus those owing the amount around the date
+        counts = self._loan_bounds[identity_rows + 1] - self._loan_bounds[identity_rows]
+        pair_transactions = np.repeat(identity_transactions, counts)
+        pair_installments = (
+            np.arange(counts.sum())
+            - np.repeat(np.cumsum(counts) - counts, counts)
+            + np.repeat(self._loan_bounds[identity_rows], counts)
+        )
+        amount_transactions, amount_installments = self._amount_candidates(amounts_minor, days)
+        keep = ~duplicate[amount_transactions]
+        pair_transactions = np.concatenate((pair_transactions, amount_transactions[keep]))
+        pair_installments = np.concatenate((pair_installments, amount_installments[keep]))
+
+        pair_keys = np.sort(pair_transactions * len(self._payment_ids) + pair_installments)
+        pair_keys = pair_keys[np.diff(pair_keys, prepend=-1) != 0]
+        pair_transactions, pair_installments = np.divmod(pair_keys, max(len(self._payment_ids), 1))
+
+        currencies = statement["currency"].to_numpy()[pair_transactions]
+        same_currency = ~np.isin(currencies, Currency.list()) | (currencies == self._currencies[pair_installments])
+        pair_transactions, pair_installments = pair_transactions[same_currency], pair_installments[same_currency]
+        pair_loan_rows = self._installment_loan_rows[pair_installments]
+
+        # identity evidence of each pair, from the (transaction, loan) it belongs to
+        pair_identity = np.zeros((len(pair_transactions), 3))
+        if len(identity_transactions):
+            identity_order = np.argsort(identity_transactions * len(self._loan_ids) + identity_rows)
+            identity_keys = (identity_transactions * len(self._loan_ids) + identity_rows)[identity_order]
+            wanted = pair_transactions * len(self._loan_ids) + pair_loan_rows
+            positions = np.minimum(np.searchsorted(identity_keys, wanted), len(identity_keys) - 1)
+            identified = identity_keys[positions] == wanted
+            pair_identity[identified] = identity_evidence[identity_order][positions[identified]]
+        evidence = {}
+        evidence[MatchEvidence.LOAN_CODE] = pair_identity[:, 0]
+        evidence[MatchEvidence.PHONE] = pair_identity[:, 1]
+        evidence[MatchEvidence.NAME] = pair_identity[:, 2]
+
+        pair_amounts = amounts_minor[pair_transactions]
+        evidence[MatchEvidence.AMOUNT] = (pair_amounts == self._outstanding[pair_installments]).astype(float)
+        evidence[MatchEvidence.AMOUNT_WITHOUT_FEE] = (pair_amounts == self._without_fee[pair_installments]).astype(
+            float
+        )
+        days_late = days[pair_transactions] - self._end_days[pair_installments]
+        window = np.where(days_late < 0, self.days_before, self.days_after)
+        evidence[MatchEvidence.DUE_DATE] = np.clip(1 - np.abs(days_late) / np.maximum(window, 1), 0, 1)
+        evidence[MatchEvidence.DUE_DATE][(days_late < -self.days_before) | (days_late > self.days_after)] = 0
+
+        scores = np.minimum(sum(EVIDENCE_WEIGHTS[kind] * values for kind, values in evidence.items()), 1.0)
+
+        # a best score shared by several loans is split between them
+        best = np.zeros(len(statement))
+        np.maximum.at(best, pair_transactions, scores)
+        at_best = np.flatnonzero(scores >= best[pair_transactions] - 1e-9)
+        best_loans = np.unique(pair_transactions[at_best] * len(self._loan_ids) + pair_loan_rows[at_best])
+        ties = np.bincount(best_loans // max(len(self._loan_ids), 1), minlength=len(statement))
+        confidence = scores / np.maximum(ties[pair_transactions], 1)
+
+        # most confident first; between equals, the oldest installment
+        order = np.lexsort((self._end_days[pair_installments], pair_transactions, -confidence))
+        chosen = [-1] * len(statement)
+        transactions_list, installments_list = pair_transactions.tolist(), pair_installments.tolist()
+        for pair in order.tolist():
+            transaction, installment = transactions_list[pair], installments_list[pair]
+            if chosen[transaction] < 0 and installment not in self._taken:
+                chosen[transaction] = pair
+                self._taken.add(installment)
+        chosen = np.array(chosen, dtype=np.int64)
+
+        matched = chosen >= 0
+        pairs = chosen[matched]
+        installments = pair_installments[pairs]
+        loan_rows = self._installment_loan_rows[installments]
+
+        result = statement.copy()
+        result["loan_id"] = pd.arrays.IntegerArray(_spread(self._loan_ids[loan_rows], matched, 0), ~matched)
+        result["loan_readable_code"] = _spread(self._loan_codes[loan_rows].astype(object), matched, None)
+        result["nombre_cliente"] = _spread(self._borrower_names[loan_rows], matched, None)
+        result["payment_id"] = pd.arrays.IntegerArray(_spread(self._payment_ids[installments], matched, 0), ~matched)
+        result["end_date"] = _spread(self._end_dates[installments], matched, np.datetime64("NaT"))
+        result["confidence"] = _spread(confidence[pairs], matched, 0.0)
+        result["evidence"] = _spread(
+            np.array(
+                [
+                    ", ".join(kind.value for kind, values in evidence.items() if values[pair] > 0)
+                    for pair in pairs.tolist()
+                ],
+                dtype=object,
+            ),
+            matched,
+            "",
+        )
+        result["duplicate"] = duplicate
+        return result
+
+
+def reconcile_bank_statement(
+    source: Union[str, IO],
+    loans_df: pd.DataFrame,
+    receipts_df: pd.DataFrame,
+    chunksize: int = 10_000,
+    **read_options,
+) -> pd.DataFrame:
+    """
+    Proposed matches of a whole bank export, read and matched `chunksize` rows at a time. Nothing is
+    recorded; accepted matches become receipts with `receipts_from_matches`.
+    """
+    reconciler = BankReconciler(loans_df, receipts_df)
+    chunks = [reconciler.match(chunk) for chunk in read_bank_statement(source, chunksize=chunksize, **read_options)]
+    if not chunks:
+        return reconciler.match(
+            pd.DataFrame(
+                {
+                    "line": pd.Series(dtype=np.int64),
+                    "date": pd.Series(dtype="datetime64[ns]"),
+                    "amount_minor": pd.Series(dtype=np.int64),
+                    "description": pd.Series(dtype=str),
+                    "reference": pd.Series(dtype=str),
+                    "currency": pd.Series(dtype=str),
+                }
+            )
+        )
+    return pd.concat(chunks, ignore_index=True)
+
+
+def receipts_from_matches(matches: pd.DataFrame, first_receipt_id: int) -> list[Receipt]:
+    """
+    One receipt per matched transaction, numbered from `first_receipt_id`. The bank reference is kept as
+    the receipt reference, or the description when the export has no references.
+    """
+    matches = matches[matches["loan_id"].notna()]
+    return [
+        Receipt(
+            receipt_id=first_receipt_id + i,
+            loan_id=int(loan_id),
+            date_received=date_received,
+            amount_minor=int(amount_minor),
+            reference=_receipt_reference(reference, description) or None,
+        )
+        for i, (loan_id, date_received, amount_minor, reference, description) in enumerate(
+            zip(
+                matches["loan_id"],
+                matches["date"],
+                matches["amount_minor"],
+                matches["reference"],
+                matches["description"],
+            )
+        )
+    ]
@@ -0,0 +1,191 @@
+import bisect
+import json
+import re
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+from pydantic import BaseModel, PositiveInt
+
+from payments_src.domain.loans import Loan
+
+# matches on loan codes and phone numbers are worth more than matches on names or car models
+FIELD_WEIGHTS = {
+    "loan_readable_code": 3.0,
+    "telefono_cliente": 3.0,
+    "nombre_cliente": 2.0,
+    "dealership_name": 1.0,
+    "marca_auto": 1.0,
+    "modelo_auto": 1.0,
+}
+EXACT_MATCH_BONUS = 2.0
+
+_TOKEN_SEPARATOR = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return text.lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN_SEPARATOR.split(normalize_text(text)) if token]
+
+
+class SearchResult(BaseModel):
+    loan_id: PositiveInt
+    score: float
+    display_name: str
+
+
+class LoanSearchIndex:
+    """
+    In-memory inverted index over the searchable loan fields. Tokens are kept in a sorted vocabulary so a
+    query token matches every indexed token it is a prefix of with two binary searches. Loans are added,
+    replaced or removed one at a time, and `sync_with_loans_df` only reindexes rows whose fields changed.
+    """
+
+    def __init__(self):
+        self._vocabulary: list[str] = []
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._loan_tokens: dict[int, set[str]] = {}
+        self._fingerprints: dict[int, tuple] = {}
+        self._display_names: dict[int, str] = {}
+        # data version of the loan table this index was last synced with
+        self.version = 0
+        # while syncing a whole table the vocabulary is sorted once at the end instead of on every insert
+        self._bulk_mode = False
+
+    def __len__(self) -> int:
+        return len(self._loan_tokens)
+
+    def upsert(self, loan_id: PositiveInt, fields: dict[str, str]) -> None:
+        fingerprint = tuple(sorted(fields.items()))
+        if self._fingerprints.get(loan_id) == fingerprint:
+            return
+
+        self.remove(loan_id)
+
+        token_weights: dict[str, float] = defaultdict(float)
+        for field_name, value in fields.items():
+            for token in tokenize(value):
+                token_weights[token] = max(token_weights[token], FIELD_WEIGHTS.get(field_name, 1.0))
+            # also index the whole value without separators so "acg00000100" or "099123456" match
+            compact_value = "".join(tokenize(value))
+            if compact_value:
+                token_weights[compact_value] = max(token_weights[compact_value], FIELD_WEIGHTS.get(field_name, 1.0))
+
+        for token, weight in token_weights.items():
+            if token not in self._postings:
+                if self._bulk_mode:
+                    self._vocabulary.append(token)
+                else:
+                    bisect.insort(self._vocabulary, token)
+            self._postings[token][loan_id] = weight
+
+        self._loan_tokens[loan_id] = set(token_weights)
+        self._fingerprints[loan_id] = fingerprint
+        self._display_names[loan_id] = (
+            f"{loan_id} - {fields['loan_readable_code']} - {fields['nombre_cliente']} "
+            f"({fields['marca_auto']} {fields['modelo_auto']})"
+        )
+
+    def upsert_loan(self, loan: Loan) -> None:
+        self.upsert(loan.loan_id, self.loan_search_fields(loan))
+
+    def remove(self, loan_id: PositiveInt) -> None:
+        for token in self._loan_tokens.pop(loan_id, set()):
+            postings = self._postings[token]
+            del postings[loan_id]
+            if not postings:
+                del self._postings[token]
+                if not self._bulk_mode:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+        self._fingerprints.pop(loan_id, None)
+        self._display_names.pop(loan_id, None)
+
+    def upsert_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Index the loans of some rows of the raw loan table; loans that are not in them are left as they are.
+        """
+        columns = ["loan_id", "loan_readable_code", "borrower", "car", "dealership"]
+        for row in loans_df[columns].itertuples(index=False):
+            self.upsert(int(row.loan_id), self.record_search_fields(row._asdict()))
+
+    def sync_with_loans_df(self, loans_df: pd.DataFrame) -> None:
+        """
+        Bring the index in line with the raw loan table: new or changed rows are reindexed and rows that are
+        gone are dropped. Nested columns are read straight from their JSON, without building models.
+        """
+        seen_loan_ids = set(int(loan_id) for loan_id in loans_df["loan_id"])
+
+        self._bulk_mode = True
+        try:
+            self.upsert_loans_df(loans_df)
+
+            for loan_id in set(self._loan_tokens) - seen_loan_ids:
+                self.remove(loan_id)
+        finally:
+            self._bulk_mode = False
+            self._vocabulary = sorted(token for token in set(self._vocabulary) if token in self._postings)
+
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        scores: dict[int, float] = {}
+        for i, query_token in enumerate(query_tokens):
+            token_scores = self._match_token(query_token)
+            if i == 0:
+                scores = token_scores
+            else:
+                # every query token has to match something in the loan
+                scores = {
+                    loan_id: scores[loan_id] + score for loan_id, score in token_scores.items() if loan_id in scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [
+            SearchResult(loan_id=loan_id, score=score, display_name=self._display_names[loan_id])
+            for loan_id, score in ranked
+        ]
+
+    def _match_token(self, query_token: str) -> dict[int, float]:
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        end = bisect.bisect_left(self._vocabulary, query_token + "\uffff", lo=start)
+
+        token_scores: dict[int, float] = {}
+        for token in self._vocabulary[start:end]:
+            bonus = EXACT_MATCH_BONUS if token == query_token else 1.0
+            for loan_id, weight in self._postings[token].items():
+                token_scores[loan_id] = max(token_scores.get(loan_id, 0.0), weight * bonus)
+        return token_scores
+
+    @staticmethod
+    def loan_search_fields(loan: Loan) -> dict[str, str]:
+        return {
+            "loan_readable_code": loan.loan_readable_code,
+            "nombre_cliente": loan.borrower.nombre_cliente,
+            "telefono_cliente": loan.borrower.telefono_cliente,
+            "marca_auto": loan.car.marca_auto,
+            "modelo_auto": loan.car.modelo_auto,
+            "dealership_name": loan.dealership.name,
+        }
+
+    @staticmethod
+    def record_search_fields(record: dict) -> dict[str, str]:
+        borrower = json.loads(record["borrower"])
+        car = json.loads(record["car"])
+        dealership = json.loads(record["dealership"])
+        return {
+            "loan_readable_code": str(record["loan_readable_code"]),
+            "nombre_cliente": str(borrower["nombre_cliente"]),
+            "telefono_cliente": str(borrower["telefono_cliente"]),
+            "marca_auto": str(car["marca_auto"]),
+            "modelo_auto": str(car["modelo_auto"]),
+            "dealership_name": str(dealership["name"]),
+        }
@@ -4,7 +4,7 @@ from typing import Any
 import streamlit as st
 
 from payments_src.domain.borrower_enums import PotentialBorrowerStatus
-from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payment_enums import AmortizationSystem, Currency
 
 
 def get_field_input_widget_potential_borrower(field_name: str, field_info: Any, key: str):
@@ -65,4 +65,6 @@ def get_field_input_widget_payment_list(field_name: str, field_info: Any, key: s
         return st.date_input(field_name, key=key, value=datetime.today())
     elif field_type == Currency:
         options = [currency.value for currency in Currency]
-        return st.selectbox(field_name, options, key=key)
\ No newline at end of file
+        return st.selectbox(field_name, options, key=key)
+    elif field_type == AmortizationSystem:
+        return st.selectbox(field_name, AmortizationSystem.list(), key=key)
\ No newline at end of file
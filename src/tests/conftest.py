@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import Loan, LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.domain.payments import PaymentListFactory
+
+
+def _make_loan(
+    loan_id: int,
+    *,
+    status: LoanStatus = LoanStatus.APPROVED,
+    dealership_id: int = 1,
+    moneda: Currency = Currency.UYU,
+    fecha_inicio: datetime = datetime(2025, 1, 10),
+    num_pagos: int = 3,
+    pago_mensual: float = 100,
+    paid_ids: tuple = (),
+) -> Loan:
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=pago_mensual,
+        fecha_inicio=fecha_inicio,
+        num_pagos=num_pagos,
+        moneda=moneda,
+    )
+    for payment_id in paid_ids:
+        payment_list.change_payment_status(payment_id, PaymentStatus.PAID.value)
+    return LoanFactory.create_loan(
+        loan_id=loan_id,
+        loan_number=loan_id,
+        payment_list=payment_list,
+        borrower=BorrowerFactory.create_borrower(loan_id, f"Cliente {loan_id}", "099123456", "nota"),
+        car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+        dealership=DealershipFactory.create_dealership(
+            dealership_id, f"Automotora {dealership_id}", f"AU{dealership_id}", "24001234"
+        ),
+        status=status,
+    )
+
+
+def _loans_df(loans: list[Loan]) -> pd.DataFrame:
+    return pd.DataFrame([loan.to_json_dict() for loan in loans])
+
+
+@pytest.fixture
+def make_loan():
+    """
+    Builds a loan of 1000 at 5% paying 100 a month from 2025-01-10 in 3 installments, approved; every keyword
+    argument overrides one of those terms and `paid_ids` marks installments as paid.
+    """
+    return _make_loan
+
+
+@pytest.fixture
+def make_loans_df():
+    """
+    Builds the loan table, as stored in the CSV, of a list of loans.
+    """
+    return _loans_df
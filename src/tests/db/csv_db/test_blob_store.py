@@ -0,0 +1,75 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from payments_src.db.csv_db.blob_store import BlobStore, stream_to_file
+from payments_src.db.csv_db.thumbnail_cache import ThumbnailCache
+from payments_src.domain.file_groups import FileObject
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    return BlobStore(blobs_path=str(tmp_path / "blobs"), refcounts_path=str(tmp_path / "refcounts.csv"), chunk_size=4)
+
+
+def test_stream_to_file(tmp_path):
+    destination = tmp_path / "file.bin"
+    file_hash, size = stream_to_file(io.BytesIO(b"0123456789"), str(destination), chunk_size=3)
+
+    assert destination.read_bytes() == b"0123456789"
+    assert size == 10
+    assert len(file_hash) == 64
+
+
+def test_blob_store_refcounts(blob_store):
+    file_hash, size = blob_store.put(io.BytesIO(b"payslip"))
+    same_hash, _ = blob_store.put(io.BytesIO(b"payslip"))
+
+    assert same_hash == file_hash
+    assert size == 7
+    assert blob_store.refcount(file_hash) == 2
+    assert os.path.basename(blob_store.path_for(file_hash)) == file_hash
+
+    assert blob_store.release(file_hash) == 1
+    assert blob_store.exists(file_hash)
+    assert blob_store.release(file_hash) == 0
+    assert not blob_store.exists(file_hash)
+
+    with pytest.raises(ValueError):
+        blob_store.release(file_hash)
+
+
+def test_thumbnail_cache_is_size_bounded(tmp_path, blob_store):
+    files = []
+    for i, color in enumerate(["red", "green", "blue"], start=1):
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 400), color).save(buffer, format="PNG")
+        file_hash, file_size = blob_store.put(buffer)
+        files.append(
+            FileObject(
+                file_name=file_hash,
+                file_readable_name=f"{color}.png",
+                file_type="png",
+                file_path=blob_store.path_for(file_hash),
+                added_date="2025-01-01T00:00:00",
+                file_group_id=1,
+                file_id=i,
+                file_hash=file_hash,
+                file_size=file_size,
+            )
+        )
+
+    cache = ThumbnailCache(cache_path=str(tmp_path / "thumbnails"), thumbnail_size=(64, 64))
+    thumbnail_path = cache.get_thumbnail(files[0])
+
+    with Image.open(thumbnail_path) as thumbnail:
+        assert max(thumbnail.size) == 64
+    assert cache.get_thumbnail(files[0]) == thumbnail_path
+
+    cache.max_bytes = os.path.getsize(thumbnail_path)
+    for file in files[1:]:
+        cache.get_thumbnail(file)
+
+    assert len(os.listdir(tmp_path / "thumbnails")) == 1
@@ -10,8 +10,8 @@ from payments_src.db.csv_db.db_initialization_ops import (
 from payments_src.domain.borrowers import Borrower
 from payments_src.domain.dealerships import Dealership
 from payments_src.domain.loans import Loan
-from payments_src.domain.payments import Payment
 from payments_src.domain.potential_borrowers import PotentialBorrower
+from payments_src.domain.receipts import Receipt
 
 
 @pytest.fixture
@@ -31,7 +31,8 @@ def loan_fields():
 
 @pytest.fixture
 def payment_fields():
-    return Payment.model_fields
+    # the payments table holds the receipts
+    return Receipt.model_fields
 
 
 @pytest.fixture
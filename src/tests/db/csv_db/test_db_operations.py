@@ -0,0 +1,180 @@
+import json
+import os
+import warnings
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.db.csv_db import db_operations
+from payments_src.db.csv_db.db_constants import LOAN_TABLE_SCHEMA_VERSION, CSVTable
+from payments_src.db.csv_db.db_operations import (
+    edit_loan_table_record,
+    flatten_loans_table,
+    is_monthly_collections_table_in_sync,
+    parse_and_expand_loan_object,
+    read_and_expand_loans_table,
+    read_loan_table,
+    read_monthly_collections_table,
+    write_loan_table,
+)
+from payments_src.db.csv_db.monthly_collections import build_monthly_collections
+from payments_src.db.csv_db.table_meta import (
+    compute_file_checksum,
+    is_trusted_table,
+    read_table_checksum,
+    read_table_schema_version,
+)
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import CarFactory
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.domain.payments import PaymentListFactory
+
+
+@pytest.fixture
+def raw_df(make_loan, make_loans_df):
+    return make_loans_df(
+        [
+            make_loan(loan_id, moneda=moneda, fecha_inicio=datetime(2025, 1, loan_id))
+            for loan_id, moneda in ((1, Currency.UYU), (2, Currency.USD))
+        ]
+    )
+
+
+def _hydrate(raw_df: pd.DataFrame) -> pd.DataFrame:
+    loans_table_copy = raw_df.copy()
+    loans_table_copy["payment_list"] = loans_table_copy["payment_list"].apply(
+        PaymentListFactory.create_from_payment_list_record_str
+    )
+    loans_table_copy["borrower"] = loans_table_copy["borrower"].apply(BorrowerFactory.create_from_borrower_record_str)
+    loans_table_copy["car"] = loans_table_copy["car"].apply(CarFactory.create_from_car_record_str)
+    loans_table_copy["dealership"] = loans_table_copy["dealership"].apply(
+        DealershipFactory.create_from_dealership_record_str
+    )
+    return loans_table_copy
+
+
+def test_parse_and_expand_loan_object(raw_df):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        expanded_df = parse_and_expand_loan_object(_hydrate(raw_df))
+
+    assert expanded_df.columns.tolist() == [
+        "loan_id",
+        "loan_readable_code",
+        "status",
+        "nombre_cliente",
+        "telefono_cliente",
+        "notas",
+        "marca_auto",
+        "modelo_auto",
+        "name",
+        "dealership_code",
+        "dealership_phone_number",
+        "fecha_inicio",
+        "pago_mensual",
+        "num_pagos",
+        "dinero_total_prestado",
+        "tasa_interes",
+        "moneda",
+        "sistema_amortizacion",
+    ]
+    assert expanded_df["moneda"].tolist() == [Currency.UYU.value, Currency.USD.value]
+    assert expanded_df["nombre_cliente"].tolist() == ["Cliente 1", "Cliente 2"]
+
+
+def test_flatten_loans_table_matches_expanded_models(raw_df):
+    # a filtered table keeps its index
+    raw_df = raw_df[raw_df["loan_id"] == 2]
+
+    pd.testing.assert_frame_equal(flatten_loans_table(raw_df), parse_and_expand_loan_object(_hydrate(raw_df)))
+
+
+def test_loan_table_writes_keep_the_monthly_collections_aggregate(tmp_path, monkeypatch, raw_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+
+    write_loan_table(raw_df)
+    assert is_monthly_collections_table_in_sync()
+
+    loan = LoanFactory.create_loan_from_csv_row(raw_df.iloc[0])
+    loan.payment_list.change_payment_status(1, PaymentStatus.PAID)
+    write_loan_table(edit_loan_table_record(read_loan_table(), loan), overwrite=True)
+
+    collections = read_monthly_collections_table()
+    pd.testing.assert_frame_equal(collections, build_monthly_collections(read_loan_table()))
+    assert collections["paid_count"].sum() == 1
+
+    # an edit made outside the app: the aggregate is rebuilt instead of trusted
+    read_loan_table().iloc[1:].to_csv(CSVTable.LOAN_PATH.value, index=False)
+    assert not is_monthly_collections_table_in_sync()
+    assert read_monthly_collections_table()["total_count"].sum() == 3
+
+
+def test_loan_table_write_with_the_previous_table_does_not_read_it_back(tmp_path, monkeypatch, raw_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+    write_loan_table(raw_df)
+
+    def read_back():
+        raise AssertionError("the loan table was read back")
+
+    monkeypatch.setattr(db_operations, "read_monthly_collections_source", read_back)
+    previous_df = read_loan_table()
+    loan = LoanFactory.create_loan_from_csv_row(previous_df.iloc[1])
+    loan.payment_list.change_payment_status(2, PaymentStatus.PAID)
+    write_loan_table(edit_loan_table_record(previous_df, loan), overwrite=True, previous_df=previous_df)
+
+    assert read_table_checksum(CSVTable.LOAN_META_PATH.value) == compute_file_checksum(CSVTable.LOAN_PATH.value)
+    assert is_monthly_collections_table_in_sync()
+    pd.testing.assert_frame_equal(read_monthly_collections_table(), build_monthly_collections(read_loan_table()))
+
+
+def test_loan_table_with_rows_written_before_amount_minor_is_read_after_an_app_write(tmp_path, monkeypatch, raw_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+
+    # the second loan was stored before amounts were kept in minor units
+    legacy_payment_list = json.loads(raw_df.loc[1, "payment_list"])
+    for payment in legacy_payment_list["payments"].values():
+        del payment["amount_minor"]
+    legacy_df = raw_df.copy()
+    legacy_df.loc[1, "payment_list"] = json.dumps(legacy_payment_list)
+    legacy_df.to_csv(CSVTable.LOAN_PATH.value, index=False)
+
+    # an edit of the other loan rewrites the whole table, legacy row included
+    previous_df = read_loan_table()
+    loan = LoanFactory.create_loan_from_csv_row(previous_df.iloc[0])
+    loan.payment_list.change_payment_status(1, PaymentStatus.PAID)
+    write_loan_table(edit_loan_table_record(previous_df, loan), overwrite=True, previous_df=previous_df)
+
+    loans = read_and_expand_loans_table(LoanStatus.APPROVED).set_index("loan_id")
+    assert [payment.amount_minor for payment in loans.loc[2, "payment_list"].payments.values()] == [10000] * 3
+    assert loans.loc[1, "payment_list"].payments[1].status == PaymentStatus.PAID.value
+
+
+def test_loan_table_write_keeps_the_schema_version_of_the_stored_rows(tmp_path, monkeypatch, raw_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+    paths = (CSVTable.LOAN_PATH.value, CSVTable.LOAN_META_PATH.value)
+
+    write_loan_table(raw_df)
+    assert read_table_schema_version(*paths) == LOAN_TABLE_SCHEMA_VERSION
+    assert is_trusted_table(*paths)
+
+    # a table stored before the app recorded versions: editing one loan does not make the others current
+    os.remove(CSVTable.LOAN_META_PATH.value)
+    previous_df = read_loan_table()
+    loan = LoanFactory.create_loan_from_csv_row(previous_df.iloc[0])
+    loan.payment_list.change_payment_status(1, PaymentStatus.PAID)
+    write_loan_table(edit_loan_table_record(previous_df, loan), overwrite=True, previous_df=previous_df)
+    assert read_table_schema_version(*paths) == 0
+    assert not is_trusted_table(*paths)
+    assert is_monthly_collections_table_in_sync()
+
+    # a migration reserializes every row and records the current version
+    write_loan_table(read_loan_table(), overwrite=True, schema_version=LOAN_TABLE_SCHEMA_VERSION)
+    assert is_trusted_table(*paths)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from payments_src.db.csv_db import db_operations
+from payments_src.db.csv_db.db_constants import TABLE_BACKEND_ENV_VAR, CSVTable, TableBackend
+from payments_src.domain.loans_enums import LoanStatus
+
+pytest.importorskip("polars")
+
+from payments_src.db.csv_db import db_operations_polars  # noqa: E402
+
+
+@pytest.fixture
+def loan_table(tmp_path, monkeypatch, make_loan, make_loans_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+    loans = [make_loan(1), make_loan(2, status=LoanStatus.POTENTIAL), make_loan(3)]
+    make_loans_df(loans).to_csv(CSVTable.LOAN_PATH.value, index=False)
+
+
+def test_read_loans_table_by_status(loan_table):
+    approved = db_operations_polars.read_loans_table_by_status(LoanStatus.APPROVED)
+    assert approved["loan_id"].to_list() == [1, 3]
+
+
+def test_append_and_edit_loan_table(loan_table, make_loan):
+    df = db_operations_polars.read_loan_table()
+
+    df = db_operations_polars.append_loan_table(df, make_loan(4, status=LoanStatus.POTENTIAL))
+    with pytest.raises(ValueError):
+        db_operations_polars.append_loan_table(df, make_loan(4, status=LoanStatus.POTENTIAL))
+
+    updated_loan = make_loan(2, status=LoanStatus.POTENTIAL)
+    updated_loan.approve_loan()
+    df = db_operations_polars.edit_loan_table_record(df, updated_loan)
+    db_operations_polars.write_loan_table(df, overwrite=True)
+
+    with pytest.raises(FileExistsError):
+        db_operations_polars.write_loan_table(df)
+
+    # the file stays readable by the pandas implementation
+    pandas_df = pd.read_csv(CSVTable.LOAN_PATH.value)
+    assert sorted(pandas_df["loan_id"]) == [1, 2, 3, 4]
+    assert pandas_df.loc[pandas_df["loan_id"] == 2, "status"].item() == LoanStatus.APPROVED.value
+
+
+def test_backends_return_the_same_frames(loan_table, monkeypatch):
+    monkeypatch.setenv(TABLE_BACKEND_ENV_VAR, TableBackend.PANDAS.value)
+    pandas_df = db_operations.read_active_loans_table()
+
+    monkeypatch.setenv(TABLE_BACKEND_ENV_VAR, TableBackend.POLARS.value)
+    assert db_operations.get_table_backend() == TableBackend.POLARS
+    polars_df = db_operations.read_active_loans_table()
+
+    pd.testing.assert_frame_equal(pandas_df.reset_index(drop=True), polars_df)
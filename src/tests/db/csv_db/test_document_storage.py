@@ -0,0 +1,61 @@
+import io
+import os
+
+import pytest
+
+from payments_src.db.csv_db.blob_store import BlobStore
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.document_storage import DocumentStorage
+
+
+class NamedBytesIO(io.BytesIO):
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+
+
+@pytest.fixture
+def document_storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(CSVTable.CUSTOMER_FILES_PATH.value)
+
+    storage = DocumentStorage(blob_store=BlobStore(chunk_size=4))
+    yield storage
+    storage.shutdown()
+
+
+def test_document_storage_records_files(document_storage):
+    futures = document_storage.upload_files(
+        1, [NamedBytesIO(b"cedula", "cedula.pdf"), NamedBytesIO(b"recibo", "recibo.png")]
+    )
+    stored_files = [future.result(timeout=10) for future in futures]
+
+    assert {file.file_readable_name for file in stored_files} == {"cedula.pdf", "recibo.png"}
+    assert all(os.path.exists(file.file_path) for file in stored_files)
+
+    file_groups = document_storage.get_file_groups(1)
+    assert len(file_groups) == 1
+    assert len(file_groups[0].files) == 2
+    assert {file.file_type for file in file_groups[0].files.values()} == {"pdf", "png"}
+
+
+def test_document_storage_deduplicates_by_content(document_storage):
+    first = document_storage.store_file(1, NamedBytesIO(b"same content", "cedula.pdf"))
+    second = document_storage.store_file(1, NamedBytesIO(b"same content", "cedula_copia.pdf"))
+    other_borrower = document_storage.store_file(2, NamedBytesIO(b"same content", "cedula.pdf"))
+
+    assert second.file_id == first.file_id
+    assert other_borrower.file_path == first.file_path
+    assert document_storage.blob_store.refcount(first.file_hash) == 2
+
+
+def test_document_storage_remove_file_releases_blob(document_storage):
+    first = document_storage.store_file(1, NamedBytesIO(b"same content", "cedula.pdf"))
+    second = document_storage.store_file(2, NamedBytesIO(b"same content", "cedula.pdf"))
+
+    document_storage.remove_file(first.file_group_id, first.file_id)
+    assert os.path.exists(first.file_path)
+    assert document_storage.get_file_groups(1)[0].files == {}
+
+    document_storage.remove_file(second.file_group_id, second.file_id)
+    assert not os.path.exists(first.file_path)
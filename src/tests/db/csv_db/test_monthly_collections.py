@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.db.csv_db.monthly_collections import (
+    apply_monthly_collections_delta,
+    build_monthly_collections,
+    monthly_collections_delta,
+)
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency, PaymentStatus
+
+
+@pytest.fixture
+def create_loan(make_loan):
+    def create_loan(loan_id: int, dealership_id: int, moneda: Currency, status: LoanStatus = LoanStatus.APPROVED):
+        return make_loan(loan_id, status=status, dealership_id=dealership_id, moneda=moneda, pago_mensual=100 * loan_id)
+
+    return create_loan
+
+
+def test_build_monthly_collections(create_loan, make_loans_df):
+    loans = [
+        create_loan(1, 1, Currency.UYU),
+        create_loan(2, 1, Currency.UYU),
+        create_loan(3, 2, Currency.USD),
+        create_loan(4, 1, Currency.UYU, LoanStatus.POTENTIAL),
+    ]
+    loans[0].payment_list.change_payment_status(1, PaymentStatus.PAID)
+
+    collections = build_monthly_collections(make_loans_df(loans)).set_index(["month", "moneda", "dealership_id"])
+
+    # loans 1 and 2 share a row per month; the potential loan is not counted
+    assert len(collections) == 6
+    assert collections.loc[("2025-01", "UYU", 1)].to_dict() == {
+        "pending_count": 1,
+        "pending_minor": 20000,
+        "paid_count": 1,
+        "paid_minor": 10000,
+        "total_count": 2,
+        "total_minor": 30000,
+    }
+    assert collections.loc[("2025-03", "USD", 2), "pending_minor"] == 30000
+
+
+def test_delta_matches_a_full_rebuild(create_loan, make_loans_df):
+    loans = [create_loan(1, 1, Currency.UYU), create_loan(2, 1, Currency.UYU), create_loan(3, 2, Currency.USD)]
+    previous_df = make_loans_df(loans)
+    collections = build_monthly_collections(previous_df)
+
+    # an installment paid, a loan restructured, a loan removed and one approved
+    loans[0].payment_list.change_payment_status(2, PaymentStatus.PAID)
+    loans[1].payment_list.restructure(fecha_inicio=datetime(2025, 6, 10), num_pagos=2, tasa_interes=0.05)
+    new_loan = create_loan(5, 3, Currency.EUR, LoanStatus.POTENTIAL)
+    new_loan.approve_loan()
+    loans_df = make_loans_df([loans[0], loans[1], new_loan])
+
+    collections = apply_monthly_collections_delta(collections, monthly_collections_delta(previous_df, loans_df))
+
+    pd.testing.assert_frame_equal(collections, build_monthly_collections(loans_df))
+    # the cancelled installments are gone, the new ones are in June and July
+    assert set(collections.loc[collections["dealership_id"] == 1, "month"]) == {
+        "2025-01",
+        "2025-02",
+        "2025-03",
+        "2025-06",
+        "2025-07",
+    }
+
+
+def test_unchanged_table_has_an_empty_delta(create_loan, make_loans_df):
+    loans_df = make_loans_df([create_loan(1, 1, Currency.UYU)])
+    assert monthly_collections_delta(loans_df, loans_df.copy()).empty
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from payments_src.db.csv_db.db_constants import LOAN_TABLE_SCHEMA_VERSION
+from payments_src.db.csv_db.table_meta import (
+    is_trusted_table,
+    is_unchanged_table,
+    read_table_schema_version,
+    write_table_meta,
+)
+
+
+@pytest.fixture
+def table_paths(tmp_path):
+    table_path = str(tmp_path / "loan.csv")
+    meta_path = str(tmp_path / "loan_meta.json")
+    with open(table_path, "w") as f:
+        f.write("loan_id,status\n1,Aprobado\n")
+    return table_path, meta_path
+
+
+def test_table_written_by_the_app_is_trusted(table_paths):
+    table_path, meta_path = table_paths
+    assert not is_trusted_table(table_path, meta_path)
+
+    write_table_meta(table_path, meta_path, schema_version=1)
+    assert is_trusted_table(table_path, meta_path, schema_version=1)
+    assert not is_trusted_table(table_path, meta_path, schema_version=2)
+
+
+def test_edited_table_is_not_trusted(table_paths):
+    table_path, meta_path = table_paths
+    write_table_meta(table_path, meta_path, schema_version=1)
+    assert is_trusted_table(table_path, meta_path, schema_version=1)
+
+    with open(table_path, "a") as f:
+        f.write("2,Rechazado\n")
+    assert not is_trusted_table(table_path, meta_path, schema_version=1)
+
+    with open(meta_path) as f:
+        assert json.load(f)["schema_version"] == 1
+
+
+def test_schema_version_of_the_rows(table_paths, tmp_path):
+    table_path, meta_path = table_paths
+    # written before the app kept a meta file: the rows may have any older layout
+    assert read_table_schema_version(table_path, meta_path) == 0
+    assert read_table_schema_version(str(tmp_path / "missing.csv"), meta_path) == LOAN_TABLE_SCHEMA_VERSION
+
+    write_table_meta(table_path, meta_path, schema_version=0)
+    assert read_table_schema_version(table_path, meta_path) == 0
+    assert is_unchanged_table(table_path, meta_path)
+    assert not is_trusted_table(table_path, meta_path)
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from payments_src.domain.business_calendar import BusinessCalendar, monthly_due_days
+from payments_src.domain.payment_enums import BusinessDayConvention
+
+
+def _calendar() -> BusinessCalendar:
+    calendar = BusinessCalendar()
+    # Thursday May 1st and Friday May 30th 2025
+    calendar.sync_with_holidays_df(pd.DataFrame({"date": ["2025-05-01", "2025-05-30"], "nombre": ["", ""]}))
+    return calendar
+
+
+def test_monthly_due_days_match_relativedelta():
+    starts = [datetime(2024, 1, 31), datetime(2025, 3, 15), datetime(2023, 12, 29)]
+
+    due_days = monthly_due_days(starts, 14)
+
+    assert due_days.shape == (3, 14)
+    for start, row in zip(starts, due_days):
+        assert row.tolist() == [(start + relativedelta(months=i)).date() for i in range(14)]
+
+
+def test_adjust_with_each_convention():
+    calendar = _calendar()
+    # a holiday, a Saturday at the end of a month, a business day
+    days = np.array(["2025-05-01", "2025-05-31", "2025-06-02"], dtype="datetime64[D]")
+
+    def adjusted(convention):
+        return calendar.adjust(days, convention).astype(str).tolist()
+
+    assert adjusted(BusinessDayConvention.UNADJUSTED) == ["2025-05-01", "2025-05-31", "2025-06-02"]
+    assert adjusted(BusinessDayConvention.FOLLOWING) == ["2025-05-02", "2025-06-02", "2025-06-02"]
+    # the holiday before the weekend pushes the end of May back to Thursday
+    assert adjusted(BusinessDayConvention.MODIFIED_FOLLOWING) == ["2025-05-02", "2025-05-29", "2025-06-02"]
+    assert adjusted(BusinessDayConvention.PRECEDING) == ["2025-04-30", "2025-05-29", "2025-06-02"]
+    assert calendar.is_business_day(days).tolist() == [False, False, True]
+
+
+def test_schedule_due_days_do_not_drift():
+    calendar = _calendar()
+
+    due_days = calendar.schedule_due_days([datetime(2025, 3, 31)], 4, BusinessDayConvention.FOLLOWING)
+
+    # May 31st rolls to June 2nd, but June is still counted from March 31st
+    assert due_days[0].astype(str).tolist() == ["2025-03-31", "2025-04-30", "2025-06-02", "2025-06-30"]
+
+
+def test_dates_outside_the_precomputed_range():
+    calendar = _calendar()
+
+    assert calendar.adjust(["1950-01-01", "2090-12-31"]).astype(str).tolist() == ["1950-01-02", "2090-12-29"]
+    assert calendar.due_dates(datetime(2090, 12, 31, 9, 30), 1) == [datetime(2090, 12, 29, 9, 30)]
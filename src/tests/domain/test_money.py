@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from payments_src.domain.money import Money, from_minor_units, to_minor_units, to_minor_units_array
+from payments_src.domain.payment_enums import Currency
+
+
+def test_minor_units_conversion():
+    assert to_minor_units(150) == 15000
+    assert to_minor_units(0.1 + 0.2) == 30
+    assert to_minor_units(1.005) == 101
+    assert from_minor_units(15050) == 150.5
+    assert to_minor_units_array(np.array([150.0, 0.1 + 0.2, 99.99])).tolist() == [15000, 30, 9999]
+
+
+def test_money_sums_are_exact():
+    total = Money.sum([to_minor_units(0.1)] * 10, Currency.USD)
+    assert total == Money(amount_minor=100, currency=Currency.USD)
+    assert total.amount == 1.0
+
+    assert (total + Money.from_amount(2.5, Currency.USD)).amount_minor == 350
+    with pytest.raises(ValueError):
+        total + Money.from_amount(1, Currency.UYU)
@@ -1,9 +1,12 @@
+import json
 from datetime import datetime
 
+import pandas as pd
 import pydantic
 import pytest
 
-from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.domain.business_calendar import BusinessCalendar
+from payments_src.domain.payment_enums import AmortizationSystem, Currency, PaymentStatus
 from payments_src.domain.payments import Payment, PaymentFactory, PaymentList, PaymentListFactory
 
 
@@ -164,4 +167,175 @@ def test_payment_list_raises_validation_error():
                     status=PaymentStatus.PENDING,
                 ),
             },
-        )
\ No newline at end of file
+        )
+
+
+def test_factory_construct_payment_list_matches_validated():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=100,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=3,
+        moneda=Currency.USD,
+    )
+    payment_list.payments[1].change_status(PaymentStatus.PAID.value)
+    payment_list.payments[1].change_date_paid(datetime(2025, 1, 2))
+    record_str = payment_list.model_dump_json()
+
+    constructed = PaymentListFactory.construct_from_payment_list_record_str(record_str)
+
+    assert constructed == PaymentListFactory.create_from_payment_list_record_str(record_str)
+    assert constructed.moneda == Currency.USD
+    assert constructed.payments[1].date_paid == datetime(2025, 1, 2)
+    assert constructed.model_dump_json() == record_str
+
+
+def test_payment_amount_minor():
+    payment = PaymentFactory.create_payment(amount=100.456, end_date=datetime(2025, 1, 1), id=1)
+    assert payment.amount_minor == 10046
+    assert payment.amount == 100.46
+
+    payment.change_amount(0.1 + 0.2)
+    assert payment.amount_minor == 30
+
+    # amount_minor wins when both are stored
+    assert Payment.model_validate_json(payment.model_dump_json()).amount_minor == 30
+
+
+def test_payment_list_totals_are_exact():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=0.1,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=10,
+        moneda=Currency.UYU,
+    )
+    payment_list.change_payment_status(1, PaymentStatus.PAID)
+    payment_list.change_payment_status(2, PaymentStatus.PAID.value)
+
+    assert payment_list.calculate_total_amount() == 1.0
+    assert payment_list.calculate_total_amount_paid() == 0.2
+    assert payment_list.calculate_total_amount_pending() == 0.8
+    assert payment_list.calculate_total_money().currency == Currency.UYU
+
+
+def test_factory_create_payment_list_with_amortization_schedule():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.02,
+        pago_mensual=None,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=12,
+        moneda=Currency.UYU,
+        sistema_amortizacion=AmortizationSystem.FRENCH.value,
+    )
+
+    assert payment_list.sistema_amortizacion == AmortizationSystem.FRENCH
+    assert payment_list.pago_mensual == 94.56
+    assert sum(payment.principal_minor for payment in payment_list.payments.values()) == 100000
+    assert payment_list.payments[1].interest_minor == 2000
+    assert payment_list.payments[12].end_date == datetime(2025, 12, 1)
+
+    record_str = payment_list.model_dump_json()
+    assert PaymentListFactory.construct_from_payment_list_record_str(record_str) == payment_list
+
+
+def test_factory_construct_payment_list_fills_fields_missing_from_older_records():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=100,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=2,
+        moneda=Currency.UYU,
+    )
+    record = json.loads(payment_list.model_dump_json())
+    del record["sistema_amortizacion"]
+    for payment in record["payments"].values():
+        for field in ("amount_minor", "principal_minor", "interest_minor", "late_fee_minor"):
+            del payment[field]
+
+    constructed = PaymentListFactory.construct_from_payment_list_record_str(json.dumps(record))
+
+    assert constructed == payment_list
+    assert constructed.payments[1].late_fee_minor == 0
+
+
+def test_payment_list_restructure():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.02,
+        pago_mensual=None,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=4,
+        moneda=Currency.UYU,
+        sistema_amortizacion=AmortizationSystem.GERMAN.value,
+    )
+    payment_list.change_payment_status(1, PaymentStatus.PAID)
+    payment_list.payments[2].late_fee_minor = 500
+
+    restructuring = payment_list.restructure(
+        fecha_inicio=datetime(2025, 6, 1),
+        num_pagos=6,
+        tasa_interes=0.03,
+        fecha=datetime(2025, 3, 15),
+        motivo="Mes de gracia",
+    )
+
+    # three pending installments of 250 of principal, plus the late fee
+    assert restructuring.saldo_minor == 75500
+    assert restructuring.cuotas_canceladas == [2, 3, 4]
+    assert PaymentStatus(payment_list.payments[1].status) == PaymentStatus.PAID
+    assert [PaymentStatus(payment_list.payments[i].status) for i in (2, 3, 4)] == [PaymentStatus.CANCELLED] * 3
+    assert [payment.id for payment in payment_list.pending_payments()] == [5, 6, 7, 8, 9, 10]
+    assert payment_list.payments[5].end_date == datetime(2025, 6, 1)
+    assert sum(payment_list.payments[i].principal_minor for i in range(5, 11)) == 75500
+    assert payment_list.outstanding_principal_minor() == 75500
+    assert payment_list.tasa_interes == 0.03
+    assert payment_list.restructurings == [restructuring]
+
+    record_str = payment_list.model_dump_json()
+    constructed = PaymentListFactory.construct_from_payment_list_record_str(record_str)
+    assert constructed == PaymentListFactory.create_from_payment_list_record_str(record_str)
+    assert constructed.restructurings[0].fecha_inicio == datetime(2025, 6, 1)
+
+
+def test_payment_list_restructure_without_pending_installments():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=100,
+        tasa_interes=0.05,
+        pago_mensual=100,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=1,
+        moneda=Currency.UYU,
+    )
+    payment_list.change_payment_status(1, PaymentStatus.PAID)
+
+    with pytest.raises(ValueError):
+        payment_list.restructure(fecha_inicio=datetime(2025, 2, 1), num_pagos=3, tasa_interes=0.05)
+
+
+def test_factory_create_payment_list_rolls_due_dates_onto_business_days():
+    calendar = BusinessCalendar()
+    calendar.sync_with_holidays_df(pd.DataFrame({"date": [datetime(2025, 3, 3), datetime(2025, 5, 1)]}))
+
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=100,
+        fecha_inicio=datetime(2025, 3, 1),
+        num_pagos=4,
+        moneda=Currency.UYU,
+        calendar=calendar,
+    )
+
+    # Saturday and a holiday Monday, a Tuesday, a holiday, a Sunday
+    assert [payment.end_date for payment in payment_list.payments.values()] == [
+        datetime(2025, 3, 4),
+        datetime(2025, 4, 1),
+        datetime(2025, 5, 2),
+        datetime(2025, 6, 2),
+    ]
+    assert payment_list.fecha_inicio == datetime(2025, 3, 1)
@@ -0,0 +1,94 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.analytics.cash_flow_simulation import (
+    build_simulation_inputs,
+    collection_bands,
+    estimate_loan_risk,
+    simulate_collections,
+)
+
+AS_OF = date(2025, 5, 15)
+
+
+@pytest.fixture
+def frames():
+    loans_frame = pd.DataFrame(
+        {
+            "loan_id": [1, 2, 3],
+            "status": [LoanStatus.APPROVED.value] * 3,
+            "moneda": ["UYU"] * 3,
+            "fecha_inicio": pd.to_datetime(["2025-01-10", "2025-01-10", "2025-01-10"]),
+            "dinero_total_prestado_minor": [30000] * 3,
+        }
+    )
+    # loan 1 always pays on time, loan 2 paid late once, loan 3 stopped paying in February
+    installments_frame = pd.DataFrame(
+        {
+            "loan_id": [1] * 6 + [2] * 6 + [3] * 6,
+            "loan_status": [LoanStatus.APPROVED.value] * 18,
+            "moneda": ["UYU"] * 18,
+            "end_date": pd.to_datetime(
+                ["2025-02-10", "2025-03-10", "2025-04-10", "2025-05-10", "2025-06-10", "2025-07-10"] * 3
+            ),
+            "payment_status": [PaymentStatus.PAID.value] * 4
+            + [PaymentStatus.PENDING.value] * 2
+            + [PaymentStatus.PAID.value] * 4
+            + [PaymentStatus.PENDING.value] * 2
+            + [PaymentStatus.PENDING.value] * 6,
+            "date_paid": pd.to_datetime(
+                ["2025-02-10", "2025-03-10", "2025-04-10", "2025-05-10", None, None]
+                + ["2025-02-10", "2025-03-25", "2025-04-10", "2025-05-10", None, None]
+                + [None] * 6
+            ),
+            "amount_minor": [10000] * 18,
+        }
+    )
+    return loans_frame, installments_frame
+
+
+def test_estimate_loan_risk(frames):
+    risk = estimate_loan_risk(*frames, AS_OF).set_index("loan_id")
+
+    assert risk.loc[1, "late_probability"] < risk.loc[2, "late_probability"] < risk.loc[3, "late_probability"]
+    # loan 3 is over 90 days past due
+    assert risk.loc[3, "default_hazard"] == 1
+    assert 0 < risk.loc[1, "default_hazard"] < risk.loc[2, "default_hazard"] < 1
+
+
+def test_simulation_without_risk_collects_the_schedule(frames):
+    _, installments_frame = frames
+    no_risk = pd.DataFrame({"loan_id": [1, 2, 3], "late_probability": 0.0, "default_hazard": 0.0})
+    inputs = build_simulation_inputs(installments_frame, no_risk, AS_OF)
+
+    collections = simulate_collections(inputs, num_scenarios=10, seed=1)
+    bands = collection_bands(inputs, collections)
+
+    assert bands["mes"].tolist() == ["2025-05", "2025-06", "2025-07", "2025-08"]
+    # the overdue installments of loan 3 are due in the first month
+    assert bands["programado"].tolist() == [400, 300, 300, 0]
+    assert (bands["p5"] == bands["programado"]).all() and (bands["p95"] == bands["programado"]).all()
+
+
+def test_simulation_is_reproducible_across_workers(frames):
+    loans_frame, installments_frame = frames
+    inputs = build_simulation_inputs(
+        installments_frame, estimate_loan_risk(loans_frame, installments_frame, AS_OF), AS_OF
+    )
+
+    inline = simulate_collections(inputs, num_scenarios=500, seed=7, chunk_size=100)
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pooled = simulate_collections(inputs, num_scenarios=500, seed=7, chunk_size=100, executor=executor)
+
+    assert inline.shape == (500, inputs.num_months)
+    np.testing.assert_array_equal(inline, pooled)
+    assert not np.array_equal(inline, simulate_collections(inputs, num_scenarios=500, seed=8, chunk_size=100))
+    # loan 3 has defaulted, so no scenario collects more than the other two loans owe
+    assert inline.sum(axis=1).max() <= 40000
@@ -0,0 +1,87 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.analytics.cohort_analysis import DELINQUENCY_STATES, CohortAnalysis
+
+
+@pytest.fixture
+def cohort_analysis():
+    loans_frame = pd.DataFrame(
+        {
+            "loan_id": [1, 2, 3],
+            "status": [LoanStatus.APPROVED.value] * 3,
+            "moneda": ["UYU"] * 3,
+            "fecha_inicio": pd.to_datetime(["2025-01-10", "2025-01-20", "2025-02-05"]),
+            "dinero_total_prestado_minor": [20000, 20000, 20000],
+        }
+    )
+    # two installments each, due a month and two months after the start
+    installments_frame = pd.DataFrame(
+        {
+            "loan_id": [1, 1, 2, 2, 3, 3],
+            "loan_status": [LoanStatus.APPROVED.value] * 6,
+            "moneda": ["UYU"] * 6,
+            "end_date": pd.to_datetime(
+                ["2025-02-10", "2025-03-10", "2025-02-20", "2025-03-20", "2025-03-05", "2025-04-05"]
+            ),
+            "payment_status": [
+                PaymentStatus.PAID.value,
+                PaymentStatus.PAID.value,
+                PaymentStatus.PAID.value,
+                PaymentStatus.PENDING.value,
+                PaymentStatus.PENDING.value,
+                PaymentStatus.PENDING.value,
+            ],
+            "date_paid": pd.to_datetime(["2025-02-10", "2025-03-08", "2025-04-15", None, None, None]),
+            "amount_minor": [11000] * 6,
+        }
+    )
+    return CohortAnalysis(loans_frame, installments_frame, as_of=date(2025, 5, 15))
+
+
+def test_cohort_summary(cohort_analysis):
+    summary = cohort_analysis.cohort_summary
+
+    assert summary["cohorte"].tolist() == ["2025-01", "2025-02"]
+    assert summary["prestamos"].tolist() == [2, 1]
+    assert summary["monto_cobrado"].tolist() == [330, 0]
+    assert summary["porcentaje_cobrado"].tolist() == [0.75, 0]
+
+
+def test_collection_curves(cohort_analysis):
+    curves = cohort_analysis.collection_curves
+
+    assert curves.index.tolist() == ["2025-01", "2025-02"]
+    assert curves.loc["2025-01"].tolist() == [0, 0.25, 0.5, 0.75, 0.75]
+    # the February cohort is only three months on book by May
+    assert curves.loc["2025-02"].iloc[:4].tolist() == [0, 0, 0, 0]
+    assert np.isnan(curves.loc["2025-02"].iloc[4])
+
+
+def test_delinquency_states(cohort_analysis):
+    snapshots = cohort_analysis.month_end_snapshots()
+    states = cohort_analysis.delinquency_states(snapshots)
+
+    assert [str(day) for day in snapshots] == ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30"]
+    assert [[DELINQUENCY_STATES[state] if state >= 0 else None for state in row] for row in states] == [
+        ["Al día", "Al día", "Cancelado", "Cancelado"],
+        # paying the February installment in April still leaves the March one 41 days late
+        ["Al día", "1-30", "31-60", "31-60"],
+        [None, "Al día", "1-30", "31-60"],
+    ]
+
+
+def test_roll_rates(cohort_analysis):
+    roll_rates = cohort_analysis.roll_rates
+
+    assert roll_rates.index.tolist() == ["Al día", "1-30", "31-60"]
+    assert roll_rates.loc["Al día"].tolist() == pytest.approx([0.25, 0.5, 0, 0, 0, 0.25])
+    assert roll_rates.loc["1-30", "31-60"] == 1
+    assert roll_rates.loc["31-60", "31-60"] == 1
+    # paid off loans stay paid off, so there is no row for them
+    assert "Cancelado" not in roll_rates.index
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+import pandas as pd
+
+from payments_src.operations.analytics.currency_analytics import build_analytics_frames
+
+
+def test_build_analytics_frames_reads_dates_with_microseconds(make_loan, make_loans_df):
+    start_with_time = datetime(2025, 6, 10, 18, 32, 38, 504297)
+    loans_frame, installments_frame = build_analytics_frames(
+        make_loans_df([make_loan(1), make_loan(2, fecha_inicio=start_with_time)])
+    )
+
+    assert loans_frame["fecha_inicio"].tolist() == [pd.Timestamp(2025, 1, 10), pd.Timestamp(start_with_time)]
+    first_due = installments_frame.loc[installments_frame["loan_id"] == 2, "end_date"].iloc[0]
+    assert first_due == pd.Timestamp(start_with_time)
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.dealership_enums import DealershipSortKey
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.analytics.dealership_metrics import build_dealership_metrics, rank_dealerships
+
+PAID, PENDING, CANCELLED = PaymentStatus.PAID.value, PaymentStatus.PENDING.value, PaymentStatus.CANCELLED.value
+
+
+@pytest.fixture
+def metrics():
+    loans_frame = pd.DataFrame(
+        {
+            "loan_id": [1, 2, 3, 4, 5],
+            "status": [LoanStatus.APPROVED.value] * 3 + [LoanStatus.REJECTED.value, LoanStatus.APPROVED.value],
+            "dealership_id": [1, 1, 2, 2, 1],
+            "moneda": ["UYU", "UYU", "UYU", "UYU", "USD"],
+            "fecha_inicio": pd.to_datetime(["2025-01-10", "2025-01-20", "2025-01-01", "2025-01-01", "2025-03-01"]),
+            "dinero_total_prestado_minor": [20000, 30000, 10000, 10000, 5000],
+        }
+    )
+    installments = [
+        (1, "2025-02-10", PAID, 10000),
+        (1, "2025-03-10", PAID, 10000),
+        (1, "2025-04-10", PENDING, 10000),
+        (2, "2025-02-20", PAID, 10000),
+        (2, "2025-03-05", PENDING, 10000),
+        (2, "2025-04-20", PENDING, 10000),
+        # replaced by a restructuring
+        (2, "2025-05-20", CANCELLED, 10000),
+        (3, "2025-02-01", PENDING, 10000),
+        (3, "2025-03-01", PENDING, 10000),
+        (4, "2025-02-01", PENDING, 10000),
+        (5, "2025-04-01", PENDING, 5000),
+    ]
+    installments_frame = pd.DataFrame(installments, columns=["loan_id", "end_date", "payment_status", "amount_minor"])
+    installments_frame["end_date"] = pd.to_datetime(installments_frame["end_date"])
+    return build_dealership_metrics(loans_frame, installments_frame, as_of=date(2025, 3, 15))
+
+
+def test_build_dealership_metrics(metrics):
+    rows = metrics.set_index(["dealership_id", "moneda"])
+    assert rows.index.tolist() == [(1, "USD"), (1, "UYU"), (2, "UYU")]
+
+    first = rows.loc[(1, "UYU")]
+    assert first["prestamos"] == 2
+    assert first["monto_prestado"] == 500
+    # the cancelled installment does not count towards the term
+    assert first["plazo_promedio"] == 3
+    assert first["monto_exigible"] == 400
+    assert first["monto_cobrado"] == 300
+    assert first["tasa_cobranza"] == pytest.approx(0.75)
+    assert (first["prestamos_activos"], first["prestamos_morosos"]) == (2, 1)
+    assert first["tasa_morosidad"] == pytest.approx(0.5)
+    assert first["monto_vencido"] == 100
+
+    # nothing due yet
+    assert rows.loc[(1, "USD"), "tasa_cobranza"] == 0
+    assert rows.loc[(1, "USD"), "prestamos_morosos"] == 0
+
+    # the rejected loan is left out
+    second = rows.loc[(2, "UYU")]
+    assert second["prestamos"] == 1
+    assert second["tasa_morosidad"] == 1
+    assert second["monto_vencido"] == 200
+
+
+def test_rank_dealerships(metrics):
+    in_uyu = metrics[metrics["moneda"] == "UYU"]
+    assert rank_dealerships(in_uyu, DealershipSortKey.TASA_MOROSIDAD)["dealership_id"].tolist() == [1, 2]
+    assert rank_dealerships(in_uyu, DealershipSortKey.TASA_COBRANZA)["dealership_id"].tolist() == [1, 2]
+
+    ranked = rank_dealerships(metrics, DealershipSortKey.PRESTAMOS)
+    assert ranked[["dealership_id", "moneda"]].values.tolist() == [[1, "UYU"], [1, "USD"], [2, "UYU"]]
+    assert ranked["posicion"].tolist() == [1, 2, 3]
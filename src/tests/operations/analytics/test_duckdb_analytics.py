@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency
+from payments_src.operations.analytics.currency_analytics import ReportingCurrencyAnalytics, build_analytics_frames
+from payments_src.operations.fx.fx_rate_store import FXRateStore
+
+pytest.importorskip("duckdb")
+
+from payments_src.operations.analytics.duckdb_analytics import DuckDBAnalytics  # noqa: E402
+
+
+@pytest.fixture
+def analytics(tmp_path, make_loan, make_loans_df):
+    loan_table_path = str(tmp_path / "loan.csv")
+    loans = [
+        make_loan(1, paid_ids=(1,)),
+        make_loan(2, dealership_id=2, fecha_inicio=datetime(2025, 2, 5), num_pagos=2),
+        make_loan(3, status=LoanStatus.REJECTED, fecha_inicio=datetime(2025, 1, 1), num_pagos=1),
+    ]
+    make_loans_df(loans).to_csv(loan_table_path, index=False)
+
+    analytics = DuckDBAnalytics(loan_table_path)
+    yield analytics
+    analytics.close()
+
+
+def test_acceptance_summary(analytics):
+    assert analytics.acceptance_summary() == {
+        "approved": 2,
+        "rejected": 1,
+        "decided": 3,
+        "acceptance_rate": pytest.approx(200 / 3),
+    }
+
+
+def test_portfolio_totals(analytics):
+    totals = analytics.portfolio_totals()
+    assert totals["total_investment"] == 2000
+    assert totals["total_expected"] == 500
+    assert totals["total_paid"] == 100
+    assert totals["total_pending"] == 400
+
+
+def test_monthly_totals(analytics):
+    monthly = analytics.monthly_totals()
+    assert monthly["month"].tolist() == ["2025-01", "2025-02", "2025-03"]
+    assert monthly["count"].tolist() == [1, 2, 2]
+    assert monthly["pending_amount"].tolist() == [0, 200, 200]
+
+    window = analytics.monthly_totals(start_date=date(2025, 2, 1), end_date=date(2025, 2, 28))
+    assert window["month"].tolist() == ["2025-02"]
+
+
+def test_due_and_overdue(analytics):
+    assert analytics.amount_due_until(date(2025, 2, 10)) == 300
+    assert analytics.overdue_summary(date(2025, 2, 10)) == {"overdue_payments": 1, "overdue_amount": 100}
+
+
+def test_loans_frame_has_the_dealership_ids(analytics):
+    assert analytics.loans_frame()["dealership_id"].tolist() == [1, 2, 1]
+
+    loans_frame, _ = build_analytics_frames(pd.read_csv(analytics.loan_table_path))
+    assert loans_frame["dealership_id"].tolist() == [1, 2, 1]
+
+
+def test_reporting_currency_analytics_matches_duckdb(analytics):
+    fx_rate_store = FXRateStore()
+    fx_rate_store.sync_with_rates_df(pd.DataFrame({"date": ["2020-01-01"], "currency": ["USD"], "rate": [40.0]}))
+
+    loans_frame, installments_frame = build_analytics_frames(pd.read_csv(analytics.loan_table_path))
+    in_uyu = ReportingCurrencyAnalytics(loans_frame, installments_frame, fx_rate_store, Currency.UYU)
+    in_usd = ReportingCurrencyAnalytics(
+        analytics.loans_frame(), analytics.installments_frame(), fx_rate_store, Currency.USD
+    )
+
+    assert in_uyu.portfolio_totals() == analytics.portfolio_totals()
+    assert in_uyu.acceptance_summary() == analytics.acceptance_summary()
+    pd.testing.assert_frame_equal(in_uyu.monthly_totals(), analytics.monthly_totals(), check_dtype=False)
+    assert in_uyu.overdue_summary(date(2025, 2, 10)) == analytics.overdue_summary(date(2025, 2, 10))
+    assert in_usd.amount_due_until(date(2025, 2, 10)) == 300 / 40
+
+
+def test_cancelled_installments_count_in_no_total(tmp_path, make_loan, make_loans_df):
+    loan = make_loan(1, paid_ids=(1,))
+    loan.payment_list.restructure(
+        fecha_inicio=datetime(2025, 6, 10), num_pagos=2, tasa_interes=0.05, fecha=datetime(2025, 5, 20)
+    )
+    loan_table_path = str(tmp_path / "loan.csv")
+    make_loans_df([loan]).to_csv(loan_table_path, index=False)
+    new_installments_minor = sum(
+        payment.amount_minor for payment in loan.payment_list.payments.values() if payment.id > 3
+    )
+
+    duckdb_analytics = DuckDBAnalytics(loan_table_path)
+    loans_frame, installments_frame = build_analytics_frames(pd.read_csv(loan_table_path))
+    in_uyu = ReportingCurrencyAnalytics(loans_frame, installments_frame, FXRateStore(), Currency.UYU)
+    try:
+        for analytics in (duckdb_analytics, in_uyu):
+            totals = analytics.portfolio_totals()
+            # installments 2 and 3 were replaced by the two of the restructuring
+            assert totals["total_paid"] == 100
+            assert totals["total_pending"] == new_installments_minor / 100
+            assert totals["total_expected"] == 100 + new_installments_minor / 100
+
+            monthly = analytics.monthly_totals().set_index("month")
+            assert monthly.index.tolist() == ["2025-01", "2025-06", "2025-07"]
+            assert monthly["paid_amount"].tolist() == [100, 0, 0]
+            assert analytics.amount_due_until(date(2025, 5, 31)) == 100
+    finally:
+        duckdb_analytics.close()
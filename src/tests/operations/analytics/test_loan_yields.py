@@ -0,0 +1,93 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.analytics.loan_yields import (
+    build_loan_cash_flows,
+    compute_loan_yields,
+    net_present_values,
+    portfolio_npv,
+    portfolio_xirr,
+    solve_yields,
+)
+
+
+def test_solve_yields_batches_rows():
+    months = np.tile(np.arange(13, dtype=float), (3, 1))
+    amounts = np.zeros((3, 13))
+    amounts[:, 0] = -1000
+    amounts[0, 1:] = 94.559597  # French schedule at 2% a month
+    amounts[1, 1:] = 1000 / 12  # nothing earned
+    amounts[2, 1:] = -1  # no inflow, no yield
+
+    rates = solve_yields(months, amounts)
+
+    assert rates[0] == pytest.approx(0.02, abs=1e-6)
+    assert rates[1] == pytest.approx(0.0, abs=1e-9)
+    assert np.isnan(rates[2])
+
+
+def test_solve_yields_falls_back_to_bisection():
+    # from a guess of 500% the first Newton step lands far below -99%
+    times, amounts = np.array([[0.0, 1.0, 2.0]]), np.array([[-100.0, 0.001, 250.0]])
+
+    rate = solve_yields(times, amounts, guess=5)
+
+    assert rate[0] == pytest.approx(0.58114383, abs=1e-6)
+
+    assert net_present_values(rate, times, amounts)[0] == pytest.approx(0, abs=1e-6)
+
+
+@pytest.fixture
+def frames():
+    loans_frame = pd.DataFrame(
+        {
+            "loan_id": [2, 1, 3],
+            "status": [LoanStatus.APPROVED.value, LoanStatus.APPROVED.value, LoanStatus.REJECTED.value],
+            "moneda": ["UYU", "UYU", "UYU"],
+            "fecha_inicio": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-01"]),
+            "dinero_total_prestado_minor": [100000, 100000, 100000],
+        }
+    )
+    installments_frame = pd.DataFrame(
+        {
+            "loan_id": [1, 2, 2, 3],
+            "loan_status": [LoanStatus.APPROVED.value] * 3 + [LoanStatus.REJECTED.value],
+            "moneda": ["UYU"] * 4,
+            "end_date": pd.to_datetime(["2026-01-01", "2026-01-01", "2026-01-01", "2026-01-01"]),
+            "payment_status": [
+                PaymentStatus.PAID.value,
+                PaymentStatus.PENDING.value,
+                PaymentStatus.CANCELLED.value,
+                PaymentStatus.PENDING.value,
+            ],
+            "date_paid": pd.to_datetime([datetime(2027, 1, 1), None, None, None]),
+            "amount_minor": [121000, 110000, 500000, 100000],
+        }
+    )
+    return loans_frame, installments_frame
+
+
+def test_loan_yields_use_payment_dates(frames):
+    loans_frame, installments_frame = frames
+
+    cash_flows = build_loan_cash_flows(loans_frame, installments_frame)
+    loan_yields = compute_loan_yields(cash_flows).set_index("loan_id")
+
+    assert cash_flows.loan_ids.tolist() == [1, 2]
+    # loan 1 was paid two years in, loan 2 is due after one year and its cancelled installment is left out
+    assert loan_yields.loc[1, "xirr"] == pytest.approx(1.21 ** (365 / 730) - 1, abs=1e-9)
+    assert loan_yields.loc[2, "xirr"] == pytest.approx(0.10, abs=1e-9)
+    assert 0.05 < portfolio_xirr(cash_flows, loans_frame) < 0.10
+
+
+def test_portfolio_npv(frames):
+    _, installments_frame = frames
+
+    assert portfolio_npv(installments_frame, 0.10, date(2025, 1, 1)) == pytest.approx(1100 / 1.1)
+    # overdue installments are not discounted
+    assert portfolio_npv(installments_frame, 0.10, date(2026, 6, 1)) == pytest.approx(1100)
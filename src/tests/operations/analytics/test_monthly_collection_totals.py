@@ -0,0 +1,17 @@
+from payments_src.db.csv_db.monthly_collections import build_monthly_collections
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.analytics.monthly_collections import monthly_collection_totals
+
+
+def test_monthly_collection_totals(make_loan, make_loans_df):
+    loans = [make_loan(1), make_loan(2, dealership_id=2, pago_mensual=200)]
+    loans[1].payment_list.change_payment_status(3, PaymentStatus.PAID)
+    collections = build_monthly_collections(make_loans_df(loans))
+
+    totals = monthly_collection_totals(collections, start_month="2025-02")
+    assert totals["month"].tolist() == ["2025-02", "2025-03"]
+    assert totals["total_amount"].tolist() == [300.0, 300.0]
+    assert totals["paid_amount"].tolist() == [0.0, 200.0]
+    assert totals["pending_count"].tolist() == [2, 1]
+
+    assert monthly_collection_totals(collections, dealership_id=2)["pending_amount"].tolist() == [200.0, 200.0, 0.0]
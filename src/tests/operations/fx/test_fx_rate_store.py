@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from payments_src.domain.payment_enums import Currency
+from payments_src.operations.fx.fx_rate_store import FXRateStore
+
+
+@pytest.fixture
+def fx_rate_store():
+    store = FXRateStore()
+    store.sync_with_rates_df(
+        pd.DataFrame(
+            {
+                "date": ["2025-01-01", "2025-02-01", "2025-01-01", "2025-02-01"],
+                "currency": ["USD", "USD", "EUR", "USD"],
+                "rate": [40.0, 42.0, 44.0, 41.0],
+            }
+        )
+    )
+    return store
+
+
+def test_rate_is_the_latest_quote_on_or_before_the_day(fx_rate_store):
+    assert fx_rate_store.rate(Currency.USD, date(2025, 1, 1)) == 40.0
+    assert fx_rate_store.rate(Currency.USD, datetime(2025, 1, 31, 18)) == 40.0
+    # the last row for a day wins
+    assert fx_rate_store.rate(Currency.USD, date(2025, 3, 1)) == 41.0
+    assert fx_rate_store.rate(Currency.UYU, date(2000, 1, 1)) == 1.0
+
+    with pytest.raises(ValueError):
+        fx_rate_store.rate(Currency.USD, date(2024, 12, 31))
+
+
+def test_convert(fx_rate_store):
+    assert fx_rate_store.convert(100, Currency.USD, Currency.UYU, date(2025, 1, 15)) == 4000
+    assert fx_rate_store.convert(110, Currency.EUR, Currency.USD, date(2025, 1, 15)) == 121
+
+
+def test_convert_minor_units(fx_rate_store):
+    converted = fx_rate_store.convert_minor_units(
+        np.array([10000, 10000, 4000, 4400]),
+        np.array(["USD", "USD", "UYU", "EUR"]),
+        np.array(["2025-01-10", "2025-02-10", "2025-01-10", "2025-01-10"], dtype="datetime64[D]"),
+        Currency.USD,
+    )
+    assert converted.tolist() == [10000, 10000, 100, 4840]
+    assert fx_rate_store.has_rates_for(["USD", "EUR", "UYU"])
@@ -0,0 +1,58 @@
+import math
+import time
+
+import pytest
+
+from payments_src.operations.jobs.job_enums import JobStatus
+from payments_src.operations.jobs.job_queue import JobQueue
+
+
+@pytest.fixture
+def job_queue():
+    queue = JobQueue(max_workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_queue_returns_result(job_queue):
+    job = job_queue.submit(math.factorial, 5, description="factorial")
+
+    assert job.result(timeout=30) == 120
+    assert job.status == JobStatus.DONE
+    assert job.description == "factorial"
+    assert job_queue.get(job.job_id) is job
+
+
+def test_job_queue_reports_failures(job_queue):
+    job = job_queue.submit(int, "not a number")
+
+    with pytest.raises(ValueError):
+        job.result(timeout=30)
+
+    assert job.status == JobStatus.FAILED
+    assert isinstance(job.error(), ValueError)
+
+
+def test_job_queue_clear_finished(job_queue):
+    jobs = [job_queue.submit(math.factorial, n) for n in range(3)]
+    job_queue.wait_for_pending()
+
+    assert all(job.done() for job in jobs)
+    assert job_queue.pending_jobs() == []
+
+    job_queue.clear_finished()
+    assert job_queue.list_jobs() == []
+
+
+def test_job_queue_tracks_pending_jobs_by_loan(job_queue):
+    blocker = job_queue.submit(time.sleep, 1)
+    job = job_queue.submit(math.factorial, 5, loan_ids=[7, 8])
+
+    assert job.loan_ids == (7, 8)
+    assert job_queue.pending_jobs_for_loan(7) == [job]
+    assert job_queue.pending_jobs_for_loan(9) == []
+    assert not job.wait(timeout=0)
+
+    assert job.wait(timeout=30)
+    assert blocker.done()
+    assert job_queue.pending_jobs_for_loan(7) == []
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_initialization_ops import initialize_payments_df
+from payments_src.db.csv_db.db_operations import (
+    get_loan_table_record,
+    get_table_version,
+    read_loan_table,
+    read_payments_table,
+    write_loan_table,
+    write_payments_table,
+)
+from payments_src.domain.loan_changes import PaymentChange
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.domain.receipts import ReceiptFactory
+from payments_src.operations.jobs.persistence_jobs import (
+    persist_loan_restructuring,
+    persist_loan_status,
+    persist_payment_change,
+    persist_receipts,
+)
+
+
+@pytest.fixture
+def loan_table(tmp_path, monkeypatch, make_loan, make_loans_df):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+    write_loan_table(make_loans_df([make_loan(1), make_loan(2, status=LoanStatus.POTENTIAL)]))
+    write_payments_table(initialize_payments_df())
+
+
+def _stored_loan(loan_id: int):
+    return get_loan_table_record(read_loan_table(), loan_id)
+
+
+def test_queued_payment_changes_keep_each_other(loan_table):
+    # both changes were made on the loan as the page read it, before either job ran
+    persist_payment_change(1, PaymentChange(payment_id=1, status=PaymentStatus.PAID, date_paid=datetime(2025, 2, 9)))
+    persist_payment_change(1, PaymentChange(payment_id=2, amount=150))
+
+    payments = _stored_loan(1).payment_list.payments
+    assert PaymentStatus(payments[1].status) == PaymentStatus.PAID
+    assert payments[1].date_paid == datetime(2025, 2, 9)
+    assert payments[2].amount == 150
+
+
+def test_payment_change_after_a_restructuring_is_rejected(loan_table):
+    terms = dict(fecha_inicio=datetime(2025, 6, 10), num_pagos=2, tasa_interes=0.05)
+    persist_loan_restructuring(1, terms, fecha=datetime(2025, 5, 20))
+
+    # the installment was cancelled by the restructuring queued before it
+    with pytest.raises(ValueError):
+        persist_payment_change(1, PaymentChange(payment_id=1, status=PaymentStatus.PAID))
+
+    payment_list = _stored_loan(1).payment_list
+    assert len(payment_list.pending_payments()) == 2
+    assert all(PaymentStatus(payment.status) != PaymentStatus.PAID for payment in payment_list.payments.values())
+
+
+def test_paying_an_installment_twice_is_rejected(loan_table):
+    persist_payment_change(1, PaymentChange(payment_id=1, status=PaymentStatus.PAID))
+    with pytest.raises(ValueError):
+        persist_payment_change(1, PaymentChange(payment_id=1, status=PaymentStatus.PAID))
+
+
+def test_loan_status_change_keeps_the_stored_payments(loan_table):
+    persist_payment_change(2, PaymentChange(payment_id=3, amount=80))
+    persist_loan_status(2, LoanStatus.APPROVED)
+
+    loan = _stored_loan(2)
+    assert loan.status == LoanStatus.APPROVED.value
+    assert loan.payment_list.payments[3].amount == 80
+
+
+def test_receipts_mark_the_installments_they_pay_as_paid(loan_table):
+    # both were numbered 1 by the page
+    persist_receipts([ReceiptFactory.create_receipt(1, 1, datetime(2025, 2, 5), 150)])
+    persist_receipts([ReceiptFactory.create_receipt(1, 1, datetime(2025, 3, 5), 150)])
+
+    assert read_payments_table()["receipt_id"].tolist() == [1, 2]
+    payments = _stored_loan(1).payment_list.payments
+    assert [PaymentStatus(payments[payment_id].status) for payment_id in (1, 2, 3)] == [
+        PaymentStatus.PAID,
+        PaymentStatus.PAID,
+        PaymentStatus.PAID,
+    ]
+    assert [payments[payment_id].date_paid for payment_id in (1, 2, 3)] == [
+        datetime(2025, 2, 5),
+        datetime(2025, 3, 5),
+        datetime(2025, 3, 5),
+    ]
+    assert all(payment.paid_by_receipts for payment in payments.values())
+
+
+def test_loan_table_writes_carry_the_loans_they_changed(loan_table):
+    first = persist_payment_change(1, PaymentChange(payment_id=2, amount=150))
+    second = persist_loan_status(2, LoanStatus.APPROVED)
+
+    # each write starts from the version the one before it left
+    assert second.previous_version == first.version
+    assert second.version == get_table_version(CSVTable.LOAN_PATH)
+
+    stored = read_loan_table().set_index("loan_id")
+    for write, loan_id in ((first, 1), (second, 2)):
+        assert write.loans_df["loan_id"].tolist() == [loan_id]
+        row = write.loans_df.iloc[0]
+        assert (row["status"], row["payment_list"]) == (
+            stored.loc[loan_id, "status"],
+            stored.loc[loan_id, "payment_list"],
+        )
+
+
+def test_receipts_that_change_no_installment_do_not_write_the_loans(loan_table):
+    version = get_table_version(CSVTable.LOAN_PATH)
+
+    assert persist_receipts([ReceiptFactory.create_receipt(1, 1, datetime(2025, 2, 5), 50)]) is None
+    assert get_table_version(CSVTable.LOAN_PATH) == version
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanSortKey, LoanStatus
+from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.operations.loans.loan_listing import LoanListing
+
+NAMES = ["Carla", "Ana", "Bruno", "Ana", "Diego"]
+
+
+@pytest.fixture
+def listing():
+    records = []
+    for loan_id, name in enumerate(NAMES, start=1):
+        payment_list = PaymentListFactory.create_payment_list(
+            dinero_total_prestado=1000 * loan_id,
+            tasa_interes=0.05,
+            pago_mensual=100,
+            fecha_inicio=datetime(2025, 1, 10),
+            num_pagos=2,
+            moneda=Currency.UYU,
+        )
+        loan = LoanFactory.create_loan(
+            loan_id=loan_id,
+            loan_number=loan_id,
+            payment_list=payment_list,
+            borrower=BorrowerFactory.create_borrower(loan_id, name, "099123456", ""),
+            car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+            dealership=DealershipFactory.create_dealership(1, "Automotora", "AU1", "24001234"),
+            status=LoanStatus.APPROVED,
+        )
+        records.append(loan.to_json_dict())
+
+    listing = LoanListing()
+    listing.sync_with_loans_df(pd.DataFrame(records))
+    return listing
+
+
+def _all_pages(listing: LoanListing, page_size: int, **kwargs) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        page = listing.get_page(page_size, cursor=cursor, **kwargs)
+        pages.append(page.rows["loan_id"].tolist())
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_the_sort_key(listing):
+    assert _all_pages(listing, 2, sort_key=LoanSortKey.NOMBRE_CLIENTE) == [[2, 4], [3, 1], [5]]
+    assert _all_pages(listing, 2, sort_key=LoanSortKey.NOMBRE_CLIENTE, descending=True) == [[5, 1], [3, 4], [2]]
+    assert _all_pages(listing, 5, sort_key=LoanSortKey.DINERO_TOTAL_PRESTADO, descending=True) == [[5, 4, 3, 2, 1]]
+
+
+def test_page_metadata_and_columns(listing):
+    first_page = listing.get_page(3, columns=["loan_id", "nombre_cliente"])
+    assert first_page.rows.columns.tolist() == ["loan_id", "nombre_cliente"]
+    assert (first_page.start, first_page.total_rows) == (0, 5)
+
+    second_page = listing.get_page(3, cursor=first_page.next_cursor)
+    assert second_page.start == 3
+    assert second_page.next_cursor is None
+
+
+def test_cursor_survives_new_loans(listing):
+    first_page = listing.get_page(2)
+
+    # a loan added before the cursor does not shift the next page
+    loans_df = listing._loans_df.copy()
+    new_row = loans_df.iloc[[0]].assign(loan_id=0)
+    listing.sync_with_loans_df(pd.concat([loans_df, new_row]))
+
+    assert listing.get_page(2, cursor=first_page.next_cursor).rows["loan_id"].tolist() == [3, 4]
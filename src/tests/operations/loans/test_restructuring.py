@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import AmortizationSystem, Currency, PaymentStatus
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.domain.restructuring import RestructurePolicy
+from payments_src.operations.loans.restructuring import dealership_loan_ids, restructure_loans
+
+
+def _loans_df() -> pd.DataFrame:
+    records = []
+    # loan 3 is paid off, loan 4 belongs to another dealership
+    for loan_id, dealership_id, sistema in (
+        (1, 1, AmortizationSystem.FRENCH),
+        (2, 1, AmortizationSystem.GERMAN),
+        (3, 1, AmortizationSystem.FRENCH),
+        (4, 2, AmortizationSystem.FRENCH),
+    ):
+        payment_list = PaymentListFactory.create_payment_list(
+            dinero_total_prestado=1200,
+            tasa_interes=0.02,
+            pago_mensual=None,
+            fecha_inicio=datetime(2025, 1, 10),
+            num_pagos=4,
+            moneda=Currency.UYU,
+            sistema_amortizacion=sistema.value,
+        )
+        payment_list.change_payment_status(1, PaymentStatus.PAID)
+        if loan_id == 3:
+            for payment_id in (2, 3, 4):
+                payment_list.change_payment_status(payment_id, PaymentStatus.PAID)
+        loan = LoanFactory.create_loan(
+            loan_id=loan_id,
+            loan_number=loan_id,
+            payment_list=payment_list,
+            borrower=BorrowerFactory.create_borrower(loan_id, f"Cliente {loan_id}", "099123456", ""),
+            car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+            dealership=DealershipFactory.create_dealership(
+                dealership_id, "Automotora", f"AU{dealership_id}", "24001234"
+            ),
+            status=LoanStatus.APPROVED,
+        )
+        records.append(loan.to_json_dict())
+    return pd.DataFrame(records)
+
+
+def test_dealership_loan_ids():
+    assert dealership_loan_ids(_loans_df(), 1) == [1, 2, 3]
+    assert dealership_loan_ids(_loans_df(), 1, status=LoanStatus.POTENTIAL) == []
+
+
+def test_restructure_loans_with_grace_month():
+    loans_df = _loans_df()
+
+    result = restructure_loans(
+        loans_df, [1, 2, 3], RestructurePolicy(grace_months=1), fecha=datetime(2025, 2, 5), motivo="Mes de gracia"
+    )
+
+    assert sorted(result.restructured) == [1, 2]
+    assert list(result.skipped) == [3]
+    # the other rows are left as they were
+    pd.testing.assert_frame_equal(result.loans_df.iloc[2:], loans_df.iloc[2:])
+
+    for loan_id, sistema in ((1, AmortizationSystem.FRENCH), (2, AmortizationSystem.GERMAN)):
+        payment_list = PaymentListFactory.create_from_payment_list_record_str(
+            result.loans_df.loc[result.loans_df["loan_id"] == loan_id, "payment_list"].iloc[0]
+        )
+        pending_payments = payment_list.pending_payments()
+        # the oldest pending installment was due on February 10th
+        assert [payment.end_date for payment in pending_payments] == [
+            datetime(2025, 3, 10),
+            datetime(2025, 4, 10),
+            datetime(2025, 5, 10),
+        ]
+        assert payment_list.sistema_amortizacion == sistema
+        assert payment_list.restructurings[0].motivo == "Mes de gracia"
+        assert sum(payment.principal_minor for payment in pending_payments) == result.restructured[loan_id].saldo_minor
+
+
+def test_restructure_overdue_loans_from_the_restructuring_date():
+    # the installments due in February, March and April are all overdue
+    fecha = datetime(2025, 6, 20, 18, 32, 38, 504297)
+    result = restructure_loans(_loans_df(), [1], RestructurePolicy(grace_months=1), fecha=fecha)
+
+    payment_list = PaymentListFactory.create_from_payment_list_record_str(result.loans_df["payment_list"].iloc[0])
+    assert result.restructured[1].fecha == datetime(2025, 6, 20)
+    assert result.restructured[1].fecha_inicio == datetime(2025, 7, 20)
+    assert [payment.end_date for payment in payment_list.pending_payments()] == [
+        datetime(2025, 7, 20),
+        datetime(2025, 8, 20),
+        datetime(2025, 9, 20),
+    ]
+
+
+def test_restructure_loans_with_new_terms():
+    result = restructure_loans(
+        _loans_df(),
+        [2],
+        RestructurePolicy(num_pagos=6, tasa_interes=0.01, sistema_amortizacion=AmortizationSystem.FRENCH),
+    )
+
+    record = json.loads(result.loans_df["payment_list"].iloc[1])
+    assert len(record["payments"]) == 10
+    assert record["tasa_interes"] == 0.01
+    assert record["sistema_amortizacion"] == AmortizationSystem.FRENCH.value
+    assert result.restructured[2].cuotas_canceladas == [2, 3, 4]
@@ -0,0 +1,151 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import AllocationComponent, Currency, PaymentStatus
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.domain.receipts import ReceiptFactory
+from payments_src.operations.payments.allocation import (
+    allocate_receipts,
+    build_installment_components,
+    settle_installments,
+)
+
+
+def _receipts(*receipts) -> pd.DataFrame:
+    return pd.DataFrame([ReceiptFactory.create_receipt(*receipt).model_dump() for receipt in receipts])
+
+
+@pytest.fixture
+def installments():
+    # loan 1: installment 1 already marked as paid, installment 2 with a late fee; loan 2: two installments
+    return pd.DataFrame(
+        {
+            "loan_id": [1, 1, 1, 2, 2],
+            "payment_id": [1, 2, 3, 1, 2],
+            "end_date": pd.to_datetime(["2025-01-01", "2025-02-01", "2025-03-01", "2025-01-01", "2025-02-01"]),
+            "payment_status": [PaymentStatus.PAID.value] + [PaymentStatus.PENDING.value] * 4,
+            "date_paid": pd.to_datetime(["2025-01-01", None, None, None, None]),
+            "paid_by_receipts": [False] * 5,
+            "amount_minor": [10000] * 5,
+            "fee_minor": [0, 1000, 0, 0, 0],
+            "interest_minor": [2000] * 5,
+            "principal_minor": [8000] * 5,
+        }
+    )
+
+
+def test_build_installment_components():
+    payment_list = PaymentListFactory.create_payment_list(
+        dinero_total_prestado=1000,
+        tasa_interes=0.05,
+        pago_mensual=125,
+        fecha_inicio=datetime(2025, 1, 1),
+        num_pagos=10,
+        moneda=Currency.UYU,
+    )
+    payment_list.payments[1].late_fee_minor = 300
+    loan = LoanFactory.create_loan(
+        loan_id=1,
+        loan_number=1,
+        payment_list=payment_list,
+        borrower=BorrowerFactory.create_borrower(1, "Cliente", "099123456", "nota"),
+        car=Car(borrower_id=1, marca_auto="Fiat", modelo_auto="Uno"),
+        dealership=DealershipFactory.create_dealership(1, "Automotora", "AU", "24001234"),
+        status=LoanStatus.APPROVED,
+    )
+
+    components = build_installment_components(pd.DataFrame([loan.to_json_dict()]))
+
+    assert len(components) == 10
+    # a flat loan repays 1000 of the 1250 it collects, 80% of every installment
+    assert components[["fee_minor", "interest_minor", "principal_minor"]].iloc[0].tolist() == [300, 2500, 10000]
+    assert components["principal_minor"].sum() == 100000
+
+
+def test_build_installment_components_reads_due_dates_with_microseconds(make_loan, make_loans_df):
+    start_with_time = datetime(2025, 6, 10, 18, 32, 38, 504297)
+    components = build_installment_components(make_loans_df([make_loan(1), make_loan(2, fecha_inicio=start_with_time)]))
+
+    assert components.loc[components["loan_id"] == 2, "end_date"].iloc[0] == pd.Timestamp(start_with_time)
+
+
+def test_allocate_receipts_pays_oldest_installments_fee_interest_principal(installments):
+    receipts = _receipts(
+        (1, 1, datetime(2025, 2, 5), 50),
+        (2, 1, datetime(2025, 3, 5), 100),
+        (3, 2, datetime(2025, 1, 10), 250),
+        (4, 3, datetime(2025, 1, 10), 30),
+    )
+
+    allocation = allocate_receipts(installments, receipts)
+
+    allocations = allocation.allocations
+    assert allocations[allocations["receipt_id"] == 1][["payment_id", "component", "amount_minor"]].values.tolist() == [
+        [2, AllocationComponent.FEE.value, 1000],
+        [2, AllocationComponent.INTEREST.value, 2000],
+        [2, AllocationComponent.PRINCIPAL.value, 2000],
+    ]
+    assert allocations[allocations["receipt_id"] == 2][["payment_id", "amount_minor"]].values.tolist() == [
+        [2, 6000],
+        [3, 2000],
+        [3, 2000],
+    ]
+    # loan 2 is overpaid and loan 3 has no installments: the rest is credit
+    credit = allocations[allocations["component"] == AllocationComponent.CREDIT.value]
+    assert credit[["receipt_id", "amount_minor"]].values.tolist() == [[3, 5000], [4, 3000]]
+    assert credit["payment_id"].isna().all()
+    assert allocations["amount_minor"].sum() == receipts["amount_minor"].sum()
+
+    derived = allocation.installments.set_index(["loan_id", "payment_id"])
+    assert derived["derived_status"].tolist() == [
+        PaymentStatus.PAID.value,
+        PaymentStatus.PAID.value,
+        PaymentStatus.PENDING.value,
+        PaymentStatus.PAID.value,
+        PaymentStatus.PAID.value,
+    ]
+    assert derived.loc[(1, 2), "derived_date_paid"] == pd.Timestamp(2025, 3, 5)
+    assert derived.loc[(1, 3), "outstanding_minor"] == 6000
+    # marked as paid on the loan, so it takes nothing
+    assert derived.loc[(1, 1), "allocated_minor"] == 0
+
+
+def test_allocate_receipts_without_receipts(installments):
+    allocation = allocate_receipts(installments, _receipts((1, 1, datetime(2025, 1, 1), 1)).iloc[:0])
+
+    assert allocation.allocations.empty
+    assert allocation.installments["outstanding_minor"].sum() == 41000
+
+
+def test_installments_paid_by_receipts_stay_paid_by_them(make_loan, make_loans_df):
+    loans_df = make_loans_df([make_loan(1)])
+    receipts = _receipts((1, 1, datetime(2025, 2, 5), 150))
+
+    settlement = settle_installments(
+        loans_df, allocate_receipts(build_installment_components(loans_df), receipts).installments
+    )
+
+    assert (settlement.changed_loans, settlement.paid_installments) == (1, 1)
+    installments = build_installment_components(settlement.loans_df)
+    assert installments["payment_status"].tolist() == [PaymentStatus.PAID.value] + [PaymentStatus.PENDING.value] * 2
+    assert installments["paid_by_receipts"].tolist() == [True, False, False]
+    assert installments.loc[0, "date_paid"] == pd.Timestamp(2025, 2, 5)
+
+    # allocated again, the receipt still pays the installment it settled and nothing changes
+    allocation = allocate_receipts(installments, receipts)
+    assert allocation.installments["allocated_minor"].tolist() == [10000, 5000, 0]
+    assert settle_installments(settlement.loans_df, allocation.installments).changed_loans == 0
+
+    # without the receipt the installment is owed again
+    reopened = settle_installments(settlement.loans_df, allocate_receipts(installments, receipts.iloc[:0]).installments)
+    assert reopened.reopened_installments == 1
+    assert (
+        build_installment_components(reopened.loans_df)["payment_status"].tolist() == [PaymentStatus.PENDING.value] * 3
+    )
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from payments_src.domain.amortization import build_schedules
+from payments_src.domain.payment_enums import AmortizationSystem
+from payments_src.operations.payments.amortization import build_schedule_frame
+from payments_src.operations.payments.monthly_payment_calculations import calculate_monthly_payment
+
+
+@pytest.mark.parametrize("system", list(AmortizationSystem))
+def test_principals_add_up_to_the_amount_loaned(system):
+    schedules = build_schedules([100000, 123457, 5000], [0.02, 0.035, 0.0], [12, 7, 3], system)
+
+    assert schedules.principal_minor.sum(axis=1).tolist() == [100000, 123457, 5000]
+    assert (schedules.installment_minor == schedules.principal_minor + schedules.interest_minor).all()
+    assert (schedules.balance_minor[[0, 1, 2], [11, 6, 2]] == 0).all()
+    # periods past the end of a shorter loan are empty
+    assert schedules.installment_minor[1, 7:].sum() == 0
+
+
+def test_flat_schedule_matches_the_monthly_payment_calculator():
+    schedule_df = build_schedule_frame(1000, 0.02, 12, AmortizationSystem.FLAT)
+
+    assert schedule_df["pago"].iloc[0] == round(calculate_monthly_payment(1000, 12, 0.02), 2)
+    assert (schedule_df["interes"] == 20).all()
+    assert schedule_df["pago"].sum() == pytest.approx(1240)
+
+
+def test_french_schedule_has_constant_installments():
+    schedule_df = build_schedule_frame(1000, 0.02, 12, AmortizationSystem.FRENCH)
+
+    assert (schedule_df["pago"].iloc[:-1] == 94.56).all()
+    assert schedule_df["pago"].iloc[-1] == pytest.approx(94.56, abs=0.05)
+    assert schedule_df["interes"].iloc[0] == 20
+    assert schedule_df["interes"].is_monotonic_decreasing
+
+
+def test_german_schedule_has_constant_principal():
+    schedule_df = build_schedule_frame(1200, 0.01, 12, AmortizationSystem.GERMAN)
+
+    assert (schedule_df["capital"] == 100).all()
+    assert schedule_df["interes"].tolist() == [12 - i for i in range(12)]
+
+
+def test_build_schedules_rejects_non_positive_num_payments():
+    with pytest.raises(ValueError):
+        build_schedules(np.array([1000]), np.array([0.02]), np.array([0]), AmortizationSystem.FRENCH)
@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from payments_src.domain.payment_enums import PaymentStatus
+from payments_src.operations.payments.delinquency_tracker import DelinquencyTracker, days_past_due
+
+
+@pytest.fixture
+def loans(make_loan):
+    # installments due on the 1st of Jan-Apr 2025 and of Mar-Jun 2025
+    return [
+        make_loan(1, fecha_inicio=datetime(2025, 1, 1), num_pagos=4),
+        make_loan(2, dealership_id=2, fecha_inicio=datetime(2025, 3, 1), num_pagos=4),
+    ]
+
+
+@pytest.fixture
+def tracker(loans, make_loans_df):
+    tracker = DelinquencyTracker()
+    tracker.sync_with_loans_df(make_loans_df(loans))
+    return tracker
+
+
+def test_days_past_due():
+    assert days_past_due(datetime(2025, 1, 1, 18), date(2025, 1, 1)) == 0
+    assert days_past_due(date(2025, 1, 1), datetime(2025, 1, 31)) == 30
+
+
+def test_aging_buckets(tracker):
+    aging_df = tracker.aging_buckets(date(2025, 3, 15)).set_index("tramo")
+
+    # loan 1 has installments 73, 42 and 14 days late; loan 2 one 14 days late
+    assert aging_df["cuotas"].tolist() == [2, 1, 1, 0]
+    assert aging_df["monto_vencido"].tolist() == [200, 100, 100, 0]
+    # loans are aged by their oldest pending installment and carry their whole pending balance
+    assert aging_df.loc["61-90", "prestamos"] == 1
+    assert aging_df.loc["61-90", "saldo_prestamos"] == 400
+    assert aging_df.loc["1-30", "saldo_prestamos"] == 400
+
+    assert tracker.outstanding_balance() == 800
+    assert tracker.portfolio_at_risk(date(2025, 3, 15), 30) == 0.5
+    assert tracker.portfolio_at_risk(date(2025, 3, 15), 90) == 0
+
+
+def test_marking_payments_as_paid_updates_the_tracker(tracker, loans):
+    loan = loans[0]
+    for payment_id in (1, 2):
+        loan.payment_list.change_payment_status(payment_id, PaymentStatus.PAID)
+    tracker.upsert_loan(loan)
+
+    aging_df = tracker.aging_buckets(date(2025, 3, 15))
+    assert aging_df["cuotas"].tolist() == [2, 0, 0, 0]
+    assert tracker.portfolio_at_risk(date(2025, 3, 15), 30) == 0
+    # the as-of date moves without rebuilding anything: by April 15 both loans owe their March installment
+    assert tracker.portfolio_at_risk(date(2025, 3, 31), 30) == 0
+    assert tracker.portfolio_at_risk(date(2025, 4, 15), 30) == 1.0
+
+
+def test_dealership_breakdown(tracker):
+    breakdown_df = tracker.dealership_breakdown(date(2025, 3, 15)).set_index("dealership_id")
+
+    assert breakdown_df["automotora"].tolist() == ["Automotora 1", "Automotora 2"]
+    assert breakdown_df["monto_vencido"].tolist() == [300, 100]
+    assert breakdown_df["par30"].tolist() == [1.0, 0.0]
+
+
+def test_sync_drops_missing_loans(tracker, loans):
+    tracker.sync_with_loans_df(pd.DataFrame([loans[1].to_json_dict()]))
+
+    assert len(tracker) == 1
+    assert tracker.outstanding_balance(dealership_id=1) == 0
+    assert tracker.outstanding_balance() == 400
+
+
+def test_upsert_loans_df_keeps_the_other_loans(tracker, make_loan, make_loans_df):
+    tracker.upsert_loans_df(
+        make_loans_df([make_loan(1, fecha_inicio=datetime(2025, 1, 1), num_pagos=4, paid_ids=(1, 2))])
+    )
+
+    assert len(tracker) == 2
+    assert tracker.outstanding_balance(dealership_id=1) == 200
+    assert tracker.outstanding_balance() == 600
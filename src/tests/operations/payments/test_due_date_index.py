@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from payments_src.operations.payments.due_date_index import DueDateIndex
+
+
+@pytest.fixture
+def loans_df(make_loan, make_loans_df):
+    return make_loans_df([make_loan(1, paid_ids=(1,)), make_loan(2, fecha_inicio=datetime(2025, 2, 5), num_pagos=2)])
+
+
+@pytest.fixture
+def due_date_index(loans_df):
+    index = DueDateIndex()
+    index.sync_with_loans_df(loans_df)
+    return index
+
+
+def test_months(due_date_index):
+    assert len(due_date_index) == 5
+    assert due_date_index.months() == ["2025-01", "2025-02", "2025-03"]
+
+
+def test_due_in_month(due_date_index):
+    entries = due_date_index.due_in_month("2025-02")
+    assert [(entry.loan_id, entry.payment_id) for entry in entries] == [(2, 1), (1, 2)]
+
+    pending_entries = due_date_index.due_in_month("2025-01", pending_only=True)
+    assert pending_entries == []
+
+
+def test_overdue_and_due_within(due_date_index):
+    overdue = due_date_index.overdue(datetime(2025, 2, 10))
+    assert [(entry.loan_id, entry.payment_id) for entry in overdue] == [(2, 1)]
+
+    due_soon = due_date_index.due_within(datetime(2025, 2, 8), days=2)
+    assert [(entry.loan_id, entry.payment_id) for entry in due_soon] == [(1, 2)]
+
+
+def test_incremental_update_and_removal(due_date_index, loans_df, make_loan):
+    paid_loan = make_loan(2, fecha_inicio=datetime(2025, 2, 5), num_pagos=2, paid_ids=(1,))
+    entries = due_date_index.record_entries(2, paid_loan.to_json_dict()["payment_list"])
+    due_date_index.upsert_entries(2, entries)
+
+    assert due_date_index.overdue(datetime(2025, 2, 10)) == []
+
+    due_date_index.sync_with_loans_df(loans_df[loans_df["loan_id"] == 1])
+    assert len(due_date_index) == 3
+    assert due_date_index.months() == ["2025-01", "2025-02", "2025-03"]
+    assert [entry.loan_id for entry in due_date_index.due_in_month("2025-02")] == [1]
+
+
+def test_upsert_loans_df_keeps_the_other_loans(due_date_index, make_loan, make_loans_df):
+    due_date_index.upsert_loans_df(
+        make_loans_df([make_loan(2, fecha_inicio=datetime(2025, 2, 5), num_pagos=2, paid_ids=(1,))])
+    )
+
+    assert len(due_date_index) == 5
+    assert due_date_index.overdue(datetime(2025, 2, 10)) == []
+    assert [(entry.loan_id, entry.payment_id) for entry in due_date_index.due_in_month("2025-02")] == [(2, 1), (1, 2)]
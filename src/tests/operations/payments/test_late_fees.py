@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.late_fees import LateFeePolicy
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency, PaymentStatus
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.operations.payments.late_fees import accrue_late_fees, compute_late_fees
+
+
+def test_compute_late_fees():
+    policy = LateFeePolicy(daily_rate=0.01, grace_days=5, max_fee_ratio=0.2)
+    fees = compute_late_fees(
+        amounts_minor=[10000] * 6,
+        end_days=["2025-03-06", "2025-03-01", "2025-01-01", "2025-03-01", "2025-01-01", "2025-01-01"],
+        paid_days=["NaT", "NaT", "NaT", "2025-03-11", "NaT", "NaT"],
+        statuses=[PaymentStatus.PENDING.value] * 3 + [PaymentStatus.PAID.value] * 2 + [PaymentStatus.CANCELLED.value],
+        as_of=date(2025, 3, 9),
+        policy=policy,
+    )
+    # pending: 3 days late is within the grace days, 8 days accrues 3, 67 days is capped at 20% of the installment;
+    # paid 10 days late accrues 5 days; paid without a payment date and cancelled are charged nothing
+    assert fees.tolist() == [0, 300, 2000, 500, 0, 0]
+
+
+def test_compute_late_fees_caps_accrual_days():
+    policy = LateFeePolicy(daily_rate=0.01, grace_days=0, max_days=10, max_fee_ratio=None)
+    fees = compute_late_fees([10000], ["2025-01-01"], ["NaT"], [PaymentStatus.PENDING.value], date(2025, 3, 1), policy)
+
+    assert fees.tolist() == [1000]
+
+
+def _loans_df() -> pd.DataFrame:
+    records = []
+    for loan_id in (1, 2):
+        payment_list = PaymentListFactory.create_payment_list(
+            dinero_total_prestado=1000,
+            tasa_interes=0.05,
+            pago_mensual=100,
+            fecha_inicio=datetime(2025, loan_id, 1),
+            num_pagos=3,
+            moneda=Currency.UYU,
+        )
+        loan = LoanFactory.create_loan(
+            loan_id=loan_id,
+            loan_number=loan_id,
+            payment_list=payment_list,
+            borrower=BorrowerFactory.create_borrower(loan_id, f"Cliente {loan_id}", "099123456", "nota"),
+            car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+            dealership=DealershipFactory.create_dealership(1, "Automotora", "AU", "24001234"),
+            status=LoanStatus.APPROVED,
+        )
+        records.append(loan.to_json_dict())
+    return pd.DataFrame(records)
+
+
+def test_accrue_late_fees_updates_only_changed_loans():
+    loans_df = _loans_df()
+    policy = LateFeePolicy(daily_rate=0.01, grace_days=0, max_fee_ratio=None)
+
+    # loan 1 has installments due Jan 1 and Feb 1 overdue; loan 2 only Feb 1
+    accrual = accrue_late_fees(loans_df, date(2025, 2, 11), policy)
+
+    assert accrual.changed_loans == 2
+    assert accrual.charged_installments == 3
+    # 41 + 10 days on loan 1, 10 days on loan 2, at 1 UYU a day
+    assert accrual.total_fee_minor == {Currency.UYU.value: 6100}
+
+    payment_list = PaymentListFactory.create_from_payment_list_record_str(accrual.loans_df["payment_list"].iloc[0])
+    assert [payment.late_fee_minor for payment in payment_list.payments.values()] == [4100, 1000, 0]
+
+    # a second run on the same day finds nothing to update
+    assert accrue_late_fees(accrual.loans_df, date(2025, 2, 11), policy).changed_loans == 0
+    assert accrual.loans_df["payment_list"].iloc[1] != loans_df["payment_list"].iloc[1]
@@ -0,0 +1,28 @@
+import pytest
+
+from payments_src.domain.payment_enums import AmortizationSystem
+from payments_src.operations.payments.amortization import build_schedule_frame
+from payments_src.operations.payments.monthly_payment_calculations import calculate_monthly_payment, quote_grid
+
+
+def test_flat_quote_grid_matches_single_quotes():
+    amounts, num_payments, interest_rates = [1000, 2500], [6, 12, 24], [0.01, 0.02]
+
+    quotes = quote_grid(amounts, num_payments, interest_rates)
+
+    assert quotes.monthly_payment.shape == (2, 3, 2)
+    for i, amount in enumerate(amounts):
+        for j, n in enumerate(num_payments):
+            for k, rate in enumerate(interest_rates):
+                assert quotes.monthly_payment[i, j, k] == pytest.approx(calculate_monthly_payment(amount, n, rate))
+                assert quotes.total_to_pay[i, j, k] == pytest.approx(calculate_monthly_payment(amount, n, rate) * n)
+
+
+@pytest.mark.parametrize("system", [AmortizationSystem.FRENCH, AmortizationSystem.GERMAN])
+def test_quote_grid_matches_schedules(system):
+    quotes = quote_grid([1000], [12], [0.0, 0.02], system)
+
+    for k, rate in enumerate([0.0, 0.02]):
+        schedule_df = build_schedule_frame(1000, rate, 12, system)
+        assert quotes.monthly_payment[0, 0, k] == pytest.approx(schedule_df["pago"].iloc[0], abs=0.01)
+        assert quotes.total_to_pay[0, 0, k] == pytest.approx(schedule_df["pago"].sum(), abs=0.05)
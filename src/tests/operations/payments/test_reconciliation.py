@@ -0,0 +1,142 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+
+from payments_src.db.csv_db.db_constants import CSVTable
+from payments_src.db.csv_db.db_operations import extend_payments_table, read_payments_table, write_payments_table
+from payments_src.domain.borrowers import BorrowerFactory
+from payments_src.domain.car import Car
+from payments_src.domain.dealerships import DealershipFactory
+from payments_src.domain.loans import LoanFactory
+from payments_src.domain.loans_enums import LoanStatus
+from payments_src.domain.payment_enums import Currency
+from payments_src.domain.payments import PaymentListFactory
+from payments_src.operations.payments.reconciliation import (
+    AUTO_ACCEPT_CONFIDENCE,
+    read_bank_statement,
+    receipts_from_matches,
+    reconcile_bank_statement,
+)
+
+STATEMENT = """Fecha;Concepto;Referencia;Importe;Moneda
+03/01/2025;TRANSF AU1-00000001 ANA;R1;100,00;UYU
+04/02/2025;PAGO CUOTA AU100000001;R2;100,00;UYU
+06/01/2025;DEP 098-333-444;R3;120,00;UYU
+05/02/2025;Bruno Gomez;R4;120,00;UYU
+02/01/2025;TRANSFERENCIA;R5;100,00;UYU
+10/01/2025;COMPRA;R6;-500,00;UYU
+15/01/2025;TRANSF AU1-00000001;R7;1.000,00;USD
+"""
+
+
+def _loans_df() -> pd.DataFrame:
+    records = []
+    # loans 1 and 3 owe the same amount on the same days
+    for loan_id, name, phone, pago_mensual in (
+        (1, "Ana Pérez", "099 111 222", 100),
+        (2, "Bruno Gómez", "098 333 444", 120),
+        (3, "Carla Díaz", "097 555 666", 100),
+    ):
+        payment_list = PaymentListFactory.create_payment_list(
+            dinero_total_prestado=250,
+            tasa_interes=0.05,
+            pago_mensual=pago_mensual,
+            fecha_inicio=datetime(2025, 1, 1),
+            num_pagos=3,
+            moneda=Currency.UYU,
+        )
+        loan = LoanFactory.create_loan(
+            loan_id=loan_id,
+            loan_number=loan_id,
+            payment_list=payment_list,
+            borrower=BorrowerFactory.create_borrower(loan_id, name, phone, "nota"),
+            car=Car(borrower_id=loan_id, marca_auto="Fiat", modelo_auto="Uno"),
+            dealership=DealershipFactory.create_dealership(1, "Automotora", "AU1", "24001234"),
+            status=LoanStatus.APPROVED,
+        )
+        records.append(loan.to_json_dict())
+    return pd.DataFrame(records)
+
+
+def _no_receipts() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "receipt_id": pd.Series(dtype=int),
+            "loan_id": pd.Series(dtype=int),
+            "date_received": pd.Series(dtype="datetime64[ns]"),
+            "amount_minor": pd.Series(dtype=int),
+            "reference": pd.Series(dtype=str),
+        }
+    )
+
+
+def _reconcile(receipts_df: pd.DataFrame, statement: str = STATEMENT) -> pd.DataFrame:
+    # two rows at a time, so matches have to carry over from one chunk to the next
+    return reconcile_bank_statement(
+        io.StringIO(statement), _loans_df(), receipts_df, chunksize=2, sep=";", decimal=",", thousands="."
+    ).set_index("reference")
+
+
+def test_read_bank_statement_skips_debits():
+    chunks = list(read_bank_statement(io.StringIO(STATEMENT), chunksize=4, sep=";", decimal=",", thousands="."))
+
+    statement = pd.concat(chunks)
+    assert statement["line"].tolist() == [2, 3, 4, 5, 6, 8]
+    assert statement["amount_minor"].tolist() == [10000, 10000, 12000, 12000, 10000, 100000]
+    assert statement["date"].iloc[0] == pd.Timestamp(2025, 1, 3)
+
+
+def test_reconcile_bank_statement():
+    matches = _reconcile(_no_receipts())
+
+    matched = matches[["loan_id", "payment_id"]].astype(object).where(matches["loan_id"].notna(), None)
+    assert matched.loc["R1"].tolist() == [1, 1]
+    # the code again: the first installment is taken, so it pays the second one
+    assert matched.loc["R2"].tolist() == [1, 2]
+    # by phone, then by name
+    assert matched.loc["R3"].tolist() == [2, 1]
+    assert matched.loc["R4"].tolist() == [2, 2]
+    # the amount alone fits loans 1 and 3: proposed, but not with enough confidence to accept it
+    assert matched.loc["R5"].tolist() == [3, 1]
+    assert matches.loc["R5", "confidence"] < AUTO_ACCEPT_CONFIDENCE
+    # loan 1 is in pesos
+    assert matched.loc["R7"].tolist() == [None, None]
+
+    assert (matches.loc[["R1", "R2", "R3", "R4"], "confidence"] >= AUTO_ACCEPT_CONFIDENCE).all()
+    assert matches.loc["R1", "evidence"] == "codigo, monto, vencimiento"
+    assert matches.loc["R3", "nombre_cliente"] == "Bruno Gómez"
+    assert not matches["duplicate"].any()
+
+
+def test_recorded_matches_are_not_matched_again():
+    matches = _reconcile(_no_receipts()).reset_index()
+    accepted = matches[matches["confidence"] >= AUTO_ACCEPT_CONFIDENCE]
+
+    receipts = receipts_from_matches(accepted, first_receipt_id=5)
+    assert [receipt.receipt_id for receipt in receipts] == [5, 6, 7, 8]
+    assert [receipt.reference for receipt in receipts] == ["R1", "R2", "R3", "R4"]
+
+    rematch = _reconcile(pd.DataFrame([receipt.model_dump() for receipt in receipts]))
+    assert rematch["duplicate"].tolist() == [True, True, True, True, False, False]
+    assert rematch.loc[rematch["duplicate"], "loan_id"].isna().all()
+    # the receipts paid loan 1's first two installments, so the amount alone now only fits loan 3
+    assert rematch.loc["R5", "loan_id"] == 3
+
+
+def test_statement_imported_again_after_saving_its_receipts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / CSVTable.PATH.value).mkdir(parents=True)
+    # references a CSV reader would turn into numbers or missing values
+    statement = STATEMENT
+    for old, new in (("R1", "000123"), ("R2", "0045"), ("R3", "7E2"), ("R4", "NA")):
+        statement = statement.replace(f";{old};", f";{new};")
+
+    matches = _reconcile(_no_receipts(), statement).reset_index()
+    receipts = receipts_from_matches(matches[matches["confidence"] >= AUTO_ACCEPT_CONFIDENCE], first_receipt_id=1)
+    write_payments_table(extend_payments_table(_no_receipts(), receipts))
+
+    receipts_df = read_payments_table()
+    assert receipts_df["reference"].tolist() == ["000123", "0045", "7E2", "NA"]
+    rematch = _reconcile(receipts_df, statement)
+    assert rematch["duplicate"].tolist() == [True, True, True, True, False, False]
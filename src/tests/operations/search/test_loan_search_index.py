@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+import pytest
+
+from payments_src.operations.search.loan_search_index import LoanSearchIndex, tokenize
+
+
+def _loan_record(loan_id, code, name, phone, brand, model, dealership_name):
+    return {
+        "loan_id": loan_id,
+        "loan_readable_code": code,
+        "borrower": json.dumps({"nombre_cliente": name, "telefono_cliente": phone}),
+        "car": json.dumps({"marca_auto": brand, "modelo_auto": model}),
+        "dealership": json.dumps({"name": dealership_name}),
+    }
+
+
+@pytest.fixture
+def loans_df():
+    return pd.DataFrame(
+        [
+            _loan_record(1, "ACG-00000001", "José Pérez", "099 123 456", "Toyota", "Corolla", "Automotora Carlos"),
+            _loan_record(2, "ACG-00000002", "Josefina Gómez", "098 555 111", "Fiat", "Uno", "Automotora Carlos"),
+            _loan_record(3, "MTV-00000001", "Pedro Toyos", "091 000 222", "Chevrolet", "Onix", "Montevideo Autos"),
+        ]
+    )
+
+
+@pytest.fixture
+def search_index(loans_df):
+    index = LoanSearchIndex()
+    index.sync_with_loans_df(loans_df)
+    return index
+
+
+def test_tokenize_strips_accents_and_separators():
+    assert tokenize("José Pérez-Gómez") == ["jose", "perez", "gomez"]
+
+
+def test_search_prefix_and_ranking(search_index):
+    results = search_index.search("jos")
+    assert [result.loan_id for result in results] == [1, 2]
+
+    # exact token matches outrank prefix matches
+    results = search_index.search("toyo")
+    assert [result.loan_id for result in results] == [3, 1]
+
+
+def test_search_requires_all_tokens(search_index):
+    assert [result.loan_id for result in search_index.search("jose toyota")] == [1]
+    assert search_index.search("jose chevrolet") == []
+
+
+def test_search_by_code_and_phone(search_index):
+    assert [result.loan_id for result in search_index.search("MTV-00000001")] == [3]
+    assert [result.loan_id for result in search_index.search("099123")] == [1]
+
+
+def test_sync_updates_incrementally(search_index, loans_df):
+    loans_df = loans_df[loans_df["loan_id"] != 2].copy()
+    loans_df.loc[loans_df["loan_id"] == 3, "borrower"] = json.dumps(
+        {"nombre_cliente": "Pedro Ramírez", "telefono_cliente": "091 000 222"}
+    )
+    search_index.sync_with_loans_df(loans_df)
+
+    assert len(search_index) == 2
+    assert search_index.search("josefina") == []
+    assert search_index.search("toyos") == []
+    assert [result.loan_id for result in search_index.search("ramirez")] == [3]
+
+
+def test_upsert_loans_df_keeps_the_other_loans(search_index):
+    search_index.upsert_loans_df(
+        pd.DataFrame([_loan_record(3, "MTV-00000001", "Pedro Ramírez", "091 000 222", "Chevrolet", "Onix", "")])
+    )
+
+    assert len(search_index) == 3
+    assert search_index.search("toyos") == []
+    assert [result.loan_id for result in search_index.search("ramirez")] == [3]
+    assert [result.loan_id for result in search_index.search("josefina")] == [2]